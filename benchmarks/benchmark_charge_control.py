@@ -0,0 +1,205 @@
+"""Step tuning vs. PI control of the solar charge power, in simulation.
+
+Simulates an hour of solar charging against a noisy P1 meter and runs
+the decision kernel on the engine's 15 s tick, once with the default
+step tuning (decision.solar_tune) and once with the PI controller
+(charge_control.track_p1). The home load steps up by 1.5 kW at 10 min
+and back at 20 min, and a cloud takes 1.5 kW of solar at 35 min.
+
+The simulation follows the engine where it matters: P1 is read every
+5 s and averaged over 60 s, the cloud reports the home load once a
+minute, the inverter applies a command 10 s after it is sent, and a
+power adjustment is refused within the power adjust cooldown (30 s) or
+when it changes the power by less than the power change threshold (100 W;
+by no more than it, outside PI control).
+
+For each mode it prints the commands sent (in all, and in the last 15
+minutes, when little but the noise changes: a controller that cycles between
+two powers shows up there), the seconds until P1 settles
+after each step (noise-free P1 back inside the balanced band of -250 W
+to +150 W and staying there for a minute), and the energy imported and
+exported while charging, averaged over several noise seeds.
+
+Run: python benchmarks/benchmark_charge_control.py [seeds]
+"""
+# pylint: disable=wrong-import-position
+
+import importlib
+import random
+import statistics
+import sys
+import types
+from collections import deque
+from dataclasses import replace
+from pathlib import Path
+
+# decision.py only needs the standard library; load it without the
+# package __init__ (which needs Home Assistant and aiohttp).
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+
+decision = importlib.import_module("hyxi_cloud.decision")
+
+PARAMS = decision.DecisionParams(
+    battery_capacity_wh=10000,
+    high_load_threshold=6500,
+    max_grid_export=0,
+    min_solar_for_charge=1000,
+    charge_margin=150,
+    charge_entry_threshold=500,
+    charge_reentry_delay=300,
+    bottomout_cooldown=300,
+    p1_setpoint=-50,
+    power_change_threshold=100,
+)
+DURATION = 3600  # s
+SAMPLE = 5  # s between P1 readings
+TICK = 15  # s between decisions
+P1_WINDOW = 60  # s of P1 averaged
+LOAD_POLL = 60  # s between cloud home load readings
+APPLY_DELAY = 10  # s from command to the inverter's new power
+ADJUST_COOLDOWN = 30  # s
+NOISE = 150  # W, standard deviation of the P1 noise
+SPIKE = 1500  # W, one-reading P1 spikes (appliances switching)
+BAND = (-250, 150)  # W, balanced P1 band of the step tuning
+HOLD = 60  # s inside the band to count as settled
+EVENTS = (620, 1240, 2110)  # load up, load down, cloud
+STEADY = EVENTS[2] + 600  # s, from here on only noise and the slow solar ramp
+
+
+def _load(t: float) -> float:
+    return 800 + (1500 if EVENTS[0] <= t < EVENTS[1] else 0)
+
+
+def _solar(t: float) -> float:
+    return 4000 + 200 * t / DURATION - (1500 if t >= EVENTS[2] else 0)
+
+
+def simulate(pi: bool, seed: int) -> dict[str, float]:
+    """Run one hour; return commands, settling times and grid energy."""
+    rng = random.Random(seed)  # noqa: S311
+    params = replace(PARAMS, pi_charge_control=pi)
+    counters = decision.DecisionCounters()
+    mode, charge = "charge", 1500.0
+    battery = charge  # what the inverter does now
+    pending: deque[tuple[float, float]] = deque()  # (time, power) not applied yet
+    readings: deque[tuple[float, float]] = deque()
+    home_load = _load(0)
+    last_adjust = -ADJUST_COOLDOWN
+    commands = steady = 0
+    true_p1: list[tuple[float, float]] = []
+    imported = exported = 0.0
+
+    for t in range(0, DURATION, SAMPLE):
+        while pending and pending[0][0] <= t:
+            battery = pending.popleft()[1]
+        if mode == "self_consume":
+            battery = max(0.0, _solar(t) - _load(t))
+        grid = _load(t) - _solar(t) + battery
+        true_p1.append((t, grid))
+        imported += max(grid, 0) * SAMPLE / 3600
+        exported += max(-grid, 0) * SAMPLE / 3600
+        p1 = grid + rng.gauss(0, NOISE)
+        if rng.random() < 0.03:
+            p1 += SPIKE
+        readings.append((t, p1))
+        while readings[0][0] <= t - P1_WINDOW:
+            readings.popleft()
+        if t % LOAD_POLL == 0:
+            home_load = _load(t)
+        if t % TICK:
+            continue
+
+        state = decision.DecisionState(
+            soc=50,
+            solar=_solar(t),
+            p1=p1,
+            home_load=home_load,
+            soc_min=10,
+            soc_max=95,
+            max_charge=5000,
+            max_discharge=5000,
+            is_night=False,
+            solar_producing=True,
+            night_soc_target=30,
+            p1_avg=statistics.fmean(v for _, v in readings),
+            hours_to_sunset=8,
+            current_mode=mode,
+            charge_power=charge,
+        )
+        result = decision.decide(state, params, counters, t)
+        refused = False
+        for command in result.commands:
+            if command.action == "set_mode":
+                mode = command.target
+                if command.power is not None:
+                    charge = command.power
+                    pending.append((t + APPLY_DELAY, charge))
+                commands += 1
+                continue
+            power = command.power
+            change = abs(power - charge)
+            # Exactly one threshold step only goes out for the PI output
+            too_small = (
+                change < params.power_change_threshold
+                if result.exact_step
+                else change <= params.power_change_threshold
+            )
+            if t - last_adjust < ADJUST_COOLDOWN or (too_small and power > 100):
+                refused = True
+                continue
+            charge, last_adjust = power, t
+            pending.append((t + APPLY_DELAY, charge))
+            commands += 1
+            steady += t >= STEADY
+        if refused and result.counters_if_refused is not None:
+            counters = result.counters_if_refused
+        else:
+            counters = result.counters
+
+    settle = [_settling(true_p1, event) for event in EVENTS]
+    return {
+        "commands": commands,
+        "steady_cmds": steady,
+        "load_up_s": settle[0],
+        "load_down_s": settle[1],
+        "cloud_s": settle[2],
+        "import_wh": imported,
+        "export_wh": exported,
+    }
+
+
+def _settling(true_p1: list[tuple[float, float]], start: float) -> float:
+    """Seconds from start until P1 enters the band and stays for HOLD."""
+    entered = None
+    for t, grid in true_p1:
+        if t < start:
+            continue
+        if BAND[0] <= grid <= BAND[1]:
+            if entered is None:
+                entered = t
+            if t - entered >= HOLD:
+                return entered - start
+        else:
+            entered = None
+    return float("inf")
+
+
+def benchmark() -> None:
+    """Print the averaged results of both modes side by side."""
+    seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    results = {
+        name: [simulate(pi, seed) for seed in range(seeds)]
+        for name, pi in (("step", False), ("pi", True))
+    }
+    print(f"{seeds} seeds, one hour each, P1 noise {NOISE} W\n")
+    print(f"{'':<14}{'step':>10}{'pi':>10}")
+    for key in results["step"][0]:
+        row = [statistics.fmean(run[key] for run in results[name]) for name in results]
+        print(f"{key:<14}" + "".join(f"{value:>10.0f}" for value in row))
+
+
+if __name__ == "__main__":
+    benchmark()
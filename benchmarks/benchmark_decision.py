@@ -0,0 +1,102 @@
+"""Throughput of the Energy Manager decision kernel.
+
+Runs decision.decide() over a batch of random inverter states (every
+priority is reached: SOC limits, export limiting, high load, night and
+solar charging), carrying each inverter's counters from tick to tick the
+way the engine does. No Home Assistant is involved.
+
+Run: python benchmarks/benchmark_decision.py [inverters] [ticks]
+"""
+# pylint: disable=wrong-import-position
+
+import importlib
+import random
+import sys
+import time
+import types
+from collections import Counter
+from pathlib import Path
+
+# decision.py only needs the standard library; load it without the
+# package __init__ (which needs Home Assistant and aiohttp).
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+
+decision = importlib.import_module("hyxi_cloud.decision")
+
+PARAMS = decision.DecisionParams(
+    battery_capacity_wh=10000,
+    high_load_threshold=6500,
+    max_grid_export=3000,
+    min_solar_for_charge=1000,
+    charge_margin=150,
+    charge_entry_threshold=500,
+    charge_reentry_delay=300,
+    bottomout_cooldown=300,
+    grid_charge_allowed=True,
+    export_limiting=True,
+    high_load_assist=True,
+    night_mode=True,
+    peak_shaving=True,
+)
+MODES = (None, "self_consume", "idle", "charge", "discharge")
+
+
+def _states(count: int, rng: random.Random) -> list:
+    states = []
+    for _ in range(count):
+        solar = rng.uniform(0, 6000) if rng.random() < 0.7 else 0.0
+        states.append(
+            decision.DecisionState(
+                soc=rng.uniform(5, 100),
+                solar=solar,
+                p1=rng.uniform(-5000, 3000),
+                home_load=rng.uniform(100, 9000),
+                soc_min=20,
+                soc_max=90,
+                max_charge=5000,
+                max_discharge=5000,
+                is_night=solar == 0 and rng.random() < 0.8,
+                solar_producing=solar > 50,
+                night_soc_target=rng.uniform(25, 60),
+                p1_avg=rng.uniform(-1000, 1000),
+                hours_to_sunset=rng.uniform(0, 12),
+                solar_covers_night=rng.random() < 0.5,
+                current_mode=rng.choice(MODES),
+                pv_curtailed=rng.random() < 0.1,
+                charge_power=rng.uniform(0, 5000),
+            )
+        )
+    return states
+
+
+def benchmark() -> None:
+    """Print decisions per second and how often each decision was taken."""
+    inverters = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    states = _states(inverters, random.Random(0))  # noqa: S311
+    counters = [decision.DecisionCounters()] * inverters
+    decide = decision.decide
+    labels: Counter[str] = Counter()
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        now = tick * 15.0
+        for i, state in enumerate(states):
+            result = decide(state, PARAMS, counters[i], now)
+            counters[i] = result.counters
+            labels[result.label] += 1
+    elapsed = time.perf_counter() - start
+
+    total = inverters * ticks
+    print(f"{inverters} inverters x {ticks} ticks = {total:,} decisions\n")
+    print(f"decide():  {elapsed / total * 1e6:.2f} µs per decision")
+    print(f"           {total / elapsed:,.0f} decisions per second\n")
+    for label, count in labels.most_common():
+        print(f"  {label:<26} {count / total:6.1%}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,299 @@
+"""End-to-end dispatch benchmarks against a real Home Assistant instance.
+
+Sets up the integration on a test hass (pytest-homeassistant-custom-
+component, from the test extras) for synthetic fleets of each size (see
+fleet.py) and times the paths a poll or push actually takes:
+
+* entry_setup: hass.config_entries.async_setup, first refresh included
+* sensor_setup_entry: the sensor platform's async_setup_entry alone
+* merge_metrics: coordinator._merge_metrics on a fresh poll
+* poll_fanout: async_set_updated_data plus the state writes it triggers
+* webhook: _async_handle_webhook for one push covering the whole fleet
+* engine_tick: one Energy Manager decision tick (dry run)
+
+Only the network is faked: get_all_device_data returns the synthetic
+fleet, while the real API client parses pushes and derives metrics.
+
+Results are printed (or written with --output) as JSON. Pass --compare
+with an earlier result to print the change per path, e.g.
+
+    python benchmarks/benchmark_dispatch.py --output before.json
+    git checkout my-branch
+    python benchmarks/benchmark_dispatch.py --compare before.json
+"""
+# pylint: disable=wrong-import-position,protected-access
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+_REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_REPO))
+
+from fleet import MIXES, generate_fleet, poll, push_payload  # noqa: E402
+from homeassistant import loader  # noqa: E402
+from homeassistant.const import __version__ as HA_VERSION  # noqa: E402, N812
+from homeassistant.util import dt as dt_util  # noqa: E402
+from hyxi_cloud_api import HyxiApiClient  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+import custom_components  # noqa: E402
+import custom_components.hyxi_cloud as integration  # noqa: E402
+from custom_components.hyxi_cloud import sensor as sensor_platform  # noqa: E402
+from custom_components.hyxi_cloud.const import (  # noqa: E402
+    CONF_ACCESS_KEY,
+    CONF_EM_DRY_RUN,
+    CONF_EM_ENABLED,
+    CONF_EM_INVERTER_SN,
+    CONF_EM_P1_ENTITY,
+    CONF_SECRET_KEY,
+    DOMAIN,
+)
+
+# Editable installs can leave non-existent paths that HA's loader trips on
+custom_components.__path__ = [p for p in custom_components.__path__ if Path(p).is_dir()]
+
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000)
+P1_ENTITY = "sensor.benchmark_p1"
+
+
+class _PushRequest:
+    """The parts of an aiohttp request the webhook handler reads."""
+
+    def __init__(self, access_key: str, body: str) -> None:
+        self.headers = {"accessKey": access_key}
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+
+def _stats(samples: list[float]) -> dict[str, float | int]:
+    """Summarize timings (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+    }
+
+
+async def _time_runs(
+    runs: int,
+    prepare: Callable[[int], Any],
+    measure: Callable[[Any], Awaitable[None]],
+) -> dict[str, float | int]:
+    """Time measure(prepare(run)) for each run; prepare isn't timed."""
+    samples = []
+    for run in range(runs):
+        arg = prepare(run)
+        start = time.perf_counter()
+        await measure(arg)
+        samples.append(time.perf_counter() - start)
+    return _stats(samples)
+
+
+async def _bench_fleet(hass, size: int, mix: str, runs: int) -> dict[str, Any]:
+    """Set up the integration for one fleet and time every path."""
+    fleet = generate_fleet(size, mix)
+    inverter = next(
+        (
+            sn
+            for sn, dev in fleet.items()
+            if dev["device_type_code"] == "HYBRID_INVERTER"
+        ),
+        None,
+    )
+    options: dict[str, Any] = {"update_interval": 5}
+    if inverter is not None:
+        options |= {
+            CONF_EM_ENABLED: True,
+            CONF_EM_INVERTER_SN: inverter,
+            CONF_EM_P1_ENTITY: P1_ENTITY,
+            CONF_EM_DRY_RUN: True,
+        }
+    hass.states.async_set(P1_ENTITY, "150")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_ACCESS_KEY: "bench_ak", CONF_SECRET_KEY: "bench_sk"},
+        options=options,
+        unique_id=f"bench_{mix}_{size}",
+    )
+    entry.add_to_hass(hass)
+
+    result: dict[str, Any] = {"devices": len(fleet)}
+    platform_times: list[float] = []
+    setup_sensor_platform = sensor_platform.async_setup_entry
+
+    async def timed_sensor_setup(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await setup_sensor_platform(*args, **kwargs)
+        finally:
+            platform_times.append(time.perf_counter() - start)
+
+    fetch = AsyncMock(side_effect=lambda **_: {"data": poll(fleet, 0), "attempts": 1})
+    with (
+        patch.object(HyxiApiClient, "get_all_device_data", fetch),
+        patch.object(sensor_platform, "async_setup_entry", timed_sensor_setup),
+    ):
+        start = time.perf_counter()
+        if not await hass.config_entries.async_setup(entry.entry_id):
+            raise RuntimeError(f"Setup failed for the {size}-device fleet")
+        await hass.async_block_till_done()
+        result["entry_setup"] = _stats([time.perf_counter() - start])
+    result["sensor_setup_entry"] = _stats(platform_times)
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    result["entities"] = len(hass.states.async_entity_ids())
+
+    def fresh_poll(run: int) -> dict:
+        coordinator.poll_unchanged = set()
+        return poll(fleet, run + 1)
+
+    async def merge(devices: dict) -> None:
+        coordinator._merge_metrics(devices)
+
+    result["merge_metrics"] = await _time_runs(runs, fresh_poll, merge)
+
+    def merged_poll(run: int) -> dict:
+        devices = fresh_poll(runs + run)
+        coordinator._merge_metrics(devices)
+        return devices
+
+    async def fan_out(devices: dict) -> None:
+        coordinator.async_set_updated_data(devices)
+        await hass.async_block_till_done()
+
+    result["poll_fanout"] = await _time_runs(runs, merged_poll, fan_out)
+
+    access_key = coordinator.client.access_key
+    webhook_id = f"hyxi_cloud_{entry.entry_id}"
+
+    def push(run: int) -> _PushRequest:
+        return _PushRequest(
+            access_key, json.dumps(push_payload(fleet, 2 * runs + run + 1))
+        )
+
+    async def handle_push(request: _PushRequest) -> None:
+        response = await integration._async_handle_webhook(
+            hass, webhook_id, request, coordinator
+        )
+        if response.status != 200:
+            raise RuntimeError(f"Webhook returned {response.status}: {response.text}")
+        await hass.async_block_till_done()
+
+    result["webhook"] = await _time_runs(runs, push, handle_push)
+
+    engine = coordinator.engine
+    if engine is not None:
+
+        def fresh_metadata(_run: int) -> None:
+            coordinator.hyxi_metadata["last_success"] = dt_util.utcnow()
+
+        async def tick(_arg: None) -> None:
+            await engine._loop_tick(dt_util.utcnow())
+            await hass.async_block_till_done()
+
+        result["engine_tick"] = await _time_runs(runs, fresh_metadata, tick)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    return result
+
+
+async def run(sizes: list[int], mix: str, runs: int) -> dict[str, Any]:
+    """Benchmark each fleet size on its own hass instance."""
+    results = {}
+    for size in sizes:
+        async with async_test_home_assistant() as hass:
+            # What the enable_custom_integrations test fixture does
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+            results[str(size)] = await _bench_fleet(hass, size, mix, runs)
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            cwd=_REPO,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except OSError, subprocess.CalledProcessError:
+        return None
+
+
+def compare(base: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """Return one line per (size, path) with the median change."""
+    lines = []
+    for size, paths in current["results"].items():
+        base_paths = base.get("results", {}).get(size, {})
+        for path, stats in paths.items():
+            before = base_paths.get(path)
+            if not isinstance(stats, dict) or not isinstance(before, dict):
+                continue
+            old, new = before["median_ms"], stats["median_ms"]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            lines.append(
+                f"{size:>6} {path:<20} {old:>10.3f} -> {new:>10.3f} ms  {change}"
+            )
+    return lines
+
+
+def main() -> None:
+    """Run the suite and emit JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), metavar="N"
+    )
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per path")
+    parser.add_argument("--output", type=Path, help="write JSON here, not stdout")
+    parser.add_argument("--compare", type=Path, help="earlier JSON to compare with")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = {
+        "schema": SCHEMA_VERSION,
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "homeassistant": HA_VERSION,
+        "mix": args.mix,
+        "runs": args.runs,
+        "results": asyncio.run(run(args.sizes, args.mix, args.runs)),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.compare:
+        base = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(f"\nchange vs {base.get('commit')} (median):", file=sys.stderr)
+        for line in compare(base, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Throughput, memory and accuracy of the streaming outlier filter.
+
+Feeds a synthetic fleet of measurement sensors (power, voltage, current,
+SOC, temperature in roughly the proportions a hybrid inverter exposes)
+through one OutlierFilter each. Every signal is a slow drift plus noise
+with an isolated glitch injected every GLITCH_EVERY samples; a few
+sensors also take a genuine step change halfway through.
+
+Reports time per sample, filter memory per sensor, the share of glitches
+caught, clean samples wrongly held back and how long genuine steps took
+to show.
+
+Run: python benchmarks/benchmark_outlier_filter.py [sensors] [samples]
+"""
+# pylint: disable=wrong-import-position
+
+import importlib
+import math
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Load const.py and filters.py without the package __init__ (which needs
+# Home Assistant and aiohttp); const only needs homeassistant.const.
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+try:
+    import homeassistant.const  # noqa: F401
+except ImportError:
+    sys.modules.setdefault("homeassistant", MagicMock())
+    sys.modules.setdefault("homeassistant.const", MagicMock())
+
+CONF_OUTLIER_FILTER = importlib.import_module("hyxi_cloud.const").CONF_OUTLIER_FILTER
+build_outlier_filter = importlib.import_module(
+    "hyxi_cloud.filters"
+).build_outlier_filter
+
+# device class -> (share of sensors, level, noise amplitude, glitch size)
+FLEET_MIX = {
+    "power": (0.5, 2000.0, 40.0, 15000.0),
+    "voltage": (0.2, 230.0, 1.5, -230.0),
+    "current": (0.15, 8.0, 0.3, 90.0),
+    "battery": (0.1, 60.0, 0.2, -60.0),
+    "temperature": (0.05, 35.0, 0.2, 60.0),
+}
+GLITCH_EVERY = 97
+STEP_EVERY = 10  # every 10th sensor steps up by 50% halfway through
+SAMPLE_INTERVAL = 10.0  # seconds, the fastest push rate
+
+
+def _noise(i: int, n: int) -> float:
+    """Deterministic noise in [-1, 1]."""
+    return math.sin(i * 12.9898 + n * 78.233) * 43758.5453 % 2 - 1
+
+
+def _fleet(sensors: int) -> list[tuple[str, float, float, float, bool]]:
+    fleet = []
+    for device_class, (share, level, noise, glitch) in FLEET_MIX.items():
+        count = round(sensors * share)
+        fleet.extend(
+            (device_class, level, noise, glitch, i % STEP_EVERY == 0)
+            for i in range(count)
+        )
+    return fleet
+
+
+def benchmark() -> None:
+    """Print throughput, memory and filter accuracy."""
+    sensors = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    options = {CONF_OUTLIER_FILTER: True}
+    fleet = _fleet(sensors)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    filters = [build_outlier_filter(options, spec[0]) for spec in fleet]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    filter_bytes = sum(s.size_diff for s in after.compare_to(before, "filename"))
+
+    glitches = caught = held = steps = 0
+    step_delay = 0
+    elapsed = 0.0
+    half = samples // 2
+    for n, ((_, level, noise, glitch, steps_up), outlier_filter) in enumerate(
+        zip(fleet, filters, strict=True)
+    ):
+        truth = level
+        shown_step = None
+        start = time.perf_counter()
+        for i in range(samples):
+            if steps_up and i == half:
+                truth = level * 1.5
+            value = truth + noise * _noise(i, n)
+            is_glitch = i % GLITCH_EVERY == GLITCH_EVERY - 1
+            if is_glitch:
+                value += glitch
+            shown = outlier_filter.filter(value, i * SAMPLE_INTERVAL)
+            if is_glitch:
+                glitches += 1
+                caught += shown != value
+            else:
+                held += shown != value
+            if steps_up and i >= half and shown_step is None:
+                if abs(shown - truth) <= 0.1 * level:
+                    shown_step = i - half
+        elapsed += time.perf_counter() - start
+        if steps_up:
+            steps += 1
+            step_delay += shown_step if shown_step is not None else samples - half
+
+    total = len(fleet) * samples
+    print(f"{len(fleet)} sensors x {samples} samples ({total:,} samples)\n")
+    print(f"time per sample:      {elapsed / total * 1e9:,.0f} ns")
+    print(f"fleet per push:       {elapsed / samples * 1e3:,.2f} ms")
+    print(f"filter memory:        {filter_bytes / len(fleet):,.0f} B per sensor")
+    print(f"glitches caught:      {caught:,} / {glitches:,}")
+    print(f"clean samples held:   {held:,} / {total - glitches:,}")
+    print(f"step delay:           {step_delay / max(steps, 1):.1f} samples (mean)")
+
+
+if __name__ == "__main__":
+    benchmark()
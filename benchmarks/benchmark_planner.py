@@ -0,0 +1,107 @@
+"""Time the Energy Manager's day-ahead battery planner.
+
+Plans a battery to sunset against a synthetic clear-sky forecast and
+times the three calls the engine makes:
+
+* full: a new plan (first tick, or the battery parameters changed)
+* forecast_update: a forecast update changed the next few hours
+* tick: nothing changed but the SOC (the common case)
+
+Each should finish far inside one decision loop interval (5-60 s).
+
+Run: python benchmarks/benchmark_planner.py [slot_minutes] [capacity_wh]
+"""
+# pylint: disable=wrong-import-position
+
+import importlib
+import math
+import statistics
+import sys
+import time
+import types
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+# planner.py only needs the standard library; load it without the
+# package __init__ (which needs Home Assistant and aiohttp).
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+
+planner = importlib.import_module("hyxi_cloud.planner")
+
+SUNRISE = datetime(2026, 6, 21, 4, 30, tzinfo=UTC)
+SUNSET = datetime(2026, 6, 21, 20, 30, tzinfo=UTC)
+PEAK_W = 6000
+
+
+def _series(slot_minutes: int, scale: float = 1.0) -> list:
+    """Clear-sky forecast from sunrise to sunset."""
+    day = (SUNSET - SUNRISE).total_seconds()
+    series = []
+    start = SUNRISE
+    while start < SUNSET:
+        phase = (start - SUNRISE).total_seconds() / day
+        series.append((start, PEAK_W * scale * math.sin(math.pi * phase)))
+        start += timedelta(minutes=slot_minutes)
+    return series
+
+
+def _time(runs: int, call) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def benchmark() -> None:
+    """Print the median time of each planner call."""
+    slot_minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    capacity = float(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    params = planner.PlanParams(
+        soc_min=10,
+        soc_max=100,
+        target_soc=40,
+        capacity_wh=capacity,
+        max_charge=5000,
+        max_discharge=5000,
+    )
+    now = SUNRISE
+    series = _series(slot_minutes)
+    slots = planner.forecast_slots(series, now, SUNSET, lambda _: 600.0)
+    cloudy = planner.forecast_slots(
+        _series(slot_minutes, 0.5)[:8] + series[8:], now, SUNSET, lambda _: 600.0
+    )
+    print(
+        f"{len(slots)} slots of {slot_minutes} min, {capacity:.0f} Wh, "
+        f"{planner._levels(params)} SOC levels\n"
+    )
+
+    def full() -> None:
+        planner.SchedulePlanner().plan(params, slots, 30)
+
+    shared = planner.SchedulePlanner()
+    shared.plan(params, slots, 30)
+    forecasts = [cloudy, slots]
+
+    def forecast_update() -> None:
+        forecasts.reverse()
+        shared.plan(params, forecasts[0], 30)
+
+    def tick() -> None:
+        shared.plan(params, forecasts[0], 31)
+
+    for name, call in (("full", full), ("forecast_update", forecast_update)):
+        print(f"{name:<16} {_time(20, call):8.2f} ms")
+    print(f"{'tick':<16} {_time(200, tick):8.3f} ms")
+    schedule = shared.plan(params, slots, 30)
+    print(
+        f"\nend SOC {schedule.soc[-1]:.0f}%, reaches target: {schedule.reaches_target}"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
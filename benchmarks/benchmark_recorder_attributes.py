@@ -0,0 +1,121 @@
+"""Recorder write volume of metric sensors, with and without poll metadata.
+
+Models the two recorder rules that matter here:
+
+* a ``states`` row is written whenever an entity's state *or* attributes
+  differ from what was last written;
+* attribute payloads are JSON-encoded on every such write and stored once
+  per distinct payload (``state_attributes`` is deduplicated by hash).
+
+"before" attaches the coordinator's ``hyxi_metadata`` (which carries a new
+``last_success`` on every poll) to every metric sensor, as HyxiSensor used
+to. "after" gives metric sensors no attributes and moves the metadata onto
+the one Integration Last Updated sensor.
+
+Run: python benchmarks/benchmark_recorder_attributes.py [devices] [polls]
+"""
+
+import json
+import sys
+from datetime import UTC, datetime, timedelta
+
+SENSORS_PER_DEVICE = 40
+# Roughly the share of a device's sensors whose value moves between two
+# 5-minute polls (power, voltages, SOC); the rest are totals that stay
+# flat, status enums, firmware versions and so on.
+CHANGING_SHARE = 0.35
+_CHANGING_EVERY = 20  # sensor i changes if i % 20 < 7 (35%)
+POLL_INTERVAL = timedelta(minutes=5)
+
+
+class RecorderModel:
+    """Count what the recorder would write for a stream of state updates."""
+
+    def __init__(self) -> None:
+        self._last: dict[str, tuple[object, str]] = {}
+        self._shared_attrs: set[str] = set()
+        self.state_rows = 0
+        self.attribute_rows = 0
+        self.attribute_bytes = 0
+
+    def write(self, entity_id: str, state: object, attributes: dict | None) -> None:
+        """Process one async_write_ha_state()."""
+        encoded = json.dumps(attributes or {}, default=str, sort_keys=True)
+        if self._last.get(entity_id) == (state, encoded):
+            return  # Only last_reported moves; no row.
+        self._last[entity_id] = (state, encoded)
+        self.state_rows += 1
+        self.attribute_bytes += len(encoded)
+        if encoded not in self._shared_attrs:
+            self._shared_attrs.add(encoded)
+            self.attribute_rows += 1
+
+
+def simulate(devices: int, polls: int, metadata_on_metrics: bool) -> RecorderModel:
+    """Run a synthetic fleet through the recorder model."""
+    recorder = RecorderModel()
+    values = {
+        f"sensor.dev{d}_m{m}": 0
+        for d in range(devices)
+        for m in range(SENSORS_PER_DEVICE)
+    }
+    cutoff = CHANGING_SHARE * _CHANGING_EVERY
+    changing = [
+        entity_id for i, entity_id in enumerate(values) if i % _CHANGING_EVERY < cutoff
+    ]
+    now = datetime(2026, 1, 1, tzinfo=UTC)
+
+    for _ in range(polls):
+        now += POLL_INTERVAL
+        metadata = {
+            "last_attempts": 1,
+            "last_success": now,
+            "last_error": None,
+            "api_status": "Online",
+            "cache_active": False,
+        }
+        for entity_id in changing:
+            values[entity_id] += 1
+
+        attrs = metadata if metadata_on_metrics else None
+        for entity_id, value in values.items():
+            recorder.write(entity_id, value, attrs)
+
+        health_attrs = (
+            None
+            if metadata_on_metrics
+            else {k: v for k, v in metadata.items() if k != "last_success"}
+        )
+        recorder.write("sensor.integration_last_updated", now, health_attrs)
+
+    return recorder
+
+
+def benchmark() -> None:
+    """Print before/after recorder write volume."""
+    devices = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 288  # one day at 5 min
+
+    print(
+        f"{devices} devices x {SENSORS_PER_DEVICE} sensors, {polls} polls "
+        f"({CHANGING_SHARE:.0%} of values change per poll)\n"
+    )
+    print(f"{'':8}{'state rows':>14}{'attr rows':>12}{'attr JSON bytes':>18}")
+    results = {}
+    for label, on_metrics in (("before", True), ("after", False)):
+        model = simulate(devices, polls, on_metrics)
+        results[label] = model
+        print(
+            f"{label:8}{model.state_rows:>14,}{model.attribute_rows:>12,}"
+            f"{model.attribute_bytes:>18,}"
+        )
+
+    before, after = results["before"], results["after"]
+    print(
+        f"\nstate rows: -{1 - after.state_rows / before.state_rows:.0%}, "
+        f"attribute JSON: -{1 - after.attribute_bytes / before.attribute_bytes:.0%}"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
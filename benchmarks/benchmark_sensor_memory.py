@@ -0,0 +1,164 @@
+"""Memory footprint of the metric sensors of a large fleet.
+
+Builds HyxiSensor entities for a synthetic fleet (one hybrid inverter
+with every sensor description, plus microinverters) on stub Home
+Assistant base classes and measures with tracemalloc:
+
+* the bytes allocated per sensor, and
+* the glitch guard state alone (last valid value, its time and the last
+  glitch logged) as instance attributes, against the same three in
+  __slots__. Entities inherit a __dict__, and on CPython 3.13 a subclass
+  that adds __slots__ loses the inline attribute values and builds a full
+  dict per instance, so the slots cost more than they save.
+
+Run: python benchmarks/benchmark_sensor_memory.py [microinverters]
+"""
+# pylint: disable=wrong-import-position
+
+import importlib
+import logging
+import sys
+import tracemalloc
+import types
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Load the sensor platform without the package __init__ (which needs Home
+# Assistant and aiohttp), on stub entity base classes.
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+
+
+class _CoordinatorEntity:
+    def __init__(self, coordinator, *args, **kwargs):
+        self.coordinator = coordinator
+
+    def __class_getitem__(cls, item):
+        return cls
+
+
+class _Description(types.SimpleNamespace):
+    """SensorEntityDescription stand-in; unset fields read as None."""
+
+    def __getattr__(self, name):
+        return None
+
+
+class _Enum:
+    """StrEnum stand-in: MEMBER reads as "member"."""
+
+    def __getattr__(self, name):
+        return name.lower()
+
+
+_ha = MagicMock()
+# MagicMock members would record every comparison and skew the measurement
+_ha.SensorDeviceClass = _ha.SensorStateClass = _Enum()
+_ha.SensorEntity = type("SensorEntity", (), {})
+_ha.RestoreEntity = type("RestoreEntity", (), {})
+_ha.CoordinatorEntity = _CoordinatorEntity
+_ha.SensorEntityDescription = _Description
+_ha.callback = lambda func: func
+_ha.dt = types.SimpleNamespace(
+    utcnow=lambda: datetime.now(UTC), parse_datetime=lambda value: None
+)
+for _name in (
+    "homeassistant",
+    "homeassistant.components",
+    "homeassistant.components.sensor",
+    "homeassistant.const",
+    "homeassistant.core",
+    "homeassistant.helpers",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.restore_state",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.util",
+):
+    sys.modules.setdefault(_name, _ha)
+
+sensor_mod = importlib.import_module("hyxi_cloud.sensor")
+
+# Keys a microinverter reports; the hybrid inverter gets every description
+MICRO_KEYS = ("acP", "acE", "totalE", "ppv", "pv1p", "pv2p", "vac", "f", "tinv")
+
+
+class _Coordinator:
+    """Just the attributes HyxiSensor reads."""
+
+    def __init__(self, data):
+        self.data = data
+        self.options = {}
+        self.poll_unchanged = set()
+
+
+class _DictState(_CoordinatorEntity):
+    """The glitch guard state as instance attributes, as HyxiBaseSensor keeps it."""
+
+    def __init__(self, value, when):
+        _CoordinatorEntity.__init__(self, None)
+        self._last_valid_value = value
+        self._last_valid_time = when
+        self._last_logged_glitch = None
+
+
+class _SlotState(_CoordinatorEntity):
+    """The glitch guard state in slots."""
+
+    __slots__ = ("_last_logged_glitch", "_last_valid_time", "_last_valid_value")
+    __init__ = _DictState.__init__
+
+
+def _measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return result, sum(s.size_diff for s in after.compare_to(before, "filename"))
+
+
+def benchmark() -> None:
+    """Print memory per sensor and per glitch guard state."""
+    micros = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    logging.disable(logging.WARNING)  # Synthetic values trip the enum checks
+    hybrid_keys = sorted(sensor_mod.SENSOR_TYPES_BY_KEY)
+    fleet = {"HYBRID": hybrid_keys} | {
+        f"MICRO{i:04d}": MICRO_KEYS for i in range(micros)
+    }
+    data = {
+        sn: {"device_type_code": "MICRO_INVERTER", "metrics": dict.fromkeys(keys, 1.5)}
+        for sn, keys in fleet.items()
+    }
+    descriptions = sensor_mod.SENSOR_TYPES_BY_KEY
+    coordinator = _Coordinator(data)
+
+    sensors, sensor_bytes = _measure(
+        lambda: [
+            sensor_mod.HyxiSensor(coordinator, sn, descriptions[key])
+            for sn, keys in fleet.items()
+            for key in keys
+        ]
+    )
+    count = len(sensors)
+    now = datetime.now(UTC)
+
+    def guard_state(cls):
+        return lambda: [
+            cls(1.5 + i, now.replace(microsecond=i % 1000)) for i in range(count)
+        ]
+
+    # Both include the entity's own __dict__; only the difference counts
+    _, dict_bytes = _measure(guard_state(_DictState))
+    _, slot_bytes = _measure(guard_state(_SlotState))
+
+    print(f"{len(fleet)} devices, {count:,} sensors\n")
+    print(f"sensors:              {sensor_bytes / count:,.0f} B per sensor")
+    print(f"guard state (dict):   {dict_bytes / count:,.0f} B per sensor")
+    print(f"guard state (slots):  {slot_bytes / count:,.0f} B per sensor")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,210 @@
+"""Synthetic HYXI fleets for the benchmarks.
+
+generate_fleet() returns a dict shaped like coordinator.data: SN ->
+device data with device_type_code, model, versions and a metrics dict in
+the form the API client produces. Fleets are deterministic for a given
+seed, so runs on different commits see identical input.
+
+Mixes (device kind -> share of the fleet):
+
+* hybrid: single-phase hybrid inverters with a battery
+* three_phase: three-phase hybrid inverters with a battery
+* micro: microinverters, one collector per 16
+* collector: collectors only
+* mixed: a bit of everything, roughly a large residential portfolio
+
+poll() and push_payload() derive a later sample of the same fleet.
+"""
+
+from __future__ import annotations
+
+import copy
+import random
+import time
+from typing import Any
+
+MIXES: dict[str, dict[str, float]] = {
+    "hybrid": {"hybrid": 1.0},
+    "three_phase": {"three_phase": 1.0},
+    "micro": {"micro": 1.0},
+    "collector": {"collector": 1.0},
+    "mixed": {"hybrid": 0.3, "three_phase": 0.2, "micro": 0.4, "collector": 0.1},
+}
+
+MICROS_PER_COLLECTOR = 16
+
+_PREFIX = {"hybrid": "HYB", "three_phase": "HT3", "micro": "MIC", "collector": "COL"}
+
+
+def _hybrid_metrics(rng: random.Random, phases: int) -> dict[str, Any]:
+    pv = [round(rng.uniform(0, 3000), 1) for _ in range(2)]
+    load = [round(rng.uniform(100, 1500), 1) for _ in range(phases)]
+    bat_p = round(rng.uniform(-2500, 2500), 1)
+    grid_kw = round((sum(pv) - sum(load) - bat_p) / 1000, 3)
+    metrics: dict[str, Any] = {
+        "batSn": f"BAT{rng.randrange(10**8):08d}",
+        "batSoc": round(rng.uniform(10, 100), 1),
+        "batSoh": 98.0,
+        "batP": bat_p,
+        "pbat": bat_p,
+        "batV": round(rng.uniform(48, 56), 2),
+        "batI": round(bat_p / 52, 2),
+        "batTmp": round(rng.uniform(15, 35), 1),
+        "batCap": 10.0,
+        "batCharge": round(rng.uniform(100, 5000), 2),
+        "batDisCharge": round(rng.uniform(100, 5000), 2),
+        "ppv": round(sum(pv), 1),
+        "gridP": grid_kw,
+        "totalE": round(rng.uniform(1000, 30000), 2),
+        "eToday": round(rng.uniform(0, 40), 2),
+        "totalEnt": round(rng.uniform(100, 10000), 2),
+        "totalEpt": round(rng.uniform(100, 10000), 2),
+        "tinv": round(rng.uniform(25, 55), 1),
+        "f": 50.0,
+        "deviceState": "1",
+    }
+    for i, power in enumerate(pv, start=1):
+        volts = round(rng.uniform(250, 450), 1)
+        metrics |= {f"pv{i}v": volts, f"pv{i}i": round(power / volts, 2)}
+    for i, power in enumerate(load, start=1):
+        volts = round(rng.uniform(225, 240), 1)
+        metrics |= {
+            f"ph{i}v": volts,
+            f"ph{i}i": round(power / volts, 2),
+            f"ph{i}p": power,
+            f"ph{i}Loadp": power,
+        }
+    return metrics
+
+
+def _micro_metrics(rng: random.Random) -> dict[str, Any]:
+    power = round(rng.uniform(0, 800), 1)
+    return {
+        "acP": power,
+        "ppv": power,
+        "pv1v": round(rng.uniform(25, 45), 1),
+        "pv1i": round(power / 2 / 35, 2),
+        "pv2v": round(rng.uniform(25, 45), 1),
+        "pv2i": round(power / 2 / 35, 2),
+        "vac": round(rng.uniform(225, 240), 1),
+        "f": 50.0,
+        "acE": 0.0,
+        "totalE": round(rng.uniform(100, 3000), 2),
+        "eToday": round(rng.uniform(0, 5), 2),
+        "tinv": round(rng.uniform(20, 60), 1),
+        "deviceState": "1",
+    }
+
+
+def _device(kind: str, sn: str, rng: random.Random) -> dict[str, Any]:
+    if kind == "collector":
+        return {
+            "device_name": f"Collector {sn[-4:]}",
+            "model": "DMU-W1",
+            "device_type_code": "COLLECTOR",
+            "sw_version": "V1.2.0",
+            "hw_version": "H1",
+            "metrics": {"signalVal": rng.randrange(-90, -40), "wifiVer": "W2.1.7"},
+        }
+    if kind == "micro":
+        return {
+            "device_name": f"Micro {sn[-4:]}",
+            "model": "HYX-M800",
+            "device_type_code": "MICRO_INVERTER",
+            "sw_version": "V3.0.1",
+            "hw_version": "H2",
+            "metrics": _micro_metrics(rng),
+        }
+    phases = 3 if kind == "three_phase" else 1
+    return {
+        "device_name": f"Inverter {sn[-4:]}",
+        "model": "HYX-H10K-HT" if phases == 3 else "HYX-H5K-LS",
+        "device_type_code": "HYBRID_INVERTER",
+        "sw_version": "V2.4.0",
+        "hw_version": "H3",
+        "metrics": _hybrid_metrics(rng, phases),
+    }
+
+
+def _counts(devices: int, mix: str) -> dict[str, int]:
+    """Split a device count over the mix's kinds (largest remainder)."""
+    shares = MIXES[mix]
+    exact = {kind: devices * share for kind, share in shares.items()}
+    counts = {kind: int(value) for kind, value in exact.items()}
+    by_remainder = sorted(exact, key=lambda kind: counts[kind] - exact[kind])
+    for kind in by_remainder[: devices - sum(counts.values())]:
+        counts[kind] += 1
+    return counts
+
+
+def generate_fleet(
+    devices: int, mix: str = "mixed", seed: int = 0, now: float | None = None
+) -> dict[str, dict[str, Any]]:
+    """Return a fleet of roughly `devices` devices in coordinator.data shape.
+
+    Microinverters are attached to collectors (parentSn); a micro mix
+    adds the collectors it needs on top of the requested count.
+    """
+    if mix not in MIXES:
+        raise ValueError(f"Unknown mix {mix!r}; choose from {sorted(MIXES)}")
+    rng = random.Random(seed)  # noqa: S311
+    collect_time = int((time.time() if now is None else now) * 1000)
+    fleet: dict[str, dict[str, Any]] = {}
+    collectors: list[str] = []
+    for kind, count in _counts(devices, mix).items():
+        for i in range(count):
+            sn = f"{_PREFIX[kind]}{seed:02d}{i:06d}"
+            fleet[sn] = _device(kind, sn, rng)
+            if kind == "collector":
+                collectors.append(sn)
+    micros = [sn for sn in fleet if sn.startswith(_PREFIX["micro"])]
+    needed = -(-len(micros) // MICROS_PER_COLLECTOR)
+    for i in range(len(collectors), needed):
+        sn = f"{_PREFIX['collector']}{seed:02d}{i:06d}"
+        fleet[sn] = _device("collector", sn, rng)
+        collectors.append(sn)
+    for i, sn in enumerate(micros):
+        fleet[sn]["metrics"]["parentSn"] = collectors[i // MICROS_PER_COLLECTOR]
+    for dev_data in fleet.values():
+        dev_data["metrics"]["collectTime"] = collect_time
+    return fleet
+
+
+def _drift(metrics: dict[str, Any], rng: random.Random, share: float) -> None:
+    """Move a share of the numeric metrics by a few percent."""
+    for key, value in metrics.items():
+        if key == "collectTime" or isinstance(value, bool):
+            continue
+        if isinstance(value, float) and rng.random() < share:
+            metrics[key] = round(value * rng.uniform(0.97, 1.03), 3)
+
+
+def poll(
+    fleet: dict[str, dict[str, Any]], step: int, changed: float = 0.5
+) -> dict[str, dict[str, Any]]:
+    """Return a new poll of the fleet `step` samples later.
+
+    About `changed` of the numeric metrics move; the rest repeat, as a
+    real poll mostly does between pushes.
+    """
+    rng = random.Random(step)  # noqa: S311
+    devices = copy.deepcopy(fleet)
+    for dev_data in devices.values():
+        metrics = dev_data["metrics"]
+        _drift(metrics, rng, changed)
+        metrics["collectTime"] = metrics["collectTime"] + step * 60_000
+    return devices
+
+
+def push_payload(
+    fleet: dict[str, dict[str, Any]], step: int, changed: float = 0.5
+) -> dict[str, Any]:
+    """Return a HYXI data push for every non-collector device of the fleet."""
+    devices = poll(fleet, step, changed)
+    return {
+        "dataList": [
+            {"deviceSn": sn, **dev_data["metrics"]}
+            for sn, dev_data in devices.items()
+            if dev_data["device_type_code"] != "COLLECTOR"
+        ]
+    }
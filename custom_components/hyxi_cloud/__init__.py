@@ -5,6 +5,7 @@ import asyncio
 import hashlib
 import hmac
 import logging
+import time
 
 from aiohttp import ClientError, web
 from homeassistant.components import webhook
@@ -23,10 +24,12 @@ from homeassistant.helpers.update_coordinator import UpdateFailed
 from hyxi_cloud_api import HyxiApiClient
 from hyxi_cloud_api import __version__ as API_VERSION
 
+from .alarms import get_alarm_store
 from .const import (
     BASE_URL_DEFAULT,
     CONF_ACCESS_KEY,
     CONF_EM_ENABLED,
+    CONF_EM_FLEET_SNS,
     CONF_EM_FORECAST_ENTITY,
     CONF_EM_FORECAST_POWER_ENTITY,
     CONF_EM_INVERTER_SN,
@@ -39,10 +42,10 @@ from .const import (
     DOMAIN,
     MANUFACTURER,
     PLATFORMS,
+    SUBSCRIPTION_SETUP_TIMEOUT,
     VERSION,
     detect_phase_type,
     get_raw_device_code,
-    mask_sensitive_key_value,
     mask_sn,
     mask_subscription_code,
     mask_url,
@@ -50,6 +53,7 @@ from .const import (
 )
 from .coordinator import HyxiDataUpdateCoordinator
 from .protection import HyxiBatteryProtectionController
+from .telemetry import trace_telemetry
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -76,12 +80,24 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     client = HyxiApiClient(access_key, secret_key, base_url, session)
 
     coordinator = HyxiDataUpdateCoordinator(hass, client, entry)
+
+    # Per-phase wall time (ms) for the setup summary below
+    timings: dict[str, int] = {}
+    lap_start = time.monotonic()
+
+    def _lap(phase: str) -> None:
+        nonlocal lap_start
+        now = time.monotonic()
+        timings[phase] = round((now - lap_start) * 1000)
+        lap_start = now
+
     coordinator.known_subscription_codes = await async_get_subscription_codes(hass)
 
     # Pre-seed coordinator.data from persistent cache so that if the API is slow
     # or unreachable at startup, data is immediately available and the fallback
     # in _async_update_data requires no additional disk read.
     await coordinator.async_preload_cache()
+    _lap("cache")
 
     try:
         await coordinator.async_config_entry_first_refresh()
@@ -95,22 +111,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     ) as err:
         _LOGGER.warning("HYXI Cloud not ready: %s", err)
         raise ConfigEntryNotReady(f"Connection error: {err}") from err
+    _lap("first_refresh")
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
-    # Set up real-time push subscription (handles enablement checks and cleanup of orphaned codes)
-    await _async_setup_push_subscription(hass, entry, coordinator)
-    # Set up alarm push subscription (handles enablement checks and cleanup of orphaned codes)
-    await _async_setup_alarm_subscription(hass, entry, coordinator)
+    # Push and alarm subscriptions (cloudhook resolution, orphan cleanup and
+    # subscribe calls) run concurrently in the background; entities come up
+    # on poll data right away and pick up push status once it settles.
+    _async_start_subscription_setup(hass, entry, coordinator)
 
     _async_register_devices(hass, entry, coordinator)
 
     _remove_legacy_select_entities(hass, coordinator.data)
     _cleanup_control_entities(hass, entry, coordinator)
+    _lap("registry")
     await _async_setup_battery_protection(hass, coordinator)
     _async_setup_energy_manager(hass, entry, coordinator)
+    _lap("control")
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _lap("platforms")
 
     # Start EM engine after platforms are loaded (entities need to exist first)
     if coordinator.engine is not None:
@@ -119,13 +139,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     await async_setup_services(hass)
+    _lap("services")
 
     _LOGGER.debug(
-        "HYXI Cloud entry %s setup complete: %d devices, protection=%s, engine=%s",
+        "HYXI Cloud entry %s setup complete: %d devices, protection=%s, engine=%s, "
+        "timings_ms=%s (subscriptions continue in background)",
         entry.entry_id,
         len(coordinator.data or {}),
         bool(getattr(coordinator, "protection_controllers", None)),
         coordinator.engine is not None,
+        timings,
     )
 
     return True
@@ -136,6 +159,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.debug("Unloading HYXI Cloud entry %s", entry.entry_id)
     coordinator = hass.data[DOMAIN].get(entry.entry_id)
     if coordinator is not None:
+        # Let in-flight subscription setup settle first so it can't register
+        # a webhook or persist a code after teardown below.
+        await _async_wait_subscription_setup(coordinator)
         if coordinator.engine is not None:
             await coordinator.engine.async_stop()
         for controller in coordinator.protection_controllers.values():
@@ -155,8 +181,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
         if not hass.data[DOMAIN]:
-            if hass.services.has_service(DOMAIN, "cancel_subscription"):
-                hass.services.async_remove(DOMAIN, "cancel_subscription")
+            for service in ("cancel_subscription", "export_decision_trace"):
+                if hass.services.has_service(DOMAIN, service):
+                    hass.services.async_remove(DOMAIN, service)
     _LOGGER.debug("HYXI Cloud entry %s unload result: %s", entry.entry_id, unload_ok)
     return unload_ok
 
@@ -288,7 +315,18 @@ def _async_setup_energy_manager(
         forecast_entity=entry.options.get(CONF_EM_FORECAST_ENTITY),
         forecast_power_entity=entry.options.get(CONF_EM_FORECAST_POWER_ENTITY),
     )
-    engine = EnergyManagerEngine(hass, coordinator, em_config)
+    fleet_sns = [
+        sn
+        for sn in entry.options.get(CONF_EM_FLEET_SNS) or []
+        if sn != em_sn and sn in coordinator.data
+    ]
+    if fleet_sns:
+        from .em_fleet import FleetEnergyManager
+
+        engine = FleetEnergyManager(hass, coordinator, em_config, fleet_sns)
+        _LOGGER.debug("EM managing %d inverters", len(fleet_sns) + 1)
+    else:
+        engine = EnergyManagerEngine(hass, coordinator, em_config)
     coordinator.engine = engine
 
     # Register EM virtual device
@@ -732,6 +770,104 @@ async def _async_execute_alarm_subscription(  # pylint: disable=too-many-argumen
         _log_push_subscription_failure("HYXI Alarm Push", err_msg)
 
 
+def _async_start_subscription_setup(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: HyxiDataUpdateCoordinator,
+) -> None:
+    """Start push and alarm subscription setup concurrently in the background.
+
+    Background tasks of the entry: HA startup doesn't wait for them, and
+    they are cancelled when the entry unloads (after unload has given them
+    a bounded wait, see _async_wait_subscription_setup).
+    """
+    push_task = entry.async_create_background_task(
+        hass,
+        _async_setup_push_subscription(hass, entry, coordinator),
+        "hyxi_cloud push subscription setup",
+    )
+    alarm_task = entry.async_create_background_task(
+        hass,
+        _async_setup_alarm_subscription(hass, entry, coordinator),
+        "hyxi_cloud alarm subscription setup",
+    )
+    coordinator.subscription_tasks = [push_task, alarm_task]
+    entry.async_create_background_task(
+        hass,
+        _async_monitor_subscription_setup(entry, coordinator, push_task, alarm_task),
+        "hyxi_cloud subscription setup monitor",
+    )
+
+
+async def _async_monitor_subscription_setup(
+    entry: ConfigEntry,
+    coordinator: HyxiDataUpdateCoordinator,
+    push_task: asyncio.Task,
+    alarm_task: asyncio.Task,
+) -> None:
+    """Wait for subscription setup, flagging any that exceed the timeout.
+
+    The setup tasks are never cancelled here: a subscribe call abandoned
+    mid-flight could leave a server-side subscription whose code we never
+    learn (HYXI allows one per account). A late success still updates the
+    status to "active" when it completes.
+    """
+    start = time.monotonic()
+    _done, pending = await asyncio.wait(
+        (push_task, alarm_task), timeout=SUBSCRIPTION_SETUP_TIMEOUT
+    )
+    error = f"Subscription setup still running after {SUBSCRIPTION_SETUP_TIMEOUT}s"
+    if push_task in pending:
+        coordinator.push_status = "error"
+        coordinator.push_error = error
+    if alarm_task in pending:
+        coordinator.alarm_push_status = "error"
+        coordinator.alarm_push_error = error
+    if pending:
+        _LOGGER.warning(
+            "HYXI Cloud entry %s: %s; status will update if it completes",
+            entry.entry_id,
+            error,
+        )
+
+    for task in (push_task, alarm_task):
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            _LOGGER.error(
+                "HYXI Cloud entry %s: unexpected error in %s: %s",
+                entry.entry_id,
+                task.get_name(),
+                task.exception(),
+            )
+
+    _LOGGER.debug(
+        "HYXI Cloud entry %s subscription setup finished in %d ms: push=%s, alarm=%s",
+        entry.entry_id,
+        round((time.monotonic() - start) * 1000),
+        coordinator.push_status,
+        coordinator.alarm_push_status,
+    )
+    coordinator.async_update_listeners()
+
+
+async def _async_wait_subscription_setup(
+    coordinator: HyxiDataUpdateCoordinator,
+) -> None:
+    """Wait (bounded) for in-flight subscription setup before teardown."""
+    pending = [task for task in coordinator.subscription_tasks if not task.done()]
+    if not pending:
+        return
+    _done, still_pending = await asyncio.wait(
+        pending, timeout=SUBSCRIPTION_SETUP_TIMEOUT
+    )
+    for task in still_pending:
+        _LOGGER.warning(
+            "Cancelling %s still running at unload; check known_subscription_codes "
+            "for an orphaned subscription",
+            task.get_name(),
+        )
+        task.cancel()
+
+
 async def _async_setup_push_subscription(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -981,20 +1117,21 @@ async def _async_handle_webhook(
             _LOGGER.debug("Received push data for untracked device SN: %s", mask_sn(sn))
             continue
 
+        coordinator.record_push(
+            sn, existing_metrics.get(sn) or {}, device_update["metrics"]
+        )
         coordinator.data[sn]["metrics"] = device_update["metrics"]
+        coordinator.downsampler.add(sn, device_update["metrics"], time.monotonic())
         any_updated = True
 
-        # Log the push metrics with sensitive keys masked (using mask_sensitive_key_value)
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            logged_metrics = {
-                k: mask_sensitive_key_value(k, v)
-                for k, v in device_update["metrics"].items()
-            }
-            _LOGGER.debug(
-                "HYXI Push Telemetry Update for Device %s: %s",
-                mask_sn(sn),
-                logged_metrics,
-            )
+        trace_telemetry(
+            coordinator.telemetry,
+            _LOGGER,
+            "push",
+            "HYXI Push Telemetry Update for Device %s: %s",
+            sn,
+            device_update["metrics"],
+        )
 
     if any_updated:
         coordinator.last_push_received = dt_util.utcnow()
@@ -1238,26 +1375,24 @@ async def _async_handle_alarm_webhook(
             )
             continue
 
-        # Merge: replace any alarm records with matching alarmCode, append new ones.
-        existing = coordinator.data[sn].get("alarms") or []
-        existing_by_code = {str(a.get("alarmCode", "")): a for a in existing}
+        # Merge: upsert by alarmCode into the device's bounded alarm store
+        # (cleared alarms age out) and publish its view as the alarms list.
+        dev_data = coordinator.data[sn]
+        store = get_alarm_store(dev_data)
         for rec in alarm_records:
-            existing_by_code[rec["alarmCode"]] = rec
-        coordinator.data[sn]["alarms"] = list(existing_by_code.values())
+            store.upsert(rec)
+        store.evict()
+        dev_data["alarms"] = store.records()
         any_updated = True
 
-        # Log the push alarms with sensitive keys masked (using mask_sensitive_key_value)
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            logged_alarms = []
-            for rec in alarm_records:
-                logged_rec = {k: mask_sensitive_key_value(k, v) for k, v in rec.items()}
-                logged_alarms.append(logged_rec)
-
-            _LOGGER.debug(
-                "HYXI Alarm Push Telemetry Update for Device %s: %s",
-                mask_sn(sn),
-                logged_alarms,
-            )
+        trace_telemetry(
+            coordinator.telemetry,
+            _LOGGER,
+            "alarm_push",
+            "HYXI Alarm Push Telemetry Update for Device %s: %s",
+            sn,
+            alarm_records,
+        )
 
     if any_updated:
         coordinator.async_update_listeners()
@@ -1324,6 +1459,45 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         ),
     )
 
+    from homeassistant.core import ServiceCall, ServiceResponse, SupportsResponse
+
+    from .decision_trace import write_rows
+
+    async def async_handle_export_decision_trace(call: ServiceCall) -> ServiceResponse:
+        """Handle the export_decision_trace service call."""
+        file_format = call.data["format"]
+        engines = [
+            (entry_id, coordinator.engine)
+            for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+            if getattr(coordinator, "engine", None) is not None
+        ]
+        if not engines:
+            raise HomeAssistantError("No HYXI Cloud Energy Manager is running")
+
+        files = []
+        for entry_id, engine in engines:
+            path = hass.config.path(
+                f"hyxi_cloud_decision_trace_{entry_id}.{file_format}"
+            )
+            # Snapshot in the event loop, write line by line in the executor
+            rows = list(engine.decision_trace.rows())
+            await hass.async_add_executor_job(write_rows, path, rows, file_format)
+            _LOGGER.info("EM decision trace: %d records written to %s", len(rows), path)
+            files.append({"path": path, "records": len(rows)})
+        return {"files": files}
+
+    hass.services.async_register(
+        DOMAIN,
+        "export_decision_trace",
+        async_handle_export_decision_trace,
+        schema=vol.Schema(
+            {
+                vol.Optional("format", default="ndjson"): vol.In(["ndjson", "csv"]),
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
 
 STORAGE_KEY = "hyxi_cloud_subscriptions"
 STORAGE_VERSION = 1
@@ -0,0 +1,205 @@
+"""Fleet aggregates of one metric across all devices of a given type.
+
+The aggregate sensors used to walk every device in coordinator.data on
+each dispatch, normalizing device types and parsing floats, even when a
+push had only touched one unrelated device. FleetAggregator indexes SNs
+by device type once per distinct fleet layout and keeps running totals
+per (device types, metric) that move by delta when a device's raw value
+changes; min/max are only recomputed after a change.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from .const import get_raw_device_code, is_null_value, normalize_device_type
+
+try:
+    import numpy as np
+except ImportError:  # Bundled with Home Assistant, but not required here.
+    np = None
+
+# Aggregates over at least this many devices keep their parsed values in
+# a NumPy array, so min/max run in C instead of a Python loop.
+NUMPY_MIN_FLEET = 256
+
+# The running total is recomputed exactly after this many delta updates,
+# so float error can't accumulate over a long uptime.
+RESYNC_EVERY = 1024
+
+_UNSET = object()
+
+
+class FleetStats(NamedTuple):
+    """Aggregates of one metric over the devices reporting a usable value."""
+
+    count: int
+    total: float | None
+    mean: float | None
+    minimum: float | None
+    maximum: float | None
+
+
+EMPTY_STATS = FleetStats(0, None, None, None, None)
+
+
+def _parse(value: Any) -> float | None:
+    """Return a raw metric value as a finite float, or None."""
+    if value is None or is_null_value(value):
+        return None
+    try:
+        number = float(value)
+    except ValueError, TypeError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+class MetricAggregate:
+    """Running aggregates of one metric over a fixed list of SNs."""
+
+    __slots__ = (
+        "_count",
+        "_deltas",
+        "_extremes",
+        "_raw",
+        "_slots",
+        "_total",
+        "_values",
+        "key",
+    )
+
+    def __init__(self, key: str, sns: tuple[str, ...]) -> None:
+        """Initialize an aggregate with one slot per SN."""
+        self.key = key
+        self._slots = {sn: i for i, sn in enumerate(sns)}
+        size = len(sns)
+        self._raw: list[Any] = [_UNSET] * size
+        self._values: Any = (
+            np.full(size, np.nan)
+            if np is not None and size >= NUMPY_MIN_FLEET
+            else [math.nan] * size
+        )
+        self._count = 0
+        self._total = 0.0
+        self._deltas = 0
+        self._extremes: tuple[float, float] | None = None
+
+    @property
+    def sns(self) -> tuple[str, ...]:
+        """Return the SNs covered by this aggregate."""
+        return tuple(self._slots)
+
+    def refresh(self, data: Mapping[str, Any]) -> bool:
+        """Re-parse devices whose raw value changed; return True if any did."""
+        key = self.key
+        raw_values = self._raw
+        values = self._values
+        changed = False
+        for sn, slot in self._slots.items():
+            dev_data = data.get(sn)
+            raw = (dev_data.get("metrics") or {}).get(key) if dev_data else None
+            if raw_values[slot] is raw or raw_values[slot] == raw:
+                continue
+            raw_values[slot] = raw
+            changed = True
+            self._deltas += 1
+
+            old = values[slot]
+            if not math.isnan(old):
+                self._total -= old
+                self._count -= 1
+            new = _parse(raw)
+            if new is None:
+                values[slot] = math.nan
+            else:
+                values[slot] = new
+                self._total += new
+                self._count += 1
+
+        if changed:
+            self._extremes = None
+            if self._deltas >= RESYNC_EVERY or not self._count:
+                self._deltas = 0
+                self._total = math.fsum(v for v in values if not math.isnan(v))
+        return changed
+
+    def stats(self) -> FleetStats:
+        """Return count, total, mean, min and max over usable values."""
+        count = self._count
+        if not count:
+            return EMPTY_STATS
+        if self._extremes is None:
+            values = self._values
+            if isinstance(values, list):
+                present = [v for v in values if not math.isnan(v)]
+                self._extremes = (min(present), max(present))
+            else:
+                self._extremes = (float(np.nanmin(values)), float(np.nanmax(values)))
+        total = self._total
+        return FleetStats(count, total, total / count, *self._extremes)
+
+
+class FleetAggregator:
+    """Device-type index and shared metric aggregates for one coordinator.
+
+    The index is rebuilt when coordinator.data is replaced (a poll), and
+    the aggregates are only discarded if the SN-to-type layout changed, so
+    a poll that returns the same fleet keeps the running totals.
+    """
+
+    __slots__ = ("_aggregates", "_by_type", "_data", "_data_len")
+
+    def __init__(self) -> None:
+        """Initialize an empty aggregator."""
+        self._data: Mapping[str, Any] | None = None
+        self._data_len = -1
+        self._by_type: dict[str, tuple[str, ...]] = {}
+        self._aggregates: dict[tuple[tuple[str, ...], str], MetricAggregate] = {}
+
+    def _reindex(self, data: Mapping[str, Any]) -> None:
+        """Rebuild the SN index if coordinator.data was replaced or resized."""
+        if data is self._data and len(data) == self._data_len:
+            return
+        by_type: dict[str, list[str]] = {}
+        for sn, dev_data in data.items():
+            device_type = normalize_device_type(get_raw_device_code(dev_data or {}))
+            by_type.setdefault(device_type, []).append(sn)
+        layout = {device_type: tuple(sns) for device_type, sns in by_type.items()}
+        if layout != self._by_type:
+            self._by_type = layout
+            self._aggregates.clear()
+        self._data = data
+        self._data_len = len(data)
+
+    def sns(self, data: Mapping[str, Any], device_types: tuple[str, ...]) -> tuple:
+        """Return the SNs of the given device types."""
+        self._reindex(data)
+        return tuple(
+            sn
+            for device_type in device_types
+            for sn in self._by_type.get(device_type, ())
+        )
+
+    def stats(
+        self, data: Mapping[str, Any], device_types: tuple[str, ...], key: str
+    ) -> FleetStats:
+        """Return up-to-date aggregates of key across the given device types."""
+        self._reindex(data)
+        agg_key = (device_types, key)
+        aggregate = self._aggregates.get(agg_key)
+        if aggregate is None:
+            aggregate = self._aggregates[agg_key] = MetricAggregate(
+                key, self.sns(data, device_types)
+            )
+        aggregate.refresh(data)
+        return aggregate.stats()
+
+
+def get_fleet_aggregator(coordinator: Any) -> FleetAggregator:
+    """Return the coordinator's FleetAggregator, attaching one if missing."""
+    fleet = getattr(coordinator, "fleet", None)
+    if not isinstance(fleet, FleetAggregator):
+        fleet = coordinator.fleet = FleetAggregator()
+    return fleet
@@ -0,0 +1,138 @@
+"""Bounded per-device alarm store for HYXI alarm push merges."""
+
+from __future__ import annotations
+
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any
+
+ACTIVE_ALARM_STATES = {"0", "1", "2", 0, 1, 2}
+
+# Cleared alarms are kept around for a while so the raw_alarms_payload
+# attribute still shows what recently resolved, but never forever: chatty
+# devices used to grow coordinator.data[sn]["alarms"] without bound.
+CLEARED_ALARM_TTL = 24 * 3600  # seconds
+CLEARED_ALARM_MAX = 50
+
+# Private dev_data key the store lives under (same convention as
+# "_sw_version_cached"), so the push handler, the poll and every
+# HyxiDeviceAlarmSensor share one store per SN.
+_STORE_KEY = "_alarm_store"
+
+# Records without an alarmCode can't be merged by code; give each its own
+# slot instead of collapsing them all onto "".
+_anonymous_keys = itertools.count()
+
+
+def is_alarm_active(record: dict[str, Any]) -> bool:
+    """Return True if an alarm record is in an active state and has not ended."""
+    return (
+        record.get("alarmState") in ACTIVE_ALARM_STATES
+        or record.get("alarmstate") in ACTIVE_ALARM_STATES
+    ) and not (record.get("endTime") or record.get("endtime"))
+
+
+def _alarm_key(record: dict[str, Any]) -> str:
+    """Return the merge key for an alarm record."""
+    code = record.get("alarmCode")
+    if code is None or code == "":
+        return f"_anonymous_{next(_anonymous_keys)}"
+    return str(code)
+
+
+class HyxiAlarmStore:
+    """Alarm records for one device, keyed by alarmCode.
+
+    Upserts are O(1): the active set is maintained incrementally, so the
+    active count never needs a rescan. Cleared records are kept in
+    clear-time order and evicted once older than the TTL or beyond the cap.
+    """
+
+    __slots__ = ("_active", "_cleared", "_max_cleared", "_records", "_ttl", "view")
+
+    def __init__(
+        self,
+        ttl: float = CLEARED_ALARM_TTL,
+        max_cleared: int = CLEARED_ALARM_MAX,
+    ) -> None:
+        """Initialize an empty store."""
+        self._records: dict[str, dict[str, Any]] = {}
+        self._active: set[str] = set()
+        self._cleared: OrderedDict[str, float] = OrderedDict()
+        self._ttl = ttl
+        self._max_cleared = max_cleared
+        # Last list handed out by records(); also used by get_alarm_store()
+        # to detect dev_data["alarms"] being replaced from outside.
+        self.view: list[dict[str, Any]] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of stored records."""
+        return len(self._records)
+
+    @property
+    def active_count(self) -> int:
+        """Return the number of active alarms."""
+        return len(self._active)
+
+    def upsert(self, record: dict[str, Any], now: float | None = None) -> None:
+        """Insert or replace a record by alarmCode."""
+        key = _alarm_key(record)
+        self._records[key] = record
+        self._cleared.pop(key, None)
+        if is_alarm_active(record):
+            self._active.add(key)
+        else:
+            self._active.discard(key)
+            self._cleared[key] = time.monotonic() if now is None else now
+        self.view = None
+
+    def replace_all(self, records, now: float | None = None) -> None:
+        """Replace the store contents with an authoritative snapshot (a poll)."""
+        self._records.clear()
+        self._active.clear()
+        self._cleared.clear()
+        for record in records:
+            if isinstance(record, dict):
+                self.upsert(record, now)
+        self.evict(now)
+        self.view = None
+
+    def evict(self, now: float | None = None) -> None:
+        """Drop cleared records past the TTL, then the oldest beyond the cap."""
+        cleared = self._cleared
+        if not cleared:
+            return
+        cutoff = (time.monotonic() if now is None else now) - self._ttl
+        while cleared:
+            key, cleared_at = next(iter(cleared.items()))
+            if cleared_at >= cutoff and len(cleared) <= self._max_cleared:
+                break
+            cleared.popitem(last=False)
+            del self._records[key]
+            self.view = None
+
+    def records(self) -> list[dict[str, Any]]:
+        """Return the stored records as a list (cached until the next change)."""
+        if self.view is None:
+            self.view = list(self._records.values())
+        return self.view
+
+
+def get_alarm_store(dev_data: dict[str, Any]) -> HyxiAlarmStore:
+    """Return the alarm store for a device's coordinator data.
+
+    The store is created on first use. If dev_data["alarms"] was replaced
+    by something other than the store itself (a fresh poll snapshot, cached
+    data), the store is reseeded from it and the list normalized to the
+    store's bounded view.
+    """
+    alarms = dev_data.get("alarms")
+    store = dev_data.get(_STORE_KEY)
+    if store is None:
+        store = dev_data[_STORE_KEY] = HyxiAlarmStore()
+    if alarms is not store.view:
+        store.replace_all(alarms or ())
+        if alarms is not None:
+            dev_data["alarms"] = store.records()
+    return store
@@ -20,6 +20,7 @@ from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 from hyxi_cloud_api import VPP_ACTIVE_MODES
 
+from .alarms import get_alarm_store
 from .const import (
     BASE_URL_DEFAULT,
     CONF_EM_ENABLED,
@@ -36,8 +37,6 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
-ACTIVE_ALARM_STATES = {"0", "1", "2", 0, 1, 2}
-
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -209,19 +208,12 @@ class HyxiDeviceAlarmSensor(
 
     def _update_internal_state(self) -> None:
         """Process alarm states once per update."""
-        self._alarms = (self.coordinator.data.get(self.sn) or {}).get("alarms") or []
+        store = get_alarm_store(self.coordinator.data.get(self.sn) or {})
+        self._alarms = store.records()
 
-        active_states = ACTIVE_ALARM_STATES
+        # The store tracks active alarms incrementally; no per-update rescan.
         old_count = self._active_alarms_count
-        self._active_alarms_count = sum(
-            1
-            for a in self._alarms
-            if (
-                a.get("alarmState") in active_states
-                or a.get("alarmstate") in active_states
-            )
-            and not (a.get("endTime") or a.get("endtime"))
-        )
+        self._active_alarms_count = store.active_count
         if self._active_alarms_count != old_count:
             _LOGGER.debug(
                 "Device alarm %s: active_alarms %d -> %d",
@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from typing import TYPE_CHECKING
 
 from homeassistant.components.button import ButtonEntity
@@ -22,7 +23,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from hyxi_cloud_api import HyxiApiClient
 
-from .binary_sensor import ACTIVE_ALARM_STATES
+from .alarms import ACTIVE_ALARM_STATES
 from .const import (
     CONF_ENABLE_PUSH,
     DOMAIN,
@@ -271,6 +272,7 @@ class HyxiModeButton(CoordinatorEntity["HyxiDataUpdateCoordinator"], ButtonEntit
                 await client.set_mode_discharge(self._sn, watts)
             elif self._mode == "self_consume":
                 await client.set_mode_self_consume(self._sn)
+            _spend_command_budget(self.coordinator, self._sn)
             _note_manual_mode(self.coordinator, self._sn, self._mode)
             _LOGGER.info("Mode '%s' command sent to %s", self._mode, mask_sn(self._sn))
             await self.coordinator.async_request_refresh()
@@ -324,6 +326,7 @@ class HyxiPeakShavingButton(
                 self.coordinator, self._sn, self._option
             )
             await client.set_peak_shaving(self._sn, self._option)
+            _spend_command_budget(self.coordinator, self._sn)
             _note_manual_mode(self.coordinator, self._sn, self._option)
             _LOGGER.info(
                 "Peak shaving '%s' command sent to %s", self._option, mask_sn(self._sn)
@@ -378,6 +381,14 @@ def _get_power_value(hass: HomeAssistant, sn: str, direction: str) -> int:
     return 100
 
 
+def _spend_command_budget(coordinator, sn: str) -> None:
+    """Count a manual mode command against the Energy Manager's budget.
+
+    A user's command is never refused; it only leaves less for the EM.
+    """
+    coordinator.command_budget.acquire(sn, time.monotonic(), priority=True)
+
+
 def _note_manual_mode(coordinator, sn: str, mode: str) -> None:
     """Track the last user-sent inverter mode for battery protection telemetry."""
     if controller := _get_protection_controller(coordinator, sn):
@@ -0,0 +1,107 @@
+"""PI control of the solar charge power.
+
+The Energy Manager's default charge tuning (decision.solar_tune) moves
+the charge power in hand-tuned steps: up by the export beyond the charge
+margin, down by at most half per tick, with a bottomout counter at the
+100 W floor. Each step reacts to the latest P1 reading alone, so a noisy
+P1 makes it hunt up and down and spend the command budget doing so.
+
+track_p1() is the alternative: a PI controller that drives the smoothed
+P1 (the engine's rolling average) to a setpoint.
+
+* Feed-forward: the charge power that would put P1 on the setpoint if
+  the inverter's own readings were exact, solar - home_load + setpoint.
+* Proportional and integral terms on the P1 error take out what the
+  feed-forward gets wrong (loads the inverter does not see).
+* The gains are small: the rolling average lags P1 by up to its window,
+  and the cloud's home load by up to a poll, so a load step shows up in
+  the error well after the feed-forward has followed it. For the same
+  reason the integral takes in at most ERROR_CLIP watts of error, so a
+  step winds it up slowly while a steady offset is still worked off.
+* Anti-windup: the output is clamped to the charge range, and the
+  integral stops growing in the direction the output is clamped in.
+* The output is quantized to the power change threshold and holds the
+  current power until it is a full step away, so P1 noise inside one
+  step changes nothing. Within half a step of the setpoint
+  the integral rests: the quantized output cannot get P1 any closer,
+  and integrating that remainder would only walk the output back and
+  forth between two neighbouring steps.
+
+Gains are per watt of P1 error; the integral gain is per second, so the
+controller behaves the same whatever the tick interval.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+# Watts of charge per watt of P1 error
+KP = 0.1
+# Watts of charge per watt of P1 error per second
+KI = 0.005
+# Largest P1 error (W) the integral takes in
+ERROR_CLIP = 200.0
+# Longest interval integrated in one step (a late tick is not a big kick)
+MAX_DT = 30.0
+# Ticks further apart than this start the controller afresh
+RESET_AFTER = 120.0
+
+
+class PIOutput(NamedTuple):
+    """One controller step."""
+
+    power: float  # Charge power to command, quantized and clamped
+    integral: float  # Integral term for the next step
+    saturated: int  # -1 at the low clamp, 1 at the high clamp, else 0
+
+
+def feed_forward(solar: float, home_load: float, setpoint: float) -> float:
+    """Charge power that would put P1 on the setpoint."""
+    return solar - home_load + setpoint
+
+
+def quantize(power: float, step: float) -> float:
+    """Round power to a multiple of step (step <= 0: unchanged)."""
+    if step <= 0:
+        return power
+    return round(power / step) * step
+
+
+def track_p1(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+    setpoint: float,
+    p1_avg: float,
+    feed: float,
+    integral: float,
+    dt: float,
+    low: float,
+    high: float,
+    step: float,
+    current: float | None = None,
+) -> PIOutput:
+    """Return the charge power that moves p1_avg towards setpoint.
+
+    P1 is positive when importing, and more charge power means more
+    import, so an import above the setpoint lowers the output. The
+    current power is kept until the output is a full step away from it.
+    """
+    error = setpoint - p1_avg
+    dt = min(max(dt, 0.0), MAX_DT)
+    if abs(error) <= step / 2:
+        dt = 0.0
+    grown = integral + KI * min(max(error, -ERROR_CLIP), ERROR_CLIP) * dt
+    raw = feed + KP * error + grown
+    saturated = 0
+    if raw > high:
+        saturated = 1
+    elif raw < low:
+        saturated = -1
+    # Conditional integration: never wind further into a clamp
+    if saturated * error > 0:
+        grown = integral
+        raw = feed + KP * error + grown
+    high = max(high, low)
+    if current is not None and abs(raw - current) < step:
+        power = min(max(current, low), high)
+    else:
+        power = min(max(quantize(raw, step), low), high)
+    return PIOutput(power, grown, saturated)
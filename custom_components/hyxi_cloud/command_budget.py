@@ -0,0 +1,155 @@
+"""Rate budget for cloud control commands.
+
+HYXI's OpenAPI rate-limits its control endpoints. The Energy Manager can
+send a mode switch every cooldown and a power adjustment every power
+adjust cooldown, battery protection and the mode buttons add their own
+commands, and a burst of them ends in ControlErrors.
+
+CommandBudget keeps token buckets: one per inverter SN and one shared
+by the whole account. A command spends a token from its SN's bucket and
+from the account's. Ordinary commands (the Energy Manager's) leave a small
+reserve in each bucket untouched and are refused when only the reserve
+is left. Priority commands (battery protection, a user pressing a
+button) are never refused: they take the reserve first and may overdraw
+the buckets, which only delays the Energy Manager until they refill.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+
+class Quota(NamedTuple):
+    """Burst size and sustained rate of a token bucket."""
+
+    burst: float  # commands
+    per_hour: float  # commands refilled per hour
+
+
+# One inverter: a burst of 6, then one command every 20 s
+SN_QUOTA = Quota(burst=6, per_hour=180)
+# The whole account: a burst of 20, then one command every 6 s
+ACCOUNT_QUOTA = Quota(burst=20, per_hour=600)
+# Tokens per bucket that only priority commands may take
+PRIORITY_RESERVE = 2
+
+
+class TokenBucket:
+    """Tokens refilled at a steady rate up to a burst size."""
+
+    __slots__ = ("_rate", "_updated", "burst", "tokens")
+
+    def __init__(self, quota: Quota) -> None:
+        """Initialize a full bucket."""
+        self.burst = quota.burst
+        self._rate = quota.per_hour / 3600
+        self.tokens = float(quota.burst)
+        self._updated: float | None = None
+
+    def refill(self, now: float) -> float:
+        """Add the tokens earned since the last refill; return the level."""
+        if self._updated is not None and now > self._updated:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self._updated) * self._rate
+            )
+        self._updated = now
+        return self.tokens
+
+    def eta(self, level: float) -> float:
+        """Seconds until the bucket holds level tokens, from the last refill."""
+        if self.tokens >= level:
+            return 0.0
+        return (level - self.tokens) / self._rate
+
+
+class CommandBudget:
+    """Per-inverter and per-account budget of control commands."""
+
+    __slots__ = (
+        "_account",
+        "_buckets",
+        "_reserve",
+        "_sn_quota",
+        "granted",
+        "overdrawn",
+        "refused",
+    )
+
+    def __init__(
+        self,
+        sn_quota: Quota = SN_QUOTA,
+        account_quota: Quota = ACCOUNT_QUOTA,
+        reserve: float = PRIORITY_RESERVE,
+    ) -> None:
+        """Initialize full buckets for the account and, lazily, each SN."""
+        self._sn_quota = sn_quota
+        self._account = TokenBucket(account_quota)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._reserve = reserve
+        self.granted: Counter[str] = Counter()
+        self.refused: Counter[str] = Counter()
+        # Priority commands sent with their buckets already empty
+        self.overdrawn = 0
+
+    def _levels(self, sn: str, now: float) -> tuple[TokenBucket, TokenBucket]:
+        """The SN's and the account's buckets, refilled to now."""
+        bucket = self._buckets.get(sn)
+        if bucket is None:
+            bucket = self._buckets[sn] = TokenBucket(self._sn_quota)
+        bucket.refill(now)
+        self._account.refill(now)
+        return bucket, self._account
+
+    def acquire(self, sn: str, now: float, *, priority: bool = False) -> bool:
+        """Spend one command for sn; False if an ordinary one must wait."""
+        buckets = self._levels(sn, now)
+        level = min(bucket.tokens for bucket in buckets)
+        if level < 1 + self._reserve and not priority:
+            self.refused[sn] += 1
+            return False
+        if level < 1:
+            self.overdrawn += 1
+        for bucket in buckets:
+            bucket.tokens -= 1
+        self.granted[sn] += 1
+        return True
+
+    def available(self, sn: str, now: float) -> int:
+        """Ordinary commands sn may send right now."""
+        level = min(bucket.tokens for bucket in self._levels(sn, now))
+        return max(0, math.floor(level - self._reserve))
+
+    def retry_after(self, sn: str, now: float) -> float:
+        """Seconds until sn may send an ordinary command again."""
+        return max(bucket.eta(1 + self._reserve) for bucket in self._levels(sn, now))
+
+    def usage(self, sn: str, now: float) -> dict[str, Any]:
+        """Return the levels and counters that concern sn."""
+        bucket, account = self._levels(sn, now)
+        return {
+            "tokens": round(bucket.tokens, 2),
+            "account_tokens": round(account.tokens, 2),
+            "retry_after_s": round(self.retry_after(sn, now), 1),
+            "granted": self.granted[sn],
+            "refused": self.refused[sn],
+        }
+
+    def as_diagnostics(
+        self, now: float, mask: Callable[[str], str] = str
+    ) -> dict[str, Any]:
+        """Return the levels and counters of all SNs, named by mask(sn)."""
+        return {
+            "account_tokens": round(self._account.refill(now), 2),
+            "overdrawn": self.overdrawn,
+            "inverters": {
+                mask(sn): {
+                    "tokens": round(bucket.refill(now), 2),
+                    "granted": self.granted[sn],
+                    "refused": self.refused[sn],
+                }
+                for sn, bucket in self._buckets.items()
+            },
+        }
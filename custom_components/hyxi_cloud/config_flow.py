@@ -20,18 +20,38 @@ from .const import (
     CONF_EM_BATTERY_OVERRIDE,
     CONF_EM_DRY_RUN,
     CONF_EM_ENABLED,
+    CONF_EM_FLEET_SNS,
     CONF_EM_FORECAST_ENTITY,
     CONF_EM_FORECAST_POWER_ENTITY,
     CONF_EM_INVERTER_SN,
     CONF_EM_LOOP_INTERVAL,
     CONF_EM_P1_ENTITY,
     CONF_ENABLE_PUSH,
+    CONF_OUTLIER_FILTER,
+    CONF_PUSH_DOWNSAMPLE,
     CONF_PUSH_RATE,
+    CONF_PUSH_STATUS_INTERVAL,
     CONF_PUSH_URL,
     CONF_REGION,
     CONF_SECRET_KEY,
+    CONF_TELEMETRY_TRACE,
+    CONF_THROTTLE_CURRENT_DEADBAND,
+    CONF_THROTTLE_MAX_AGE,
+    CONF_THROTTLE_MIN_INTERVAL,
+    CONF_THROTTLE_POWER_DEADBAND,
+    CONF_THROTTLE_RELATIVE_DEADBAND,
+    CONF_THROTTLE_VOLTAGE_DEADBAND,
+    CONF_WRITE_THROTTLE,
+    DEFAULT_PUSH_DOWNSAMPLE,
     DEFAULT_PUSH_RATE,
+    DEFAULT_PUSH_STATUS_INTERVAL,
     DEFAULT_REGION,
+    DEFAULT_THROTTLE_CURRENT_DEADBAND,
+    DEFAULT_THROTTLE_MAX_AGE,
+    DEFAULT_THROTTLE_MIN_INTERVAL,
+    DEFAULT_THROTTLE_POWER_DEADBAND,
+    DEFAULT_THROTTLE_RELATIVE_DEADBAND,
+    DEFAULT_THROTTLE_VOLTAGE_DEADBAND,
     DOMAIN,
     MICRO_ESS_CONTROL_SUPPORTED,
     default_region_for_country,
@@ -41,6 +61,16 @@ from .const import (
     resolve_base_url,
 )
 
+# Write throttling step fields: option -> (default, maximum)
+THROTTLE_OPTION_DEFAULTS: dict[str, tuple[float, float]] = {
+    CONF_THROTTLE_POWER_DEADBAND: (DEFAULT_THROTTLE_POWER_DEADBAND, 1000),
+    CONF_THROTTLE_VOLTAGE_DEADBAND: (DEFAULT_THROTTLE_VOLTAGE_DEADBAND, 50),
+    CONF_THROTTLE_CURRENT_DEADBAND: (DEFAULT_THROTTLE_CURRENT_DEADBAND, 10),
+    CONF_THROTTLE_RELATIVE_DEADBAND: (DEFAULT_THROTTLE_RELATIVE_DEADBAND, 50),
+    CONF_THROTTLE_MIN_INTERVAL: (DEFAULT_THROTTLE_MIN_INTERVAL, 3600),
+    CONF_THROTTLE_MAX_AGE: (DEFAULT_THROTTLE_MAX_AGE, 3600),
+}
+
 REGION_OPTIONS: list[selector.SelectOptionDict] = [
     {"value": "eu", "label": "Europe"},
     {"value": "na", "label": "North America"},
@@ -56,6 +86,14 @@ PUSH_RATE_OPTIONS: list[selector.SelectOptionDict] = [
     {"value": "300", "label": "5 minutes"},
 ]
 
+# Seconds; "0" publishes every push to the metric sensors
+PUSH_DOWNSAMPLE_OPTIONS: list[selector.SelectOptionDict] = [
+    {"value": "0", "label": "Off"},
+    {"value": "30", "label": "30 seconds"},
+    {"value": "60", "label": "1 minute"},
+    {"value": "300", "label": "5 minutes"},
+]
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -81,28 +119,41 @@ def _build_em_schema(
     options: Mapping[str, Any], sn_options: list[str], current_sn: str
 ) -> vol.Schema:
     """Build the Energy Manager schema."""
-    return vol.Schema(
-        {
-            vol.Required(
-                CONF_EM_P1_ENTITY,
-                default=options.get(CONF_EM_P1_ENTITY, ""),
-            ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
-            vol.Optional(
-                CONF_EM_FORECAST_ENTITY,
-                default=options.get(CONF_EM_FORECAST_ENTITY, ""),
-            ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
+    fields: dict[Any, Any] = {
+        vol.Required(
+            CONF_EM_P1_ENTITY,
+            default=options.get(CONF_EM_P1_ENTITY, ""),
+        ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
+        vol.Optional(
+            CONF_EM_FORECAST_ENTITY,
+            default=options.get(CONF_EM_FORECAST_ENTITY, ""),
+        ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
+        vol.Optional(
+            CONF_EM_FORECAST_POWER_ENTITY,
+            default=options.get(CONF_EM_FORECAST_POWER_ENTITY, ""),
+        ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
+        vol.Required(CONF_EM_INVERTER_SN, default=current_sn): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=sn_options,
+                mode=selector.SelectSelectorMode.DROPDOWN,
+            )
+        ),
+    }
+    if len(sn_options) > 1:
+        # Further inverters on the same meter, managed together
+        fields[
             vol.Optional(
-                CONF_EM_FORECAST_POWER_ENTITY,
-                default=options.get(CONF_EM_FORECAST_POWER_ENTITY, ""),
-            ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor")),
-            vol.Required(
-                CONF_EM_INVERTER_SN, default=current_sn
-            ): selector.SelectSelector(
-                selector.SelectSelectorConfig(
-                    options=sn_options,
-                    mode=selector.SelectSelectorMode.DROPDOWN,
-                )
-            ),
+                CONF_EM_FLEET_SNS, default=list(options.get(CONF_EM_FLEET_SNS) or [])
+            )
+        ] = selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=sn_options,
+                multiple=True,
+                mode=selector.SelectSelectorMode.LIST,
+            )
+        )
+    fields.update(
+        {
             vol.Optional(
                 CONF_EM_BATTERY_OVERRIDE,
                 default=options.get(CONF_EM_BATTERY_OVERRIDE, False),
@@ -137,6 +188,7 @@ def _build_em_schema(
             ): selector.BooleanSelector(),
         }
     )
+    return vol.Schema(fields)
 
 
 class HyxiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call-arg]
@@ -312,13 +364,30 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
                     "enable_battery_control"
                 ]
 
+            if CONF_TELEMETRY_TRACE in user_input:
+                self._options[CONF_TELEMETRY_TRACE] = user_input[CONF_TELEMETRY_TRACE]
+
+            if CONF_OUTLIER_FILTER in user_input:
+                self._options[CONF_OUTLIER_FILTER] = user_input[CONF_OUTLIER_FILTER]
+
+            if CONF_WRITE_THROTTLE in user_input:
+                self._options[CONF_WRITE_THROTTLE] = user_input[CONF_WRITE_THROTTLE]
+
             if CONF_ENABLE_PUSH in user_input:
                 self._options[CONF_ENABLE_PUSH] = user_input[CONF_ENABLE_PUSH]
             if CONF_PUSH_RATE in user_input:
                 # SelectSelector always returns strings; coerce back to int for SDK
                 self._options[CONF_PUSH_RATE] = int(user_input[CONF_PUSH_RATE])
+            if CONF_PUSH_DOWNSAMPLE in user_input:
+                self._options[CONF_PUSH_DOWNSAMPLE] = int(
+                    user_input[CONF_PUSH_DOWNSAMPLE]
+                )
             if CONF_PUSH_URL in user_input:
                 self._options[CONF_PUSH_URL] = user_input[CONF_PUSH_URL]
+            if CONF_PUSH_STATUS_INTERVAL in user_input:
+                self._options[CONF_PUSH_STATUS_INTERVAL] = user_input[
+                    CONF_PUSH_STATUS_INTERVAL
+                ]
 
             enable_em = self._options.get(CONF_EM_ENABLED, False)
             if "enable_energy_manager" in user_input:
@@ -348,27 +417,37 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
 
             if enable_em:
                 self._options[CONF_EM_ENABLED] = True
-                return await self.async_step_energy_manager()
-
-            # EM disabled — remove EM keys if they were previously set
-            self._options.pop(CONF_EM_ENABLED, None)
-            for key in (
-                CONF_EM_INVERTER_SN,
-                CONF_EM_P1_ENTITY,
-                CONF_EM_FORECAST_ENTITY,
-                CONF_EM_FORECAST_POWER_ENTITY,
-                CONF_EM_BATTERY_OVERRIDE,
-                CONF_EM_BATTERY_CAPACITY,
-                CONF_EM_LOOP_INTERVAL,
-                CONF_EM_DRY_RUN,
-            ):
-                self._options.pop(key, None)
+            else:
+                # EM disabled — remove EM keys if they were previously set
+                self._options.pop(CONF_EM_ENABLED, None)
+                for key in (
+                    CONF_EM_INVERTER_SN,
+                    CONF_EM_FLEET_SNS,
+                    CONF_EM_P1_ENTITY,
+                    CONF_EM_FORECAST_ENTITY,
+                    CONF_EM_FORECAST_POWER_ENTITY,
+                    CONF_EM_BATTERY_OVERRIDE,
+                    CONF_EM_BATTERY_CAPACITY,
+                    CONF_EM_LOOP_INTERVAL,
+                    CONF_EM_DRY_RUN,
+                ):
+                    self._options.pop(key, None)
 
             # Push disabled — remove push keys if they were previously set
             if not self._options.get(CONF_ENABLE_PUSH, False):
                 self._options.pop(CONF_PUSH_RATE, None)
                 self._options.pop(CONF_PUSH_URL, None)
+                self._options.pop(CONF_PUSH_STATUS_INTERVAL, None)
+                self._options.pop(CONF_PUSH_DOWNSAMPLE, None)
 
+            if self._options.get(CONF_WRITE_THROTTLE, False):
+                return await self.async_step_write_throttle()
+            # Throttling disabled — remove its settings
+            for key in THROTTLE_OPTION_DEFAULTS:
+                self._options.pop(key, None)
+
+            if enable_em:
+                return await self.async_step_energy_manager()
             return self.async_create_entry(title="", data=self._options)
 
         # Pull current values or defaults
@@ -388,6 +467,21 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_BACK_DISCOVERY,
                 default=options.get(CONF_BACK_DISCOVERY, False),
             ): selector.BooleanSelector(),
+            # Toggle for the diagnostics telemetry trace buffer
+            vol.Optional(
+                CONF_TELEMETRY_TRACE,
+                default=options.get(CONF_TELEMETRY_TRACE, False),
+            ): selector.BooleanSelector(),
+            # Toggle for the measurement sensor outlier filter
+            vol.Optional(
+                CONF_OUTLIER_FILTER,
+                default=options.get(CONF_OUTLIER_FILTER, False),
+            ): selector.BooleanSelector(),
+            # Toggle for the sensor write throttling step
+            vol.Optional(
+                CONF_WRITE_THROTTLE,
+                default=options.get(CONF_WRITE_THROTTLE, False),
+            ): selector.BooleanSelector(),
             # Toggle for Real-Time Push
             vol.Optional(
                 CONF_ENABLE_PUSH,
@@ -415,6 +509,27 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
                     default=options.get(CONF_PUSH_URL, ""),
                 )
             ] = selector.TextSelector()
+            schema_dict[
+                vol.Optional(
+                    CONF_PUSH_STATUS_INTERVAL,
+                    default=options.get(
+                        CONF_PUSH_STATUS_INTERVAL, DEFAULT_PUSH_STATUS_INTERVAL
+                    ),
+                )
+            ] = vol.All(vol.Coerce(int), vol.Range(min=0, max=3600))
+            schema_dict[
+                vol.Required(
+                    CONF_PUSH_DOWNSAMPLE,
+                    default=str(
+                        options.get(CONF_PUSH_DOWNSAMPLE, DEFAULT_PUSH_DOWNSAMPLE)
+                    ),
+                )
+            ] = selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=PUSH_DOWNSAMPLE_OPTIONS,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            )
 
         # Show the device control toggle for any control-capable device
         # (hybrid inverter, all-in-one; also micro_ess/HALO once
@@ -440,6 +555,15 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
         """Save the energy manager user input."""
         self._options[CONF_EM_P1_ENTITY] = user_input[CONF_EM_P1_ENTITY]
         self._options[CONF_EM_INVERTER_SN] = user_input[CONF_EM_INVERTER_SN]
+        fleet_sns = [
+            sn
+            for sn in user_input.get(CONF_EM_FLEET_SNS) or []
+            if sn != user_input[CONF_EM_INVERTER_SN]
+        ]
+        if fleet_sns:
+            self._options[CONF_EM_FLEET_SNS] = fleet_sns
+        else:
+            self._options.pop(CONF_EM_FLEET_SNS, None)
         self._options[CONF_EM_BATTERY_OVERRIDE] = user_input.get(
             CONF_EM_BATTERY_OVERRIDE, False
         )
@@ -458,6 +582,27 @@ class HyxiOptionsFlowHandler(config_entries.OptionsFlow):
         self._options[CONF_EM_LOOP_INTERVAL] = user_input.get(CONF_EM_LOOP_INTERVAL, 15)
         self._options[CONF_EM_DRY_RUN] = user_input.get(CONF_EM_DRY_RUN, False)
 
+    async def async_step_write_throttle(self, user_input=None):
+        """Configure deadbands and intervals for throttled sensor writes."""
+        if user_input is not None:
+            for key in THROTTLE_OPTION_DEFAULTS:
+                if key in user_input:
+                    self._options[key] = user_input[key]
+            if self._options.get(CONF_EM_ENABLED, False):
+                return await self.async_step_energy_manager()
+            return self.async_create_entry(title="", data=self._options)
+
+        options = self._options if self._options else self._config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(key, default=options.get(key, default)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=maximum)
+                )
+                for key, (default, maximum) in THROTTLE_OPTION_DEFAULTS.items()
+            }
+        )
+        return self.async_show_form(step_id="write_throttle", data_schema=schema)
+
     async def async_step_energy_manager(self, user_input=None):
         """Configure the Energy Manager -- P1 entity, forecast, inverter SN."""
         _LOGGER.debug(
@@ -1,6 +1,7 @@
 """Constants for the HYXI Cloud integration."""
 
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -80,6 +81,42 @@ CONF_ENABLE_PUSH = "enable_realtime_push"
 CONF_PUSH_RATE = "realtime_push_rate"
 CONF_PUSH_URL = "realtime_push_url"
 DEFAULT_PUSH_RATE = 10  # 10 seconds (converted to ms at SDK call site)
+# How long setup waits on push/alarm subscription before flagging an error.
+# In-flight subscribe calls are never cancelled by it (see __init__.py).
+SUBSCRIPTION_SETUP_TIMEOUT = 90  # seconds
+# Minimum time between state writes of the last data/alarm push timestamp
+# sensors; pushes can arrive every few seconds.
+CONF_PUSH_STATUS_INTERVAL = "push_status_interval"
+DEFAULT_PUSH_STATUS_INTERVAL = 60  # seconds
+# Bucket (seconds) over which pushed metrics are aggregated before metric
+# sensors publish them (see downsample.py); 0 publishes every push.
+CONF_PUSH_DOWNSAMPLE = "push_downsample"
+DEFAULT_PUSH_DOWNSAMPLE = 0
+
+# Telemetry trace buffer (see telemetry.py): when enabled, sampled telemetry
+# goes to a ring buffer downloadable via diagnostics instead of the debug log.
+CONF_TELEMETRY_TRACE = "telemetry_trace"
+TELEMETRY_TRACE_SIZE = 200  # entries kept
+TELEMETRY_TRACE_MIN_INTERVAL = 60  # seconds between entries per source + device
+TELEMETRY_TRACE_SAMPLE_EVERY = 1  # keep every Nth eligible payload
+
+# State write throttling for power/voltage/current sensors (see throttle.py)
+CONF_WRITE_THROTTLE = "write_throttle"
+CONF_THROTTLE_POWER_DEADBAND = "throttle_power_deadband"
+CONF_THROTTLE_VOLTAGE_DEADBAND = "throttle_voltage_deadband"
+CONF_THROTTLE_CURRENT_DEADBAND = "throttle_current_deadband"
+CONF_THROTTLE_RELATIVE_DEADBAND = "throttle_relative_deadband"
+CONF_THROTTLE_MIN_INTERVAL = "throttle_min_interval"
+CONF_THROTTLE_MAX_AGE = "throttle_max_age"
+DEFAULT_THROTTLE_POWER_DEADBAND = 10.0  # W
+DEFAULT_THROTTLE_VOLTAGE_DEADBAND = 1.0  # V
+DEFAULT_THROTTLE_CURRENT_DEADBAND = 0.1  # A
+DEFAULT_THROTTLE_RELATIVE_DEADBAND = 2.0  # % of the last written value
+DEFAULT_THROTTLE_MIN_INTERVAL = 0  # seconds
+DEFAULT_THROTTLE_MAX_AGE = 300  # seconds; a suppressed value is written after this
+
+# Opt-in rolling-median/rate outlier filter for measurement sensors (see filters.py)
+CONF_OUTLIER_FILTER = "outlier_filter"
 
 NULL_VALUES = {"", "null", "none", "na", "--"}
 
@@ -185,12 +222,9 @@ def mask_url(url: str | None) -> str:
         return "https://[MASKED_DOMAIN]/api/webhook/hyxi_cloud_***"
 
 
-def mask_sensitive_key_value(key: str, value: Any) -> Any:
-    """Check if key contains sensitive info (SN, plant ID, IMEI, alias, address, etc.) and mask it."""
-    if value is None:
-        return None
-
-    sensitive_exact = {
+# Lower-cased keys whose values identify a user, plant or device.
+SENSITIVE_EXACT_KEYS = frozenset(
+    {
         "alias",
         "plantaddress",
         "plantname",
@@ -204,16 +238,30 @@ def mask_sensitive_key_value(key: str, value: Any) -> Any:
         "batsn",
         "emssn",
     }
+)
+# Credentials that must never reach a log line or diagnostics verbatim.
+SECRET_KEYS = frozenset({"token", "access_token", "refresh_token", "password"})
 
+
+@lru_cache(maxsize=1024)
+def is_sensitive_key(key: str) -> bool:
+    """Return True if values under this key must be masked (cached per key)."""
     key_lower = str(key).lower()
-    if (
-        key_lower in sensitive_exact
+    return (
+        key_lower in SENSITIVE_EXACT_KEYS
+        or key_lower in SECRET_KEYS
         or key_lower.endswith("sn")
         or "plantid" in key_lower
         or "imei" in key_lower
-    ):
-        return mask_sn(str(value))
+    )
+
 
+def mask_sensitive_key_value(key: str, value: Any) -> Any:
+    """Check if key contains sensitive info (SN, plant ID, IMEI, alias, address, etc.) and mask it."""
+    if value is None:
+        return None
+    if is_sensitive_key(key):
+        return mask_sn(str(value))
     return value
 
 
@@ -228,6 +276,18 @@ def get_raw_device_code(dev_data: dict) -> str:
     )
 
 
+def get_sample_timestamp(metrics: dict) -> float | None:
+    """Return a metrics snapshot's collectTime as epoch seconds, if present."""
+    value = metrics.get("collectTime")
+    if value is None:
+        return None
+    try:
+        ts = float(value)
+    except ValueError, TypeError:
+        return None
+    return ts / 1000 if ts > 9999999999 else ts
+
+
 def get_software_version(dev_data: dict) -> str | None:
     """Extract and format the software version for a device."""
     sw_version = dev_data.get("sw_version")
@@ -358,6 +418,8 @@ PLATFORMS: list[Platform] = [
 # Energy Manager option keys
 CONF_EM_ENABLED = "em_enabled"
 CONF_EM_INVERTER_SN = "em_inverter_sn"
+# Further inverters behind the same P1 meter, managed with the one above
+CONF_EM_FLEET_SNS = "em_fleet_sns"
 CONF_EM_P1_ENTITY = "em_p1_entity"
 CONF_EM_FORECAST_ENTITY = "em_forecast_entity"
 CONF_EM_FORECAST_POWER_ENTITY = "em_forecast_power_entity"
@@ -383,6 +445,7 @@ EM_DEFAULTS: dict[str, int | float] = {
     "bottomout_cooldown": 300,
     "p1_smoothing_period": 60,
     "max_grid_export": 0,
+    "p1_setpoint": -50,
 }
 EM_LOOP_INTERVAL = 15  # seconds
 
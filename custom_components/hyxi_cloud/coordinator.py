@@ -1,6 +1,8 @@
 """DataUpdateCoordinator for HYXI Cloud."""
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import Any, TypedDict
 
@@ -14,15 +16,25 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Upda
 from homeassistant.util import dt as dt_util
 from hyxi_cloud_api import HyxiApiClient
 
+from .aggregates import FleetAggregator
+from .alarms import get_alarm_store
+from .command_budget import CommandBudget
 from .const import (
     CONF_BACK_DISCOVERY,
+    CONF_ENABLE_PUSH,
+    CONF_PUSH_DOWNSAMPLE,
+    CONF_TELEMETRY_TRACE,
     DOMAIN,
     get_raw_device_code,
+    get_sample_timestamp,
     get_software_version,
-    mask_sensitive_key_value,
     mask_sn,
     normalize_device_type,
 )
+from .device_info import DeviceInfoCache
+from .downsample import PushDownsampler
+from .telemetry import TelemetryTrace, telemetry_active, trace_telemetry
+from .throttle import WriteThrottleStats
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -39,6 +51,8 @@ class HyxiMetadata(TypedDict):
 
 CACHE_MAX_AGE = timedelta(days=7)
 
+_MISSING = object()
+
 
 def _extract_cached_devices(raw: dict | None) -> dict | None:
     """Extract the device dict from cache storage, handling old and new formats."""
@@ -101,6 +115,12 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
         self.webhook_id: str | None = None
         self.push_url: str | None = None
         self.last_push_received: datetime | None = None
+        # Per SN: metric key -> epoch time it was last set by a push. Used
+        # to keep pushed values that are newer than a poll's collectTime.
+        self._push_metric_times: dict[str, dict[str, float]] = {}
+        # SNs whose last poll brought nothing newer; their metrics dict is
+        # reused as-is so entities can skip the update entirely.
+        self.poll_unchanged: set[str] = set()
         self.push_status: str = "inactive"
         self.push_error: str | None = None
 
@@ -111,11 +131,30 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
         self.alarm_push_url: str | None = None
         self.alarm_push_error: str | None = None
         self.alarm_last_push_received: datetime | None = None
+        # Background push/alarm subscription setup started by async_setup_entry
+        self.subscription_tasks: list[asyncio.Task] = []
 
         self.device_store: Store[dict[str, Any]] = Store(
             hass, 1, f"hyxi_cloud_devices_{entry.entry_id}"
         )
         self.known_subscription_codes: list[str] = []
+        # Device-type index and running metric aggregates (aggregates.py)
+        self.fleet = FleetAggregator()
+        # Written/suppressed counts of throttled sensor writes (throttle.py)
+        self.write_stats = WriteThrottleStats()
+        # Rate budget of control commands, per SN and account (command_budget.py)
+        self.command_budget = CommandBudget()
+        # Device info shared by each device's sensors (device_info.py)
+        self.device_infos = DeviceInfoCache()
+        # Push buckets published to the metric sensors (downsample.py)
+        self.downsampler = PushDownsampler(
+            entry.options.get(CONF_PUSH_DOWNSAMPLE, 0)
+            if entry.options.get(CONF_ENABLE_PUSH)
+            else 0
+        )
+        self.telemetry = TelemetryTrace(
+            enabled=bool(entry.options.get(CONF_TELEMETRY_TRACE, False))
+        )
 
     async def async_preload_cache(self) -> None:
         """Pre-seed coordinator.data from persistent cache before the first API call.
@@ -149,6 +188,7 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
 
     async def _async_update_data(self):
         """Fetch data and manage metadata attributes."""
+        self.poll_unchanged = set()
         # Read Discovery Toggle
         allow_discovery = self.entry.options.get(CONF_BACK_DISCOVERY, False)
         _LOGGER.debug(
@@ -218,6 +258,7 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
             self.hyxi_metadata["last_error"] = None
 
             self._merge_metrics(devices)
+            self._sync_alarm_stores(devices)
             self._log_polled_telemetry(devices)
 
             # Return pure device dictionary
@@ -237,6 +278,7 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
                         len(cached_devices),
                     )
                     self._merge_metrics(cached_devices)
+                    self._sync_alarm_stores(cached_devices)
                     await self._async_sync_device_metadata(cached_devices)
                     return cached_devices
                 if cached_devices and _is_cache_expired(raw):
@@ -256,41 +298,89 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
             self._handle_update_error(err)
             raise
 
+    def record_push(self, sn: str, previous: dict, metrics: dict) -> None:
+        """Stamp the metrics a push changed for SN with the receive time.
+
+        Keys the push left at their previous value keep their old stamp.
+        """
+        now = time.time()
+        stamps = self._push_metric_times.setdefault(sn, {})
+        for key, value in metrics.items():
+            if previous.get(key, _MISSING) != value:
+                stamps[key] = now
+        self.poll_unchanged.discard(sn)
+
     def _merge_metrics(self, devices: dict) -> None:
-        """Merge pulled metrics with existing cached metrics to preserve push-only keys."""
+        """Reconcile polled metrics with the ones already held (incl. push-only keys).
+
+        A metric last pushed after the poll's collectTime keeps its pushed
+        value; without a collectTime the poll is treated as current. Devices
+        for which the poll brought nothing newer keep their previous metrics
+        dict (no derived-metric recompute) and are flagged in poll_unchanged,
+        provided the previous refresh succeeded (availability may change).
+        """
         if not self.data:
             return
 
+        previous_ok = self.last_update_success
         for sn, dev_data in devices.items():
-            if sn in self.data:
-                existing_metrics = dict(self.data[sn].get("metrics") or {})
-                new_metrics = dev_data.get("metrics") or {}
+            if sn not in self.data:
+                continue
+            old_metrics = self.data[sn].get("metrics") or {}
+            new_metrics = dev_data.get("metrics") or {}
+            pushed = self._push_metric_times.get(sn)
+            poll_time = get_sample_timestamp(new_metrics) if pushed else None
+
+            updates = {}
+            for key, value in new_metrics.items():
+                if value is None:
+                    continue
+                if poll_time is not None and pushed.get(key, 0) > poll_time:
+                    continue
+                if old_metrics.get(key, _MISSING) != value:
+                    updates[key] = value
+
+            if not updates and old_metrics:
+                dev_data["metrics"] = old_metrics
+                if previous_ok:
+                    self.poll_unchanged.add(sn)
+                continue
 
-                # Update existing metrics with new values
-                existing_metrics.update(
-                    {k: v for k, v in new_metrics.items() if v is not None}
-                )
+            merged = dict(old_metrics)
+            merged.update(updates)
 
-                # Recalculate derived metrics on the merged dataset
-                derived = self.client.compute_derived_metrics(
-                    existing_metrics, dev_data.get("device_type_code", "")
-                )
-                existing_metrics.update(derived)
+            # Recalculate derived metrics on the merged dataset
+            derived = self.client.compute_derived_metrics(
+                merged, dev_data.get("device_type_code", "")
+            )
+            merged.update(derived)
+
+            dev_data["metrics"] = merged
 
-                dev_data["metrics"] = existing_metrics
+    @staticmethod
+    def _sync_alarm_stores(devices: dict) -> None:
+        """Seed each device's alarm store from the polled snapshot.
+
+        Done once per poll here so the alarm sensors and the alarm webhook
+        find an up-to-date, bounded store instead of each rebuilding it.
+        """
+        for dev_data in devices.values():
+            if "alarms" in dev_data:
+                get_alarm_store(dev_data)
 
     def _log_polled_telemetry(self, devices: dict) -> None:
-        """Log the polled metrics for visibility."""
+        """Trace the polled metrics for visibility."""
+        if not telemetry_active(self.telemetry, _LOGGER):
+            return
         for sn, dev_data in devices.items():
             if "metrics" in dev_data:
-                logged_metrics = {
-                    k: mask_sensitive_key_value(k, v)
-                    for k, v in dev_data["metrics"].items()
-                }
-                _LOGGER.debug(
+                trace_telemetry(
+                    self.telemetry,
+                    _LOGGER,
+                    "poll",
                     "HYXI Polled Telemetry for Device %s: %s",
-                    mask_sn(sn),
-                    logged_metrics,
+                    sn,
+                    dev_data["metrics"],
                 )
 
     def _handle_update_error(self, err: Exception) -> None:
@@ -319,6 +409,8 @@ class HyxiDataUpdateCoordinator(DataUpdateCoordinator):
             # and cache it for the individual sensors to avoid re-calculation
             sw_version = get_software_version(dev_data)
             dev_data["_sw_version_cached"] = sw_version
+            if self.device_infos.refresh(sn, dev_data, sw_version):
+                _LOGGER.debug("Device info of %s rebuilt", mask_sn(sn))
 
             device = dev_reg.async_get_device(identifiers={(DOMAIN, sn)})
             if not device:
@@ -0,0 +1,561 @@
+"""Pure decision kernel of the Energy Manager.
+
+decide() holds the Energy Manager's battery policy: given a snapshot of
+the system (DecisionState), of the EM parameters (DecisionParams), the
+engine's hysteresis counters and a monotonic clock value, it returns the
+decision label, the commands to send and the counters for the next tick.
+It reads no Home Assistant state, awaits nothing and keeps no state of
+its own, so a decision can be evaluated (and replayed, simulated or
+batched over many inverters) without a running hass.
+
+EnergyManagerEngine is the adapter around it: it snapshots entity state
+into these types, calls decide() and sends the commands to the cloud.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from .charge_control import RESET_AFTER, feed_forward, track_p1
+
+# Seconds one reading of the hysteresis counters stands for (the engine's
+# loop interval). Decisions are event-driven and can come every few
+# seconds, so the counters advance at most once per interval.
+COUNT_INTERVAL = 15.0
+
+
+@dataclass(slots=True)
+class DecisionState:
+    """Snapshot of current system state for the decision engine."""
+
+    soc: float
+    solar: float
+    p1: float
+    home_load: float
+    soc_min: float
+    soc_max: float
+    max_charge: float
+    max_discharge: float
+    is_night: bool
+    solar_producing: bool
+    night_soc_target: float
+    # Derived readings (P1 rolling average, sun and forecast)
+    p1_avg: float = 0.0
+    hours_to_sunset: float = 12.0
+    solar_covers_night: bool = True
+    # Battery power the day-ahead plan (planner.py) wants in this slot:
+    # + charge, - discharge, None without a forecast series
+    planned_power: float | None = None
+    # What the engine last told the inverter
+    current_mode: str | None = None
+    last_decision: str = ""
+    pv_curtailed: bool = False
+    charge_power: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class DecisionParams:
+    """EM parameter and feature switch values for one decision."""
+
+    battery_capacity_wh: float
+    high_load_threshold: float
+    max_grid_export: float
+    min_solar_for_charge: float
+    charge_margin: float
+    charge_entry_threshold: float
+    charge_reentry_delay: float
+    bottomout_cooldown: float
+    grid_charge_allowed: bool = False
+    export_limiting: bool = False
+    high_load_assist: bool = False
+    night_mode: bool = False
+    peak_shaving: bool = False  # Device supports PV curtailment (controlId 1021)
+    # PI charge power control (charge_control.py) instead of the step tuning
+    pi_charge_control: bool = False
+    p1_setpoint: float = -50.0
+    power_change_threshold: float = 100.0
+
+
+@dataclass(slots=True)
+class SolarConfig:
+    """Computed solar charge parameters for a single decision tick."""
+
+    min_solar_for_charge: float
+    charge_margin: float
+    charge_entry_threshold: float
+    readings_needed: int
+    sunset_urgent: bool
+
+
+class DecisionCounters(NamedTuple):
+    """Hysteresis counters carried from one decision to the next."""
+
+    charge_entry_export_count: int = 0
+    charge_bottomout_count: int = 0
+    last_charge_exit: float = 0.0
+    last_bottomout_exit: float = -999999.0
+    # PI charge power control: integral term and when it was last updated
+    charge_integral: float = 0.0
+    last_charge_tune: float = -999999.0
+    # When the entry or bottomout counter last advanced
+    last_count: float = -999999.0
+
+    @property
+    def counting(self) -> bool:
+        """Whether a count is under way and needs further readings."""
+        return self.charge_entry_export_count > 0 or self.charge_bottomout_count > 0
+
+
+class Command(NamedTuple):
+    """A command for the inverter.
+
+    action is one of set_mode (target: mode), adjust_power (target:
+    charge/discharge), curtail_pv or release_pv.
+    """
+
+    action: str
+    target: str | None = None
+    power: int | None = None
+
+
+class Decision(NamedTuple):
+    """Result of one decision."""
+
+    label: str
+    commands: tuple[Command, ...] = ()
+    counters: DecisionCounters = DecisionCounters()
+    # Counters to keep instead if the inverter refuses a command (cooldown)
+    counters_if_refused: DecisionCounters | None = None
+    # Power on the power change threshold's grid (PI control): a change of
+    # exactly one threshold step is sent, not dropped as too small
+    exact_step: bool = False
+
+
+_RELEASE_PV = (Command("release_pv"),)
+
+
+def _switch_to(s: DecisionState, mode: str, keep: tuple[str, ...] = ()) -> tuple:
+    """Set mode unless the inverter is already in it (or in one of keep)."""
+    if s.current_mode == mode or s.current_mode in keep:
+        return ()
+    return (Command("set_mode", mode),)
+
+
+def _count(c: DecisionCounters, now: float, **counts: int) -> DecisionCounters:
+    """Advance the hysteresis counters by one reading, once per COUNT_INTERVAL."""
+    if now - c.last_count < COUNT_INTERVAL:
+        return c
+    return c._replace(last_count=now, **counts)
+
+
+def _drive(s: DecisionState, mode: str, power: float) -> tuple:
+    """Switch to a charge/discharge mode, or retune it if already there."""
+    action = "adjust_power" if s.current_mode == mode else "set_mode"
+    return (Command(action, mode, int(power)),)
+
+
+def decide(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters, now: float
+) -> Decision:
+    """Return the decision for state s.
+
+    Priority order:
+      1. Safety: SOC below minimum -> emergency charge
+      2. Safety: SOC above maximum -> forced discharge
+      2b. Export limiting (single-phase) -> charge or curtail PV
+      3. Sustained high load -> battery assist or idle
+      4. Night -> self_consume until soc_min, then idle
+      4b. Night preservation -> idle if SOC <= night target
+      5. Solar optimization -> self_consume first, charge on sustained export
+    """
+    decision = soc_limits(s, p, c)
+    if decision is not None:
+        return decision
+
+    released = ()
+    if p.peak_shaving:
+        decision = export_limit(s, p, c)
+        if decision is not None:
+            return decision
+        # Export limiting switched off (or unlimited): resume production
+        if s.pv_curtailed and (not p.export_limiting or p.max_grid_export <= 0):
+            released = _RELEASE_PV
+
+    decision = high_load(s, p, c)
+    if decision is None:
+        decision = night(s, p, c)
+    if decision is None:
+        decision = solar(s, p, c, now)
+    if decision is None:
+        # Nothing applies: self_consume as safe fallback
+        fallback = ()
+        if s.current_mode in ("charge", "discharge"):
+            fallback = (Command("set_mode", "self_consume"),)
+        decision = Decision("idle_default", fallback, c)
+    if released:
+        decision = decision._replace(commands=released + decision.commands)
+    return decision
+
+
+def soc_limits(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters
+) -> Decision | None:
+    """PRIORITY 1 & 2: SOC safety limits."""
+    if s.soc <= s.soc_min:
+        if s.solar_producing:
+            charge_target = min(s.solar - 50, s.max_charge)
+            charge_target = max(charge_target, 300)
+            # Absorb grid export: if P1 negative, increase charge to
+            # capture excess solar instead of wasting it to grid
+            if s.p1 < 0:
+                charge_target = min(charge_target + abs(int(s.p1)), int(s.max_charge))
+            return Decision(
+                "emergency_solar_charge", _drive(s, "charge", charge_target), c
+            )
+
+        if p.grid_charge_allowed:
+            grid_charge_w = min(2000, int(s.max_charge))
+            return Decision(
+                "grid_charge_emergency", _drive(s, "charge", grid_charge_w), c
+            )
+        return Decision("low_soc_idle", _switch_to(s, "idle"), c)
+
+    if s.soc > s.soc_max:
+        discharge_w = max(s.p1, 1000)
+        discharge_w = min(discharge_w, s.max_discharge)
+        return Decision(
+            "forced_discharge_over_max", _drive(s, "discharge", discharge_w), c
+        )
+
+    return None
+
+
+def export_limit(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters
+) -> Decision | None:
+    """PRIORITY 2b: Export limiting (single-phase only).
+
+    Uses battery charge to absorb excess when SOC allows, and PV
+    curtailment (stop/hold) when battery is full. Three-phase devices
+    rely on existing mode controls instead.
+    """
+    if not p.peak_shaving or not p.export_limiting or p.max_grid_export <= 0:
+        return None
+    max_export = p.max_grid_export
+
+    # P1 negative = exporting; check if export exceeds limit
+    if s.p1 < -max_export:
+        if s.soc < s.soc_max:
+            # Battery has room — charge to absorb excess
+            excess = abs(s.p1) - max_export
+            charge_target = min(excess, s.max_charge)
+            charge_target = max(charge_target, 300)
+            released = _RELEASE_PV if s.pv_curtailed else ()
+            return Decision(
+                "export_limit_charge",
+                released + _drive(s, "charge", charge_target),
+                c,
+            )
+
+        # Battery full — curtail PV via peak shaving stop
+        curtail = () if s.pv_curtailed else (Command("curtail_pv"),)
+        return Decision("export_limit_pv_curtail", curtail, c)
+
+    # Export within limit — release curtailment if active
+    if s.pv_curtailed:
+        return Decision("export_limit_pv_resume", _RELEASE_PV, c)
+
+    # Were charging due to export limit but export is now within limit
+    if s.current_mode == "charge" and s.last_decision == "export_limit_charge":
+        return Decision("export_limit_ok", (Command("set_mode", "self_consume"),), c)
+
+    return None
+
+
+def high_load(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters
+) -> Decision | None:
+    """PRIORITY 3: Sustained high load."""
+    if not p.high_load_assist or s.home_load <= p.high_load_threshold:
+        return None
+
+    high_load_wh = s.max_discharge * 0.5
+    capacity = p.battery_capacity_wh
+    soc_cost = (high_load_wh / capacity) * 100 if capacity > 0 else 100
+
+    if (s.soc - soc_cost) > s.night_soc_target:
+        return Decision("high_load_battery_assist", _switch_to(s, "self_consume"), c)
+    return Decision("high_load_grid_only", _switch_to(s, "idle"), c)
+
+
+def night(s: DecisionState, p: DecisionParams, c: DecisionCounters) -> Decision | None:
+    """PRIORITY 4 & 4b: Night mode."""
+    if not p.night_mode:
+        return None
+
+    if not s.solar_producing and s.is_night:
+        if s.soc > s.soc_min:
+            return Decision("night_self_consume", _switch_to(s, "self_consume"), c)
+        return Decision("night_reserve_hold", _switch_to(s, "idle"), c)
+
+    # Night battery preservation during daytime; with a plan, hold the
+    # battery in the slots the plan doesn't discharge in
+    if s.planned_power is None:
+        preserve = not s.solar_covers_night
+    else:
+        preserve = s.planned_power >= 0
+    if (
+        not s.is_night
+        and s.soc <= s.night_soc_target
+        and s.p1 > 0
+        and s.p1_avg > 0
+        and preserve
+    ):
+        return Decision("night_preserve_idle", _switch_to(s, "idle"), c)
+
+    return None
+
+
+def solar(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters, now: float
+) -> Decision | None:
+    """PRIORITY 5: Solar optimization."""
+    if not s.solar_producing:
+        return None
+    if s.soc >= s.soc_max:
+        return Decision("solar_battery_full", _switch_to(s, "self_consume"), c)
+
+    sc = solar_config(s, p, c, now)
+    if s.current_mode != "charge":
+        return solar_entry(s, sc, c, now)
+    if p.pi_charge_control:
+        return solar_track(s, p, sc, c, now)
+    return solar_tune(s, sc, c, now)
+
+
+def solar_config(
+    s: DecisionState, p: DecisionParams, c: DecisionCounters, now: float
+) -> SolarConfig:
+    """Return the solar charge thresholds for this tick."""
+    min_solar_for_charge = p.min_solar_for_charge
+    charge_entry_threshold = p.charge_entry_threshold
+    readings_needed = max(int(p.charge_reentry_delay / COUNT_INTERVAL / 3), 2)
+
+    # After a bottomout exit, double the readings needed
+    if (now - c.last_bottomout_exit) < p.bottomout_cooldown:
+        readings_needed = readings_needed * 2
+
+    # Sunset urgency
+    sunset_urgent = (
+        s.hours_to_sunset < 4
+        and s.soc < s.night_soc_target
+        and not s.solar_covers_night
+    )
+    if sunset_urgent:
+        charge_entry_threshold = max(charge_entry_threshold // 2, 100)
+        readings_needed = max(readings_needed // 2, 1)
+        min_solar_for_charge = max(min_solar_for_charge - 300, 200)
+
+    return SolarConfig(
+        min_solar_for_charge=min_solar_for_charge,
+        charge_margin=p.charge_margin,
+        charge_entry_threshold=charge_entry_threshold,
+        readings_needed=readings_needed,
+        sunset_urgent=sunset_urgent,
+    )
+
+
+def solar_entry(
+    s: DecisionState, sc: SolarConfig, c: DecisionCounters, now: float
+) -> Decision:
+    """Charge entry decision when not currently charging."""
+    stay = _switch_to(s, "self_consume", keep=("idle",))
+    if s.solar < sc.min_solar_for_charge or s.p1 >= -sc.charge_entry_threshold:
+        return Decision(
+            "solar_self_consume", stay, c._replace(charge_entry_export_count=0)
+        )
+
+    counted = _count(c, now, charge_entry_export_count=c.charge_entry_export_count + 1)
+    if counted.charge_entry_export_count < sc.readings_needed:
+        return Decision("solar_export_waiting", stay, counted)
+
+    charge_target = min(abs(s.p1) - sc.charge_margin - 100, s.solar - 500)
+    if s.planned_power is not None and s.planned_power > charge_target:
+        # Start at the planned power; solar_tune backs off if it imports
+        charge_target = min(s.planned_power, s.solar - 500)
+    charge_target = min(charge_target, s.max_charge)
+    charge_target = max(charge_target, 300)
+    return Decision(
+        "pre_night_charge" if sc.sunset_urgent else "solar_charge",
+        (Command("set_mode", "charge", int(charge_target)),),
+        c._replace(charge_entry_export_count=0),
+        # Keep counting until the inverter takes the switch
+        counters_if_refused=counted,
+    )
+
+
+def solar_tune(
+    s: DecisionState, sc: SolarConfig, c: DecisionCounters, now: float
+) -> Decision:
+    """Fine-tune charge power when already in charge mode."""
+    current_charge = s.charge_power
+    solar_cap = max(s.solar - sc.charge_margin, 100)
+
+    if s.solar < sc.min_solar_for_charge - 150:
+        return _leave_charge(c, now)
+
+    if s.p1 > sc.charge_margin:
+        return _solar_reduce_charge(s.p1, current_charge, solar_cap, sc, c, now)
+
+    # Volatile P1 can briefly dip negative between import spikes, so
+    # decrement the bottomout counter rather than resetting it
+    eased = _count(c, now, charge_bottomout_count=max(0, c.charge_bottomout_count - 1))
+    if s.p1 < -(sc.charge_margin + 100):
+        # Exporting too much — increase charge
+        excess_export = abs(s.p1) - sc.charge_margin
+        charge_target = current_charge + excess_export
+        charge_target = min(charge_target, s.max_charge)
+        charge_target = min(charge_target, solar_cap)
+        return Decision(
+            "solar_charge",
+            (Command("adjust_power", "charge", int(charge_target)),),
+            eased,
+        )
+
+    # P1 within target range — balanced
+    return Decision("solar_charge", (), eased)
+
+
+def solar_track(
+    s: DecisionState,
+    p: DecisionParams,
+    sc: SolarConfig,
+    c: DecisionCounters,
+    now: float,
+) -> Decision:
+    """Charge power from the PI controller when already in charge mode.
+
+    Tracks the P1 setpoint with the smoothed P1 (see charge_control).
+    Holding the output at the 100W floor while still importing counts
+    as a bottomout, as in solar_tune.
+    """
+    if s.solar < sc.min_solar_for_charge - 150:
+        return _leave_charge(c, now)
+
+    current_charge = s.charge_power
+    solar_cap = max(s.solar - sc.charge_margin, 100)
+    feed = feed_forward(s.solar, s.home_load, p.p1_setpoint)
+    integral = c.charge_integral
+    dt = now - c.last_charge_tune
+    if dt > RESET_AFTER:
+        # Not tuned lately: start from the feed-forward alone
+        integral = 0.0
+        dt = 0.0
+    out = track_p1(
+        p.p1_setpoint,
+        s.p1_avg,
+        feed,
+        integral,
+        dt,
+        low=100,
+        high=min(s.max_charge, solar_cap),
+        step=p.power_change_threshold,
+        current=current_charge,
+    )
+
+    bottoming = out.saturated < 0 and s.p1_avg > sc.charge_margin
+    counted = _count(
+        c,
+        now,
+        charge_bottomout_count=c.charge_bottomout_count + 1
+        if bottoming
+        else max(0, c.charge_bottomout_count - 1),
+    )
+    if bottoming and counted.charge_bottomout_count >= 5:
+        return Decision(
+            "solar_self_consume",
+            (Command("set_mode", "self_consume"),),
+            DecisionCounters(
+                last_charge_exit=now,
+                last_bottomout_exit=now,
+            ),
+        )
+    tuned = counted._replace(
+        charge_integral=out.integral,
+        last_charge_tune=now,
+    )
+    label = "solar_charge_reduced" if bottoming else "solar_charge"
+
+    # Output is on the threshold's grid: one step is a change worth sending
+    moved = abs(out.power - current_charge) >= p.power_change_threshold
+    if not moved and not (out.power <= 100 < current_charge):
+        return Decision(label, (), tuned)
+    return Decision(
+        label,
+        (Command("adjust_power", "charge", int(out.power)),),
+        tuned,
+        # Hold the integral while the inverter refuses (cooldown)
+        counters_if_refused=tuned._replace(charge_integral=integral),
+        exact_step=True,
+    )
+
+
+def _leave_charge(c: DecisionCounters, now: float) -> Decision:
+    """Leave solar charging for self-consume."""
+    return Decision(
+        "solar_self_consume",
+        (Command("set_mode", "self_consume"),),
+        c._replace(
+            last_charge_exit=now,
+            charge_entry_export_count=0,
+            charge_bottomout_count=0,
+            last_charge_tune=DecisionCounters().last_charge_tune,
+        ),
+    )
+
+
+def _solar_reduce_charge(
+    p1: float,
+    current_charge: float,
+    solar_cap: float,
+    sc: SolarConfig,
+    c: DecisionCounters,
+    now: float,
+) -> Decision:
+    """Reduce charge power when importing from grid.
+
+    Uses dampened reduction: max 50% cut per tick to avoid volatile P1
+    spikes crashing charge power from high values to 100W in one step.
+    """
+    desired_reduction = p1 + sc.charge_margin
+    max_step = max(current_charge * 0.5, 200)
+    actual_reduction = min(desired_reduction, max_step)
+    charge_target = current_charge - actual_reduction
+    charge_target = min(charge_target, solar_cap)
+    charge_target = max(charge_target, 100)
+
+    if charge_target > 100:
+        return Decision(
+            "solar_charge",
+            (Command("adjust_power", "charge", int(charge_target)),),
+            c._replace(charge_bottomout_count=0),
+        )
+
+    counted = _count(c, now, charge_bottomout_count=c.charge_bottomout_count + 1)
+    if counted.charge_bottomout_count < 5:
+        return Decision(
+            "solar_charge_reduced",
+            (Command("adjust_power", "charge", 100),),
+            counted,
+        )
+    return Decision(
+        "solar_self_consume",
+        (Command("set_mode", "self_consume"),),
+        DecisionCounters(
+            charge_entry_export_count=0,
+            charge_bottomout_count=0,
+            last_charge_exit=now,
+            last_bottomout_exit=now,
+        ),
+    )
@@ -0,0 +1,282 @@
+"""Decision trace of the Energy Manager.
+
+Finding out why the engine picked one decision over another used to
+mean enabling DEBUG and grepping "EM TICK:" lines, which show only a few
+of the inputs. DecisionTrace keeps the last decisions in full: every
+field of the kernel's inputs (DecisionState, DecisionParams and the
+counters), the decision, its commands, whether the inverter accepted
+one, and the latency from the input change to the command.
+
+The buffer is a fixed ring. The numbers of all records live in one flat
+array of doubles and the few text fields in a list of tuples, so memory
+stays bounded and no per-decision objects are kept.
+
+Records export as flat rows with the same columns as NDJSON or CSV, and
+parse_record() reads either back into kernel inputs, so a trace can be
+replayed through decide() offline (scripts/replay_decisions.py).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import fields
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .decision import (
+    Command,
+    Decision,
+    DecisionCounters,
+    DecisionParams,
+    DecisionState,
+)
+
+# Decisions kept: an hour and a half of busy 15 s ticks, about 110 kB
+TRACE_SIZE = 360
+
+STATE_FIELDS = tuple(field.name for field in fields(DecisionState))
+PARAM_FIELDS = tuple(field.name for field in fields(DecisionParams))
+COUNTER_FIELDS = DecisionCounters._fields
+
+# Fields by type, for turning the stored doubles (and CSV text) back
+_TYPES = {
+    **{field.name: field.type for field in fields(DecisionState)},
+    **{field.name: field.type for field in fields(DecisionParams)},
+    **{
+        name: type(default).__name__
+        for name, default in DecisionCounters._field_defaults.items()
+    },
+    "sent": "bool",
+    "latency_ms": "float | None",
+}
+_TEXT_COLUMNS = ("decision", "commands", "current_mode", "last_decision")
+_NUMBER_COLUMNS = (
+    "time",
+    "monotonic",
+    "sent",
+    "latency_ms",
+    *(name for name in STATE_FIELDS if name not in _TEXT_COLUMNS),
+    *PARAM_FIELDS,
+    *COUNTER_FIELDS,
+)
+# Export column order: what was decided first, then why
+COLUMNS = (
+    "time",
+    "decision",
+    "commands",
+    "sent",
+    "latency_ms",
+    *STATE_FIELDS,
+    *PARAM_FIELDS,
+    *COUNTER_FIELDS,
+    "monotonic",
+)
+
+
+class ReplayCase(NamedTuple):
+    """One traced decision as kernel inputs and the recorded outcome."""
+
+    state: DecisionState
+    params: DecisionParams
+    counters: DecisionCounters
+    now: float
+    decision: str
+    commands: tuple[Command, ...]
+
+
+def encode_commands(commands: Iterable[Command]) -> str:
+    """Commands as text: action:target:power, separated by "|"."""
+    return "|".join(
+        ":".join(str(part) for part in command if part is not None)
+        for command in commands
+    )
+
+
+def decode_commands(text: str) -> tuple[Command, ...]:
+    """Read commands written by encode_commands()."""
+    commands = []
+    for item in filter(None, text.split("|")):
+        action, target, power = ([*item.split(":"), None, None])[:3]
+        commands.append(Command(action, target or None, int(power) if power else None))
+    return tuple(commands)
+
+
+class DecisionTrace:
+    """Fixed-size ring buffer of Energy Manager decisions."""
+
+    __slots__ = ("_next", "_numbers", "_texts", "recorded", "size")
+
+    def __init__(self, size: int = TRACE_SIZE) -> None:
+        """Initialize an empty trace holding up to size decisions."""
+        self.size = size
+        self._numbers = array("d", bytes(8 * size * len(_NUMBER_COLUMNS)))
+        self._texts: list[tuple[str, ...] | None] = [None] * size
+        self._next = 0
+        self.recorded = 0  # decisions recorded since setup
+
+    def __len__(self) -> int:
+        """Number of decisions held."""
+        return min(self.recorded, self.size)
+
+    def record(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        self,
+        state: DecisionState,
+        params: DecisionParams,
+        counters: DecisionCounters,
+        now: float,
+        decision: Decision,
+        sent: bool,
+        latency: float | None = None,
+    ) -> None:
+        """Record one decision; counters are those it was made with."""
+        values = {
+            "time": datetime.now(UTC).timestamp(),
+            "monotonic": now,
+            "sent": sent,
+            "latency_ms": math.nan if latency is None else latency * 1000,
+        }
+        for name in STATE_FIELDS:
+            values[name] = getattr(state, name)
+        for name in PARAM_FIELDS:
+            values[name] = getattr(params, name)
+        values.update(counters._asdict())
+
+        base = self._next * len(_NUMBER_COLUMNS)
+        numbers = self._numbers
+        for offset, name in enumerate(_NUMBER_COLUMNS):
+            value = values[name]
+            numbers[base + offset] = math.nan if value is None else float(value)
+        self._texts[self._next] = (
+            decision.label,
+            encode_commands(decision.commands),
+            state.current_mode or "",
+            state.last_decision,
+        )
+        self._next = (self._next + 1) % self.size
+        self.recorded += 1
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        """Yield the held decisions as flat rows, oldest first."""
+        held = len(self)
+        start = (self._next - held) % self.size
+        for i in range(held):
+            slot = (start + i) % self.size
+            base = slot * len(_NUMBER_COLUMNS)
+            values: dict[str, Any] = dict(
+                zip(_TEXT_COLUMNS, self._texts[slot] or (), strict=True)
+            )
+            for offset, name in enumerate(_NUMBER_COLUMNS):
+                values[name] = _typed(name, self._numbers[base + offset])
+            values["time"] = datetime.fromtimestamp(values["time"], UTC).isoformat()
+            values["current_mode"] = values["current_mode"] or None
+            yield {name: values[name] for name in COLUMNS}
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the held decisions for diagnostics."""
+        return {
+            "size": self.size,
+            "recorded": self.recorded,
+            "records": list(self.rows()),
+        }
+
+
+def _typed(name: str, value: float) -> Any:
+    """A stored double as its field's type; NaN is None."""
+    if math.isnan(value):
+        return None
+    kind = _TYPES.get(name, "float")
+    if kind == "bool":
+        return bool(value)
+    if kind == "int":
+        return int(value)
+    return value
+
+
+def ndjson_lines(rows: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+    """Rows as NDJSON lines."""
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+    """Rows as CSV lines, with a header."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    yield _drain(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield _drain(buffer)
+
+
+def _drain(buffer: io.StringIO) -> str:
+    """Take the text written to buffer so far."""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+
+def write_rows(path: str, rows: Iterable[Mapping[str, Any]], file_format: str) -> None:
+    """Write rows to a file as NDJSON or CSV (blocking)."""
+    lines = csv_lines(rows) if file_format == "csv" else ndjson_lines(rows)
+    with Path(path).open("w", encoding="utf-8", newline="") as file:
+        file.writelines(lines)
+
+
+def read_rows(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Read rows from NDJSON or CSV lines (told apart by the first line)."""
+    lines = iter(lines)
+    for first in lines:
+        if first.strip():
+            break
+    else:
+        return
+    if first.lstrip().startswith("{"):
+        yield json.loads(first)
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader([first, *lines])
+
+
+def parse_record(row: Mapping[str, Any]) -> ReplayCase:
+    """Turn an exported row (NDJSON or CSV) back into kernel inputs.
+
+    Raises KeyError or ValueError on a row that isn't a decision record.
+    """
+
+    def value(name: str) -> Any:
+        raw = row[name]
+        kind = _TYPES.get(name, "str")
+        if raw in (None, ""):
+            if kind.endswith("None"):
+                return None
+            if kind == "str":
+                return ""
+            raise ValueError(f"{name} is empty")
+        if kind == "bool":
+            if isinstance(raw, str):
+                return raw.strip().lower() in ("1", "true")
+            return bool(raw)
+        if kind == "int":
+            return int(float(raw))
+        if kind.startswith("float"):
+            return float(raw)
+        return str(raw)
+
+    return ReplayCase(
+        DecisionState(**{name: value(name) for name in STATE_FIELDS}),
+        DecisionParams(**{name: value(name) for name in PARAM_FIELDS}),
+        DecisionCounters(*(value(name) for name in COUNTER_FIELDS)),
+        float(row["monotonic"]),
+        str(row["decision"]),
+        decode_commands(str(row["commands"] or "")),
+    )
@@ -0,0 +1,94 @@
+"""Device info shared by the sensors of one device.
+
+Home Assistant reads device_info from every entity it sets up, and a
+device has dozens of metric sensors that all describe the same device
+(or the same battery). DeviceInfoCache keeps one dict per (SN, battery)
+on the coordinator, so those sensors share a single object. The
+coordinator refreshes it from _async_sync_device_metadata, which drops a
+device's entries only when the fields they are built from changed (a new
+model, firmware version, name or parent).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from .const import DOMAIN, MANUFACTURER, get_software_version
+
+
+def build_device_info(
+    sn: str, dev_data: dict, metrics: dict, battery: bool = False
+) -> dict[str, Any]:
+    """Return the device info for SN, or for its battery if battery is set."""
+    bat_sn = metrics.get("batSn")
+    if battery and bat_sn:
+        return {
+            "identifiers": {(DOMAIN, bat_sn)},
+            "name": f"Battery {bat_sn}",
+            "manufacturer": MANUFACTURER,
+            "model": "Energy Storage System",
+            "serial_number": bat_sn,
+            "via_device": (DOMAIN, sn),
+        }
+
+    info = {
+        "identifiers": {(DOMAIN, sn)},
+        "name": dev_data.get("device_name") or f"Device {sn}",
+        "manufacturer": MANUFACTURER,
+        "model": dev_data.get("model"),
+        "sw_version": dev_data.get("_sw_version_cached")
+        or get_software_version(dev_data),
+        "hw_version": dev_data.get("hw_version"),
+        "serial_number": sn,
+    }
+
+    # Handle Parent Collector relationship
+    parent_sn = metrics.get("parentSn")
+    if parent_sn:
+        info["via_device"] = (DOMAIN, parent_sn)
+
+    return info
+
+
+def _signature(dev_data: dict, sw_version: str | None) -> tuple:
+    """Return the fields a device's cached info is built from."""
+    metrics = dev_data.get("metrics") or {}
+    return (
+        dev_data.get("model"),
+        sw_version,
+        dev_data.get("hw_version"),
+        dev_data.get("device_name"),
+        metrics.get("parentSn"),
+        metrics.get("batSn"),
+    )
+
+
+class DeviceInfoCache:
+    """Device info per (SN, battery), shared by all of a device's sensors."""
+
+    __slots__ = ("_infos", "_signatures")
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._infos: dict[tuple[str, bool], dict[str, Any]] = {}
+        self._signatures: dict[str, tuple] = {}
+
+    def get(
+        self, sn: str, dev_data: dict, metrics: dict, battery: bool = False
+    ) -> dict[str, Any]:
+        """Return the shared device info, building it on first use."""
+        key = (sn, battery)
+        info = self._infos.get(key)
+        if info is None:
+            info = self._infos[key] = build_device_info(sn, dev_data, metrics, battery)
+        return info
+
+    def refresh(self, sn: str, dev_data: dict, sw_version: str | None) -> bool:
+        """Drop SN's entries if its metadata changed; return True if it did."""
+        signature = _signature(dev_data, sw_version)
+        if self._signatures.get(sn) == signature:
+            return False
+        self._signatures[sn] = signature
+        self._infos.pop((sn, False), None)
+        self._infos.pop((sn, True), None)
+        return True
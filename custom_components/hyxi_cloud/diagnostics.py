@@ -0,0 +1,89 @@
+"""Diagnostics support for HYXI Cloud."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_ACCESS_KEY,
+    CONF_PUSH_URL,
+    CONF_SECRET_KEY,
+    DOMAIN,
+    get_raw_device_code,
+    mask_sn,
+    normalize_device_type,
+)
+from .coordinator import HyxiDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_ACCESS_KEY,
+    CONF_SECRET_KEY,
+    CONF_PUSH_URL,
+    "push_subscribe_code",
+    "alarm_subscribe_code",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: HyxiDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    devices = {
+        mask_sn(sn): {
+            "model": dev_data.get("model"),
+            "device_type": normalize_device_type(get_raw_device_code(dev_data)),
+            "metric_keys": sorted(dev_data.get("metrics") or {}),
+            "alarm_count": len(dev_data.get("alarms") or []),
+        }
+        for sn, dev_data in (coordinator.data or {}).items()
+    }
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "metadata": dict(coordinator.hyxi_metadata),
+        "push": {
+            "status": coordinator.push_status,
+            "error": coordinator.push_error,
+            "last_received": coordinator.last_push_received,
+            "alarm_status": coordinator.alarm_push_status,
+            "alarm_error": coordinator.alarm_push_error,
+            "alarm_last_received": coordinator.alarm_last_push_received,
+        },
+        "devices": devices,
+        "telemetry_trace": coordinator.telemetry.as_diagnostics(),
+        "write_throttle": coordinator.write_stats.as_diagnostics(),
+        "push_downsample": coordinator.downsampler.as_diagnostics(),
+        "command_budget": coordinator.command_budget.as_diagnostics(
+            time.monotonic(), mask_sn
+        ),
+        "load_profile": (
+            coordinator.engine.load_profile.as_diagnostics()
+            if coordinator.engine is not None
+            else None
+        ),
+        "decision_scheduler": (
+            coordinator.engine.scheduler_stats
+            if coordinator.engine is not None
+            else None
+        ),
+        "decision_trace": (
+            coordinator.engine.decision_trace.as_diagnostics()
+            if coordinator.engine is not None
+            else None
+        ),
+        "stale_recovery": (
+            coordinator.engine.recovery_stats
+            if coordinator.engine is not None
+            else None
+        ),
+    }
@@ -0,0 +1,167 @@
+"""Bucketed downsampling of pushed metrics for the entity layer.
+
+Push can deliver a device's metrics every 10 seconds. The Energy Manager
+and the battery protection controllers want every sample, but the
+state machine and recorder rarely need that resolution. With a bucket
+configured, coordinator.data still carries the raw stream, while
+PushDownsampler collects min/mean/max/last per metric and device over
+each bucket. Metric sensors hold their state while a bucket is open and
+publish once when it closes: measurements show the bucket mean, all
+other sensors the latest value.
+
+A bucket closes on the first push after its end, so a push outage leaves
+it open; after two bucket lengths holds() lets poll updates through
+again and mean_view() stops laying the stale means over them.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, NamedTuple
+
+from .const import is_null_value
+
+
+class BucketStats(NamedTuple):
+    """Aggregates of one metric over a closed bucket."""
+
+    minimum: float
+    mean: float
+    maximum: float
+    last: float
+    count: int
+
+
+class _Bucket:
+    """Running aggregates of one device's numeric metrics."""
+
+    __slots__ = ("metrics", "start")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        # key -> [min, max, sum, count, last]
+        self.metrics: dict[str, list[float]] = {}
+
+    def add(self, metrics: dict[str, Any]) -> None:
+        """Fold one metrics snapshot into the bucket."""
+        aggregates = self.metrics
+        for key, raw in metrics.items():
+            if isinstance(raw, bool) or raw is None or is_null_value(raw):
+                continue
+            try:
+                value = float(raw)
+            except ValueError, TypeError:
+                continue
+            if not math.isfinite(value):
+                continue
+            agg = aggregates.get(key)
+            if agg is None:
+                aggregates[key] = [value, value, value, 1, value]
+                continue
+            if value < agg[0]:
+                agg[0] = value
+            if value > agg[1]:
+                agg[1] = value
+            agg[2] += value
+            agg[3] += 1
+            agg[4] = value
+
+    def stats(self) -> dict[str, BucketStats]:
+        """Return the aggregates of every metric seen in the bucket."""
+        return {
+            key: BucketStats(low, total / count, high, last, int(count))
+            for key, (low, high, total, count, last) in self.metrics.items()
+        }
+
+
+class PushDownsampler:
+    """Per-device push buckets shared by a coordinator's metric sensors."""
+
+    __slots__ = (
+        "_closed",
+        "_closed_at",
+        "_generation",
+        "_open",
+        "_views",
+        "bucket_seconds",
+    )
+
+    def __init__(self, bucket_seconds: float = 0) -> None:
+        """Initialize; a bucket of 0 disables downsampling."""
+        self.bucket_seconds = float(bucket_seconds or 0)
+        self._open: dict[str, _Bucket] = {}
+        self._closed: dict[str, dict[str, BucketStats]] = {}
+        self._closed_at: dict[str, float] = {}
+        self._generation: dict[str, int] = {}
+        self._views: dict[str, tuple[int, dict, dict]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if a bucket size is configured."""
+        return self.bucket_seconds > 0
+
+    def add(self, sn: str, metrics: dict[str, Any], now: float) -> bool:
+        """Add one pushed snapshot; return True if it closed SN's bucket."""
+        if not self.enabled:
+            return False
+        bucket = self._open.get(sn)
+        closed = False
+        if bucket is not None and now - bucket.start >= self.bucket_seconds:
+            self._closed[sn] = bucket.stats()
+            self._closed_at[sn] = now
+            self._generation[sn] = self._generation.get(sn, 0) + 1
+            bucket = None
+            closed = True
+        if bucket is None:
+            bucket = self._open[sn] = _Bucket(now)
+        bucket.add(metrics)
+        return closed
+
+    def generation(self, sn: str) -> int:
+        """Return how many buckets have closed for SN."""
+        return self._generation.get(sn, 0)
+
+    def holds(self, sn: str, seen_generation: int, now: float) -> bool:
+        """Return True if an entity that saw seen_generation should wait.
+
+        It waits while SN's bucket is open and no newer bucket has closed.
+        A bucket left open for two bucket lengths means pushes stopped, so
+        updates are let through again.
+        """
+        bucket = self._open.get(sn)
+        return (
+            bucket is not None
+            and self._generation.get(sn, 0) == seen_generation
+            and now - bucket.start < 2 * self.bucket_seconds
+        )
+
+    def stats(self, sn: str) -> dict[str, BucketStats]:
+        """Return the aggregates of SN's last closed bucket."""
+        return self._closed.get(sn, {})
+
+    def mean_view(self, sn: str, metrics: dict, now: float) -> dict:
+        """Return metrics with the last closed bucket's means laid over them.
+
+        Built once per closed bucket and metrics dict, then shared by all
+        of the device's measurement sensors. Means older than two bucket
+        lengths (pushes stopped) are no longer laid over polled values.
+        """
+        closed = self._closed.get(sn)
+        if not closed or now - self._closed_at[sn] >= 2 * self.bucket_seconds:
+            return metrics
+        generation = self._generation.get(sn, 0)
+        cached = self._views.get(sn)
+        if cached is not None and cached[0] == generation and cached[1] is metrics:
+            return cached[2]
+        view = dict(metrics)
+        view.update((key, stats.mean) for key, stats in closed.items())
+        self._views[sn] = (generation, metrics, view)
+        return view
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the bucket size and how many buckets have closed."""
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "devices": len(self._open),
+            "closed_buckets": sum(self._generation.values()),
+        }
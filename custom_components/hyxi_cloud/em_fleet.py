@@ -0,0 +1,312 @@
+"""Energy Manager for several hybrid inverters behind one P1 meter.
+
+A single EnergyManagerEngine drives one inverter. With two or three
+hybrid inverters on one grid connection, one engine per inverter would
+see the same P1 reading and fight over it. FleetEnergyManager instead
+runs one decision loop, on one P1 stream, for the lead inverter (whose
+EM numbers and switches hold the parameters) and treats the member
+batteries as one: the decision kernel sees their combined SOC, solar,
+load and power limits, and every charge or discharge target is split
+across the members by split_power(). The EM's max charge and discharge
+power are limits for the whole site (a grid connection cap, say), not
+per inverter: the fleet limit is the parameter, capped by the sum of the
+members' own limits.
+
+Each member keeps its own command channel, an EnergyManagerEngine that
+is never started, so cooldowns, dry-run, mode events and the protection
+controller hand-off stay per inverter. Commands go out concurrently.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Awaitable, Iterable, Sequence
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+
+from .const import detect_phase_type, mask_sn
+from .decision import Command, Decision, DecisionState
+from .engine import EMEntityConfig, EnergyManagerEngine
+
+if TYPE_CHECKING:
+    from .coordinator import HyxiDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# A single-phase inverter puts all of its power on one phase, so the
+# three-phase units take the larger share of a split.
+_PHASE_WEIGHT = {"three_phase": 1.0, "single_phase": 0.5}
+
+_MAX_POWER_KEYS = {"charge": "maxChargePower", "discharge": "maxDischargePower"}
+
+
+def split_power(
+    total: float, weights: Sequence[float], limits: Sequence[float]
+) -> list[int]:
+    """Split total power over members by weight, within each member's limit.
+
+    Power a member can't take goes to the others in proportion to their
+    weights. Members with no weight (or no limit) get nothing.
+    """
+    shares = [0.0] * len(weights)
+    open_members = {
+        i for i, weight in enumerate(weights) if weight > 0 and limits[i] > 0
+    }
+    remaining = total
+    while remaining > 0 and open_members:
+        weight_sum = sum(weights[i] for i in open_members)
+        capped = {
+            i for i in open_members if remaining * weights[i] / weight_sum >= limits[i]
+        }
+        if not capped:
+            for i in open_members:
+                shares[i] = remaining * weights[i] / weight_sum
+            break
+        for i in capped:
+            shares[i] = limits[i]
+        open_members -= capped
+        remaining = total - sum(shares)
+    return [int(share) for share in shares]
+
+
+class FleetEnergyManager(EnergyManagerEngine):
+    """Energy Manager coordinating the batteries of several inverters."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: HyxiDataUpdateCoordinator,
+        config: EMEntityConfig,
+        member_sns: Iterable[str],
+    ) -> None:
+        """Initialize the fleet with the lead inverter and its members."""
+        super().__init__(hass, coordinator, config)
+        self._members: list[EnergyManagerEngine] = [self]
+        for sn in member_sns:
+            if sn == self._sn or sn in self.member_sns:
+                continue
+            member_config = EMEntityConfig(sn=sn, p1_entity="", param_sn=self._sn)
+            self._members.append(EnergyManagerEngine(hass, coordinator, member_config))
+
+    @property
+    def member_sns(self) -> list[str]:
+        """Serial numbers of the member inverters, lead first."""
+        return [member._sn for member in self._members]
+
+    # ── Combined readings ───────────────────────────────────────────────
+
+    @staticmethod
+    def _capacity(member: EnergyManagerEngine) -> float:
+        """Battery capacity of one member in Wh (batCap, 2000 Wh fallback)."""
+        api_cap = member._get_coordinator_metric("batCap", 0)
+        return api_cap * 1000 if api_cap > 0 else 2000.0
+
+    def _get_battery_capacity(self) -> float:
+        """Combined capacity; an options override is the site's total."""
+        options = self._coordinator.entry.options
+        if options.get("em_battery_capacity_override"):
+            try:
+                return float(options.get("em_battery_capacity_wh", 2000))
+            except ValueError, TypeError:
+                pass
+        return sum(self._capacity(member) for member in self._members)
+
+    def _get_soc(self) -> float:
+        """Capacity-weighted SOC of the member batteries."""
+        total = weighted = 0.0
+        for member in self._members:
+            capacity = self._capacity(member)
+            total += capacity
+            weighted += member._get_coordinator_metric("batSoc", 50) * capacity
+        return weighted / total
+
+    def _get_solar(self) -> float:
+        """Combined solar power of the members."""
+        return sum(m._get_coordinator_metric("ppv", 0) for m in self._members)
+
+    def _get_home_load(self) -> float:
+        """Combined home load of the members."""
+        return sum(m._get_coordinator_metric("home_load", 0) for m in self._members)
+
+    def _has_peak_shaving(self) -> bool:
+        """Whether any member can curtail PV."""
+        return any(self._peak_shaving_members())
+
+    def _peak_shaving_members(self) -> list[EnergyManagerEngine]:
+        return [
+            member
+            for member in self._members
+            if EnergyManagerEngine._has_peak_shaving(member)
+        ]
+
+    def _member_limit(self, member: EnergyManagerEngine, direction: str) -> float:
+        """A member's power limit: the EM parameter, capped by the hardware."""
+        limit = EnergyManagerEngine._power_limit(self, direction)
+        hardware = member._get_coordinator_metric(_MAX_POWER_KEYS[direction], 0)
+        return min(limit, hardware) if hardware > 0 else limit
+
+    def _power_limit(self, direction: str) -> float:
+        """Site power limit: the EM parameter, capped by the members' sum."""
+        return min(
+            EnergyManagerEngine._power_limit(self, direction),
+            sum(self._member_limit(m, direction) for m in self._members),
+        )
+
+    def _fleet_mode(self) -> str | None:
+        """The mode most members are in (the lead's on a tie)."""
+        counts = Counter(member._current_mode for member in self._members)
+        mode, count = counts.most_common(1)[0]
+        return self._current_mode if counts[self._current_mode] == count else mode
+
+    def _active_mode(self) -> str | None:
+        """The charge or discharge mode of any member (the lead's first).
+
+        The lead may already be back in self_consume while a member still
+        charges or discharges, so disabling the EM checks them all.
+        """
+        for member in self._members:
+            mode = EnergyManagerEngine._active_mode(member)
+            if mode is not None:
+                return mode
+        return None
+
+    def _decision_state(self) -> DecisionState:
+        """Snapshot the fleet as one battery for the decision kernel."""
+        s = super()._decision_state()
+        s.current_mode = self._fleet_mode()
+        s.pv_curtailed = any(member._pv_curtailed for member in self._members)
+        s.charge_power = sum(
+            member._get_current_power_setting("charge") for member in self._members
+        )
+        return s
+
+    # ── Command fan-out ─────────────────────────────────────────────────
+
+    async def _apply_decision(self, decision: Decision) -> bool:
+        """Apply a kernel decision, then bring stray members in line.
+
+        The kernel only sees the fleet's majority mode, so it has nothing
+        to send for a member left in another one (its write failed, or it
+        was in cooldown). Unless this decision switched mode anyway, such a
+        member is switched to the fleet mode here, or to self_consume next
+        to a charging or discharging fleet, where members without a share
+        sit.
+        """
+        sent = await super()._apply_decision(decision)
+        if any(command.action == "set_mode" for command in decision.commands):
+            return sent
+        return await self._reconcile() or sent
+
+    async def _reconcile(self) -> bool:
+        """Switch members out of line with the fleet mode; True if any moved."""
+        mode = self._fleet_mode()
+        if mode is None:
+            return False
+        target = "self_consume" if mode in ("charge", "discharge") else mode
+        stray = [m for m in self._members if m._current_mode not in (mode, target)]
+        if not stray:
+            return False
+        for member in stray:
+            _LOGGER.info(
+                "EM fleet: %s is in %s, fleet in %s; switching it to %s",
+                mask_sn(member._sn),
+                member._current_mode,
+                mode,
+                target,
+            )
+            member._last_decision = self._last_decision
+        results = await asyncio.gather(*(m._set_mode(target) for m in stray))
+        return any(results)
+
+    def _split(self, direction: str, total: float) -> list[int]:
+        """Split a charge/discharge target across the members.
+
+        Weighted by the energy each battery can still take (charge) or give
+        (discharge) within its own SOC limits, and by phase.
+        """
+        weights = []
+        limits = []
+        for member in self._members:
+            soc = member._get_coordinator_metric("batSoc", 50)
+            if direction == "charge":
+                headroom = member._get_protection_param("soc_max", 90) - soc
+            else:
+                headroom = soc - member._get_protection_param("soc_min", 20)
+            dev_data = (self._coordinator.data or {}).get(member._sn) or {}
+            phase = _PHASE_WEIGHT.get(detect_phase_type(dev_data), 1.0)
+            weights.append(max(headroom, 0) * self._capacity(member) * phase)
+            limits.append(self._member_limit(member, direction))
+        if not any(weights):
+            # Every battery is at its limit: share by power alone
+            weights = limits
+        return split_power(total, weights, limits)
+
+    async def _drive_member(
+        self,
+        member: EnergyManagerEngine,
+        direction: str,
+        power: int,
+        exact_step: bool = False,
+    ) -> bool:
+        """Send one member its share of a charge/discharge target."""
+        if power <= 0:
+            # No share: stop charging/discharging, leave other modes be
+            if member._current_mode in ("charge", "discharge"):
+                return await member._set_mode("self_consume")
+            return True
+        if member._current_mode == direction:
+            if member._power_unchanged(direction, power, exact_step):
+                return True  # Already at its share
+            return await member._adjust_power(direction, power, exact_step)
+        return await member._set_mode(direction, power)
+
+    async def _send_command(self, command: Command, exact_step: bool = False) -> bool:
+        """Fan a kernel command out to the members concurrently."""
+        for member in self._members[1:]:
+            member._last_decision = self._last_decision
+        sends: dict[EnergyManagerEngine, Awaitable[bool]]
+        if command.action == "curtail_pv":
+            sends = {
+                m: m._set_peak_shaving("stop") for m in self._peak_shaving_members()
+            }
+        elif command.action == "release_pv":
+            sends = {m: self._release_member(m) for m in self._members}
+        elif command.target in ("charge", "discharge"):
+            shares = self._split(command.target, command.power or 0)
+            _LOGGER.debug(
+                "EM fleet: %s %sW split %s", command.target, command.power, shares
+            )
+            sends = {
+                member: self._drive_member(member, command.target, share, exact_step)
+                for member, share in zip(self._members, shares, strict=True)
+            }
+        elif command.action == "set_mode":
+            sends = {
+                member: member._set_mode(command.target)
+                for member in self._members
+                if member._current_mode != command.target
+            }
+        else:
+            return await super()._send_command(command, exact_step)
+        results = await asyncio.gather(*sends.values())
+        refused = [m for m, ok in zip(sends, results, strict=True) if not ok]
+        if not refused:
+            return True
+        # A partly applied command counts as refused, so the kernel keeps
+        # its counters and sends it again; the members that took it have
+        # nothing left to change and accept the repeat
+        _LOGGER.info(
+            "EM fleet: %s %s refused by %s",
+            command.action,
+            command.target or "",
+            ", ".join(mask_sn(member._sn) for member in refused),
+        )
+        return False
+
+    @staticmethod
+    async def _release_member(member: EnergyManagerEngine) -> bool:
+        await member._release_pv_curtailment()
+        return True
@@ -0,0 +1,125 @@
+"""Local energy integration of pushed power values.
+
+The cloud's lifetime counters (totalEnt, bat_charge_total, ...) move in
+coarse steps and only on a poll, while push delivers instantaneous power
+every few seconds. An EnergyAccumulator integrates one power metric with
+the trapezoidal rule over the samples' collectTime, so a re-dispatch of
+the same sample never counts twice.
+
+Where the cloud has a matching counter, the accumulator is re-anchored to
+it whenever it changes: the local total catches up if it fell behind (a
+push outage, a restart) and stops integrating while it is more than
+ANCHOR_MAX_LEAD ahead, so it tracks the counter without ever decreasing.
+Counter dips are ignored; after a genuine counter reset the accumulator
+keeps integrating on its own.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, NamedTuple
+
+from .const import is_null_value
+from .filters import counter_reset_is_valid
+
+# Gaps longer than this (seconds) aren't integrated; the anchor covers them
+MAX_SAMPLE_GAP = 900
+# How far (kWh) the local total may run ahead of its cloud counter
+ANCHOR_MAX_LEAD = 0.5
+
+_WS_PER_KWH = 3_600_000
+_DETACHED: Any = object()  # anchor after a counter reset
+
+
+class LocalEnergySource(NamedTuple):
+    """Power metric integrated by a local energy sensor."""
+
+    power_key: str
+    counter_key: str | None  # cloud lifetime counter (kWh) to anchor to
+
+
+# Local energy sensor key -> what it integrates
+LOCAL_ENERGY_SOURCES: dict[str, LocalEnergySource] = {
+    "pv_energy_local": LocalEnergySource("ppv", "totalE"),
+    "grid_import_energy_local": LocalEnergySource("grid_import", "totalEnt"),
+    "grid_export_energy_local": LocalEnergySource("grid_export", "totalEpt"),
+    "bat_charge_energy_local": LocalEnergySource("bat_charging", "bat_charge_total"),
+    "bat_discharge_energy_local": LocalEnergySource(
+        "bat_discharging", "bat_discharge_total"
+    ),
+    "home_energy_local": LocalEnergySource("home_load", None),
+}
+
+
+def _number(value: Any) -> float | None:
+    """Return a raw metric as a finite float, or None."""
+    if value is None or is_null_value(value):
+        return None
+    try:
+        number = float(value)
+    except ValueError, TypeError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+class EnergyAccumulator:
+    """Trapezoidal kWh integral of one power metric (W)."""
+
+    __slots__ = ("_anchor", "_power", "_time", "total")
+
+    def __init__(self, total: float | None = None) -> None:
+        """Initialize from a restored total, or None to start at the anchor."""
+        self.total = total
+        self._power: float | None = None
+        self._time: float | None = None
+        self._anchor: Any = None
+
+    def add(self, power: Any, sample_time: float) -> bool:
+        """Integrate up to a power sample; return True if the total moved."""
+        watts = _number(power)
+        if watts is None:
+            self._power = None
+            return False
+        watts = max(watts, 0.0)
+        last_power, last_time = self._power, self._time
+        if last_time is not None and sample_time <= last_time:
+            return False  # Same (or an older) sample dispatched again
+        self._power, self._time = watts, sample_time
+        if last_power is None or last_time is None:
+            return False
+        elapsed = sample_time - last_time
+        if elapsed > MAX_SAMPLE_GAP or self.total is None:
+            return False
+        anchor = self._anchor
+        if isinstance(anchor, float) and self.total - anchor > ANCHOR_MAX_LEAD:
+            return False
+        energy = (last_power + watts) / 2 * elapsed / _WS_PER_KWH
+        self.total += energy
+        return energy > 0
+
+    def anchor(self, counter: Any) -> bool:
+        """Re-anchor to the cloud counter (kWh); return True if the total moved."""
+        value = _number(counter)
+        if value is None or value < 0 or self._anchor is _DETACHED:
+            return False
+        anchor = self._anchor
+        if anchor is not None and value < anchor:
+            if counter_reset_is_valid(anchor, value):
+                # Counter reset (e.g. device replaced): keep counting locally
+                # from here instead of waiting for it to catch up again.
+                self._anchor = _DETACHED
+            return False  # Otherwise a glitch; ignore it like the counter does
+        self._anchor = value
+        if self.total is None or value > self.total:
+            self.total = value
+            return True
+        return False
+
+    def start(self) -> None:
+        """Start a counter-less accumulator at zero.
+
+        Not for a source with a counter: its total stays None until the
+        first anchor, which would otherwise jump it to the lifetime value.
+        """
+        if self.total is None:
+            self.total = 0.0
@@ -17,21 +17,23 @@ Modes used:
 from __future__ import annotations
 
 import logging
+import math
 import time
 from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import timedelta
-from typing import TYPE_CHECKING
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.components import persistent_notification
 from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.event import (
+    async_call_later,
     async_track_state_change_event,
     async_track_time_interval,
 )
+from homeassistant.helpers.storage import Store
 from hyxi_cloud_api import HyxiApiClient
 
 from .const import (
@@ -47,6 +49,27 @@ from .const import (
     mask_sn,
     normalize_device_type,
 )
+from .decision import (
+    Command,
+    Decision,
+    DecisionCounters,
+    DecisionParams,
+    DecisionState,
+    decide,
+)
+from .decision_trace import DecisionTrace
+from .ephemeris import SunEphemeris
+from .load_profile import LoadProfile
+from .planner import (
+    SOC_STEP,
+    BatterySchedule,
+    PlanParams,
+    SchedulePlanner,
+    forecast_series,
+    forecast_slots,
+)
+from .recovery import StaleDataRecovery
+from .scheduler import DecisionScheduler
 
 if TYPE_CHECKING:
     from .coordinator import HyxiDataUpdateCoordinator
@@ -56,8 +79,11 @@ _LOGGER = logging.getLogger(__name__)
 # Default rolling average window for P1 readings (overridable via p1_smoothing_period param)
 _P1_SMOOTHING_DEFAULT = 60
 
+# Decide at least every this many loop intervals, even when nothing changed
+_MAX_IDLE_INTERVALS = 4
 
-@dataclass
+
+@dataclass(slots=True)
 class EMEntityConfig:
     """Entity configuration for the Energy Manager engine."""
 
@@ -65,34 +91,9 @@ class EMEntityConfig:
     p1_entity: str
     forecast_entity: str | None = None
     forecast_power_entity: str | None = None
-
-
-@dataclass
-class DecisionState:
-    """Snapshot of current system state for the decision engine."""
-
-    soc: float
-    solar: float
-    p1: float
-    home_load: float
-    soc_min: float
-    soc_max: float
-    max_charge: float
-    max_discharge: float
-    is_night: bool
-    solar_producing: bool
-    night_soc_target: float
-
-
-@dataclass
-class SolarConfig:
-    """Computed solar charge parameters for a single decision tick."""
-
-    min_solar_for_charge: float
-    charge_margin: float
-    charge_entry_threshold: float
-    readings_needed: int
-    sunset_urgent: bool
+    # SN whose EM number/switch entities hold the parameters; fleet members
+    # (em_fleet.py) read the lead inverter's
+    param_sn: str | None = None
 
 
 class EnergyManagerEngine:
@@ -108,6 +109,7 @@ class EnergyManagerEngine:
         self._hass = hass
         self._coordinator = coordinator
         self._sn = config.sn
+        self._param_sn = config.param_sn or config.sn
         self._p1_entity = config.p1_entity
         self._forecast_entity = config.forecast_entity
         self._forecast_power_entity = config.forecast_power_entity
@@ -117,12 +119,28 @@ class EnergyManagerEngine:
         self._last_decision: str = ""
         self._last_action: str = ""
         self._in_decision: bool = False
-        self._last_fast_path_trigger: float = 0
         self._last_power_adjust: float = -999999.0
-        self._last_charge_exit: float = 0
-        self._last_bottomout_exit: float = -999999.0
-        self._charge_entry_export_count: int = 0
-        self._charge_bottomout_count: int = 0
+        # Hysteresis counters carried between decisions (decision.py)
+        self._counters = DecisionCounters()
+        # When to decide: input changes, parameter edits, idle net (scheduler.py)
+        loop_interval = int(
+            coordinator.entry.options.get(CONF_EM_LOOP_INTERVAL, EM_LOOP_INTERVAL)
+        )
+        self._loop_interval = loop_interval
+        self._scheduler = DecisionScheduler(loop_interval * _MAX_IDLE_INTERVALS)
+        self._unsub_evaluate: CALLBACK_TYPE | None = None
+        # Inputs and outcome of the last decisions (decision_trace.py)
+        self._trace = DecisionTrace()
+        # Sunrise, sunset and elevation, rebuilt when sun.sun changes
+        # (ephemeris.py)
+        self._sun: SunEphemeris | None = None
+        # Staged recovery from stale cloud data (recovery.py)
+        self._recovery = StaleDataRecovery(hass, coordinator)
+        # Day-ahead battery plan from the forecast series (planner.py)
+        self._planner = SchedulePlanner()
+        # Hour-of-week household load, saved across restarts (load_profile.py)
+        self._load_profile = LoadProfile()
+        self._profile_store: Store[dict[str, Any]] | None = None
         self._current_mode: str | None = None
         self._last_sent_power: dict[str, int] = {"charge": 0, "discharge": 0}
 
@@ -130,6 +148,9 @@ class EnergyManagerEngine:
         self._pv_curtailed: bool = False
         self._last_pv_curtail_toggle: float = -999999.0
 
+        # Whether the last command was refused by the budget (command_budget.py)
+        self._throttled: bool = False
+
         # P1 rolling average
         self._p1_buffer: deque[tuple[float, float]] = deque()
 
@@ -148,7 +169,7 @@ class EnergyManagerEngine:
         if not self._enabled:
             return "stopped"
         # Check if em_enabled switch is off
-        em_enabled_uid = f"hyxi_{self._sn}_em_enabled"
+        em_enabled_uid = f"hyxi_{self._param_sn}_em_enabled"
         em_entity = self._find_entity_id("switch", em_enabled_uid)
         if em_entity and not self._get_ha_state_bool(em_entity, True):
             return "disabled"
@@ -181,6 +202,41 @@ class EnergyManagerEngine:
         """Whether the engine loop is running."""
         return self._enabled
 
+    @property
+    def load_profile(self) -> LoadProfile:
+        """Learned hour-of-week household load."""
+        return self._load_profile
+
+    @property
+    def decision_count(self) -> int:
+        """Number of decisions made since the engine was set up."""
+        return self._scheduler.decisions
+
+    @property
+    def scheduler_stats(self) -> dict[str, Any]:
+        """Decision scheduling counters and latencies."""
+        return self._scheduler.as_diagnostics()
+
+    @property
+    def command_budget(self) -> int:
+        """Commands the inverter may send now without being throttled."""
+        return self._coordinator.command_budget.available(self._sn, time.monotonic())
+
+    @property
+    def command_budget_usage(self) -> dict[str, Any]:
+        """Budget levels and granted/refused command counts."""
+        return self._coordinator.command_budget.usage(self._sn, time.monotonic())
+
+    @property
+    def recovery_stats(self) -> dict[str, Any]:
+        """Stale data recovery counters per stage."""
+        return self._recovery.as_diagnostics()
+
+    @property
+    def decision_trace(self) -> DecisionTrace:
+        """The last decisions with their inputs."""
+        return self._trace
+
     @property
     def p1_avg(self) -> float:
         """Rolling 1-minute average of P1 readings."""
@@ -197,20 +253,18 @@ class EnergyManagerEngine:
 
         self._enabled = True
         _LOGGER.info("Energy Manager started for %s", mask_sn(self._sn))
+        await self._async_load_profile()
 
-        # Decision loop — interval from options or default
-        interval = int(
-            self._coordinator.entry.options.get(CONF_EM_LOOP_INTERVAL, EM_LOOP_INTERVAL)
-        )
+        # Decision loop — a tick decides only when the scheduler says so
         self._unsub_listeners.append(
             async_track_time_interval(
                 self._hass,
                 self._loop_tick,
-                timedelta(seconds=interval),
+                timedelta(seconds=self._loop_interval),
             )
         )
 
-        # P1 state change listener for rolling average + high-load fast-path
+        # P1 state change listener for rolling average + P1 deadband
         if self._p1_entity:
             self._unsub_listeners.append(
                 async_track_state_change_event(
@@ -220,17 +274,28 @@ class EnergyManagerEngine:
                 )
             )
 
-        # Low-SOC fast-path: listen for battery SOC changes
-        soc_entity = self._find_entity_id("sensor", f"hyxi_{self._sn}_batsoc")
-        if soc_entity:
+        # SOC, solar and home load arrive with each coordinator update
+        self._unsub_listeners.append(
+            self._coordinator.async_add_listener(self._on_coordinator_update)
+        )
+
+        # Parameter edits: EM numbers/switches and the SOC limits
+        param_entities = self._param_entity_ids()
+        if param_entities:
             self._unsub_listeners.append(
                 async_track_state_change_event(
                     self._hass,
-                    [soc_entity],
-                    self._on_soc_change,
+                    param_entities,
+                    self._on_param_change,
                 )
             )
 
+        # sun.sun changes when the sun crosses the horizon or the location
+        # is edited; rebuild the sun times then
+        self._unsub_listeners.append(
+            async_track_state_change_event(self._hass, ["sun.sun"], self._on_sun_change)
+        )
+
         # Hourly night consumption estimate
         self._unsub_listeners.append(
             async_track_time_interval(
@@ -251,9 +316,31 @@ class EnergyManagerEngine:
         for unsub in self._unsub_listeners:
             unsub()
         self._unsub_listeners.clear()
+        if self._unsub_evaluate is not None:
+            self._unsub_evaluate()
+            self._unsub_evaluate = None
+        if self._profile_store is not None:
+            try:
+                await self._profile_store.async_save(self._load_profile.as_dict())
+            except Exception as err:  # pylint: disable=broad-except
+                # A failed save only loses the hours learned since the last one
+                _LOGGER.warning("EM: Failed to save the load profile: %s", err)
         _LOGGER.info("Energy Manager stopped for %s", mask_sn(self._sn))
         self._notify_sensors()
 
+    async def _async_load_profile(self) -> None:
+        """Warm-start the load profile from storage."""
+        self._profile_store = Store(
+            self._hass, 1, f"hyxi_cloud_load_profile_{self._coordinator.entry.entry_id}"
+        )
+        try:
+            raw = await self._profile_store.async_load()
+        except Exception as err:  # pylint: disable=broad-except
+            # Intentional broad catch: a corrupt file just means relearning
+            _LOGGER.warning("EM: Failed to load the load profile: %s", err)
+            return
+        self._load_profile = LoadProfile.from_dict(raw)
+
     def register_update_callback(self, cb: Callable[[], None]) -> None:
         """Register a callback for sensor updates after each decision."""
         self._update_callbacks.append(cb)
@@ -275,6 +362,28 @@ class EnergyManagerEngine:
         registry = er.async_get(self._hass)
         return registry.async_get_entity_id(domain, DOMAIN, unique_id)
 
+    def _param_entity_ids(self) -> list[str]:
+        """Entities whose edits call for a new decision.
+
+        The EM numbers and switches of this entry, and the protection SOC
+        limits the engine reads.
+        """
+        registry = er.async_get(self._hass)
+        prefix = f"hyxi_{self._param_sn}_em_"
+        entity_ids = [
+            entry.entity_id
+            for entry in er.async_entries_for_config_entry(
+                registry, self._coordinator.entry.entry_id
+            )
+            if entry.domain in ("number", "switch")
+            and entry.unique_id.startswith(prefix)
+        ]
+        for key in ("soc_min", "soc_max"):
+            entity_id = self._find_entity_id("number", f"hyxi_{self._sn}_{key}")
+            if entity_id:
+                entity_ids.append(entity_id)
+        return entity_ids
+
     def _get_coordinator_metric(self, key: str, default: float = 0.0) -> float:
         """Get a metric value from the coordinator data."""
         if not self._coordinator.data:
@@ -336,7 +445,7 @@ class EnergyManagerEngine:
             return self._get_battery_capacity()
 
         default = EM_DEFAULTS.get(key, 0)
-        unique_id = f"hyxi_{self._sn}_em_{key}"
+        unique_id = f"hyxi_{self._param_sn}_em_{key}"
         entity_id = self._find_entity_id("number", unique_id)
         if not entity_id:
             # Try switch domain for boolean params
@@ -361,7 +470,7 @@ class EnergyManagerEngine:
         state-machine write, mirroring how _get_param/_get_ha_state_float
         read it, if the entity object can't be found (e.g. not yet added).
         """
-        unique_id = f"hyxi_{self._sn}_em_{key}"
+        unique_id = f"hyxi_{self._param_sn}_em_{key}"
         entity_id = self._find_entity_id("number", unique_id)
         if not entity_id:
             return
@@ -420,52 +529,48 @@ class EnergyManagerEngine:
         """Get current P1 meter reading (positive=import, negative=export)."""
         return self._get_ha_state_float(self._p1_entity, 0)
 
+    def _ephemeris(self) -> SunEphemeris:
+        """Sun times for the configured location, built on first use."""
+        if self._sun is None:
+            config = self._hass.config
+            self._sun = SunEphemeris(
+                config.latitude, config.longitude, config.elevation
+            )
+        return self._sun
+
     def _is_night(self) -> bool:
         """Check if it's nighttime (no solar and sun below horizon)."""
-        solar = self._get_solar()
-        if solar > 50:
+        if self._get_solar() > 50:
             return False
-        sun_state = self._hass.states.get("sun.sun")
-        if sun_state is None:
-            return solar < 50
-        elevation = sun_state.attributes.get("elevation", 0)
-        return elevation < 0
+        from homeassistant.util import dt as dt_util
+
+        return self._ephemeris().elevation(dt_util.utcnow()) < 0
 
     def _hours_until_sunrise(self) -> float:
-        """Calculate hours until next sunrise from sun.sun attributes."""
-        sun_state = self._hass.states.get("sun.sun")
-        if sun_state is None:
-            return 12.0
-        next_rising = sun_state.attributes.get("next_rising")
-        if next_rising is None:
-            return 12.0
+        """Hours until the next sunrise, 12 if there is none soon."""
         from homeassistant.util import dt as dt_util
 
         now = dt_util.utcnow()
-        if isinstance(next_rising, str):
-            next_rising = dt_util.parse_datetime(next_rising)
+        next_rising = self._ephemeris().next_rising(now)
         if next_rising is None:
             return 12.0
-        diff = (next_rising - now).total_seconds() / 3600
-        return max(0.0, diff)
+        return max(0.0, (next_rising - now).total_seconds() / 3600)
+
+    def _next_setting(self) -> datetime | None:
+        """Next sunset, or None if there is none soon."""
+        from homeassistant.util import dt as dt_util
+
+        return self._ephemeris().next_setting(dt_util.utcnow())
 
     def _hours_until_sunset(self) -> float:
-        """Calculate hours until next sunset from sun.sun attributes."""
-        sun_state = self._hass.states.get("sun.sun")
-        if sun_state is None:
-            return 12.0
-        next_setting = sun_state.attributes.get("next_setting")
-        if next_setting is None:
-            return 12.0
+        """Hours until the next sunset, 12 if there is none soon."""
         from homeassistant.util import dt as dt_util
 
         now = dt_util.utcnow()
-        if isinstance(next_setting, str):
-            next_setting = dt_util.parse_datetime(next_setting)
+        next_setting = self._ephemeris().next_setting(now)
         if next_setting is None:
             return 12.0
-        diff = (next_setting - now).total_seconds() / 3600
-        return max(0.0, diff)
+        return max(0.0, (next_setting - now).total_seconds() / 3600)
 
     # ── Protection integration ─────────────────────────────────────────
 
@@ -485,6 +590,30 @@ class EnergyManagerEngine:
         """Check if dry-run mode is enabled in options."""
         return bool(self._coordinator.entry.options.get("em_dry_run", False))
 
+    def _command_allowed(self, command: str) -> bool:
+        """Spend a command from the budget; False while it is used up.
+
+        A refused command is simply not sent: the decision stays busy and
+        the next tick tries again once the budget has refilled.
+        """
+        budget = self._coordinator.command_budget
+        now = time.monotonic()
+        if budget.acquire(self._sn, now):
+            if self._throttled:
+                _LOGGER.info("EM: Command budget for %s refilled", mask_sn(self._sn))
+                self._throttled = False
+            return True
+        if not self._throttled:
+            _LOGGER.warning(
+                "EM: Command budget for %s used up, holding %s for %.0fs",
+                mask_sn(self._sn),
+                command,
+                budget.retry_after(self._sn, now),
+            )
+            self._throttled = True
+            self._notify_sensors()
+        return False
+
     async def _set_mode(self, mode: str, power_w: int | None = None) -> bool:
         """Set operating mode via direct API call with cooldown enforcement."""
         cooldown = self._get_param("mode_switch_cooldown")
@@ -518,6 +647,9 @@ class EnergyManagerEngine:
             self._notify_sensors()
             return True
 
+        if not self._command_allowed(mode):
+            return False
+
         client: HyxiApiClient = self._coordinator.client
         try:
             if mode == "idle":
@@ -562,18 +694,32 @@ class EnergyManagerEngine:
             _LOGGER.error("EM: Failed to set mode %s: %s", mode, err)
             return False
 
-    async def _adjust_power(self, direction: str, target_w: int) -> bool:
+    def _power_unchanged(
+        self, direction: str, target_w: int, exact_step: bool = False
+    ) -> bool:
+        """Whether target_w is too close to the current power to resend.
+
+        Within the power change threshold; with exact_step, a change of
+        exactly one threshold step still counts (PI output on its grid).
+        """
+        if target_w <= 100:
+            return False
+        threshold = self._get_param("power_change_threshold")
+        change = abs(target_w - self._get_current_power_setting(direction))
+        return change < threshold if exact_step else change <= threshold
+
+    async def _adjust_power(
+        self, direction: str, target_w: int, exact_step: bool = False
+    ) -> bool:
         """Adjust charge/discharge power and resend command to inverter."""
         adjust_cooldown = self._get_param("power_adjust_cooldown")
         if (time.monotonic() - self._last_power_adjust) < adjust_cooldown:
             return False
 
         target_w = int(max(1, min(target_w, 10000)))
-        threshold = self._get_param("power_change_threshold")
 
         # Check if power actually changed enough
-        current_power = self._get_current_power_setting(direction)
-        if abs(target_w - current_power) <= threshold and target_w > 100:
+        if self._power_unchanged(direction, target_w, exact_step):
             return False
 
         if self._dry_run:
@@ -587,6 +733,9 @@ class EnergyManagerEngine:
             self._current_mode = direction
             return True
 
+        if not self._command_allowed(f"{direction} power"):
+            return False
+
         client: HyxiApiClient = self._coordinator.client
         try:
             if direction == "charge":
@@ -634,6 +783,9 @@ class EnergyManagerEngine:
             self._notify_sensors()
             return True
 
+        if not self._command_allowed(f"peak shaving {option}"):
+            return False
+
         client: HyxiApiClient = self._coordinator.client
         try:
             await client.set_peak_shaving(self._sn, option)
@@ -673,12 +825,21 @@ class EnergyManagerEngine:
     # ── Night consumption estimation ────────────────────────────────────
 
     def _estimate_night_consumption_wh(self) -> float:
-        """Estimate energy needed to survive the night (Wh)."""
+        """Estimate energy needed to survive the night (Wh).
+
+        Integrates the learned hour-of-week load until solar returns; hours
+        the profile hasn't learned yet count at the average night load.
+        """
+        from homeassistant.util import dt as dt_util
+
         avg_load = self._get_param("avg_night_consumption")
         hours_until_solar = self._hours_until_sunrise() + 1.0
         night_hours = 11
         hours_remaining = min(hours_until_solar, night_hours)
-        wh_needed = avg_load * hours_remaining
+        now = dt_util.now()
+        wh_needed = self._load_profile.energy_wh(
+            now, now + timedelta(hours=hours_remaining), avg_load
+        )
         buffer_pct = self._get_param("night_buffer_pct") / 100
         wh_needed *= 1 + buffer_pct
         return wh_needed
@@ -725,6 +886,59 @@ class EnergyManagerEngine:
         usable_wh = (estimated_solar_wh - avg_night_load * hours_to_sunset) * 0.8
         return usable_wh >= wh_needed
 
+    def _power_limit(self, direction: str) -> float:
+        """Maximum charge/discharge power (W) of the battery."""
+        return self._get_param(f"max_{direction}_power")
+
+    def _forecast_series(self) -> list[tuple[datetime, float]]:
+        """Read a solar forecast series from the forecast entities' attributes."""
+        for entity_id in (self._forecast_power_entity, self._forecast_entity):
+            state = self._hass.states.get(entity_id) if entity_id else None
+            if state is not None:
+                series = forecast_series(state.attributes)
+                if series:
+                    return series
+        return []
+
+    def _expected_load(self, start: datetime) -> float:
+        """Expected home load (W) in the forecast slot starting at start.
+
+        From the learned profile (which only changes once an hour, so the
+        planner keeps reusing its tables), else the average night load.
+        """
+        from homeassistant.util import dt as dt_util
+
+        expected = self._load_profile.expected(dt_util.as_local(start))
+        if expected is None:
+            return self._get_param("avg_night_consumption")
+        return expected
+
+    def _battery_schedule(self, target_soc: float) -> BatterySchedule | None:
+        """Plan the battery to sunset, or None without a forecast series."""
+        if self._is_night():
+            return None
+        sunset = self._next_setting()
+        series = self._forecast_series()
+        if sunset is None or not series:
+            return None
+        from homeassistant.util import dt as dt_util
+
+        slots = forecast_slots(series, dt_util.utcnow(), sunset, self._expected_load)
+        if not slots:
+            return None
+        # The night target follows the learned load to the watt-hour, so it
+        # moves a little every tick; on the planner's SOC grid (rounded up,
+        # to stay on the safe side) it only changes when the plan would
+        params = PlanParams(
+            soc_min=self._get_protection_param("soc_min", 20),
+            soc_max=self._get_protection_param("soc_max", 90),
+            target_soc=math.ceil(target_soc / SOC_STEP) * SOC_STEP,
+            capacity_wh=self._get_param("battery_capacity_wh"),
+            max_charge=self._power_limit("charge"),
+            max_discharge=self._power_limit("discharge"),
+        )
+        return self._planner.plan(params, slots, self._get_soc())
+
     # ── Battery energy calculation ──────────────────────────────────────
 
     def battery_energy_available_wh(self) -> float:
@@ -739,15 +953,10 @@ class EnergyManagerEngine:
     # ── Main decision engine ────────────────────────────────────────────
 
     async def _make_decision(self) -> None:
-        """Core decision logic. Called every EM_LOOP_INTERVAL seconds.
-
-        Priority order:
-          1. Safety: SOC below minimum -> emergency charge
-          2. Safety: SOC above maximum -> forced discharge
-          3. Sustained high load -> battery assist or idle
-          4. Night -> self_consume until soc_min, then idle
-          4b. Night preservation -> idle if SOC <= night target
-          5. Solar optimization -> self_consume first, charge on sustained export
+        """Core decision logic. Called when the scheduler asks for a decision.
+
+        Snapshots the system and the EM parameters, lets the decision
+        kernel (decision.decide) pick the decision and sends its commands.
         """
         if self._in_decision:
             _LOGGER.debug(
@@ -756,20 +965,13 @@ class EnergyManagerEngine:
             return
         self._in_decision = True
         try:
-            # Read soc_min/soc_max from EXISTING protection number entities
-            solar = self._get_solar()
-            s = DecisionState(
-                soc=self._get_soc(),
-                solar=solar,
-                p1=self._get_p1(),
-                home_load=self._get_home_load(),
-                soc_min=self._get_protection_param("soc_min", 20),
-                soc_max=self._get_protection_param("soc_max", 90),
-                max_charge=self._get_param("max_charge_power"),
-                max_discharge=self._get_param("max_discharge_power"),
-                is_night=self._is_night(),
-                solar_producing=solar > 50,
-                night_soc_target=self._soc_needed_for_night(),
+            s = self._decision_state()
+            self._scheduler.begin(
+                time.monotonic(),
+                p1=s.p1,
+                soc=s.soc,
+                solar=s.solar,
+                home_load=s.home_load,
             )
 
             _LOGGER.debug(
@@ -783,363 +985,121 @@ class EnergyManagerEngine:
                 s.night_soc_target,
             )
 
-            # PRIORITY 1 & 2: SOC safety limits
-            if await self._check_soc_limits(s):
-                return
-
-            # PRIORITY 2b: Export limiting
-            if await self._check_export_limit(s):
-                return
-
-            # PRIORITY 3: Sustained high load
-            if await self._check_high_load(s):
-                return
-
-            # PRIORITY 4 & 4b: Night mode
-            if await self._check_night(s):
-                return
-
-            # PRIORITY 5: Solar optimization
-            if await self._check_solar(s):
-                return
-
-            # ── DEFAULT: self_consume as safe fallback ─────────────────────
-            self._set_decision("idle_default")
-            if self._current_mode in ("charge", "discharge"):
-                await self._set_mode("self_consume")
+            params = self._decision_params()
+            counters = self._counters
+            now = time.monotonic()
+            decision = decide(s, params, counters, now)
+            sent = await self._apply_decision(decision)
+            # Commands and running counts need the next tick to follow up
+            latency = self._scheduler.finish(
+                time.monotonic(),
+                sent=sent,
+                busy=bool(decision.commands)
+                or self._counters != counters
+                or self._counters.counting,
+            )
+            self._trace.record(s, params, counters, now, decision, sent, latency)
         finally:
             self._in_decision = False
 
-    async def _check_soc_limits(self, s: DecisionState) -> bool:
-        """PRIORITY 1 & 2: SOC safety limits. Returns True if handled."""
-        if s.soc <= s.soc_min:
-            if s.solar_producing:
-                charge_target = min(s.solar - 50, s.max_charge)
-                charge_target = max(charge_target, 300)
-                # Absorb grid export: if P1 negative, increase charge to
-                # capture excess solar instead of wasting it to grid
-                if s.p1 < 0:
-                    charge_target = min(
-                        charge_target + abs(int(s.p1)), int(s.max_charge)
-                    )
-                self._set_decision("emergency_solar_charge")
-                if self._current_mode != "charge":
-                    await self._set_mode("charge", int(charge_target))
-                else:
-                    await self._adjust_power("charge", int(charge_target))
-                return True
-
-            grid_charge_uid = f"hyxi_{self._sn}_em_grid_charge_allowed"
-            grid_entity = self._find_entity_id("switch", grid_charge_uid)
-            if self._get_ha_state_bool(grid_entity):
-                grid_charge_w = min(2000, int(s.max_charge))
-                self._set_decision("grid_charge_emergency")
-                if self._current_mode != "charge":
-                    await self._set_mode("charge", grid_charge_w)
-                else:
-                    await self._adjust_power("charge", grid_charge_w)
-                return True
-            self._set_decision("low_soc_idle")
-            if self._current_mode != "idle":
-                await self._set_mode("idle")
-            return True
+    def _decision_state(self) -> DecisionState:
+        """Snapshot the readings and inverter state for the decision kernel."""
+        # Read soc_min/soc_max from EXISTING protection number entities
+        soc = self._get_soc()
+        solar = self._get_solar()
+        night_soc_target = self._soc_needed_for_night()
+        schedule = self._battery_schedule(night_soc_target)
+        if schedule is not None:
+            covered = schedule.reaches_target
+        else:
+            # Only consult the forecast when the battery is short of the target
+            covered = soc > night_soc_target or self._solar_will_cover_charge(
+                night_soc_target
+            )
+        return DecisionState(
+            soc=soc,
+            solar=solar,
+            p1=self._get_p1(),
+            home_load=self._get_home_load(),
+            soc_min=self._get_protection_param("soc_min", 20),
+            soc_max=self._get_protection_param("soc_max", 90),
+            max_charge=self._power_limit("charge"),
+            max_discharge=self._power_limit("discharge"),
+            is_night=self._is_night(),
+            solar_producing=solar > 50,
+            night_soc_target=night_soc_target,
+            p1_avg=self.p1_avg,
+            hours_to_sunset=self._hours_until_sunset(),
+            solar_covers_night=soc > night_soc_target or covered,
+            planned_power=schedule.power[0] if schedule is not None else None,
+            current_mode=self._current_mode,
+            last_decision=self._last_decision,
+            pv_curtailed=self._pv_curtailed,
+            charge_power=self._get_current_power_setting("charge"),
+        )
 
-        if s.soc > s.soc_max:
-            discharge_w = max(s.p1, 1000)
-            discharge_w = min(discharge_w, s.max_discharge)
-            self._set_decision("forced_discharge_over_max")
-            if self._current_mode != "discharge":
-                await self._set_mode("discharge", int(discharge_w))
-            else:
-                await self._adjust_power("discharge", int(discharge_w))
-            return True
+    def _decision_params(self) -> DecisionParams:
+        """Snapshot the EM parameters and feature switches."""
+        return DecisionParams(
+            battery_capacity_wh=self._get_param("battery_capacity_wh"),
+            high_load_threshold=self._get_param("high_load_threshold"),
+            max_grid_export=self._get_param("max_grid_export"),
+            min_solar_for_charge=self._get_param("min_solar_for_charge"),
+            charge_margin=self._get_param("charge_margin"),
+            charge_entry_threshold=self._get_param("charge_entry_threshold"),
+            charge_reentry_delay=self._get_param("charge_reentry_delay"),
+            bottomout_cooldown=self._get_param("bottomout_cooldown"),
+            grid_charge_allowed=self._get_switch("grid_charge_allowed"),
+            export_limiting=self._get_switch("export_limiting"),
+            high_load_assist=self._get_switch("high_load_battery_assist"),
+            night_mode=self._get_switch("night_mode"),
+            peak_shaving=self._has_peak_shaving(),
+            pi_charge_control=self._get_switch("pi_charge_control"),
+            p1_setpoint=self._get_param("p1_setpoint"),
+            power_change_threshold=self._get_param("power_change_threshold"),
+        )
 
-        return False
+    def _get_switch(self, key: str) -> bool:
+        """Read an EM feature switch; off when it doesn't exist."""
+        entity_id = self._find_entity_id("switch", f"hyxi_{self._param_sn}_em_{key}")
+        return self._get_ha_state_bool(entity_id, False)
 
-    async def _check_export_limit(self, s: DecisionState) -> bool:
-        """PRIORITY 2b: Export limiting (single-phase only). Returns True if handled.
+    async def _apply_decision(self, decision: Decision) -> bool:
+        """Record a kernel decision and send its commands.
 
-        Only applies to single-phase devices with peak shaving support
-        (controlId 1021). Uses battery charge to absorb excess when SOC
-        allows, and PV curtailment (stop/hold) when battery is full.
-        Three-phase devices rely on existing mode controls instead.
+        Returns True if the inverter accepted at least one command.
         """
-        if not self._has_peak_shaving():
-            return False
-
-        export_limit_uid = f"hyxi_{self._sn}_em_export_limiting"
-        export_limit_entity = self._find_entity_id("switch", export_limit_uid)
-        if not self._get_ha_state_bool(export_limit_entity, False):
-            if self._pv_curtailed:
-                await self._release_pv_curtailment()
-            return False
-
-        max_export = self._get_param("max_grid_export")
-        if max_export <= 0:
-            if self._pv_curtailed:
-                await self._release_pv_curtailment()
-            return False
-
-        # P1 negative = exporting; check if export exceeds limit
-        if s.p1 < -max_export:
-            if s.soc < s.soc_max:
-                # Battery has room — charge to absorb excess
-                if self._pv_curtailed:
-                    await self._release_pv_curtailment()
-                excess = abs(s.p1) - max_export
-                charge_target = min(excess, s.max_charge)
-                charge_target = max(charge_target, 300)
-                self._set_decision("export_limit_charge")
-                if self._current_mode != "charge":
-                    await self._set_mode("charge", int(charge_target))
-                else:
-                    await self._adjust_power("charge", int(charge_target))
-                return True
-
-            # Battery full — curtail PV via peak shaving stop
-            self._set_decision("export_limit_pv_curtail")
-            if not self._pv_curtailed:
-                await self._set_peak_shaving("stop")
-            return True
-
-        # Export within limit — release curtailment if active
-        if self._pv_curtailed:
-            self._set_decision("export_limit_pv_resume")
-            await self._release_pv_curtailment()
-            return True
-
-        # Were charging due to export limit but export is now within limit
-        if (
-            self._current_mode == "charge"
-            and self._last_decision == "export_limit_charge"
-        ):
-            if s.p1 >= -max_export:
-                self._set_decision("export_limit_ok")
-                await self._set_mode("self_consume")
-                return True
-
-        return False
-
-    async def _check_high_load(self, s: DecisionState) -> bool:
-        """PRIORITY 3: Sustained high load. Returns True if handled."""
-        # Check if high load feature is enabled by the user
-        high_load_assist_uid = f"hyxi_{self._sn}_em_high_load_battery_assist"
-        high_load_entity = self._find_entity_id("switch", high_load_assist_uid)
-        high_load_assist = self._get_ha_state_bool(high_load_entity, False)
-        if not high_load_assist:
-            return False
-
-        high_load_threshold = self._get_param("high_load_threshold")
-
-        if s.home_load > high_load_threshold:
-            high_load_wh = s.max_discharge * 0.5
-            capacity = self._get_param("battery_capacity_wh")
-            soc_cost = (high_load_wh / capacity) * 100 if capacity > 0 else 100
-
-            if (s.soc - soc_cost) > s.night_soc_target:
-                self._set_decision("high_load_battery_assist")
-                if self._current_mode != "self_consume":
-                    await self._set_mode("self_consume")
+        self._set_decision(decision.label)
+        accepted = True
+        sent = False
+        for command in decision.commands:
+            if await self._send_command(command, decision.exact_step):
+                sent = True
             else:
-                self._set_decision("high_load_grid_only")
-                if self._current_mode != "idle":
-                    await self._set_mode("idle")
-            return True
-
-        return False
-
-    async def _check_night(self, s: DecisionState) -> bool:
-        """PRIORITY 4 & 4b: Night mode. Returns True if handled."""
-        # Check if night mode feature is enabled by the user
-        night_mode_uid = f"hyxi_{self._sn}_em_night_mode"
-        night_mode_entity = self._find_entity_id("switch", night_mode_uid)
-        if not self._get_ha_state_bool(night_mode_entity, False):
-            return False
-
-        if not s.solar_producing and s.is_night:
-            if s.soc > s.soc_min:
-                self._set_decision("night_self_consume")
-                if self._current_mode != "self_consume":
-                    await self._set_mode("self_consume")
-            else:
-                self._set_decision("night_reserve_hold")
-                if self._current_mode != "idle":
-                    await self._set_mode("idle")
-            return True
-
-        # Night battery preservation during daytime
-        p1_avg = self.p1_avg
-        if (
-            not s.is_night
-            and s.soc <= s.night_soc_target
-            and s.p1 > 0
-            and p1_avg > 0
-            and not self._solar_will_cover_charge(s.night_soc_target)
-        ):
-            self._set_decision("night_preserve_idle")
-            if self._current_mode != "idle":
-                await self._set_mode("idle")
-            return True
-
-        return False
-
-    async def _check_solar(self, s: DecisionState) -> bool:
-        """PRIORITY 5: Solar optimization. Returns True if handled."""
-        if s.solar_producing and s.soc < s.soc_max:
-            await self._solar_charge_logic(s)
-            return True
-
-        if s.solar_producing and s.soc >= s.soc_max:
-            self._set_decision("solar_battery_full")
-            if self._current_mode != "self_consume":
-                await self._set_mode("self_consume")
-            return True
-
-        return False
-
-    async def _solar_charge_logic(self, s: DecisionState) -> None:
-        """Solar charge entry/exit and power tuning logic."""
-        min_solar_for_charge = self._get_param("min_solar_for_charge")
-        charge_margin = self._get_param("charge_margin")
-        charge_entry_threshold = self._get_param("charge_entry_threshold")
-        charge_reentry_delay = self._get_param("charge_reentry_delay")
-        readings_needed = max(int(charge_reentry_delay / 15 / 3), 2)
-
-        # After a bottomout exit, double the readings needed
-        bottomout_cooldown = self._get_param("bottomout_cooldown")
-        if (time.monotonic() - self._last_bottomout_exit) < bottomout_cooldown:
-            readings_needed = readings_needed * 2
-
-        # Sunset urgency
-        hours_to_sunset = self._hours_until_sunset()
-        sunset_urgent = False
-        if hours_to_sunset < 4 and s.soc < s.night_soc_target:
-            if not self._solar_will_cover_charge(s.night_soc_target):
-                sunset_urgent = True
-                charge_entry_threshold = max(charge_entry_threshold // 2, 100)
-                readings_needed = max(readings_needed // 2, 1)
-                min_solar_for_charge = max(min_solar_for_charge - 300, 200)
-
-        sc = SolarConfig(
-            min_solar_for_charge=min_solar_for_charge,
-            charge_margin=charge_margin,
-            charge_entry_threshold=charge_entry_threshold,
-            readings_needed=readings_needed,
-            sunset_urgent=sunset_urgent,
-        )
-
-        if self._current_mode != "charge":
-            await self._solar_entry_logic(s, sc)
+                accepted = False
+        if not accepted and decision.counters_if_refused is not None:
+            self._counters = decision.counters_if_refused
         else:
-            await self._solar_tune_logic(s, sc)
+            self._counters = decision.counters
+        return sent
 
-    async def _solar_entry_logic(
-        self,
-        s: DecisionState,
-        sc: SolarConfig,
-    ) -> None:
-        """Handle charge entry decision when not currently charging."""
-        if s.solar < sc.min_solar_for_charge:
-            self._set_decision("solar_self_consume")
-            if self._current_mode not in ("self_consume", "idle"):
-                await self._set_mode("self_consume")
-            self._charge_entry_export_count = 0
-
-        elif s.p1 < -sc.charge_entry_threshold:
-            self._charge_entry_export_count += 1
-            if (
-                self._charge_entry_export_count >= sc.readings_needed
-                and s.solar >= sc.min_solar_for_charge
-            ):
-                charge_target = min(abs(s.p1) - sc.charge_margin - 100, s.solar - 500)
-                charge_target = min(charge_target, s.max_charge)
-                charge_target = max(charge_target, 300)
-                decision = "pre_night_charge" if sc.sunset_urgent else "solar_charge"
-                self._set_decision(decision)
-                if await self._set_mode("charge", int(charge_target)):
-                    self._charge_entry_export_count = 0
-            else:
-                self._set_decision("solar_export_waiting")
-                if self._current_mode not in ("self_consume", "idle"):
-                    await self._set_mode("self_consume")
-        else:
-            self._charge_entry_export_count = 0
-            self._set_decision("solar_self_consume")
-            if self._current_mode not in ("self_consume", "idle"):
-                await self._set_mode("self_consume")
+    async def _send_command(self, command: Command, exact_step: bool = False) -> bool:
+        """Send one kernel command; return False if it was refused.
 
-    async def _solar_tune_logic(
-        self,
-        s: DecisionState,
-        sc: SolarConfig,
-    ) -> None:
-        """Fine-tune charge power when already in charge mode."""
-        current_charge = self._get_current_power_setting("charge")
-        solar_cap = max(s.solar - sc.charge_margin, 100)
-
-        if s.solar < sc.min_solar_for_charge - 150:
-            self._set_decision("solar_self_consume")
-            self._last_charge_exit = time.monotonic()
-            self._charge_entry_export_count = 0
-            self._charge_bottomout_count = 0
-            await self._set_mode("self_consume")
-
-        elif s.p1 > sc.charge_margin:
-            await self._solar_reduce_charge(
-                s.p1, current_charge, solar_cap, sc.charge_margin
-            )
-
-        elif s.p1 < -(sc.charge_margin + 100):
-            # Exporting too much — increase charge
-            # Decrement bottomout counter (don't fully reset — volatile P1
-            # can briefly dip negative between import spikes)
-            self._charge_bottomout_count = max(0, self._charge_bottomout_count - 1)
-            excess_export = abs(s.p1) - sc.charge_margin
-            charge_target = current_charge + excess_export
-            charge_target = min(charge_target, s.max_charge)
-            charge_target = min(charge_target, solar_cap)
-            self._set_decision("solar_charge")
-            await self._adjust_power("charge", int(charge_target))
-        else:
-            # P1 within target range — balanced
-            self._charge_bottomout_count = max(0, self._charge_bottomout_count - 1)
-            self._set_decision("solar_charge")
-
-    async def _solar_reduce_charge(
-        self,
-        p1,
-        current_charge,
-        solar_cap,
-        charge_margin,
-    ) -> None:
-        """Reduce charge power when importing from grid.
-
-        Uses dampened reduction: max 50% cut per tick to avoid volatile P1
-        spikes crashing charge power from high values to 100W in one step.
+        exact_step: the decision's power is on the threshold grid (see
+        Decision.exact_step).
         """
-        desired_reduction = p1 + charge_margin
-        max_step = max(current_charge * 0.5, 200)
-        actual_reduction = min(desired_reduction, max_step)
-        charge_target = current_charge - actual_reduction
-        charge_target = min(charge_target, solar_cap)
-        charge_target = max(charge_target, 100)
-
-        if charge_target <= 100:
-            self._charge_bottomout_count += 1
-            if self._charge_bottomout_count >= 5:
-                self._set_decision("solar_self_consume")
-                self._last_charge_exit = time.monotonic()
-                self._last_bottomout_exit = time.monotonic()
-                self._charge_entry_export_count = 0
-                self._charge_bottomout_count = 0
-                await self._set_mode("self_consume")
-            else:
-                self._set_decision("solar_charge_reduced")
-                await self._adjust_power("charge", 100)
-        else:
-            self._charge_bottomout_count = 0
-            self._set_decision("solar_charge")
-            await self._adjust_power("charge", int(charge_target))
+        if command.action == "set_mode":
+            return await self._set_mode(command.target, command.power)
+        if command.action == "adjust_power":
+            return await self._adjust_power(command.target, command.power, exact_step)
+        if command.action == "curtail_pv":
+            return await self._set_peak_shaving("stop")
+        if command.action == "release_pv":
+            await self._release_pv_curtailment()
+            return True
+        _LOGGER.error("EM: Unknown command: %s", command.action)
+        return False
 
     def _set_decision(self, decision: str) -> None:
         """Update the current decision label."""
@@ -1156,50 +1116,56 @@ class EnergyManagerEngine:
     # ── Callbacks ───────────────────────────────────────────────────────
 
     async def _loop_tick(self, now) -> None:
-        """15-second timer callback."""
+        """Loop interval timer callback.
+
+        Guards against stale data and a disabled EM on every tick; decides
+        only when the scheduler has a decision due.
+        """
         if not self._enabled:
             return
 
-        # Staleness guard: auto-reload integration if data hasn't refreshed
+        # Staleness guard: don't decide on old data; recover it, from a
+        # refresh up to an entry reload as the last resort (recovery.py)
         from homeassistant.util import dt as dt_util
 
         last_success = self._coordinator.hyxi_metadata.get("last_success")
         if last_success is not None:
             stale_seconds = (dt_util.utcnow() - last_success).total_seconds()
             if stale_seconds > 600:  # 10 minutes
-                _LOGGER.warning(
-                    "EM: Coordinator data stale (%.0f min) — reloading integration",
-                    stale_seconds / 60,
-                )
-                persistent_notification.async_create(
-                    self._hass,
-                    f"Energy Manager detected stale data ({stale_seconds / 60:.0f} min). "
-                    "Auto-reloading integration to restore updates.",
-                    title="HYXI Cloud: Stale Data",
-                    notification_id="hyxi_stale_data",
-                )
-                await self._hass.config_entries.async_reload(
-                    self._coordinator.entry.entry_id
-                )
+                await self._recovery.async_recover(stale_seconds)
                 return
 
         # Check em_enabled switch — force self_consume on disable
-        em_enabled_uid = f"hyxi_{self._sn}_em_enabled"
+        em_enabled_uid = f"hyxi_{self._param_sn}_em_enabled"
         em_entity = self._find_entity_id("switch", em_enabled_uid)
         if em_entity and not self._get_ha_state_bool(em_entity, True):
-            if self._current_mode in ("charge", "discharge"):
+            active_mode = self._active_mode()
+            if active_mode is not None:
                 _LOGGER.info(
                     "EM: Disabled — forcing self_consume from %s for %s",
-                    self._current_mode,
+                    active_mode,
                     mask_sn(self._sn),
                 )
                 try:
-                    await self._set_mode("self_consume")
+                    await self._send_command(Command("set_mode", "self_consume"))
                 except OSError, ValueError, TypeError, HyxiApiClient.ControlError:
                     _LOGGER.debug("EM: Failed to force self_consume on disable")
                 self._set_decision("disabled")
+            # Decide as soon as the EM is switched back on
+            self._scheduler.request("enabled", time.monotonic())
             return
 
+        if self._scheduler.due(time.monotonic()):
+            await self._decide_safely()
+
+    def _active_mode(self) -> str | None:
+        """The charge or discharge mode the battery is in, else None."""
+        if self._current_mode in ("charge", "discharge"):
+            return self._current_mode
+        return None
+
+    async def _decide_safely(self) -> None:
+        """Make a decision, falling back to self_consume on an error."""
         try:
             await self._make_decision()
         except OSError, ValueError, TypeError, HyxiApiClient.ControlError:
@@ -1207,13 +1173,40 @@ class EnergyManagerEngine:
             self._set_decision("error")
             # Safe fallback
             try:
-                await self._set_mode("self_consume")
+                await self._send_command(Command("set_mode", "self_consume"))
             except OSError, ValueError, TypeError, HyxiApiClient.ControlError:
                 _LOGGER.debug("EM: Fallback self_consume also failed")
 
+    @callback
+    def _evaluate_soon(self) -> None:
+        """Run the pending decision now, or once the minimum gap has passed."""
+        if not self._enabled or self._unsub_evaluate is not None:
+            return
+        delay = self._scheduler.wait(time.monotonic())
+        if delay > 0:
+            self._unsub_evaluate = async_call_later(
+                self._hass, delay, self._on_evaluate_timer
+            )
+        else:
+            self._hass.async_create_task(self._evaluate())
+
+    async def _on_evaluate_timer(self, _now) -> None:
+        """Run a decision deferred by the minimum gap."""
+        self._unsub_evaluate = None
+        await self._evaluate()
+
+    async def _evaluate(self) -> None:
+        """Event-driven decision; the timer handles a disabled EM."""
+        if not self._enabled or not self._scheduler.pending:
+            return
+        em_entity = self._find_entity_id("switch", f"hyxi_{self._param_sn}_em_enabled")
+        if em_entity and not self._get_ha_state_bool(em_entity, True):
+            return
+        await self._decide_safely()
+
     @callback
     def _on_p1_change(self, event) -> None:
-        """Handle P1 state changes — update rolling average and high-load fast-path."""
+        """Handle P1 state changes — update rolling average and P1 deadband."""
         new_state = event.data.get("new_state")
         if new_state is None or new_state.state in ("unknown", "unavailable"):
             return
@@ -1225,6 +1218,7 @@ class EnergyManagerEngine:
 
         now = time.monotonic()
         self._p1_buffer.append((now, value))
+        self._learn_load(value)
 
         # Trim buffer to configurable window
         window = self._get_param("p1_smoothing_period") or _P1_SMOOTHING_DEFAULT
@@ -1232,39 +1226,67 @@ class EnergyManagerEngine:
         while self._p1_buffer and self._p1_buffer[0][0] < cutoff:
             self._p1_buffer.popleft()
 
-        # High-load fast-path: if home_load exceeds threshold, run decision immediately
-        if not self._enabled:
-            return
+        if self._enabled and self._scheduler.observe("p1", value, now):
+            self._evaluate_soon()
+
+    def _learn_load(self, p1: float) -> None:
+        """Add one household load sample to the profile.
+
+        The inverter's home load reading, or the P1 import when the inverter
+        doesn't report one. The profile is saved when an hour completes.
+        """
+        from homeassistant.util import dt as dt_util
 
         home_load = self._get_home_load()
-        threshold = self._get_param("high_load_threshold")
-        if home_load > threshold:
-            now = time.monotonic()
-            if now - self._last_fast_path_trigger >= 15:
-                self._last_fast_path_trigger = now
-                self._hass.async_create_task(self._make_decision())
+        load = home_load if home_load > 0 else max(p1, 0.0)
+        if (
+            self._load_profile.add(dt_util.now(), load)
+            and self._profile_store is not None
+        ):
+            self._profile_store.async_delay_save(self._load_profile.as_dict, 60)
 
     @callback
-    def _on_soc_change(self, event) -> None:
-        """Handle SOC changes — low-SOC fast-path."""
+    def _on_coordinator_update(self) -> None:
+        """Check the coordinator's readings against their deadbands."""
         if not self._enabled:
             return
+        now = time.monotonic()
+        readings = (
+            ("soc", self._get_soc()),
+            ("solar", self._get_solar()),
+            ("home_load", self._get_home_load()),
+        )
+        # Observe them all, so the ignored-change count stays honest
+        triggered = [self._scheduler.observe(name, v, now) for name, v in readings]
+        if any(triggered):
+            self._evaluate_soon()
 
+    @callback
+    def _on_param_change(self, event) -> None:
+        """Decide again after a parameter or SOC limit edit."""
         new_state = event.data.get("new_state")
         if new_state is None or new_state.state in ("unknown", "unavailable"):
             return
+        if self._enabled and self._scheduler.request("param", time.monotonic()):
+            self._evaluate_soon()
 
-        try:
-            soc = float(new_state.state)
-        except ValueError, TypeError:
-            return
+    @callback
+    def _on_sun_change(self, event) -> None:
+        """Rebuild the sun times when sun.sun's next events move.
 
-        soc_min = self._get_protection_param("soc_min", 20)
-        if soc < soc_min:
-            now = time.monotonic()
-            if now - self._last_fast_path_trigger >= 15:
-                self._last_fast_path_trigger = now
-                self._hass.async_create_task(self._make_decision())
+        sun.sun also updates its elevation every few minutes; that alone
+        leaves the cached times as they are.
+        """
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if old_state is not None and new_state is not None:
+            keys = ("next_rising", "next_setting")
+            if old_state.state == new_state.state and all(
+                old_state.attributes.get(key) == new_state.attributes.get(key)
+                for key in keys
+            ):
+                return
+        self._sun = None
 
     async def _update_night_estimate(self, now) -> None:
         """Hourly night consumption update — EMA from P1 readings at night."""
@@ -0,0 +1,92 @@
+"""Sunrise, sunset and sun elevation for the Energy Manager.
+
+The engine asks about the sun several times per decision: is it night,
+how long until sunrise, how long until sunset. Each answer used to read
+the sun.sun entity again and parse its ISO timestamps, and without a
+sun.sun entity the engine fell back to guesses.
+
+SunEphemeris computes the same values locally with astral (the library
+behind sun.sun) from the configured coordinates. The risings and
+settings around today are computed once per UTC day and the elevation
+at most once a minute, so a query is a lookup in a few cached times.
+Nothing here reads Home Assistant state, so simulations can use it too.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, date, datetime, timedelta
+
+from astral import Observer
+from astral import sun as astral_sun
+
+# Days around today (UTC) whose risings and settings are cached. A UTC day
+# can hold the local sunset of the day before, so look one day back; two
+# days ahead cover the next rising from any time of day.
+_DAYS = (-1, 0, 1, 2)
+
+# How long an elevation stays cached (s)
+ELEVATION_TTL = 60.0
+
+
+class SunEphemeris:
+    """Cached sun times for one location."""
+
+    __slots__ = (
+        "_day",
+        "_elevation",
+        "_elevation_at",
+        "_observer",
+        "_risings",
+        "_settings",
+    )
+
+    def __init__(
+        self, latitude: float, longitude: float, elevation_m: float = 0.0
+    ) -> None:
+        """Initialize for a location (degrees, metres above sea level)."""
+        self._observer = Observer(latitude, longitude, elevation_m)
+        self._day: date | None = None
+        self._risings: tuple[datetime, ...] = ()
+        self._settings: tuple[datetime, ...] = ()
+        self._elevation_at: datetime | None = None
+        self._elevation = 0.0
+
+    def _refresh(self, now: datetime) -> None:
+        """Compute the risings and settings around now's UTC day, once."""
+        day = now.astimezone(UTC).date()
+        if day == self._day:
+            return
+        risings = []
+        settings = []
+        for offset in _DAYS:
+            when = day + timedelta(days=offset)
+            for events, event in (
+                (risings, astral_sun.sunrise),
+                (settings, astral_sun.sunset),
+            ):
+                try:
+                    events.append(event(self._observer, when, tzinfo=UTC))
+                except ValueError:
+                    # Polar day or night: no rising or setting that day
+                    continue
+        self._risings = tuple(sorted(risings))
+        self._settings = tuple(sorted(settings))
+        self._day = day
+
+    def next_rising(self, now: datetime) -> datetime | None:
+        """First sunrise after now, or None if there is none in two days."""
+        self._refresh(now)
+        return next((rising for rising in self._risings if rising > now), None)
+
+    def next_setting(self, now: datetime) -> datetime | None:
+        """First sunset after now, or None if there is none in two days."""
+        self._refresh(now)
+        return next((setting for setting in self._settings if setting > now), None)
+
+    def elevation(self, now: datetime) -> float:
+        """Elevation of the sun above the horizon (degrees) at now."""
+        since = self._elevation_at
+        if since is None or not 0 <= (now - since).total_seconds() < ELEVATION_TTL:
+            self._elevation = astral_sun.elevation(self._observer, now)
+            self._elevation_at = now
+        return self._elevation
@@ -0,0 +1,197 @@
+"""Streaming outlier filters for sensor values.
+
+The cloud occasionally reports a single bogus sample: a power reading
+that is off by an order of magnitude, a SOC that drops to 0 for one push,
+a lifetime counter that briefly goes backwards. Counters have always been
+guarded (see counter_reset_is_valid/counter_max_jump); measurement
+sensors can opt in to an OutlierFilter built from per-device-class stages:
+
+* HampelStage rejects a sample that is far from the rolling median of the
+  last few raw samples, measured in median absolute deviations.
+* RateStage rejects a sample that moved faster than the quantity
+  physically can (e.g. battery SOC in %/minute).
+
+A rejected sample holds the last accepted value. A sample that confirms
+the rejected one (a real step rather than a spike) is accepted, so a
+genuine level change costs one sample of delay. Per-entity state is a
+fixed-size array ring buffer and a few slots; each sample is O(window).
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections.abc import Callable, Mapping
+from functools import partial
+from typing import Any, Protocol
+
+from .const import CONF_OUTLIER_FILTER
+
+# Raw samples kept per entity for the rolling median
+HAMPEL_WINDOW = 7
+# Samples needed before the Hampel stage starts rejecting
+HAMPEL_MIN_SAMPLES = 5
+# Rejection threshold in (scaled) median absolute deviations
+HAMPEL_SIGMAS = 3.0
+# Deviations within this fraction of the median are never outliers
+HAMPEL_MIN_RELATIVE = 0.1
+# MAD -> standard deviation for normally distributed noise
+_MAD_SCALE = 1.4826
+# Consecutive rejections after which a value is accepted regardless
+MAX_HELD = 3
+
+
+def counter_reset_is_valid(last: float, value: float) -> bool:
+    """Return True if a drop of a TOTAL_INCREASING counter is a real reset.
+
+    A drop is only a valid reset if the new value is practically zero AND
+    the drop is significant (not just a tiny dip).
+    """
+    return 0.0 <= value <= 0.1 and (last - value) > last * 0.5
+
+
+def counter_max_jump(elapsed_hours: float) -> float:
+    """Return the largest plausible counter increase over elapsed_hours."""
+    return round(100.0 + 50.0 * elapsed_hours, 2)
+
+
+class FilterStage(Protocol):
+    """One outlier test applied to every sample of an entity."""
+
+    def accepts(
+        self, value: float, now: float, last: float | None, last_time: float
+    ) -> bool:
+        """Return False if value is an outlier given the last accepted one."""
+
+
+class HampelStage:
+    """Rolling-median (Hampel) outlier test over the last raw samples."""
+
+    __slots__ = ("_count", "_index", "_samples", "min_band")
+
+    def __init__(self, min_band: float, window: int = HAMPEL_WINDOW) -> None:
+        """Initialize the stage; min_band is the smallest deviation rejected."""
+        self.min_band = min_band
+        self._samples = array("d", bytes(8 * window))
+        self._index = 0
+        self._count = 0
+
+    def accepts(
+        self, value: float, now: float, last: float | None, last_time: float
+    ) -> bool:
+        """Test value against the window, then add it to the window."""
+        samples = self._samples
+        count = self._count
+        accepted = True
+        if count >= HAMPEL_MIN_SAMPLES:
+            window = sorted(samples[:count])
+            median = window[count // 2]
+            mad = sorted(abs(sample - median) for sample in window)[count // 2]
+            band = max(
+                self.min_band,
+                HAMPEL_SIGMAS * _MAD_SCALE * mad,
+                HAMPEL_MIN_RELATIVE * abs(median),
+            )
+            # A value close to the one currently shown is never an outlier
+            accepted = abs(value - median) <= band or (
+                last is not None and abs(value - last) <= self.min_band
+            )
+        # Rejected samples enter the window too, so a sustained level change
+        # moves the median over within half a window.
+        samples[self._index] = value
+        self._index = (self._index + 1) % len(samples)
+        self._count = min(count + 1, len(samples))
+        return accepted
+
+
+class RateStage:
+    """Rate-of-change limit against the last accepted value."""
+
+    __slots__ = ("floor", "per_second")
+
+    def __init__(self, per_minute: float, floor: float) -> None:
+        """Allow floor plus per_minute for each minute since the last value."""
+        self.per_second = per_minute / 60
+        self.floor = floor
+
+    def accepts(
+        self, value: float, now: float, last: float | None, last_time: float
+    ) -> bool:
+        """Return False if value moved faster than the limit allows."""
+        if last is None:
+            return True
+        allowed = self.floor + self.per_second * max(0.0, now - last_time)
+        return abs(value - last) <= allowed
+
+
+# Device class -> stage factories for its measurement sensors. Extend this
+# to filter another device class; each factory builds one entity's stage.
+DEVICE_CLASS_STAGES: dict[str, tuple[Callable[[], FilterStage], ...]] = {
+    "power": (partial(HampelStage, 50.0),),
+    "apparent_power": (partial(HampelStage, 50.0),),
+    "reactive_power": (partial(HampelStage, 50.0),),
+    "voltage": (partial(HampelStage, 5.0),),
+    "current": (partial(HampelStage, 1.0),),
+    "frequency": (partial(HampelStage, 0.5),),
+    "battery": (partial(RateStage, 1.0, 2.0), partial(HampelStage, 5.0)),
+    "temperature": (partial(RateStage, 2.0, 2.0),),
+}
+
+
+class OutlierFilter:
+    """Chain of stages for one entity; holds the last accepted value."""
+
+    __slots__ = ("_held", "_last", "_last_time", "_pending", "_tolerance", "stages")
+
+    def __init__(self, stages: tuple[FilterStage, ...]) -> None:
+        """Initialize the filter with this entity's own stage instances."""
+        self.stages = stages
+        self._tolerance = max(
+            (getattr(stage, "min_band", 0.0) for stage in stages), default=0.0
+        )
+        self._last: float | None = None
+        self._last_time = 0.0
+        self._pending: float | None = None
+        self._held = 0
+
+    def filter(self, value: float, now: float) -> float | None:
+        """Return value if accepted, else the last accepted value.
+
+        Returns None when value is rejected before anything was accepted.
+        """
+        last = self._last
+        if not math.isfinite(value):
+            return last
+        accepted = True
+        for stage in self.stages:
+            # Every stage sees every sample, so rolling windows stay complete
+            if not stage.accepts(value, now, last, self._last_time):
+                accepted = False
+        if not accepted:
+            pending = self._pending
+            confirmed = pending is not None and self._confirms(pending, value)
+            self._held += 1
+            if not confirmed and self._held < MAX_HELD:
+                self._pending = value
+                return last
+        self._last = value
+        self._last_time = now
+        self._pending = None
+        self._held = 0
+        return value
+
+    def _confirms(self, pending: float, value: float) -> bool:
+        """Return True if value repeats the previously rejected sample."""
+        return abs(value - pending) <= max(self._tolerance, abs(pending) * 0.05)
+
+
+def build_outlier_filter(options: Any, device_class: Any) -> OutlierFilter | None:
+    """Return a filter for a measurement device class if the option is on."""
+    if not isinstance(options, Mapping) or not options.get(CONF_OUTLIER_FILTER):
+        return None
+    factories = DEVICE_CLASS_STAGES.get(
+        str(device_class) if device_class is not None else ""
+    )
+    if not factories:
+        return None
+    return OutlierFilter(tuple(factory() for factory in factories))
@@ -0,0 +1,199 @@
+"""Hour-of-week household load profile for the Energy Manager.
+
+The engine used to know one number about the house: an average night
+consumption, nudged once an hour. LoadProfile learns the load for each
+of the 168 hours of the week from every P1 sample instead, so the night
+reserve and the day-ahead plan see the real evening peak, the quiet
+small hours and the weekend.
+
+Each hour-of-week bucket holds four numbers: how many hours were folded
+in, the mean load, and running estimates of the median and the 90th
+percentile. Samples are averaged over the hour under way, each weighted
+by how long it held (until the next sample, the end of the hour or
+MAX_HOLD), so a burst of readings doesn't outweigh a quiet stretch of
+the same hour. When the hour ends its mean is folded into the bucket,
+weighing recent weeks more so the profile follows a change of habits
+within about a month. Memory is a fixed 168 x 4 array, and the whole
+profile is saved as one flat list.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import Any
+
+HOURS_PER_WEEK = 168
+_FIELDS = 4
+_HOURS, _MEAN, _P50, _P90 = range(_FIELDS)
+
+# An hour's mean counts 1/n for the bucket's first n weeks, then 1/_MAX_WEEKS
+_MAX_WEEKS = 4
+# Step of the running quantiles per sample, as a fraction of the load
+_QUANTILE_RATE = 0.02
+_QUANTILE_FLOOR = 100.0  # W, so quantiles still move on a near-zero load
+# Longest a sample is held for (s), so a gap in the readings (engine
+# stopped, meter offline) doesn't hold a stale value for the whole hour
+MAX_HOLD = 900.0
+
+
+class LoadProfile:
+    """Running hour-of-week statistics of the household load."""
+
+    __slots__ = (
+        "_buckets",
+        "_hour",
+        "_hour_count",
+        "_hour_seconds",
+        "_hour_sum",
+        "_last",
+    )
+
+    def __init__(self) -> None:
+        """Initialize an empty profile."""
+        self._buckets = array("d", bytes(8 * HOURS_PER_WEEK * _FIELDS))
+        # Hour-of-week being averaged: its load x seconds, seconds held and
+        # sample count, and the last sample (time, load), held until now
+        self._hour: int | None = None
+        self._hour_sum = 0.0
+        self._hour_seconds = 0.0
+        self._hour_count = 0
+        self._last: tuple[datetime, float] | None = None
+
+    @staticmethod
+    def bucket(when: datetime) -> int:
+        """Hour-of-week bucket of a (local) time; Monday 00:00 is 0."""
+        return when.weekday() * 24 + when.hour
+
+    def add(self, when: datetime, load: float) -> bool:
+        """Add one load sample (W); return True if it completed an hour."""
+        if not math.isfinite(load) or load < 0:
+            return False
+        index = self.bucket(when)
+        completed = False
+        if index != self._hour:
+            if self._last is not None:
+                last_when = self._last[0]
+                self._hold(
+                    last_when.replace(minute=0, second=0, microsecond=0)
+                    + timedelta(hours=1)
+                )
+            completed = self._fold()
+            self._hour = index
+            self._hour_sum = 0.0
+            self._hour_seconds = 0.0
+            self._hour_count = 0
+        else:
+            self._hold(when)
+        self._last = (when, load)
+        self._hour_count += 1
+
+        buckets = self._buckets
+        base = index * _FIELDS
+        if buckets[base + _HOURS] == 0 and self._hour_count == 1:
+            buckets[base + _P50] = buckets[base + _P90] = load
+            return completed
+        step = _QUANTILE_RATE * max(self._running_mean(load), _QUANTILE_FLOOR)
+        for field, quantile in ((_P50, 0.5), (_P90, 0.9)):
+            if load > buckets[base + field]:
+                buckets[base + field] += step * quantile
+            else:
+                buckets[base + field] -= step * (1 - quantile)
+        return completed
+
+    def _hold(self, until: datetime) -> None:
+        """Add the last sample, held up to until, to the hour under way."""
+        if self._last is None:
+            return
+        last_when, last_load = self._last
+        seconds = min(max((until - last_when).total_seconds(), 0.0), MAX_HOLD)
+        self._hour_sum += last_load * seconds
+        self._hour_seconds += seconds
+
+    def _running_mean(self, load: float) -> float:
+        """Time-weighted mean of the hour so far (load while nothing held)."""
+        if self._hour_seconds <= 0:
+            return load
+        return self._hour_sum / self._hour_seconds
+
+    def _fold(self) -> bool:
+        """Fold the mean of the hour under way into its bucket."""
+        if self._hour is None or self._hour_seconds <= 0:
+            return False
+        buckets = self._buckets
+        base = self._hour * _FIELDS
+        hours = buckets[base + _HOURS] + 1
+        weight = 1 / min(hours, _MAX_WEEKS)
+        mean = self._hour_sum / self._hour_seconds
+        buckets[base + _MEAN] += (mean - buckets[base + _MEAN]) * weight
+        buckets[base + _HOURS] = hours
+        return True
+
+    def expected(self, when: datetime) -> float | None:
+        """Expected mean load (W) in the hour of when, or None if unknown."""
+        base = self.bucket(when) * _FIELDS
+        if self._buckets[base + _HOURS] == 0:
+            return None
+        return self._buckets[base + _MEAN]
+
+    def quantiles(self, when: datetime) -> tuple[float, float] | None:
+        """Median and 90th percentile load (W) in the hour of when."""
+        base = self.bucket(when) * _FIELDS
+        if self._buckets[base + _HOURS] == 0:
+            return None
+        return self._buckets[base + _P50], self._buckets[base + _P90]
+
+    def energy_wh(self, start: datetime, end: datetime, fallback: float) -> float:
+        """Expected energy (Wh) used between start and end.
+
+        Hours the profile hasn't learned yet count at fallback (W).
+        """
+        total = 0.0
+        when = start
+        while when < end:
+            hour_end = when.replace(minute=0, second=0, microsecond=0) + timedelta(
+                hours=1
+            )
+            span = (min(hour_end, end) - when).total_seconds() / 3600
+            expected = self.expected(when)
+            total += (fallback if expected is None else expected) * span
+            when = hour_end
+        return total
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the learned buckets for storage."""
+        return {"buckets": [round(value, 1) for value in self._buckets]}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any] | None) -> LoadProfile:
+        """Restore a stored profile; anything unreadable starts empty."""
+        profile = cls()
+        buckets = (data or {}).get("buckets")
+        if isinstance(buckets, list) and len(buckets) == HOURS_PER_WEEK * _FIELDS:
+            try:
+                restored = array("d", (float(value) for value in buckets))
+            except ValueError, TypeError:
+                return profile
+            if all(math.isfinite(value) and value >= 0 for value in restored):
+                profile._buckets = restored
+        return profile
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return a summary for diagnostics: coverage and mean per weekday."""
+        buckets = self._buckets
+        learned = [
+            index
+            for index in range(HOURS_PER_WEEK)
+            if buckets[index * _FIELDS + _HOURS]
+        ]
+        by_day: dict[int, list[float]] = {}
+        for index in learned:
+            by_day.setdefault(index // 24, []).append(buckets[index * _FIELDS + _MEAN])
+        return {
+            "hours_learned": len(learned),
+            "mean_load_by_weekday": {
+                day: round(sum(means) / len(means)) for day, means in by_day.items()
+            },
+        }
@@ -118,6 +118,7 @@ EM_NUMBER_DEFS: list[EMNumberDef] = [
     EMNumberDef("bottomout_cooldown", "s", 60, 900, 30, "mdi:timer-alert"),
     EMNumberDef("p1_smoothing_period", "s", 1, 300, 1, "mdi:chart-timeline-variant"),
     EMNumberDef("max_grid_export", "W", 0, 10000, 100, "mdi:transmission-tower-export"),
+    EMNumberDef("p1_setpoint", "W", -1000, 1000, 10, "mdi:target"),
 ]
 
 
@@ -0,0 +1,263 @@
+"""Day-ahead battery schedule for the Energy Manager.
+
+Plans the battery's SOC from now to sunset against a solar forecast
+series and an expected home load, so the engine knows ahead of time
+whether solar will bring the battery to the night target, and in which
+slots it has to hold the battery (idle) or can let it discharge.
+
+The plan is a small dynamic program over a 1% SOC grid. Each forecast
+slot may charge from its solar surplus (never from the grid: the
+engine only grid-charges in an emergency) or discharge into its deficit
+(never to the grid). The cost is the energy imported, plus a little for
+energy exported, plus a penalty for every Wh the battery ends short of
+the night target at sunset; so the plan discharges freely while the
+target is safe and holds the battery only when it has to.
+
+Nothing here reads Home Assistant state. SchedulePlanner keeps the
+value tables of its last plan and only recomputes the slots up to the
+last one whose forecast or load changed; between forecast updates a
+tick just walks the stored tables.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+# Attributes with a {timestamp: W} mapping (Open-Meteo Solar Forecast,
+# older Forecast.Solar) and with [{period_start, pv_estimate (kW)}]
+# lists (Solcast), in order of preference
+_WATTS_ATTRIBUTES = ("watts",)
+_SOLCAST_ATTRIBUTES = ("detailedForecast", "detailedHourly")
+
+# Cost per Wh, relative to importing one. Exported energy is worth less
+# than stored energy; a Wh short of the night target is imported at night
+# and eats into the reserve, so it costs more than importing it now.
+_EXPORT_COST = 0.1
+_SHORTFALL_COST = 2.0
+
+SOC_STEP = 1.0  # SOC grid resolution (%)
+
+
+class Slot(NamedTuple):
+    """One forecast slot of the plan."""
+
+    start: datetime
+    hours: float
+    solar: float  # W
+    load: float  # W
+
+
+@dataclass(frozen=True, slots=True)
+class PlanParams:
+    """Battery limits the plan must respect."""
+
+    soc_min: float
+    soc_max: float
+    target_soc: float  # night SOC target at sunset
+    capacity_wh: float
+    max_charge: float
+    max_discharge: float
+
+
+class BatterySchedule(NamedTuple):
+    """The planned battery power and SOC per slot."""
+
+    slots: tuple[Slot, ...]
+    power: tuple[int, ...]  # W per slot: + charge, - discharge
+    soc: tuple[float, ...]  # SOC at the end of each slot
+    reaches_target: bool
+
+
+def forecast_series(attributes: Mapping[str, Any]) -> list[tuple[datetime, float]]:
+    """Read a solar forecast series (start, W) from entity attributes.
+
+    Returns an empty list when the attributes hold no series.
+    """
+    series: list[tuple[datetime, float]] = []
+    for attr in _WATTS_ATTRIBUTES:
+        watts = attributes.get(attr)
+        if isinstance(watts, Mapping):
+            for start, value in watts.items():
+                _append(series, start, value, 1.0)
+            if series:
+                return sorted(series)
+    for attr in _SOLCAST_ATTRIBUTES:
+        periods = attributes.get(attr)
+        if isinstance(periods, Sequence) and not isinstance(periods, str):
+            for period in periods:
+                if isinstance(period, Mapping):
+                    start = period.get("period_start")
+                    _append(series, start, period.get("pv_estimate"), 1000.0)
+            if series:
+                return sorted(series)
+    return series
+
+
+def _append(
+    series: list[tuple[datetime, float]], start: Any, value: Any, scale: float
+) -> None:
+    """Add one (start, W) point, skipping anything that doesn't parse."""
+    if isinstance(start, str):
+        try:
+            start = datetime.fromisoformat(start)
+        except ValueError:
+            return
+    if not isinstance(start, datetime) or start.tzinfo is None:
+        return
+    try:
+        watts = float(value) * scale
+    except ValueError, TypeError:
+        return
+    series.append((start, max(watts, 0.0)))
+
+
+def forecast_slots(
+    series: Sequence[tuple[datetime, float]],
+    now: datetime,
+    end: datetime,
+    load: Callable[[datetime], float],
+) -> list[Slot]:
+    """Cut a forecast series into the slots between now and end.
+
+    Each point lasts until the next one (the last one as long as the one
+    before it, or an hour). The slot under way counts in full, so it stays
+    the same from tick to tick; the last slot is cut at end. load(start)
+    is the expected home load (W) of a slot.
+    """
+    slots = []
+    for i, (start, solar) in enumerate(series):
+        if i + 1 < len(series):
+            slot_end = series[i + 1][0]
+        elif i:
+            slot_end = start + (start - series[i - 1][0])
+        else:
+            slot_end = start + timedelta(hours=1)
+        finish = min(slot_end, end)
+        if slot_end <= now or finish <= start:
+            continue
+        hours = (finish - start).total_seconds() / 3600
+        slots.append(Slot(start, hours, solar, load(start)))
+    return slots
+
+
+class SchedulePlanner:
+    """Plans battery schedules, reusing the tables of the previous plan."""
+
+    __slots__ = ("_moves", "_params", "_slots", "_values", "recomputed")
+
+    def __init__(self) -> None:
+        """Initialize with no previous plan."""
+        self._params: PlanParams | None = None
+        self._slots: list[Slot] = []
+        # _values[t][i]: least cost from slot t at SOC level i to sunset
+        # (the last entry is the terminal cost); _moves[t][i]: best level
+        # step in slot t
+        self._values: list[list[float]] = []
+        self._moves: list[list[int]] = []
+        # Slots recomputed by the last plan() call
+        self.recomputed = 0
+
+    def plan(
+        self, params: PlanParams, slots: Sequence[Slot], soc: float
+    ) -> BatterySchedule:
+        """Plan the battery from soc through slots."""
+        slots = list(slots)
+        reused = 0
+        if params == self._params:
+            while (
+                reused < len(slots)
+                and reused < len(self._slots)
+                and slots[-1 - reused] == self._slots[-1 - reused]
+            ):
+                reused += 1
+        else:
+            self._values = [_terminal(params)]
+            self._moves = []
+            self._slots = []
+        # Keep the tables of the unchanged tail, recompute the rest
+        keep = len(self._slots) - reused
+        values = self._values[keep:]
+        moves = self._moves[keep:]
+        levels = _levels(params)
+        for slot in reversed(slots[: len(slots) - reused]):
+            step_values, step_moves = _solve_slot(params, levels, slot, values[0])
+            values.insert(0, step_values)
+            moves.insert(0, step_moves)
+        self._params = params
+        self._slots = slots
+        self._values = values
+        self._moves = moves
+        self.recomputed = len(slots) - reused
+        return self._trace(params, levels, soc)
+
+    def _trace(self, params: PlanParams, levels: int, soc: float) -> BatterySchedule:
+        """Follow the best moves forward from soc."""
+        level = round(
+            (min(max(soc, params.soc_min), params.soc_max) - params.soc_min) / SOC_STEP
+        )
+        level = min(max(level, 0), levels - 1)
+        wh_per_level = params.capacity_wh * SOC_STEP / 100
+        power = []
+        trajectory = []
+        for slot, moves in zip(self._slots, self._moves, strict=True):
+            move = moves[level]
+            power.append(int(move * wh_per_level / slot.hours))
+            level += move
+            trajectory.append(params.soc_min + level * SOC_STEP)
+        end_soc = trajectory[-1] if trajectory else soc
+        return BatterySchedule(
+            tuple(self._slots),
+            tuple(power),
+            tuple(trajectory),
+            end_soc >= params.target_soc,
+        )
+
+
+def _levels(params: PlanParams) -> int:
+    """Number of SOC levels between soc_min and soc_max."""
+    return max(int((params.soc_max - params.soc_min) / SOC_STEP) + 1, 1)
+
+
+def _terminal(params: PlanParams) -> list[float]:
+    """Cost of ending at each SOC level: the shortfall below the target."""
+    wh_per_level = params.capacity_wh * SOC_STEP / 100
+    return [
+        max(params.target_soc - (params.soc_min + i * SOC_STEP), 0)
+        / SOC_STEP
+        * wh_per_level
+        * _SHORTFALL_COST
+        for i in range(_levels(params))
+    ]
+
+
+def _solve_slot(
+    params: PlanParams, levels: int, slot: Slot, following: list[float]
+) -> tuple[list[float], list[int]]:
+    """Best level step and cost-to-go for every SOC level in one slot."""
+    wh_per_level = params.capacity_wh * SOC_STEP / 100
+    surplus = slot.solar - slot.load
+    # Charge only from the surplus, discharge only into the deficit
+    max_up = int(min(params.max_charge, max(surplus, 0)) * slot.hours / wh_per_level)
+    max_down = int(
+        min(params.max_discharge, max(-surplus, 0)) * slot.hours / wh_per_level
+    )
+    costs = {}
+    for move in range(-max_down, max_up + 1):
+        grid_wh = -surplus * slot.hours + move * wh_per_level
+        costs[move] = grid_wh if grid_wh > 0 else -grid_wh * _EXPORT_COST
+    values = []
+    moves = []
+    for level in range(levels):
+        best_move = 0
+        best = costs[0] + following[level]
+        for move in range(max(-max_down, -level), min(max_up, levels - 1 - level) + 1):
+            value = costs[move] + following[level + move]
+            # On a tie keep the SOC higher: later forecasts are less certain
+            if value <= best:
+                best, best_move = value, move
+        values.append(best)
+        moves.append(best_move)
+    return values, moves
@@ -272,6 +272,11 @@ class HyxiBatteryProtectionController:
             )
             return
 
+        # Safety first: protection is never held back by the command budget,
+        # but its commands count against it
+        self._coordinator.command_budget.acquire(
+            self._sn, time.monotonic(), priority=True
+        )
         await self._send_control(mode)
 
         self._last_sent_mode = mode
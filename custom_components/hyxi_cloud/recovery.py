@@ -0,0 +1,256 @@
+"""Staged recovery from stale HYXI Cloud data.
+
+When the coordinator's last successful poll is too old, the Energy
+Manager used to reload the whole config entry. That tears down every
+entity, webhook and subscription and builds them again: a heavy fix for
+what is usually a short cloud stall.
+
+StaleDataRecovery tries the cheap fixes first and stops at the first one
+that brings fresh data:
+
+1. refresh: poll the cloud again now.
+2. reconnect: a new API client, so a new token, then poll again.
+3. resubscribe: with push enabled, set up the push and alarm webhooks
+   and subscriptions again, then poll again.
+4. reload: reload the config entry, as before.
+
+Each stage runs under its own timeout. A stage that times out is left to
+finish in the background rather than cancelled: a subscribe call
+abandoned mid-flight could leave a server-side subscription whose code is
+never learned. A stage still running from an earlier attempt is not
+started again, and a reload waits for a resubscribe still in flight (and
+is put off if it does not finish): the reload tears down and rebuilds
+the same subscriptions, and a resubscribe finishing after it would
+register webhooks for the coordinator the reload threw away. Every
+stage counts its attempts, recoveries, failures, skips and timeouts,
+and the time it took.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from hyxi_cloud_api import HyxiApiClient
+
+from .const import BASE_URL_DEFAULT, CONF_ACCESS_KEY, CONF_SECRET_KEY
+
+if TYPE_CHECKING:
+    from .coordinator import HyxiDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stage -> seconds it may take before the next stage is tried
+STAGE_TIMEOUTS: dict[str, float] = {
+    "refresh": 30.0,
+    "reconnect": 45.0,
+    "resubscribe": 120.0,
+    "reload": 120.0,
+}
+STAGES = tuple(STAGE_TIMEOUTS)
+# Stages a reload must not overlap: they set up what the reload tears down
+RELOAD_WAITS_FOR = ("resubscribe",)
+
+
+class _StageStats:
+    """Outcome counters of one recovery stage."""
+
+    __slots__ = ("attempts", "failed", "last_ms", "recovered", "skipped", "timeouts")
+
+    def __init__(self) -> None:
+        """Initialize zeroed counters."""
+        self.attempts = 0
+        self.recovered = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_ms: int | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StaleDataRecovery:
+    """Brings back fresh data from the cloud, cheapest fix first."""
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: HyxiDataUpdateCoordinator
+    ) -> None:
+        """Initialize for the coordinator of one config entry."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._running = False
+        self._stats = {stage: _StageStats() for stage in STAGES}
+        # Stage tasks that may still be running after their timeout
+        self._tasks: dict[str, asyncio.Task[bool]] = {}
+        self._last_stage: str | None = None
+        self._last_stale_seconds: float | None = None
+        # Last successful poll when the recovery started
+        self._since: Any = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a recovery is under way."""
+        return self._running
+
+    async def async_recover(self, stale_seconds: float) -> bool:
+        """Run the stages until data is fresh; return whether it is.
+
+        A recovery already under way is not started again.
+        """
+        if self._running:
+            return False
+        self._running = True
+        self._last_stale_seconds = stale_seconds
+        self._since = self._coordinator.hyxi_metadata.get("last_success")
+        try:
+            for stage in STAGES:
+                if await self._async_run_stage(stage, stale_seconds):
+                    return True
+            return False
+        finally:
+            self._running = False
+
+    async def _async_run_stage(self, stage: str, stale_seconds: float) -> bool:
+        """Run one stage under its timeout; return whether it recovered."""
+        stats = self._stats[stage]
+        action: Callable[[], Awaitable[bool]] = getattr(self, f"_async_{stage}")
+        if stage == "resubscribe" and not self._coordinator.push_enabled:
+            stats.skipped += 1
+            return False
+        if self._in_flight(stage):
+            stats.skipped += 1
+            return False
+        if stage == "reload" and not await self._async_wait_in_flight(
+            RELOAD_WAITS_FOR, STAGE_TIMEOUTS["reload"]
+        ):
+            _LOGGER.warning(
+                "HYXI Cloud recovery: reload put off, resubscribe still running"
+            )
+            stats.skipped += 1
+            return False
+
+        _LOGGER.warning(
+            "HYXI Cloud data stale (%.0f min): recovery stage '%s'",
+            stale_seconds / 60,
+            stage,
+        )
+        stats.attempts += 1
+        self._last_stage = stage
+        start = time.monotonic()
+        task = self._hass.async_create_task(action(), f"hyxi_cloud recovery {stage}")
+        self._tasks[stage] = task
+        done, _pending = await asyncio.wait({task}, timeout=STAGE_TIMEOUTS[stage])
+        stats.last_ms = round((time.monotonic() - start) * 1000)
+
+        if not done:
+            stats.timeouts += 1
+            _LOGGER.warning(
+                "HYXI Cloud recovery stage '%s' still running after %.0fs",
+                stage,
+                STAGE_TIMEOUTS[stage],
+            )
+            return False
+        try:
+            recovered = task.result()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            _LOGGER.warning("HYXI Cloud recovery stage '%s' failed: %s", stage, err)
+            recovered = False
+        if recovered:
+            stats.recovered += 1
+            _LOGGER.info(
+                "HYXI Cloud recovered by stage '%s' (%d ms)",
+                stage,
+                stats.last_ms,
+            )
+            return True
+        stats.failed += 1
+        return False
+
+    def _in_flight(self, stage: str) -> bool:
+        """Whether the stage's task from an earlier attempt still runs."""
+        task = self._tasks.get(stage)
+        return task is not None and not task.done()
+
+    async def _async_wait_in_flight(
+        self, stages: tuple[str, ...], timeout: float
+    ) -> bool:
+        """Wait for the stages still running; False if one outlasts timeout.
+
+        The tasks are not cancelled, here or if this wait is.
+        """
+        running = {self._tasks[stage] for stage in stages if self._in_flight(stage)}
+        if not running:
+            return True
+        _done, pending = await asyncio.wait(running, timeout=timeout)
+        return not pending
+
+    async def _async_refresh(self) -> bool:
+        """Poll the cloud now; True if it brought fresh data."""
+        await self._coordinator.async_refresh()
+        last_success = self._coordinator.hyxi_metadata.get("last_success")
+        return last_success is not None and last_success != self._since
+
+    async def _async_reconnect(self) -> bool:
+        """Replace the API client (and its token), then poll."""
+        entry = self._coordinator.entry
+        client = HyxiApiClient(
+            entry.data.get(CONF_ACCESS_KEY),
+            entry.data.get(CONF_SECRET_KEY),
+            entry.data.get("base_url") or BASE_URL_DEFAULT,
+            async_get_clientsession(self._hass),
+        )
+        if not await client._refresh_token():  # pylint: disable=protected-access
+            return False
+        self._coordinator.client = client
+        return await self._async_refresh()
+
+    async def _async_resubscribe(self) -> bool:
+        """Set up the push and alarm subscriptions again, then poll.
+
+        Not forced: a code whose remote cancel fails is kept, as on unload.
+        """
+        from . import (
+            _async_setup_alarm_subscription,
+            _async_setup_push_subscription,
+            _async_teardown_alarm_subscription,
+            _async_teardown_push_subscription,
+        )
+
+        coordinator = self._coordinator
+        entry = coordinator.entry
+        await _async_teardown_push_subscription(self._hass, coordinator, entry)
+        await _async_teardown_alarm_subscription(self._hass, coordinator, entry)
+        await _async_setup_push_subscription(self._hass, entry, coordinator)
+        await _async_setup_alarm_subscription(self._hass, entry, coordinator)
+        coordinator.async_update_listeners()
+        return await self._async_refresh()
+
+    async def _async_reload(self) -> bool:
+        """Reload the config entry, the last resort."""
+        stale_seconds = self._last_stale_seconds or 0.0
+        persistent_notification.async_create(
+            self._hass,
+            f"Energy Manager detected stale data ({stale_seconds / 60:.0f} min) "
+            "that a refresh and a reconnect did not fix. "
+            "Reloading the integration to restore updates.",
+            title="HYXI Cloud: Stale Data",
+            notification_id="hyxi_stale_data",
+        )
+        await self._hass.config_entries.async_reload(self._coordinator.entry.entry_id)
+        return True
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the counters of every stage."""
+        return {
+            "running": self._running,
+            "last_stage": self._last_stage,
+            "stages": {stage: stats.as_dict() for stage, stats in self._stats.items()},
+        }
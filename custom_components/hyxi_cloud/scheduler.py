@@ -0,0 +1,171 @@
+"""Event-driven scheduling of Energy Manager decisions.
+
+The engine used to decide on a fixed timer, plus fast paths that ran
+extra decisions on a high load or a low SOC. DecisionScheduler instead
+remembers the inputs the last decision saw and asks for a new one when
+an input moves by more than its deadband or a parameter is edited.
+
+The timer still ticks, but a tick only decides when a decision is
+pending, when the last one is still at work (it sent commands, or moved
+or is still running a hysteresis count), or when nothing has been
+decided for max_idle seconds. The idle net catches what depends on the
+clock alone: sunset, cooldowns running out.
+
+Nothing here reads Home Assistant state; the engine feeds the readings
+in. The scheduler counts decisions, skipped ticks and ignored changes,
+and measures the latency from the input change to the command it caused.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any
+
+# Change of an input that calls for a new decision
+DEADBANDS: dict[str, float] = {
+    "p1": 150.0,  # W
+    "soc": 1.0,  # %
+    "solar": 200.0,  # W
+    "home_load": 300.0,  # W
+}
+
+# Least time between two event-driven decisions (s), so a noisy meter
+# can't decide on every reading. The kernel's hysteresis counters still
+# advance once per loop interval (decision.COUNT_INTERVAL), not per decision
+MIN_GAP = 5.0
+
+
+class DecisionScheduler:
+    """Decides when the Energy Manager should make its next decision."""
+
+    __slots__ = (
+        "_busy",
+        "_deadbands",
+        "_last_run",
+        "_latency_total",
+        "_max_idle",
+        "_pending_since",
+        "_reference",
+        "_started",
+        "decisions",
+        "ignored",
+        "latency_last",
+        "latency_max",
+        "skipped",
+        "triggers",
+        "with_commands",
+    )
+
+    def __init__(
+        self, max_idle: float, deadbands: Mapping[str, float] | None = None
+    ) -> None:
+        """Initialize with the longest time (s) to go without a decision."""
+        self._max_idle = max_idle
+        self._deadbands = dict(DEADBANDS if deadbands is None else deadbands)
+        # Inputs seen by the last decision
+        self._reference: dict[str, float] = {}
+        self._last_run: float | None = None
+        self._busy = False
+        # When the pending decision was asked for, and the one under way
+        self._pending_since: float | None = None
+        self._started: float | None = None
+
+        self.decisions = 0
+        self.skipped = 0  # timer ticks that didn't decide
+        self.ignored = 0  # input changes within their deadband
+        self.triggers: Counter[str] = Counter()
+        # Latency (s) of the decisions that were asked for and sent commands
+        self.with_commands = 0
+        self.latency_last: float | None = None
+        self.latency_max = 0.0
+        self._latency_total = 0.0
+
+    @property
+    def pending(self) -> bool:
+        """Whether a decision has been asked for."""
+        return self._pending_since is not None
+
+    def observe(self, name: str, value: float, now: float) -> bool:
+        """Note a new reading of an input.
+
+        Returns True if it asked for a decision that wasn't pending yet.
+        """
+        reference = self._reference.get(name)
+        if reference is not None and abs(value - reference) < self._deadbands[name]:
+            self.ignored += 1
+            return False
+        return self.request(name, now)
+
+    def request(self, reason: str, now: float) -> bool:
+        """Ask for a decision; return True if none was pending yet."""
+        if self._pending_since is not None:
+            return False
+        self._pending_since = now
+        self.triggers[reason] += 1
+        return True
+
+    def due(self, now: float) -> bool:
+        """Whether a timer tick should decide; counts the ticks skipped."""
+        if self._pending_since is not None:
+            return True
+        if self._last_run is None:
+            self.triggers["start"] += 1
+        elif self._busy:
+            self.triggers["busy"] += 1
+        elif now - self._last_run >= self._max_idle:
+            self.triggers["idle"] += 1
+        else:
+            self.skipped += 1
+            return False
+        return True
+
+    def wait(self, now: float) -> float:
+        """Seconds until an event-driven decision may run."""
+        if self._last_run is None:
+            return 0.0
+        return max(self._last_run + MIN_GAP - now, 0.0)
+
+    def begin(self, now: float, **inputs: float) -> None:
+        """Record a decision starting on these inputs."""
+        self._reference.update(inputs)
+        self._started = self._pending_since
+        self._pending_since = None
+        self._last_run = now
+
+    def finish(self, now: float, *, sent: bool, busy: bool) -> float | None:
+        """Record the end of a decision.
+
+        sent: a command was accepted. busy: the decision isn't settled yet
+        and the next tick should decide again. Returns the latency (s) from
+        the input change to the command, if there was both.
+        """
+        self.decisions += 1
+        self._busy = busy
+        latency = None
+        if sent and self._started is not None:
+            latency = now - self._started
+            self.with_commands += 1
+            self.latency_last = latency
+            self.latency_max = max(self.latency_max, latency)
+            self._latency_total += latency
+        self._started = None
+        return latency
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the counters and latencies (ms)."""
+        return {
+            "decisions": self.decisions,
+            "skipped_ticks": self.skipped,
+            "ignored_changes": self.ignored,
+            "triggers": dict(self.triggers),
+            "latency_last_ms": (
+                None if self.latency_last is None else round(self.latency_last * 1000)
+            ),
+            "latency_max_ms": round(self.latency_max * 1000),
+            "latency_mean_ms": (
+                round(self._latency_total / self.with_commands * 1000)
+                if self.with_commands
+                else None
+            ),
+        }
@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from functools import lru_cache
 from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
 
 from homeassistant.components.sensor import (
@@ -20,22 +22,37 @@ from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 
+from .aggregates import get_fleet_aggregator
 from .const import (
     CONF_EM_ENABLED,
     CONF_EM_INVERTER_SN,
+    CONF_ENABLE_PUSH,
     CONF_PUSH_RATE,
+    CONF_PUSH_STATUS_INTERVAL,
+    DEFAULT_PUSH_STATUS_INTERVAL,
     DOMAIN,
     MANUFACTURER,
     NULL_VALUES,
     detect_phase_type,
     get_raw_device_code,
-    get_software_version,
+    get_sample_timestamp,
     is_battery_control_enabled,
     is_null_value,
     is_zero_value,
     mask_sn,
     normalize_device_type,
 )
+from .device_info import DeviceInfoCache, build_device_info
+from .downsample import PushDownsampler
+from .energy import LOCAL_ENERGY_SOURCES, EnergyAccumulator
+from .filters import (
+    OutlierFilter,
+    build_outlier_filter,
+    counter_max_jump,
+    counter_reset_is_valid,
+)
+from .telemetry import MaskedPayload
+from .throttle import WriteThrottle, WriteThrottleStats, throttle_policy
 
 if TYPE_CHECKING:
     from .coordinator import HyxiDataUpdateCoordinator
@@ -953,6 +970,40 @@ SENSOR_TYPES = [
 
 SENSOR_TYPES_BY_KEY = {desc.key: desc for desc in SENSOR_TYPES}
 
+# Energy integrated locally from pushed power (see energy.py)
+LOCAL_ENERGY_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="pv_energy_local",
+        translation_key="pv_energy_local",
+        icon="mdi:solar-power-variant",
+    ),
+    SensorEntityDescription(
+        key="grid_import_energy_local",
+        translation_key="grid_import_energy_local",
+        icon="mdi:transmission-tower-import",
+    ),
+    SensorEntityDescription(
+        key="grid_export_energy_local",
+        translation_key="grid_export_energy_local",
+        icon="mdi:transmission-tower-export",
+    ),
+    SensorEntityDescription(
+        key="bat_charge_energy_local",
+        translation_key="bat_charge_energy_local",
+        icon="mdi:battery-plus-variant",
+    ),
+    SensorEntityDescription(
+        key="bat_discharge_energy_local",
+        translation_key="bat_discharge_energy_local",
+        icon="mdi:battery-minus-variant",
+    ),
+    SensorEntityDescription(
+        key="home_energy_local",
+        translation_key="home_energy_local",
+        icon="mdi:home-lightning-bolt",
+    ),
+)
+
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up HYXI sensors."""
@@ -962,6 +1013,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
         return
 
     entities: list[SensorEntity] = []
+    debug_enabled = _LOGGER.isEnabledFor(logging.DEBUG)
 
     # 1. Hardware Loop
     for sn, dev_data in coordinator.data.items():
@@ -970,135 +1022,45 @@ async def async_setup_entry(hass, entry, async_add_entities):
         device_type = normalize_device_type(raw_code)
         metrics = dev_data.get("metrics") or {}
 
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            logged_metrics = {
-                k: (
-                    mask_sn(str(v))
-                    if k
-                    in {
-                        "deviceSn",
-                        "parentSn",
-                        "batSn",
-                        "emsSn",
-                        "alias",
-                        "plantId",
-                        "gprsImei",
-                        "plantAddress",
-                        "plantName",
-                        "deviceName",
-                        "alarmName",
-                        "token",
-                        "access_token",
-                        "refresh_token",
-                        "password",
-                    }
-                    and v is not None
-                    else v
-                )
-                for k, v in metrics.items()
-            }
-
+        if debug_enabled:
             _LOGGER.debug(
                 "HYXI Processing Device %s (Normalized Type: %s). Metrics: %s",
                 mask_sn(sn),
                 device_type,
-                logged_metrics,
+                MaskedPayload(metrics),
             )
 
-        is_collector_or_dmu = device_type == "collector"
-
-        base_keys = BASE_KEYS_COLLECTOR if is_collector_or_dmu else BASE_KEYS_OTHER
-        local_battery_sensors = BATTERY_SENSORS
-
-        # Pre-calculate base keys to process + specific static keys
-        keys_to_add = set(base_keys)
-        keys_to_add.add("device_type")
-
-        # Process dynamically available valid metrics keys
-        for key, v in metrics.items():
-            if v is not None and not (
-                isinstance(v, str) and v.strip().lower() in NULL_VALUES
-            ):
-                keys_to_add.add(key)
-
-        # Pre-register standard sensors to ensure webhook-only metrics are successfully registered
-        if not is_collector_or_dmu:
-            # Common inverter sensors (always applicable)
-            keys_to_add.update(
-                {
-                    "ph1Loadp",
-                    "ph1v",
-                    "ph1i",
-                    "ph1p",
-                    "pv1v",
-                    "pv1i",
-                    "pv1p",
-                    "pv2v",
-                    "pv2i",
-                    "pv2p",
-                    "home_load",
-                    "grid_import",
-                    "grid_export",
-                    "ppv",
-                    "totalE",
-                    "totalEnt",
-                    "totalEpt",
-                    "totalEchg",
-                    "acP",
-                    "acE",
-                    "gridP",
-                    "gridF",
-                    "invSts",
-                    "gridSts",
-                }
-            )
-
-            # Check phase type for Phase 2 & 3 sensors
-            phase_type = detect_phase_type(dev_data)
-            if phase_type == "three_phase":
-                keys_to_add.update(
-                    {
-                        "ph2Loadp",
-                        "ph2v",
-                        "ph2i",
-                        "ph2p",
-                        "ph3Loadp",
-                        "ph3v",
-                        "ph3i",
-                        "ph3p",
-                    }
-                )
-
-            # Check if device type supports battery
-            if device_type in ("hybrid_inverter", "all_in_one"):
-                keys_to_add.update(local_battery_sensors)
-                keys_to_add.update(
-                    {
-                        "bat_charging",
-                        "bat_discharging",
-                        "bat_power_dc",
-                        "bat_charge_total",
-                        "bat_discharge_total",
-                    }
-                )
-
-        # O(1) removals instead of repeated conditionals
-        if is_collector_or_dmu:
-            keys_to_add.difference_update(local_battery_sensors)
+        phase_type = None if device_type == "collector" else detect_phase_type(dev_data)
+        metric_keys = frozenset(
+            key
+            for key, v in metrics.items()
+            if key in SENSOR_TYPES_BY_KEY
+            and v is not None
+            and not (isinstance(v, str) and v.strip().lower() in NULL_VALUES)
+        )
+        for plan in _compile_entity_plan(device_type, phase_type, metric_keys):
+            entities.append(HyxiSensor(coordinator, sn, plan.description, plan))
 
-        for key in keys_to_add:
-            if description := SENSOR_TYPES_BY_KEY.get(key):
-                entities.append(HyxiSensor(coordinator, sn, description))
     # 2. Integration Health
     entities.append(HyxiLastUpdateSensor(coordinator, entry))
     entities.append(HyxiSubscriptionStatusSensor(coordinator, entry))
+    if entry.options.get(CONF_ENABLE_PUSH, False):
+        entities.append(HyxiLastDataPushSensor(coordinator, entry))
+        entities.append(HyxiLastAlarmPushSensor(coordinator, entry))
+        # Energy integrated from the pushed power of each device
+        for sn, dev_data in coordinator.data.items():
+            metrics = (dev_data or {}).get("metrics") or {}
+            entities.extend(
+                HyxiLocalEnergySensor(coordinator, sn, description)
+                for description in LOCAL_ENERGY_SENSORS
+                if not is_null_value(
+                    metrics.get(LOCAL_ENERGY_SOURCES[description.key].power_key)
+                )
+            )
 
-    # 2b. Microinverter Aggregate Sensors
-    has_micro_inverter = any(
-        normalize_device_type(get_raw_device_code(dev_data)) == "micro_inverter"
-        for dev_data in coordinator.data.values()
-    )
-    if has_micro_inverter:
+    # 2b. Fleet Aggregate Sensors
+    fleet = get_fleet_aggregator(coordinator)
+    if fleet.sns(coordinator.data, ("micro_inverter",)):
         entities.append(
             HyxiMicroinverterSumSensor(
                 coordinator,
@@ -1132,6 +1094,52 @@ async def async_setup_entry(hass, entry, async_add_entities):
             )
         )
 
+    # Only worth a summary with more than one battery-capable inverter
+    battery_types = ("hybrid_inverter", "all_in_one")
+    if len(fleet.sns(coordinator.data, battery_types)) > 1:
+        battery_summary = {
+            "identifiers": {(DOMAIN, f"{entry.entry_id}_batteries_summary")},
+            "name": "Batteries Summary",
+            "manufacturer": MANUFACTURER,
+            "model": "Aggregated Battery Metrics",
+        }
+        entities.append(
+            HyxiFleetAggregateSensor(
+                coordinator,
+                entry,
+                "batSoc",
+                SensorEntityDescription(
+                    key="batteries_soc_mean",
+                    translation_key="batteries_soc_mean",
+                    native_unit_of_measurement="%",
+                    device_class=SensorDeviceClass.BATTERY,
+                    state_class=SensorStateClass.MEASUREMENT,
+                    suggested_display_precision=0,
+                ),
+                battery_types,
+                battery_summary,
+                aggregate="mean",
+            )
+        )
+        entities.append(
+            HyxiFleetAggregateSensor(
+                coordinator,
+                entry,
+                "batP",
+                SensorEntityDescription(
+                    key="batteries_power_total",
+                    translation_key="batteries_power_total",
+                    native_unit_of_measurement="W",
+                    device_class=SensorDeviceClass.POWER,
+                    state_class=SensorStateClass.MEASUREMENT,
+                    icon="mdi:home-battery",
+                    suggested_display_precision=0,
+                ),
+                battery_types,
+                battery_summary,
+            )
+        )
+
     # 3. Battery protection telemetry
     if is_battery_control_enabled(entry, coordinator):
         for sn, dev_data in coordinator.data.items():
@@ -1217,6 +1225,32 @@ async def async_setup_entry(hass, entry, async_add_entities):
                 ),
             )
         )
+        entities.append(
+            EMSensor(
+                coordinator,
+                em_sn,
+                EMSensorDef(
+                    "decisions",
+                    em_device_info,
+                    state_class=SensorStateClass.TOTAL_INCREASING,
+                    icon="mdi:counter",
+                    entity_category=EntityCategory.DIAGNOSTIC,
+                ),
+            )
+        )
+        entities.append(
+            EMSensor(
+                coordinator,
+                em_sn,
+                EMSensorDef(
+                    "command_budget",
+                    em_device_info,
+                    state_class=SensorStateClass.MEASUREMENT,
+                    icon="mdi:speedometer",
+                    entity_category=EntityCategory.DIAGNOSTIC,
+                ),
+            )
+        )
 
     # FINAL REGISTRATION
     if entities:
@@ -1228,6 +1262,10 @@ class HyxiBaseSensor(
 ):
     """Base class for HYXI sensors with shared logic."""
 
+    # Set per instance only when the options enable them
+    _throttle: WriteThrottle | None = None
+    _outlier_filter: OutlierFilter | None = None
+
     def __init__(self, coordinator):
         """Initialize the base sensor."""
         super().__init__(coordinator)
@@ -1238,6 +1276,45 @@ class HyxiBaseSensor(
     def _update_native_value(self):
         """Update the cached native value. Should be overridden by subclasses."""
 
+    def _setup_write_throttle(self) -> None:
+        """Throttle state writes if the options enable it for this description.
+
+        Only measurements are throttled; totals must record every step.
+        """
+        description = self.entity_description
+        if description.state_class not in (SensorStateClass.MEASUREMENT, "measurement"):
+            return
+        policy = throttle_policy(
+            getattr(self.coordinator, "options", None), description.device_class
+        )
+        if policy is None:
+            return
+        stats = getattr(self.coordinator, "write_stats", None)
+        self._throttle = WriteThrottle(
+            policy, stats if isinstance(stats, WriteThrottleStats) else None
+        )
+
+    def _setup_outlier_filter(self) -> None:
+        """Filter glitches of measurement sensors if the options enable it.
+
+        Counters keep their own monotonic guard (_check_anti_dip/_spike).
+        """
+        description = self.entity_description
+        if description.state_class not in (SensorStateClass.MEASUREMENT, "measurement"):
+            return
+        outlier_filter = build_outlier_filter(
+            getattr(self.coordinator, "options", None), description.device_class
+        )
+        if outlier_filter is not None:
+            self._outlier_filter = outlier_filter
+
+    def _write_suppressed(self) -> bool:
+        """Return True if the throttle holds back this update's state write."""
+        throttle = self._throttle
+        return throttle is not None and not throttle.should_write(
+            self._attr_native_value, self.coordinator.last_update_success
+        )
+
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
         await super().async_added_to_hass()
@@ -1276,13 +1353,7 @@ class HyxiBaseSensor(
         if self._last_valid_value is None or num_value >= self._last_valid_value:
             return None
 
-        # A drop is ONLY a valid reset if the new value is practically zero (e.g., < 0.1)
-        # AND the drop is significant (meaning it's not just a tiny dip).
-        is_valid_reset = (0.0 <= num_value <= 0.1) and (
-            (self._last_valid_value - num_value) > (self._last_valid_value * 0.5)
-        )
-
-        if not is_valid_reset:
+        if not counter_reset_is_valid(self._last_valid_value, num_value):
             self._log_glitch_once(
                 num_value,
                 "HYXI Glitch Filter: Prevented %s drop (%s -> %s)",
@@ -1307,7 +1378,7 @@ class HyxiBaseSensor(
                 0.0, (now - self._last_valid_time).total_seconds() / 3600.0
             )
 
-        max_allowed_jump = round(100.0 + (50.0 * time_elapsed_hours), 2)
+        max_allowed_jump = counter_max_jump(time_elapsed_hours)
 
         if (num_value - self._last_valid_value) > max_allowed_jump:
             self._log_glitch_once(
@@ -1345,8 +1416,21 @@ class HyxiBaseSensor(
                     spike_result = self._check_anti_spike(num_value)
                     if spike_result is not None:
                         return spike_result
+                # Only the spike check reads the time, so only counters pay
+                # for a wall-clock read per value.
+                self._last_valid_time = dt_util.utcnow()
+            elif self._outlier_filter is not None:
+                filtered = self._outlier_filter.filter(num_value, time.monotonic())
+                if filtered != num_value:
+                    self._log_glitch_once(
+                        num_value,
+                        "HYXI Outlier Filter: Holding %s at %s (ignored %s)",
+                        self.entity_description.key,
+                        filtered,
+                        num_value,
+                    )
+                    return filtered
             self._last_valid_value = num_value
-            self._last_valid_time = dt_util.utcnow()
             return num_value
         except ValueError, TypeError:
             _LOGGER.debug(
@@ -1376,6 +1460,9 @@ class HyxiSensor(HyxiBaseSensor):
     """Representation of a Physical HYXI Sensor."""
 
     _attr_has_entity_name = True
+    # Set per instance only when push downsampling is enabled
+    _downsampler: PushDownsampler | None = None
+    _bucket_generation = 0
     _PARSERS: ClassVar[dict[str, str]] = {
         "device_type": "_parse_device_type",
         "app_sw": "_parse_app_sw",
@@ -1405,8 +1492,18 @@ class HyxiSensor(HyxiBaseSensor):
         "batTmp": _SameQuantityFallback("batTch", ("hybrid_inverter", "all_in_one")),
     }
 
-    def __init__(self, coordinator: Any, sn: str, description: Any) -> None:
-        """Initialize the sensor."""
+    def __init__(
+        self,
+        coordinator: Any,
+        sn: str,
+        description: Any,
+        plan: _SensorPlanEntry | None = None,
+    ) -> None:
+        """Initialize the sensor.
+
+        plan comes from _compile_entity_plan() during platform setup; it is
+        resolved here for sensors built on their own.
+        """
         super().__init__(coordinator)
         self.entity_description = description
         self._sn = sn
@@ -1415,28 +1512,25 @@ class HyxiSensor(HyxiBaseSensor):
         self._dev_data = coordinator.data.get(sn) or {}
         self._metrics = self._dev_data.get("metrics") or {}
 
-        raw_code = get_raw_device_code(self._dev_data)
-        self._device_type = normalize_device_type(raw_code)
+        if plan is None:
+            plan = _plan_entry(
+                description, normalize_device_type(get_raw_device_code(self._dev_data))
+            )
+        self._device_type = plan.device_type
 
         # Determine actual SN (e.g. Battery SN for battery sensors)
         bat_sn = self._metrics.get("batSn")
+        self._actual_sn = bat_sn if plan.battery_scoped and bat_sn else sn
 
-        if description.key in BATTERY_SENSORS and bat_sn:
-            self._actual_sn = bat_sn
-        else:
-            self._actual_sn = sn
-
-        key_lower = description.key.lower()
         self._attr_unique_id = f"hyxi_{self._actual_sn}_{description.key}"
-        self._attr_translation_key = description.translation_key or key_lower
-        self.entity_id = f"sensor.hyxi_{self._actual_sn}_{key_lower}"
-
-        if key_lower in INT_SENSOR_KEYS:
-            self._parser_func = self._parse_int_sensor
-        elif parser_name := self._PARSERS.get(key_lower):
-            self._parser_func = getattr(self, parser_name)
-        else:
-            self._parser_func = self._parse_default
+        self._attr_translation_key = plan.translation_key
+        self.entity_id = f"sensor.hyxi_{self._actual_sn}_{plan.key_lower}"
+        self._parser_func = getattr(self, plan.parser_name)
+        downsampler = getattr(coordinator, "downsampler", None)
+        if isinstance(downsampler, PushDownsampler) and downsampler.enabled:
+            self._downsampler = downsampler
+        self._setup_outlier_filter()
+        self._setup_write_throttle()
 
         self._update_native_value()
 
@@ -1444,49 +1538,39 @@ class HyxiSensor(HyxiBaseSensor):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self._dev_data = self.coordinator.data.get(self._sn) or {}
-        self._metrics = self._dev_data.get("metrics") or {}
+        metrics = self._dev_data.get("metrics") or {}
+        if (downsampler := self._downsampler) is not None:
+            now = time.monotonic()
+            # Mid-bucket push: the engine and protection controllers see
+            # it in coordinator.data, the state machine waits for the bucket.
+            if downsampler.holds(self._sn, self._bucket_generation, now):
+                return
+            self._bucket_generation = downsampler.generation(self._sn)
+            if self.entity_description.state_class in (
+                SensorStateClass.MEASUREMENT,
+                "measurement",
+            ):
+                metrics = downsampler.mean_view(self._sn, metrics, now)
+        # The poll brought nothing newer for this device (e.g. push is
+        # fresher): same metrics dict as before, nothing to re-parse or write.
+        if metrics is self._metrics and self._sn in self.coordinator.poll_unchanged:
+            return
+        self._metrics = metrics
         self._update_native_value()
+        if self._write_suppressed():
+            return
         super()._handle_coordinator_update()
 
     @property
     def device_info(self):
-        """Return dynamic device information to ensure versions update in UI."""
-        dev_data = self._dev_data
-        metrics = self._metrics
-        bat_sn = metrics.get("batSn")
-
-        if self.entity_description.key in BATTERY_SENSORS and bat_sn:
-            return {
-                "identifiers": {(DOMAIN, bat_sn)},
-                "name": f"Battery {bat_sn}",
-                "manufacturer": MANUFACTURER,
-                "model": "Energy Storage System",
-                "serial_number": bat_sn,
-                "via_device": (DOMAIN, self._sn),
-            }
-
-        # Determine if we need to apply any state-mapping for specific types
-        sw_version = dev_data.get("_sw_version_cached") or get_software_version(
-            dev_data
+        """Return the device info shared by all sensors of this device."""
+        battery = self.entity_description.key in BATTERY_SENSORS and bool(
+            self._metrics.get("batSn")
         )
-        hw_version = dev_data.get("hw_version")
-
-        info = {
-            "identifiers": {(DOMAIN, self._sn)},
-            "name": dev_data.get("device_name") or f"Device {self._sn}",
-            "manufacturer": MANUFACTURER,
-            "model": dev_data.get("model"),
-            "sw_version": sw_version,
-            "hw_version": hw_version,
-            "serial_number": self._sn,
-        }
-
-        # Handle Parent Collector relationship
-        parent_sn = metrics.get("parentSn")
-        if parent_sn:
-            info["via_device"] = (DOMAIN, parent_sn)
-
-        return info
+        cache = getattr(self.coordinator, "device_infos", None)
+        if isinstance(cache, DeviceInfoCache):
+            return cache.get(self._sn, self._dev_data, self._metrics, battery)
+        return build_device_info(self._sn, self._dev_data, self._metrics, battery)
 
     # native_value used to be overridden here to adjust acP/genP/gridP by
     # subtracting a raw "acl" metric and applying fixed multipliers
@@ -1542,12 +1626,6 @@ class HyxiSensor(HyxiBaseSensor):
             return None
         return self._process_numeric_value(value)
 
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        coordinator: HyxiDataUpdateCoordinator = self.coordinator
-        return coordinator.hyxi_metadata
-
     def _update_native_value(self):
         """Update the cached native value."""
         dev_data = self._dev_data
@@ -1606,6 +1684,121 @@ class HyxiSensor(HyxiBaseSensor):
             self._attr_native_value = parsed_val
 
 
+class _SensorPlanEntry(NamedTuple):
+    """Everything HyxiSensor derives from its description and device type."""
+
+    description: Any
+    device_type: str
+    key_lower: str
+    translation_key: str
+    parser_name: str
+    # Unique id, entity id and device are keyed by batSn when present
+    battery_scoped: bool
+
+
+def _plan_entry(description: Any, device_type: str) -> _SensorPlanEntry:
+    """Resolve the parser and naming for one sensor description."""
+    key = description.key
+    key_lower = key.lower()
+    if key_lower in INT_SENSOR_KEYS:
+        parser_name = "_parse_int_sensor"
+    else:
+        parser_name = HyxiSensor._PARSERS.get(key_lower, "_parse_default")
+    return _SensorPlanEntry(
+        description,
+        device_type,
+        key_lower,
+        description.translation_key or key_lower,
+        parser_name,
+        key in BATTERY_SENSORS,
+    )
+
+
+@lru_cache(maxsize=64)
+def _compile_entity_plan(
+    device_type: str, phase_type: str | None, metric_keys: frozenset[str]
+) -> tuple[_SensorPlanEntry, ...]:
+    """Return the HyxiSensor plan for one device signature.
+
+    metric_keys holds the device's non-null metrics that have a sensor
+    description. Devices sharing a signature (a microinverter fleet, say)
+    share one compiled plan, so setup cost scales with distinct signatures
+    rather than devices x keys.
+    """
+    is_collector_or_dmu = device_type == "collector"
+    keys_to_add = set(BASE_KEYS_COLLECTOR if is_collector_or_dmu else BASE_KEYS_OTHER)
+    keys_to_add.add("device_type")
+    keys_to_add.update(metric_keys)
+
+    # Pre-register standard sensors to ensure webhook-only metrics are successfully registered
+    if not is_collector_or_dmu:
+        # Common inverter sensors (always applicable)
+        keys_to_add.update(
+            {
+                "ph1Loadp",
+                "ph1v",
+                "ph1i",
+                "ph1p",
+                "pv1v",
+                "pv1i",
+                "pv1p",
+                "pv2v",
+                "pv2i",
+                "pv2p",
+                "home_load",
+                "grid_import",
+                "grid_export",
+                "ppv",
+                "totalE",
+                "totalEnt",
+                "totalEpt",
+                "totalEchg",
+                "acP",
+                "acE",
+                "gridP",
+                "gridF",
+                "invSts",
+                "gridSts",
+            }
+        )
+
+        # Phase 2 & 3 sensors
+        if phase_type == "three_phase":
+            keys_to_add.update(
+                {
+                    "ph2Loadp",
+                    "ph2v",
+                    "ph2i",
+                    "ph2p",
+                    "ph3Loadp",
+                    "ph3v",
+                    "ph3i",
+                    "ph3p",
+                }
+            )
+
+        # Check if device type supports battery
+        if device_type in ("hybrid_inverter", "all_in_one"):
+            keys_to_add.update(BATTERY_SENSORS)
+            keys_to_add.update(
+                {
+                    "bat_charging",
+                    "bat_discharging",
+                    "bat_power_dc",
+                    "bat_charge_total",
+                    "bat_discharge_total",
+                }
+            )
+    else:
+        keys_to_add.difference_update(BATTERY_SENSORS)
+
+    return tuple(
+        _plan_entry(SENSOR_TYPES_BY_KEY[key], device_type)
+        for key in sorted(keys_to_add)
+        if key in SENSOR_TYPES_BY_KEY
+    )
+
+
 class HyxiLastUpdateSensor(
     CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity
 ):
@@ -1628,8 +1821,19 @@ class HyxiLastUpdateSensor(
         self._update_native_value()
 
     def _update_native_value(self):
-        """Update the cached native value."""
-        self._attr_native_value = self.coordinator.hyxi_metadata.get("last_success")
+        """Update the cached native value and the poll metadata attributes."""
+        coordinator: HyxiDataUpdateCoordinator = self.coordinator
+        metadata = coordinator.hyxi_metadata
+        self._attr_native_value = metadata.get("last_success")
+        # The poll metadata lives here (and on the Cloud Status binary
+        # sensor) rather than on every metric sensor, where a changing
+        # last_success forced a new recorder row per sensor per poll.
+        self._attr_extra_state_attributes = {
+            "api_status": metadata.get("api_status"),
+            "last_attempts": metadata.get("last_attempts"),
+            "last_error": metadata.get("last_error"),
+            "cache_active": metadata.get("cache_active"),
+        }
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -1641,7 +1845,12 @@ class HyxiLastUpdateSensor(
 class HyxiSubscriptionStatusSensor(
     CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity
 ):
-    """Diagnostic sensor for real-time push subscription status (data + alarm)."""
+    """Diagnostic sensor for real-time push subscription status (data + alarm).
+
+    Only the enum state and slow-changing subscription details live here.
+    Per-push timestamps are on HyxiLastPushSensor, so a push that changes
+    nothing about the subscriptions doesn't write a new state.
+    """
 
     _attr_has_entity_name = True
     _attr_translation_key = "realtime_subscription_status"
@@ -1659,6 +1868,7 @@ class HyxiSubscriptionStatusSensor(
             "manufacturer": MANUFACTURER,
             "model": "Cloud API Bridge",
         }
+        self._last_written: tuple | None = None
         self._update_value()
 
     def _update_value(self):
@@ -1692,7 +1902,6 @@ class HyxiSubscriptionStatusSensor(
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return state attributes for both push subscription channels."""
         coord = self.coordinator
-        alarm_last = getattr(coord, "alarm_last_push_received", None)
         return {
             # --- Real-time data push ---
             "data_push": {
@@ -1700,9 +1909,6 @@ class HyxiSubscriptionStatusSensor(
                 "subscribe_code": coord.subscribe_code,
                 "callback_url": coord.push_url,
                 "post_rate": coord.entry.options.get(CONF_PUSH_RATE),
-                "last_push_received": coord.last_push_received.isoformat()
-                if coord.last_push_received
-                else None,
                 "error": coord.push_error,
             },
             # --- Alarm push ---
@@ -1710,7 +1916,6 @@ class HyxiSubscriptionStatusSensor(
                 "status": getattr(coord, "alarm_push_status", "inactive") or "inactive",
                 "subscribe_code": getattr(coord, "alarm_subscribe_code", None),
                 "callback_url": getattr(coord, "alarm_push_url", None),
-                "last_push_received": alarm_last.isoformat() if alarm_last else None,
                 "error": getattr(coord, "alarm_push_error", None),
             },
             "known_subscription_codes": getattr(coord, "known_subscription_codes", []),
@@ -1718,17 +1923,181 @@ class HyxiSubscriptionStatusSensor(
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator, skipping no-op writes."""
         self._update_value()
+        snapshot = (
+            self.coordinator.last_update_success,
+            self._attr_native_value,
+            self.extra_state_attributes,
+        )
+        if snapshot == self._last_written:
+            return
+        self._last_written = snapshot
+        super()._handle_coordinator_update()
+
+
+class HyxiLastPushSensor(CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity):
+    """Diagnostic timestamp of the most recent data or alarm push.
+
+    The state is written at most once per CONF_PUSH_STATUS_INTERVAL, so a
+    push every few seconds doesn't mean a recorder row every few seconds.
+    """
+
+    _attr_has_entity_name = True
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Coordinator attribute holding the timestamp
+    _source: ClassVar[str]
+
+    def __init__(self, coordinator, entry):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._min_interval = entry.options.get(
+            CONF_PUSH_STATUS_INTERVAL, DEFAULT_PUSH_STATUS_INTERVAL
+        )
+        self._attr_unique_id = f"{entry.entry_id}_{self._attr_translation_key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.entry_id)},
+            "name": "HYXI Cloud Service",
+            "manufacturer": MANUFACTURER,
+            "model": "Cloud API Bridge",
+        }
+        self._attr_native_value = getattr(coordinator, self._source, None)
+        self._last_available: bool | None = None
+
+    def _is_due(self, value: datetime | None) -> bool:
+        """Return True if value is new enough to be worth a state write."""
+        current = self._attr_native_value
+        if value is None or value == current:
+            return False
+        if not isinstance(current, datetime) or not isinstance(value, datetime):
+            return True
+        return (value - current).total_seconds() >= self._min_interval
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the timestamp if the interval has passed or availability changed."""
+        value = getattr(self.coordinator, self._source, None)
+        due = self._is_due(value)
+        available = self.coordinator.last_update_success
+        if not due and available == self._last_available:
+            return
+        if due:
+            self._attr_native_value = value
+        self._last_available = available
+        super()._handle_coordinator_update()
+
+
+class HyxiLastDataPushSensor(HyxiLastPushSensor):
+    """Timestamp of the most recent real-time data push."""
+
+    _attr_translation_key = "last_data_push"
+    _source = "last_push_received"
+
+
+class HyxiLastAlarmPushSensor(HyxiLastPushSensor):
+    """Timestamp of the most recent alarm push."""
+
+    _attr_translation_key = "last_alarm_push"
+    _source = "alarm_last_push_received"
+
+
+class HyxiLocalEnergySensor(
+    CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity, RestoreEntity
+):
+    """Energy integrated locally from one power metric of a device.
+
+    Finer-grained than the cloud's lifetime counters, which it is anchored
+    to (see energy.py). The total is restored on restart; the state is
+    only written when it moves by at least a Wh.
+    """
+
+    _attr_has_entity_name = True
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_suggested_display_precision = 3
+
+    def __init__(self, coordinator, sn: str, description: SensorEntityDescription):
+        """Initialize the sensor from the device's current metrics."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._sn = sn
+        self._source = LOCAL_ENERGY_SOURCES[description.key]
+        self._attr_unique_id = f"hyxi_{sn}_{description.key}"
+        self._accumulator = EnergyAccumulator()
+        metrics = (coordinator.data.get(sn) or {}).get("metrics") or {}
+        # A counter source waits for its first counter: counting from zero
+        # until it arrives would make the anchor jump to the lifetime total
+        if self._source.counter_key is None:
+            self._accumulator.start()
+        self._integrate(metrics)
+        self._attr_native_value = self._rounded_total()
+        self._last_available: bool | None = None
+
+    def _rounded_total(self) -> float | None:
+        """Return the accumulated total to the Wh."""
+        total = self._accumulator.total
+        return None if total is None else round(total, 3)
+
+    def _integrate(self, metrics: dict) -> None:
+        """Feed one metrics snapshot into the accumulator."""
+        accumulator = self._accumulator
+        if self._source.counter_key is not None:
+            accumulator.anchor(metrics.get(self._source.counter_key))
+        sample_time = get_sample_timestamp(metrics) or time.time()
+        accumulator.add(metrics.get(self._source.power_key), sample_time)
+
+    async def async_added_to_hass(self) -> None:
+        """Continue from the restored total."""
+        await super().async_added_to_hass()
+        if (last_state := await self.async_get_last_state()) is None:
+            return
+        try:
+            restored = float(last_state.state)
+        except ValueError, TypeError:
+            return
+        accumulator = self._accumulator
+        if accumulator.total is None or restored > accumulator.total:
+            accumulator.total = restored
+            self._attr_native_value = self._rounded_total()
+
+    @property
+    def device_info(self):
+        """Return the device info shared by all sensors of this device."""
+        dev_data = self.coordinator.data.get(self._sn) or {}
+        metrics = dev_data.get("metrics") or {}
+        cache = getattr(self.coordinator, "device_infos", None)
+        if isinstance(cache, DeviceInfoCache):
+            return cache.get(self._sn, dev_data, metrics)
+        return build_device_info(self._sn, dev_data, metrics)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Integrate the new sample; write once the total moved a Wh."""
+        dev_data = self.coordinator.data.get(self._sn) or {}
+        self._integrate(dev_data.get("metrics") or {})
+        value = self._rounded_total()
+        available = self.coordinator.last_update_success
+        if value == self._attr_native_value and available == self._last_available:
+            return
+        self._attr_native_value = value
+        self._last_available = available
         super()._handle_coordinator_update()
 
 
-class HyxiMicroinverterSumSensor(
+class HyxiFleetAggregateSensor(
     CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity
 ):
-    """Aggregate a single metric (AC power, daily yield, etc.) across all microinverters."""
+    """Aggregate a single metric across all devices of some device types.
+
+    The state is one of the FleetStats fields; the others are exposed as
+    attributes but left out of the recorder, since they change with every
+    update.
+    """
 
     _attr_has_entity_name = True
+    _unrecorded_attributes = frozenset({"count", "mean", "minimum", "maximum"})
 
     def __init__(
         self,
@@ -1736,41 +2105,45 @@ class HyxiMicroinverterSumSensor(
         entry,
         metric_key: str,
         description: SensorEntityDescription,
+        device_types: tuple[str, ...],
+        device_info: dict[str, Any],
+        aggregate: str = "total",
     ) -> None:
         """Initialize the aggregate sensor."""
         super().__init__(coordinator)
         self.entity_description = description
         self._metric_key = metric_key
+        self._device_types = device_types
+        self._aggregate = aggregate
+        self._fleet = get_fleet_aggregator(coordinator)
         self._attr_unique_id = f"{entry.entry_id}_{description.key}"
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, f"{entry.entry_id}_microinverters_summary")},
-            "name": "Microinverters Summary",
-            "manufacturer": MANUFACTURER,
-            "model": "Aggregated Microinverter Metrics",
-        }
+        self._attr_device_info = device_info
         self._logged_no_data = False
         self._update_native_value()
 
     def _update_native_value(self) -> None:
-        """Recompute the sum of the tracked metric across all microinverter devices."""
-        debug_enabled = _LOGGER.isEnabledFor(logging.DEBUG)
-        total = 0.0
-        found_any = False
+        """Refresh the aggregate from the shared fleet index."""
+        data = self.coordinator.data or {}
+        stats = self._fleet.stats(data, self._device_types, self._metric_key)
+        value = getattr(stats, self._aggregate)
+        self._attr_native_value = round(value, 2) if value is not None else None
+        self._attr_extra_state_attributes = {
+            "count": stats.count,
+            "mean": round(stats.mean, 2) if stats.mean is not None else None,
+            "minimum": stats.minimum,
+            "maximum": stats.maximum,
+        }
+
+        found_any = stats.count > 0
+        debug_enabled = not found_any and _LOGGER.isEnabledFor(logging.DEBUG)
         raw_values: dict[str, Any] = {}
-        for sn, dev_data in self.coordinator.data.items():
-            if normalize_device_type(get_raw_device_code(dev_data)) != "micro_inverter":
-                continue
-            value = (dev_data.get("metrics") or {}).get(self._metric_key)
-            if debug_enabled:
-                raw_values[mask_sn(sn)] = value
-            if value is None or is_null_value(value):
-                continue
-            try:
-                total += float(value)
-                found_any = True
-            except ValueError, TypeError:
-                continue
-        self._attr_native_value = round(total, 2) if found_any else None
+        if debug_enabled:
+            raw_values = {
+                mask_sn(sn): ((data.get(sn) or {}).get("metrics") or {}).get(
+                    self._metric_key
+                )
+                for sn in self._fleet.sns(data, self._device_types)
+            }
         self._log_no_usable_value(found_any, raw_values, debug_enabled)
 
     def _log_no_usable_value(
@@ -1791,11 +2164,11 @@ class HyxiMicroinverterSumSensor(
             return
         if not self._logged_no_data:
             _LOGGER.debug(
-                "%s: no usable '%s' value across %d micro_inverter device(s); "
-                "raw values were: %s",
+                "%s: no usable '%s' value across %d %s device(s); raw values were: %s",
                 self.entity_description.key,
                 self._metric_key,
                 len(raw_values),
+                "/".join(self._device_types),
                 raw_values,
             )
             self._logged_no_data = True
@@ -1807,6 +2180,32 @@ class HyxiMicroinverterSumSensor(
         super()._handle_coordinator_update()
 
 
+class HyxiMicroinverterSumSensor(HyxiFleetAggregateSensor):
+    """Aggregate a single metric (AC power, daily yield, etc.) across all microinverters."""
+
+    def __init__(
+        self,
+        coordinator,
+        entry,
+        metric_key: str,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the aggregate sensor."""
+        super().__init__(
+            coordinator,
+            entry,
+            metric_key,
+            description,
+            ("micro_inverter",),
+            {
+                "identifiers": {(DOMAIN, f"{entry.entry_id}_microinverters_summary")},
+                "name": "Microinverters Summary",
+                "manufacturer": MANUFACTURER,
+                "model": "Aggregated Microinverter Metrics",
+            },
+        )
+
+
 class HyxiLastSentModeSensor(
     CoordinatorEntity["HyxiDataUpdateCoordinator"], SensorEntity, RestoreEntity
 ):
@@ -1870,6 +2269,7 @@ class EMSensorDef:
     device_class: SensorDeviceClass | None = None
     state_class: SensorStateClass | None = None
     icon: str | None = None
+    entity_category: EntityCategory | None = None
 
 
 class EMSensor(SensorEntity):
@@ -1889,6 +2289,12 @@ class EMSensor(SensorEntity):
         "hours_until_sunrise": "_hours_until_sunrise",
         "hours_until_sunset": "_hours_until_sunset",
         "p1_average": "p1_avg",
+        "decisions": "decision_count",
+        "command_budget": "command_budget",
+    }
+    _ATTRIBUTE_GETTERS: ClassVar[dict[str, str]] = {
+        "decisions": "scheduler_stats",
+        "command_budget": "command_budget_usage",
     }
 
     def __init__(
@@ -1909,6 +2315,8 @@ class EMSensor(SensorEntity):
         self._attr_state_class = sensor_def.state_class
         if sensor_def.icon:
             self._attr_icon = sensor_def.icon
+        if sensor_def.entity_category:
+            self._attr_entity_category = sensor_def.entity_category
 
     async def async_added_to_hass(self) -> None:
         """Register for engine updates."""
@@ -1944,3 +2352,12 @@ class EMSensor(SensorEntity):
         if isinstance(value, float):
             return round(value, 1)
         return value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the engine's detail attributes for this sensor, if any."""
+        engine = self._coordinator.engine
+        getter_name = self._ATTRIBUTE_GETTERS.get(self._key)
+        if not engine or not getter_name:
+            return None
+        return getattr(engine, getter_name, None)
@@ -90,6 +90,14 @@ async def async_setup_entry(
                 em_device=True,
             )
         )
+        entities.append(
+            EMToggleSwitch(
+                coordinator,
+                em_sn,
+                EMToggleDef("pi_charge_control"),
+                em_device=True,
+            )
+        )
 
         # Export limiting — single-phase only (uses peak shaving controlId 1021)
         em_dev_data = coordinator.data.get(em_sn, {})
@@ -276,6 +284,7 @@ class EMToggleSwitch(SwitchEntity, RestoreEntity):
         "night_mode": "mdi:weather-night",
         "high_load_battery_assist": "mdi:flash-alert-outline",
         "export_limiting": "mdi:transmission-tower-off",
+        "pi_charge_control": "mdi:tune-vertical",
     }
 
     def __init__(
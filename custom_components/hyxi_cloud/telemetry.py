@@ -0,0 +1,148 @@
+"""Telemetry tracing for HYXI Cloud.
+
+Per-device telemetry (polls, data push, alarm push) used to be masked into
+a full copy on every delivery just to feed a debug log line. Tracing now
+checks the log level up front and only masks when a line is actually
+rendered. Optionally, sampled and rate-limited traces go to a bounded ring
+buffer that is downloadable through diagnostics instead of flooding
+home-assistant.log.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from typing import Any
+
+from .const import (
+    TELEMETRY_TRACE_MIN_INTERVAL,
+    TELEMETRY_TRACE_SAMPLE_EVERY,
+    TELEMETRY_TRACE_SIZE,
+    mask_sensitive_key_value,
+    mask_sn,
+)
+
+
+def mask_payload(data: Any) -> Any:
+    """Return a masked copy of a metrics mapping or a list of records."""
+    if isinstance(data, Mapping):
+        return {k: mask_sensitive_key_value(k, v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [mask_payload(item) for item in data]
+    return data
+
+
+class MaskedPayload:
+    """Log argument that masks its payload only when the record is rendered."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Any) -> None:
+        """Wrap a payload without copying it."""
+        self._data = data
+
+    def __repr__(self) -> str:
+        """Render the masked payload."""
+        return repr(mask_payload(self._data))
+
+    __str__ = __repr__
+
+
+class TelemetryTrace:
+    """Sampled, rate-limited ring buffer of masked telemetry payloads."""
+
+    __slots__ = (
+        "_entries",
+        "_last_written",
+        "_min_interval",
+        "_sample_every",
+        "_seen",
+        "enabled",
+        "suppressed",
+        "written",
+    )
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        size: int = TELEMETRY_TRACE_SIZE,
+        min_interval: float = TELEMETRY_TRACE_MIN_INTERVAL,
+        sample_every: int = TELEMETRY_TRACE_SAMPLE_EVERY,
+    ) -> None:
+        """Initialize the trace buffer."""
+        self.enabled = enabled
+        self._entries: deque[dict[str, Any]] = deque(maxlen=size)
+        self._min_interval = min_interval
+        self._sample_every = max(1, sample_every)
+        self._seen: dict[tuple[str, str], int] = {}
+        self._last_written: dict[tuple[str, str], float] = {}
+        self.written = 0
+        self.suppressed = 0
+
+    def record(self, source: str, sn: str, data: Any) -> bool:
+        """Append a masked entry unless sampled out or rate limited."""
+        key = (source, sn)
+        seen = self._seen.get(key, 0) + 1
+        self._seen[key] = seen
+        now = time.monotonic()
+        last = self._last_written.get(key)
+        if seen % self._sample_every or (
+            last is not None and now - last < self._min_interval
+        ):
+            self.suppressed += 1
+            return False
+
+        self._last_written[key] = now
+        self._entries.append(
+            {
+                "time": datetime.now(UTC).isoformat(),
+                "source": source,
+                "device": mask_sn(sn),
+                "data": mask_payload(data),
+            }
+        )
+        self.written += 1
+        return True
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the buffer and its counters for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "size": self._entries.maxlen,
+            "min_interval": self._min_interval,
+            "sample_every": self._sample_every,
+            "written": self.written,
+            "suppressed": self.suppressed,
+            "entries": list(self._entries),
+        }
+
+
+def _buffering(trace: Any) -> bool:
+    """Return True if a (real) trace buffer is enabled."""
+    return isinstance(trace, TelemetryTrace) and trace.enabled
+
+
+def telemetry_active(trace: Any, logger: logging.Logger) -> bool:
+    """Return True if a telemetry payload would go anywhere at all."""
+    return _buffering(trace) or logger.isEnabledFor(logging.DEBUG)
+
+
+def trace_telemetry(
+    trace: Any,
+    logger: logging.Logger,
+    source: str,
+    message: str,
+    sn: str,
+    data: Any,
+) -> None:
+    """Send one device's telemetry to the trace buffer, or else the debug log.
+
+    message takes two %s arguments: the masked SN and the masked payload.
+    """
+    if _buffering(trace):
+        trace.record(source, sn, data)
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, mask_sn(sn), MaskedPayload(data))
@@ -0,0 +1,145 @@
+"""State write throttling for high-rate metric sensors.
+
+With push enabled, power/voltage/current sensors can get a new value
+every few seconds, most of it jitter. A WriteThrottle suppresses a state
+write unless the value moved by more than a deadband (the larger of an
+absolute band for the device class and a relative band), at most once per
+minimum interval, and always once the last written state is older than
+the max age so a value never stays stale.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from .const import (
+    CONF_THROTTLE_CURRENT_DEADBAND,
+    CONF_THROTTLE_MAX_AGE,
+    CONF_THROTTLE_MIN_INTERVAL,
+    CONF_THROTTLE_POWER_DEADBAND,
+    CONF_THROTTLE_RELATIVE_DEADBAND,
+    CONF_THROTTLE_VOLTAGE_DEADBAND,
+    CONF_WRITE_THROTTLE,
+    DEFAULT_THROTTLE_CURRENT_DEADBAND,
+    DEFAULT_THROTTLE_MAX_AGE,
+    DEFAULT_THROTTLE_MIN_INTERVAL,
+    DEFAULT_THROTTLE_POWER_DEADBAND,
+    DEFAULT_THROTTLE_RELATIVE_DEADBAND,
+    DEFAULT_THROTTLE_VOLTAGE_DEADBAND,
+)
+
+# Device class -> (option, default) for its absolute deadband
+THROTTLED_DEVICE_CLASSES: dict[str, tuple[str, float]] = {
+    "power": (CONF_THROTTLE_POWER_DEADBAND, DEFAULT_THROTTLE_POWER_DEADBAND),
+    "voltage": (CONF_THROTTLE_VOLTAGE_DEADBAND, DEFAULT_THROTTLE_VOLTAGE_DEADBAND),
+    "current": (CONF_THROTTLE_CURRENT_DEADBAND, DEFAULT_THROTTLE_CURRENT_DEADBAND),
+}
+
+
+class ThrottlePolicy(NamedTuple):
+    """Write throttling settings for one device class."""
+
+    device_class: str
+    abs_deadband: float
+    rel_deadband: float  # fraction of the last written value
+    min_interval: float  # seconds
+    max_age: float  # seconds
+
+
+def throttle_policy(options: Any, device_class: Any) -> ThrottlePolicy | None:
+    """Return the policy for a device class, or None if it isn't throttled."""
+    if not isinstance(options, Mapping) or not options.get(CONF_WRITE_THROTTLE):
+        return None
+    device_class = str(device_class) if device_class is not None else None
+    if device_class not in THROTTLED_DEVICE_CLASSES:
+        return None
+    option, default = THROTTLED_DEVICE_CLASSES[device_class]
+    return ThrottlePolicy(
+        device_class,
+        float(options.get(option, default)),
+        float(
+            options.get(
+                CONF_THROTTLE_RELATIVE_DEADBAND, DEFAULT_THROTTLE_RELATIVE_DEADBAND
+            )
+        )
+        / 100,
+        float(options.get(CONF_THROTTLE_MIN_INTERVAL, DEFAULT_THROTTLE_MIN_INTERVAL)),
+        float(options.get(CONF_THROTTLE_MAX_AGE, DEFAULT_THROTTLE_MAX_AGE)),
+    )
+
+
+class WriteThrottleStats:
+    """Written/suppressed state write counts per device class."""
+
+    __slots__ = ("suppressed", "written")
+
+    def __init__(self) -> None:
+        """Initialize empty counters."""
+        self.written: dict[str, int] = {}
+        self.suppressed: dict[str, int] = {}
+
+    def count(self, device_class: str, written: bool) -> None:
+        """Count one write decision."""
+        counters = self.written if written else self.suppressed
+        counters[device_class] = counters.get(device_class, 0) + 1
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the counters and suppression ratio per device class."""
+        result = {}
+        for device_class in sorted(set(self.written) | set(self.suppressed)):
+            written = self.written.get(device_class, 0)
+            suppressed = self.suppressed.get(device_class, 0)
+            result[device_class] = {
+                "written": written,
+                "suppressed": suppressed,
+                "suppressed_ratio": round(suppressed / (written + suppressed), 3),
+            }
+        return result
+
+
+class WriteThrottle:
+    """Decide whether one sensor's new value is worth a state write."""
+
+    __slots__ = ("_available", "_time", "_value", "policy", "stats")
+
+    def __init__(
+        self, policy: ThrottlePolicy, stats: WriteThrottleStats | None = None
+    ) -> None:
+        """Initialize the throttle; the first value is always written."""
+        self.policy = policy
+        self.stats = stats
+        self._value: Any = None
+        self._time: float | None = None
+        self._available: bool | None = None
+
+    def _significant(self, value: Any, now: float) -> bool:
+        """Return True if value must be written under the policy."""
+        # Always write the first value and moves between known and unknown
+        if self._time is None or (value is None) != (self._value is None):
+            return True
+        elapsed = now - self._time
+        if elapsed >= self.policy.max_age:
+            return True
+        if elapsed < self.policy.min_interval:
+            return False
+        last = self._value
+        if not isinstance(value, (int, float)) or not isinstance(last, (int, float)):
+            return value != last
+        band = max(self.policy.abs_deadband, self.policy.rel_deadband * abs(last))
+        return abs(value - last) > band
+
+    def should_write(
+        self, value: Any, available: bool = True, now: float | None = None
+    ) -> bool:
+        """Return True (and remember value) if the state should be written."""
+        now = time.monotonic() if now is None else now
+        write = available != self._available or self._significant(value, now)
+        if write:
+            self._value = value
+            self._time = now
+            self._available = available
+        if self.stats is not None:
+            self.stats.count(self.policy.device_class, write)
+        return write
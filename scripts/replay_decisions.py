@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Replay an Energy Manager decision trace through the decision kernel.
+
+Reads a trace exported by the hyxi_cloud.export_decision_trace service
+(NDJSON or CSV) and runs decision.decide() on each record's inputs.
+Every record is replayed on its own, with the counters it was made with.
+
+Without options, it checks that the kernel still makes the recorded
+decisions, e.g. after a change to decision.py. With --set, it shows
+which decisions a different parameter would have changed:
+
+    python scripts/replay_decisions.py trace.ndjson
+    python scripts/replay_decisions.py trace.csv --set charge_margin=300
+
+Exits with 1 if any decision differs from the recorded one.
+"""
+# pylint: disable=wrong-import-position
+
+import argparse
+import dataclasses
+import importlib
+import sys
+import types
+from collections import Counter
+from pathlib import Path
+
+# decision.py and decision_trace.py only need the standard library; load
+# them without the package __init__ (which needs Home Assistant).
+_PKG_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "hyxi_cloud"
+_pkg = types.ModuleType("hyxi_cloud")
+_pkg.__path__ = [str(_PKG_DIR)]
+sys.modules.setdefault("hyxi_cloud", _pkg)
+
+decision = importlib.import_module("hyxi_cloud.decision")
+decision_trace = importlib.import_module("hyxi_cloud.decision_trace")
+
+
+def _overrides(pairs: list[str]) -> dict:
+    """Parse name=value parameter overrides."""
+    params = {
+        field.name: field for field in dataclasses.fields(decision.DecisionParams)
+    }
+    overrides = {}
+    for pair in pairs:
+        name, _, raw = pair.partition("=")
+        if name not in params:
+            raise SystemExit(f"Unknown parameter {name!r}; one of: {', '.join(params)}")
+        if params[name].type == "bool":
+            overrides[name] = raw.strip().lower() in ("1", "true", "on")
+        else:
+            overrides[name] = float(raw)
+    return overrides
+
+
+def replay(path: Path, overrides: dict) -> int:
+    """Replay a trace file; return the number of differing decisions."""
+    changes: Counter[tuple[str, str]] = Counter()
+    total = 0
+    with path.open(encoding="utf-8", newline="") as file:
+        for row in decision_trace.read_rows(file):
+            case = decision_trace.parse_record(row)
+            params = dataclasses.replace(case.params, **overrides)
+            result = decision.decide(case.state, params, case.counters, case.now)
+            total += 1
+            if (result.label, result.commands) == (case.decision, case.commands):
+                continue
+            changes[(case.decision, result.label)] += 1
+            print(
+                f"{row['time']}  {case.decision} "
+                f"[{decision_trace.encode_commands(case.commands)}] -> "
+                f"{result.label} [{decision_trace.encode_commands(result.commands)}]"
+            )
+    differing = sum(changes.values())
+    print(f"\n{total} decisions replayed, {differing} differ")
+    for (recorded, replayed), count in changes.most_common():
+        print(f"{count:6d}  {recorded} -> {replayed}")
+    return differing
+
+
+def main() -> None:
+    """Replay the trace named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", type=Path, help="NDJSON or CSV decision trace")
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="override an EM parameter for the replay",
+    )
+    args = parser.parse_args()
+    sys.exit(1 if replay(args.trace, _overrides(args.set)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,9 @@ class MockCoordinatorEntity:
     def __init__(self, coordinator, *args, **kwargs):
         self.coordinator = coordinator
 
+    def __class_getitem__(cls, item):
+        return cls
+
 
 class MockSensorEntity:
     def __init__(self, *args, **kwargs):
@@ -56,19 +59,22 @@ sys.modules["homeassistant.helpers.restore_state"] = MagicMock()
 sys.modules["homeassistant.helpers.restore_state"].RestoreEntity = MockRestoreEntity  # type: ignore[attr-defined]
 sys.modules["homeassistant.helpers.update_coordinator"] = mock_coordinator
 sys.modules["homeassistant.helpers.aiohttp_client"] = MagicMock()
+sys.modules["homeassistant.helpers.storage"] = MagicMock()
+sys.modules["homeassistant.helpers.device_registry"] = MagicMock()
 sys.modules["homeassistant.util"] = mock_ha
 sys.modules["aiohttp"] = MagicMock()
 
 import hyxi_cloud.const as const_mod
+import hyxi_cloud.device_info as device_info_mod
 import hyxi_cloud.sensor as sensor_mod
 
 # Wire up real const.py functions
 sensor_mod.normalize_device_type = const_mod.normalize_device_type
 sensor_mod.get_raw_device_code = const_mod.get_raw_device_code
-sensor_mod.get_software_version = const_mod.get_software_version
 sensor_mod.mask_sn = const_mod.mask_sn
 sensor_mod.MANUFACTURER = const_mod.MANUFACTURER
 sensor_mod.DOMAIN = const_mod.DOMAIN
+device_info_mod.get_software_version = const_mod.get_software_version
 
 
 def benchmark():
@@ -88,21 +94,30 @@ def benchmark():
     description.key = "signalVal"
     description.translation_key = None
 
-    sensor = sensor_mod.HyxiSensor(coordinator, "SN123", description)
-
     iterations = 100000
-    # Warm up
-    for _ in range(100):
-        _ = sensor.device_info
-
-    start_time = time.perf_counter()
-    for _ in range(iterations):
-        _ = sensor.device_info
-    end_time = time.perf_counter()
-
-    total_time = end_time - start_time
-    print(f"Total time for {iterations} iterations: {total_time:.4f} seconds")
-    print(f"Average time per call: {total_time / iterations * 1e6:.4f} microseconds")
+    # Without a cache (e.g. a bare coordinator) every read builds the dict;
+    # the real coordinator carries a DeviceInfoCache shared by all sensors.
+    for label, cache in (
+        ("uncached", None),
+        ("cached", device_info_mod.DeviceInfoCache()),
+    ):
+        coordinator.device_infos = cache
+        sensor = sensor_mod.HyxiSensor(coordinator, "SN123", description)
+
+        # Warm up
+        for _ in range(100):
+            _ = sensor.device_info
+
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            _ = sensor.device_info
+        end_time = time.perf_counter()
+
+        total_time = end_time - start_time
+        print(f"[{label}] Total time for {iterations} iterations: {total_time:.4f} s")
+        print(
+            f"[{label}] Average time per call: {total_time / iterations * 1e6:.4f} us"
+        )
 
 
 if __name__ == "__main__":
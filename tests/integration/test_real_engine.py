@@ -17,10 +17,37 @@ from custom_components.hyxi_cloud.const import (
     CONF_EM_P1_ENTITY,
     DOMAIN,
 )
+from custom_components.hyxi_cloud.decision import COUNT_INTERVAL
 from custom_components.hyxi_cloud.engine import (
     EMEntityConfig,
     EnergyManagerEngine,
 )
+from custom_components.hyxi_cloud.ephemeris import SunEphemeris
+from custom_components.hyxi_cloud.recovery import StaleDataRecovery
+
+
+@pytest.fixture(autouse=True)
+def _no_sun_times():
+    """Keep decisions off the wall clock: sun down, no rising or setting soon.
+
+    Tests that need the sun somewhere pin it with _pin_sun().
+    """
+    with patch.multiple(
+        SunEphemeris,
+        elevation=MagicMock(return_value=-1.0),
+        next_rising=MagicMock(return_value=None),
+        next_setting=MagicMock(return_value=None),
+    ):
+        yield
+
+
+def _pin_sun(engine, elevation=0.0, rising=None, setting=None):
+    """Pin the engine's sun times (ephemeris.py) to fixed values."""
+    sun = MagicMock(spec=SunEphemeris)
+    sun.elevation.return_value = elevation
+    sun.next_rising.return_value = rising
+    sun.next_setting.return_value = setting
+    engine._sun = sun
 
 
 @pytest.mark.asyncio
@@ -153,27 +180,13 @@ async def test_engine_lifecycle_and_helpers(hass: HomeAssistant):
     # Test is_night, hours_until_sunrise, hours_until_sunset
     # Set solar to <= 50 to allow is_night to return True when sun is below horizon
     coordinator.data["SN123"]["metrics"]["ppv"] = "0.0"
+    rising = dt_util.parse_datetime("2026-06-02T10:00:00Z")
+    setting = dt_util.parse_datetime("2026-06-02T22:00:00Z")
     # Elevation < 0 -> night
-    hass.states.async_set(
-        "sun.sun",
-        "below_horizon",
-        {
-            "elevation": -5.0,
-            "next_rising": "2026-06-02T10:00:00Z",
-            "next_setting": "2026-06-02T22:00:00Z",
-        },
-    )
+    _pin_sun(engine, -5.0, rising, setting)
     assert engine._is_night() is True
     # Elevation > 0 -> not night
-    hass.states.async_set(
-        "sun.sun",
-        "above_horizon",
-        {
-            "elevation": 10.0,
-            "next_rising": "2026-06-02T10:00:00Z",
-            "next_setting": "2026-06-02T22:00:00Z",
-        },
-    )
+    _pin_sun(engine, 10.0, rising, setting)
     assert engine._is_night() is False
 
     with patch(
@@ -402,7 +415,7 @@ async def test_engine_decisions_and_actions(hass: HomeAssistant):
         "switch", DOMAIN, "hyxi_SN123_em_night_mode"
     )
     hass.states.async_set(sw_night_entity_id, "on")
-    hass.states.async_set("sun.sun", "below_horizon", {"elevation": -10.0})
+    _pin_sun(engine, -10.0)
     coordinator.data["SN123"]["metrics"]["ppv"] = 0
 
     # Night self consume
@@ -420,8 +433,9 @@ async def test_engine_decisions_and_actions(hass: HomeAssistant):
     )
     hass.states.async_set(sw_grid_entity_id, "off")
 
-    # Patch _check_soc_limits to return False so we can reach the otherwise unreachable else block in _check_night
-    with patch.object(engine, "_check_soc_limits", return_value=False):
+    # Skip the SOC limits so we can reach the otherwise unreachable else block
+    # of the night priority
+    with patch("custom_components.hyxi_cloud.decision.soc_limits", return_value=None):
         coordinator.data["SN123"]["metrics"]["batSoc"] = 20
         engine._last_mode_switch = -999999.0
         engine._last_power_adjust = -999999.0
@@ -435,7 +449,7 @@ async def test_engine_decisions_and_actions(hass: HomeAssistant):
     coordinator.data["SN123"]["metrics"]["batSoc"] = 60
     coordinator.data["SN123"]["metrics"]["ppv"] = 1500
     hass.states.async_set("sensor.p1_meter", "-800")  # export 800W
-    hass.states.async_set("sun.sun", "above_horizon", {"elevation": 20.0})
+    _pin_sun(engine, 20.0)
     await hass.async_block_till_done()
 
     # Trigger solar logic
@@ -445,7 +459,10 @@ async def test_engine_decisions_and_actions(hass: HomeAssistant):
     # It takes readings_needed (default is 2) to enter charge mode
     assert engine.decision == "solar_export_waiting"
 
-    # Call it again to exceed readings_needed
+    # Call it again, a loop interval later, to exceed readings_needed
+    engine._counters = engine._counters._replace(
+        last_count=engine._counters.last_count - COUNT_INTERVAL
+    )
     engine._last_mode_switch = -999999.0
     engine._last_power_adjust = -999999.0
     await engine._make_decision()
@@ -473,7 +490,7 @@ async def test_engine_decisions_and_actions(hass: HomeAssistant):
 
 @pytest.mark.asyncio
 async def test_engine_callbacks_and_staleness(hass: HomeAssistant):
-    """Test fast-path callbacks, night consumption estimate, staleness auto-reload, and error fallback."""
+    """Test event-driven decisions, staleness recovery, and error fallback."""
     entry = MockConfigEntry(
         domain=DOMAIN,
         data={"access_key": "test_ak", "secret_key": "test_sk"},
@@ -511,25 +528,31 @@ async def test_engine_callbacks_and_staleness(hass: HomeAssistant):
     engine = EnergyManagerEngine(hass, coordinator, config)
     await engine.async_start()
 
-    # 1. Test fast-path callback via P1 change event (high load)
+    # 1. A P1 change event asks the scheduler for a decision
     hass.states.async_set("sensor.p1_meter", "3500.0")
     # Trigger event listener callback
     await hass.async_block_till_done()
 
-    # 2. Test fast-path callback via SOC change event
-    soc_entity_id = "sensor.hyxi_sn123_batsoc"
-    hass.states.async_set(soc_entity_id, "18.0")
+    # 2. A coordinator update with a new SOC asks for one too
+    coordinator.data["SN123"]["metrics"]["batSoc"] = 18
+    engine._on_coordinator_update()
     await hass.async_block_till_done()
 
-    # 3. Test coordinator data staleness check (> 10 minutes)
+    # 3. Test coordinator data staleness check (> 10 minutes): the staged
+    # recovery runs instead of a decision
     coordinator.hyxi_metadata["last_success"] = dt_util.utcnow() - timedelta(minutes=15)
-    with patch(
-        "homeassistant.config_entries.ConfigEntries.async_reload", return_value=True
-    ) as mock_reload:
+    with (
+        patch.object(
+            StaleDataRecovery, "async_recover", AsyncMock(return_value=True)
+        ) as mock_recover,
+        patch.object(engine, "_decide_safely", AsyncMock()) as mock_decide,
+    ):
         await engine._loop_tick(None)
-        mock_reload.assert_called_once_with(entry.entry_id)
+        mock_recover.assert_awaited_once()
+        assert mock_recover.await_args.args[0] > 600
+        mock_decide.assert_not_awaited()
 
-    # Reset metadata last success to avoid reloading in next ticks
+    # Reset metadata last success to avoid recovering in next ticks
     coordinator.hyxi_metadata["last_success"] = dt_util.utcnow()
 
     # 4. Test em_enabled switch turn off -> forces self_consume
@@ -782,11 +805,8 @@ async def test_engine_protection_and_forecast_helpers(hass: HomeAssistant):
         "homeassistant.util.dt.utcnow",
         return_value=dt_util.parse_datetime("2026-06-02T08:00:00Z"),
     ):
-        hass.states.async_set(
-            "sun.sun",
-            "above_horizon",
-            {"next_setting": "2026-06-02T18:00:00Z"},  # 10h to sunset
-        )
+        # 10h to sunset
+        _pin_sun(engine, setting=dt_util.parse_datetime("2026-06-02T18:00:00Z"))
         # estimated_solar_wh=(3000/2)*10=15000; avg_night_load default=400;
         # usable=(15000-400*10)*0.8=8800Wh, well above the 40Wh needed for +2%
         assert engine._solar_will_cover_charge(52) is True
@@ -831,8 +851,8 @@ async def test_engine_set_param(hass: HomeAssistant):
 
 
 @pytest.mark.asyncio
-async def test_engine_on_soc_change_fast_path(hass: HomeAssistant):
-    """Test the low-SOC fast-path callback triggers/suppresses correctly."""
+async def test_engine_coordinator_and_param_triggers(hass: HomeAssistant):
+    """Test coordinator updates and SOC limit edits schedule decisions."""
     entry = MockConfigEntry(
         domain=DOMAIN,
         data={"access_key": "test_ak", "secret_key": "test_sk"},
@@ -858,53 +878,44 @@ async def test_engine_on_soc_change_fast_path(hass: HomeAssistant):
     )
     hass.states.async_set(soc_min_entry.entity_id, "20")
 
-    with patch.object(engine, "_make_decision", new=AsyncMock()) as mock_decision:
-        # Not started yet -> disabled guard short-circuits even a low-SOC event
-        event = MagicMock()
-        event.data = {"new_state": MagicMock(state="10.0")}
-        engine._on_soc_change(event)
+    def _decided():
+        engine._scheduler.begin(time.monotonic(), soc=50.0, solar=0.0, home_load=0.0)
+
+    with patch.object(
+        engine, "_make_decision", new=AsyncMock(side_effect=_decided)
+    ) as mock_decision:
+        # Not started yet -> updates are ignored
+        engine._on_coordinator_update()
         await hass.async_block_till_done()
         mock_decision.assert_not_called()
 
         await engine.async_start()
 
-        # Missing new_state -> no-op
-        event.data = {"new_state": None}
-        engine._on_soc_change(event)
+        # First readings -> decide right away
+        engine._on_coordinator_update()
         await hass.async_block_till_done()
-        mock_decision.assert_not_called()
-
-        # Unavailable state -> no-op
-        event.data = {"new_state": MagicMock(state="unavailable")}
-        engine._on_soc_change(event)
-        await hass.async_block_till_done()
-        mock_decision.assert_not_called()
+        mock_decision.assert_called_once()
 
-        # Non-numeric state -> no-op (ValueError swallowed)
-        event.data = {"new_state": MagicMock(state="not-a-number")}
-        engine._on_soc_change(event)
+        # Unchanged readings -> within the deadbands, no decision
+        engine._on_coordinator_update()
         await hass.async_block_till_done()
-        mock_decision.assert_not_called()
+        mock_decision.assert_called_once()
 
-        # SOC at/above soc_min -> no fast-path trigger needed
-        event.data = {"new_state": MagicMock(state="50.0")}
-        engine._on_soc_change(event)
+        # Unavailable SOC limit -> no-op
+        hass.states.async_set(soc_min_entry.entity_id, "unavailable")
         await hass.async_block_till_done()
-        mock_decision.assert_not_called()
+        assert not engine._scheduler.pending
 
-        # SOC below soc_min -> triggers the decision fast-path
-        event.data = {"new_state": MagicMock(state="10.0")}
-        engine._on_soc_change(event)
+        # SOC limit edit right after a decision -> waits for the minimum gap
+        hass.states.async_set(soc_min_entry.entity_id, "25")
         await hass.async_block_till_done()
+        assert engine._scheduler.pending
+        assert engine._unsub_evaluate is not None
         mock_decision.assert_called_once()
 
-        # A second low-SOC event within the 15s cooldown is suppressed
-        mock_decision.reset_mock()
-        engine._on_soc_change(event)
-        await hass.async_block_till_done()
-        mock_decision.assert_not_called()
-
+        # Stopping cancels the deferred decision
         await engine.async_stop()
+        assert engine._unsub_evaluate is None
 
 
 @pytest.mark.asyncio
@@ -1051,16 +1062,23 @@ def _make_engine(hass: HomeAssistant, *, options=None, metrics=None, model="H10K
 
 @pytest.mark.asyncio
 async def test_engine_lifecycle_edge_cases(hass: HomeAssistant):
-    """Test async_start/async_stop idempotency and the SOC-listener branch."""
-    engine, _coordinator, _entry = _make_engine(hass)
+    """Test async_start/async_stop idempotency and the parameter-listener branch."""
+    engine, _coordinator, entry = _make_engine(hass)
     registry = er.async_get(hass)
 
-    # Register the batSoc sensor entity so async_start's SOC-listener branch
-    # (only taken when the entity actually exists) gets exercised.
-    soc_entry = registry.async_get_or_create(
-        "sensor", DOMAIN, "hyxi_SN123_batsoc", suggested_object_id="hyxi_sn123_batsoc"
+    # Register an EM number of this entry so async_start's parameter-listener
+    # branch (only taken when such entities exist) gets exercised; EM sensors
+    # don't count as parameters.
+    param_entry = registry.async_get_or_create(
+        "number",
+        DOMAIN,
+        "hyxi_SN123_em_high_load_threshold",
+        config_entry=entry,
+    )
+    registry.async_get_or_create(
+        "sensor", DOMAIN, "hyxi_SN123_em_status", config_entry=entry
     )
-    hass.states.async_set(soc_entry.entity_id, "50.0")
+    assert engine._param_entity_ids() == [param_entry.entity_id]
 
     await engine.async_start()
     assert engine.enabled is True
@@ -1109,20 +1127,9 @@ async def test_engine_state_reading_edge_cases(hass: HomeAssistant):
     # _get_protection_param: no matching number entity registered
     assert engine._get_protection_param("soc_min", 17.0) == 17.0
 
-    # _hours_until_sunrise: sun.sun exists but next_rising fails to parse
-    hass.states.async_set(
-        "sun.sun", "above_horizon", {"next_rising": "not-a-timestamp"}
-    )
+    # _hours_until_sunrise/_sunset: no rising or setting soon (polar day)
+    _pin_sun(engine, 10.0)
     assert engine._hours_until_sunrise() == 12.0
-
-    # _hours_until_sunset: no sun.sun entity registered at all
-    hass.states.async_remove("sun.sun")
-    assert engine._hours_until_sunset() == 12.0
-
-    # _hours_until_sunset: sun.sun exists but next_setting fails to parse
-    hass.states.async_set(
-        "sun.sun", "above_horizon", {"next_setting": "not-a-timestamp"}
-    )
     assert engine._hours_until_sunset() == 12.0
 
     # _soc_needed_for_night: non-positive capacity falls back to 10000 Wh
@@ -1249,9 +1256,7 @@ async def test_engine_make_decision_guards(hass: HomeAssistant):
     coordinator.data["SN123"]["metrics"]["ppv"] = "0.0"  # not solar-producing
     coordinator.data["SN123"]["metrics"]["batSoc"] = "50.0"  # well within limits
     hass.states.async_set("sensor.p1_meter", "0")
-    hass.states.async_set(
-        "sun.sun", "above_horizon", {"elevation": 10.0}
-    )  # daytime, not night
+    _pin_sun(engine, 10.0)  # daytime, not night
     for key in ("soc_min", "soc_max"):
         registry.async_get_or_create(
             "number",
@@ -1284,554 +1289,85 @@ def _set_soc_limits(hass, registry, soc_min="20", soc_max="90"):
 
 
 @pytest.mark.asyncio
-async def test_engine_check_soc_limits_mode_transitions(hass: HomeAssistant):
-    """Test the 'already in the target mode -> adjust instead of switch'
-    branches for all three _check_soc_limits outcomes."""
+async def test_engine_decision_snapshots(hass: HomeAssistant):
+    """Test the state and parameter snapshots handed to the decision kernel.
+
+    The kernel's branches are covered by tests/test_decision.py; this checks
+    the adapter reads them from the right entities.
+    """
     engine, _coordinator, _entry = _make_engine(
         hass,
         options={
-            "em_dry_run": True,
             "em_battery_capacity_override": True,
             "em_battery_capacity_wh": 2000,
         },
+        metrics={"batSoc": "25.0", "ppv": "1200.0"},
+        model="H5K-LS",  # single-phase: peak shaving supported
     )
     registry = er.async_get(hass)
-    _set_soc_limits(hass, registry)
+    _set_soc_limits(hass, registry, soc_min="15", soc_max="85")
+    hass.states.async_set("sensor.p1_meter", "-300")
+    for key, val in (("night_mode", "on"), ("export_limiting", "off")):
+        sw_entry = registry.async_get_or_create(
+            "switch",
+            DOMAIN,
+            f"hyxi_SN123_em_{key}",
+            suggested_object_id=f"hyxi_sn123_em_{key}",
+        )
+        hass.states.async_set(sw_entry.entity_id, val)
 
-    s_kwargs = {
-        "home_load": 0,
-        "max_charge": 2000,
-        "max_discharge": 2000,
-        "is_night": False,
-        "night_soc_target": 30,
-    }
-    from custom_components.hyxi_cloud.engine import DecisionState
+    params = engine._decision_params()
+    assert params.battery_capacity_wh == 2000.0
+    assert params.charge_margin == 150.0  # EM_DEFAULTS
+    assert params.night_mode is True
+    assert params.export_limiting is False
+    assert params.high_load_assist is False  # no switch entity
+    assert params.peak_shaving is True
 
-    # emergency_solar_charge while already charging -> adjust_power branch
     engine._current_mode = "charge"
-    s = DecisionState(
-        soc=15,
-        solar=1000,
-        p1=-100,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        **s_kwargs,
-    )
-    assert await engine._check_soc_limits(s) is True
-    assert engine.decision == "emergency_solar_charge"
-
-    # grid_charge_emergency while NOT already charging -> set_mode branch
-    sw_entry = registry.async_get_or_create(
-        "switch",
-        DOMAIN,
-        "hyxi_SN123_em_grid_charge_allowed",
-        suggested_object_id="hyxi_sn123_em_grid_charge_allowed",
-    )
-    hass.states.async_set(sw_entry.entity_id, "on")
-    engine._current_mode = "idle"
-    engine._last_mode_switch = -999999.0
-    s = DecisionState(
-        soc=15,
-        solar=0,
-        p1=100,
-        solar_producing=False,
-        soc_min=20,
-        soc_max=90,
-        **s_kwargs,
-    )
-    assert await engine._check_soc_limits(s) is True
-    assert engine.decision == "grid_charge_emergency"
-    assert engine.current_mode == "charge"
-
-    # forced_discharge_over_max while already discharging -> adjust_power branch
-    engine._current_mode = "discharge"
-    s = DecisionState(
-        soc=95,
-        solar=0,
-        p1=500,
-        solar_producing=False,
-        soc_min=20,
-        soc_max=90,
-        **s_kwargs,
-    )
-    assert await engine._check_soc_limits(s) is True
-    assert engine.decision == "forced_discharge_over_max"
+    engine._pv_curtailed = True
+    engine._last_sent_power["charge"] = 700
+    s = engine._decision_state()
+    assert (s.soc, s.solar, s.p1) == (25.0, 1200.0, -300.0)
+    assert (s.soc_min, s.soc_max) == (15.0, 85.0)
+    assert s.solar_producing is True
+    assert s.current_mode == "charge"
+    assert s.pv_curtailed is True
+    assert s.charge_power == 700
 
 
 @pytest.mark.asyncio
-async def test_engine_check_export_limit_branches(hass: HomeAssistant):
-    """Test every branch of the single-phase export-limiting priority check."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
+async def test_engine_applies_kernel_commands(hass: HomeAssistant):
+    """Test a decision with several commands: release PV, then charge."""
     engine, coordinator, _entry = _make_engine(
-        hass,
-        options={"em_dry_run": True},
-        model="H5K-LS",  # single-phase
+        hass, options={"em_dry_run": True}, model="H5K-LS"
     )
     registry = er.async_get(hass)
-    s_kwargs = {
-        "home_load": 0,
-        "max_charge": 2000,
-        "max_discharge": 2000,
-        "is_night": False,
-        "night_soc_target": 30,
-    }
-
-    # Not single-phase / no peak shaving support -> always False
-    coordinator.data["SN123"]["model"] = "H10K-HT"  # three-phase
-    s = DecisionState(
-        soc=50, solar=0, p1=0, solar_producing=False, soc_min=20, soc_max=90, **s_kwargs
-    )
-    assert await engine._check_export_limit(s) is False
-    coordinator.data["SN123"]["model"] = "H5K-LS"  # restore single-phase
-
-    # Export limiting switch off, and not currently curtailed -> False, no release
-    assert await engine._check_export_limit(s) is False
-
-    # Export limiting switch off but WAS curtailed -> releases curtailment
+    _set_soc_limits(hass, registry)
     sw_export = registry.async_get_or_create(
         "switch",
         DOMAIN,
         "hyxi_SN123_em_export_limiting",
         suggested_object_id="hyxi_sn123_em_export_limiting",
     )
-    hass.states.async_set(sw_export.entity_id, "off")
-    engine._pv_curtailed = True
-    with patch.object(
-        engine, "_set_peak_shaving", new=AsyncMock(return_value=True)
-    ) as mock_shave:
-        assert await engine._check_export_limit(s) is False
-        mock_shave.assert_called_once_with("hold")
-    engine._pv_curtailed = False
-
-    # Export limiting on, but max_grid_export configured as 0 (disabled) and
-    # currently curtailed -> releases curtailment
     hass.states.async_set(sw_export.entity_id, "on")
-    engine._pv_curtailed = True
-    with patch.object(engine, "_get_param", return_value=0.0):
-        with patch.object(
-            engine, "_set_peak_shaving", new=AsyncMock(return_value=True)
-        ) as mock_shave:
-            assert await engine._check_export_limit(s) is False
-            mock_shave.assert_called_once_with("hold")
-    engine._pv_curtailed = False
-
-    # Exporting beyond the limit, battery has room -> charge to absorb (new
-    # mode), also releasing any prior curtailment since we're charging again
-    with patch.object(engine, "_get_param", return_value=500.0):
-        s = DecisionState(
-            soc=50,
-            solar=1000,
-            p1=-2000,
-            solar_producing=True,
-            soc_min=20,
-            soc_max=90,
-            **s_kwargs,
-        )
-        engine._current_mode = "idle"
-        engine._last_mode_switch = -999999.0
-        engine._pv_curtailed = True
-        with patch.object(
-            engine, "_release_pv_curtailment", new=AsyncMock()
-        ) as mock_release:
-            assert await engine._check_export_limit(s) is True
-            mock_release.assert_called_once()
-        assert engine.decision == "export_limit_charge"
-        engine._pv_curtailed = False
-
-        # Same, but already charging -> adjust_power branch
-        engine._current_mode = "charge"
-        engine._last_power_adjust = -999999.0
-        assert await engine._check_export_limit(s) is True
-        assert engine.decision == "export_limit_charge"
-
-        # Exporting beyond the limit, battery full -> curtail via peak shaving
-        s = DecisionState(
-            soc=95,
-            solar=1000,
-            p1=-2000,
-            solar_producing=True,
-            soc_min=20,
-            soc_max=90,
-            **s_kwargs,
-        )
-        engine._pv_curtailed = False
-        engine._last_pv_curtail_toggle = -999999.0
-        assert await engine._check_export_limit(s) is True
-        assert engine.decision == "export_limit_pv_curtail"
-
-        # Export within limit while previously charging for export -> revert
-        # to self_consume
-        engine._current_mode = "charge"
-        engine._pv_curtailed = False
-        engine._set_decision("export_limit_charge")
-        s = DecisionState(
-            soc=50,
-            solar=200,
-            p1=100,
-            solar_producing=False,
-            soc_min=20,
-            soc_max=90,
-            **s_kwargs,
-        )
-        assert await engine._check_export_limit(s) is True
-        assert engine.decision == "export_limit_ok"
-
-        # Export within limit and nothing special going on -> False
-        engine._current_mode = "self_consume"
-        engine._set_decision("idle")
-        assert await engine._check_export_limit(s) is False
-
-
-@pytest.mark.asyncio
-async def test_engine_check_high_load_disabled(hass: HomeAssistant):
-    """Test _check_high_load returns False when the assist switch is off."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
-    engine, _coordinator, _entry = _make_engine(hass)
-    s = DecisionState(
-        soc=50,
-        solar=0,
-        p1=0,
-        home_load=9999,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=False,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    assert await engine._check_high_load(s) is False
-
-
-@pytest.mark.asyncio
-async def test_engine_check_high_load_below_threshold(hass: HomeAssistant):
-    """Test _check_high_load returns False when the assist switch is on but
-    home load hasn't actually exceeded the threshold."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
-    engine, _coordinator, _entry = _make_engine(hass)
-    registry = er.async_get(hass)
-    sw_assist = registry.async_get_or_create(
-        "switch",
-        DOMAIN,
-        "hyxi_SN123_em_high_load_battery_assist",
-        suggested_object_id="hyxi_sn123_em_high_load_battery_assist",
-    )
-    hass.states.async_set(sw_assist.entity_id, "on")
-
-    with patch.object(engine, "_get_param", return_value=6500.0):  # threshold
-        s = DecisionState(
-            soc=50,
-            solar=0,
-            p1=0,
-            home_load=100,  # well under the threshold
-            max_charge=2000,
-            max_discharge=2000,
-            is_night=False,
-            solar_producing=False,
-            soc_min=20,
-            soc_max=90,
-            night_soc_target=30,
-        )
-        assert await engine._check_high_load(s) is False
-
-
-@pytest.mark.asyncio
-async def test_engine_check_night_daytime_preservation(hass: HomeAssistant):
-    """Test the daytime night-reserve-preservation branch of _check_night."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
-    engine, _coordinator, _entry = _make_engine(hass, options={"em_dry_run": True})
-    registry = er.async_get(hass)
-    sw_night = registry.async_get_or_create(
-        "switch",
-        DOMAIN,
-        "hyxi_SN123_em_night_mode",
-        suggested_object_id="hyxi_sn123_em_night_mode",
-    )
-    hass.states.async_set(sw_night.entity_id, "on")
-
-    # Feed a positive rolling P1 average so p1_avg > 0
-    engine._p1_buffer.append((time.monotonic(), 500.0))
-
-    with patch.object(engine, "_solar_will_cover_charge", return_value=False):
-        s = DecisionState(
-            soc=25,
-            solar=0,
-            p1=200,
-            home_load=0,
-            max_charge=2000,
-            max_discharge=2000,
-            is_night=False,
-            solar_producing=False,
-            soc_min=20,
-            soc_max=90,
-            night_soc_target=30,  # soc(25) <= night_soc_target(30)
-        )
-        engine._current_mode = "self_consume"
-        assert await engine._check_night(s) is True
-        assert engine.decision == "night_preserve_idle"
-
-
-@pytest.mark.asyncio
-async def test_engine_check_night_returns_false_when_nothing_applies(
-    hass: HomeAssistant,
-):
-    """Test _check_night falls through to False when night mode is on but
-    neither the nighttime nor the daytime-preservation condition is met."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
-    engine, _coordinator, _entry = _make_engine(hass)
-    registry = er.async_get(hass)
-    sw_night = registry.async_get_or_create(
-        "switch",
+    num_export = registry.async_get_or_create(
+        "number",
         DOMAIN,
-        "hyxi_SN123_em_night_mode",
-        suggested_object_id="hyxi_sn123_em_night_mode",
-    )
-    hass.states.async_set(sw_night.entity_id, "on")
-
-    s = DecisionState(
-        soc=80,  # well above night_soc_target -- no preservation needed
-        solar=1000,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,  # daytime -- nighttime branch doesn't apply either
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
+        "hyxi_SN123_em_max_grid_export",
+        suggested_object_id="hyxi_sn123_em_max_grid_export",
     )
-    assert await engine._check_night(s) is False
-
-
-@pytest.mark.asyncio
-async def test_engine_check_solar_branches(hass: HomeAssistant):
-    """Test _check_solar's battery-full branch, bottomout-cooldown doubling,
-    and sunset-urgency adjustment."""
-    from custom_components.hyxi_cloud.engine import DecisionState
-
-    engine, _coordinator, _entry = _make_engine(hass, options={"em_dry_run": True})
-
-    # solar_battery_full: producing solar but SOC already at/above max
-    s = DecisionState(
-        soc=90,
-        solar=1000,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    engine._current_mode = "charge"
-    assert await engine._check_solar(s) is True
-    assert engine.decision == "solar_battery_full"
-
-    # Bottomout-cooldown doubling + sunset urgency both flow through
-    # _solar_charge_logic -> _solar_entry_logic; just confirm no crash and
-    # that a decision gets set via the sunset-urgent path.
-    engine._last_bottomout_exit = time.monotonic()  # inside bottomout_cooldown
-    with (
-        patch.object(engine, "_hours_until_sunset", return_value=2.0),  # < 4h
-        patch.object(engine, "_solar_will_cover_charge", return_value=False),
-    ):
-        s = DecisionState(
-            soc=50,
-            solar=50,  # below min_solar_for_charge -> solar_self_consume path
-            p1=0,
-            home_load=0,
-            max_charge=2000,
-            max_discharge=2000,
-            is_night=False,
-            solar_producing=True,
-            soc_min=20,
-            soc_max=90,
-            night_soc_target=60,  # soc(50) < night_soc_target(60)
-        )
-        engine._current_mode = "idle"
-        assert await engine._check_solar(s) is True
-        assert engine.decision == "solar_self_consume"
-
-
-@pytest.mark.asyncio
-async def test_engine_solar_entry_and_tune_logic(hass: HomeAssistant):
-    """Test the low-solar entry branch and the tune-logic exit/balanced branches."""
-    from custom_components.hyxi_cloud.engine import DecisionState, SolarConfig
-
-    engine, _coordinator, _entry = _make_engine(hass, options={"em_dry_run": True})
-
-    s = DecisionState(
-        soc=50,
-        solar=50,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    sc = SolarConfig(
-        min_solar_for_charge=1000,
-        charge_margin=150,
-        charge_entry_threshold=500,
-        readings_needed=2,
-        sunset_urgent=False,
-    )
-
-    # solar below threshold -> solar_self_consume, mode switches away from
-    # a non-idle/self_consume mode (e.g. was discharging)
-    engine._current_mode = "discharge"
-    engine._charge_entry_export_count = 5
-    await engine._solar_entry_logic(s, sc)
-    assert engine.decision == "solar_self_consume"
-    assert engine._charge_entry_export_count == 0
-    assert engine.current_mode == "self_consume"
-
-    # solar above threshold and P1 not exporting past the entry threshold
-    # (neither low-solar nor sustained-export) -> falls to the else branch
-    engine._current_mode = "discharge"
-    engine._last_mode_switch = -999999.0  # avoid cooldown from the call above
-    s_else = DecisionState(
-        soc=50,
-        solar=1500,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    engine._charge_entry_export_count = 3
-    await engine._solar_entry_logic(s_else, sc)
-    assert engine.decision == "solar_self_consume"
-    assert engine._charge_entry_export_count == 0
-    assert engine.current_mode == "self_consume"
-
-    # solar_export_waiting: current_mode not in (self_consume, idle) forces a switch
-    engine._current_mode = "discharge"
-    engine._last_mode_switch = -999999.0
-    s2 = DecisionState(
-        soc=50,
-        solar=1500,
-        p1=-600,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    engine._charge_entry_export_count = 0
-    await engine._solar_entry_logic(s2, sc)
-    assert engine.decision == "solar_export_waiting"
-    assert engine.current_mode == "self_consume"
-
-    # _solar_tune_logic: solar has dropped well below threshold while
-    # charging -> exit to self_consume
-    engine._current_mode = "charge"
-    s3 = DecisionState(
-        soc=50,
-        solar=100,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    await engine._solar_tune_logic(s3, sc)
-    assert engine.decision == "solar_self_consume"
-
-    # _solar_tune_logic: P1 within the balanced range -> stays on solar_charge
-    # without calling adjust_power
-    engine._current_mode = "charge"
-    engine._charge_bottomout_count = 3
-    s4 = DecisionState(
-        soc=50,
-        solar=1500,
-        p1=0,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    with patch.object(engine, "_adjust_power", new=AsyncMock()) as mock_adjust:
-        await engine._solar_tune_logic(s4, sc)
-        mock_adjust.assert_not_called()
-    assert engine.decision == "solar_charge"
-    assert engine._charge_bottomout_count == 2
-
-    # _solar_reduce_charge: normal reduction (charge_target stays > 100) --
-    # reached via _solar_tune_logic when importing (p1 > charge_margin)
-    engine._current_mode = "charge"
-    engine._charge_bottomout_count = 3
-    engine._last_sent_power["charge"] = 1000
-    s5 = DecisionState(
-        soc=50,
-        solar=1500,
-        p1=200,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    with patch.object(engine, "_adjust_power", new=AsyncMock()) as mock_adjust:
-        await engine._solar_tune_logic(s5, sc)
-        mock_adjust.assert_called_once()
-    assert engine.decision == "solar_charge"
-    assert engine._charge_bottomout_count == 0
+    hass.states.async_set(num_export.entity_id, "1000")
+    coordinator.data["SN123"]["metrics"]["ppv"] = "3000.0"
+    hass.states.async_set("sensor.p1_meter", "-2500")
+    _pin_sun(engine, 30.0)
 
-    # _solar_reduce_charge: repeated deep imports push charge_target to the
-    # 100W floor -- once bottomout_count reaches 5, exit to self_consume
-    engine._current_mode = "charge"
-    engine._last_mode_switch = -999999.0  # avoid cooldown from earlier calls
-    engine._charge_bottomout_count = 4
-    engine._last_sent_power["charge"] = 150
-    s6 = DecisionState(
-        soc=50,
-        solar=1500,
-        p1=500,
-        home_load=0,
-        max_charge=2000,
-        max_discharge=2000,
-        is_night=False,
-        solar_producing=True,
-        soc_min=20,
-        soc_max=90,
-        night_soc_target=30,
-    )
-    await engine._solar_tune_logic(s6, sc)
-    assert engine.decision == "solar_self_consume"
-    assert engine._charge_bottomout_count == 0
-    assert engine.current_mode == "self_consume"
+    engine._current_mode = "self_consume"
+    engine._pv_curtailed = True
+    await engine._make_decision()
+    assert engine.decision == "export_limit_charge"
+    assert engine._pv_curtailed is False
+    assert engine.current_mode == "charge"
 
 
 @pytest.mark.asyncio
@@ -1885,8 +1421,8 @@ async def test_engine_loop_tick_edge_cases(hass: HomeAssistant):
 
 @pytest.mark.asyncio
 async def test_engine_on_p1_change_edge_cases(hass: HomeAssistant):
-    """Test _on_p1_change's guard branches, buffer trimming, and fast-path
-    trigger for sustained high load."""
+    """Test _on_p1_change's guard branches, buffer trimming, and the
+    event-driven decision on a P1 change."""
     engine, coordinator, _entry = _make_engine(hass)
 
     # Missing/placeholder new_state -> no-op, nothing buffered
@@ -1906,7 +1442,7 @@ async def test_engine_on_p1_change_edge_cases(hass: HomeAssistant):
         engine._on_p1_change(event)
     assert all(v == 250.0 for _, v in engine._p1_buffer)  # the stale entry is gone
 
-    # Engine not enabled -> stops right after buffering, no fast-path trigger
+    # Engine not enabled -> stops right after buffering, no decision
     coordinator.data["SN123"]["metrics"]["home_load"] = "9999.0"
     with patch.object(engine, "_make_decision", new=AsyncMock()) as mock_decision:
         event.data = {"new_state": MagicMock(state="300.0")}
@@ -1914,10 +1450,9 @@ async def test_engine_on_p1_change_edge_cases(hass: HomeAssistant):
         await hass.async_block_till_done()
         mock_decision.assert_not_called()
 
-    # Engine enabled + home_load over threshold -> triggers the fast-path
+    # Engine enabled + P1 beyond its deadband -> decides right away
     await engine.async_start()
     with patch.object(engine, "_make_decision", new=AsyncMock()) as mock_decision:
-        engine._last_fast_path_trigger = 0
         event.data = {"new_state": MagicMock(state="300.0")}
         engine._on_p1_change(event)
         await hass.async_block_till_done()
@@ -0,0 +1,128 @@
+"""Tests for the fleet aggregation index."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.hyxi_cloud import aggregates
+from custom_components.hyxi_cloud.aggregates import (
+    EMPTY_STATS,
+    FleetAggregator,
+    MetricAggregate,
+    get_fleet_aggregator,
+)
+
+
+def _fleet_data():
+    return {
+        "M1": {"device_type_code": "MICRO_INVERTER", "metrics": {"acP": "18.0"}},
+        "M2": {"device_type_code": "MICRO_INVERTER", "metrics": {"acP": 22.5}},
+        "M3": {"device_type_code": "MICRO_INVERTER", "metrics": {"acP": "--"}},
+        "H1": {"device_type_code": "HYBRID_INVERTER", "metrics": {"acP": 5000}},
+    }
+
+
+def test_stats_over_one_device_type():
+    """Only devices of the requested type with usable values count."""
+    data = _fleet_data()
+    stats = FleetAggregator().stats(data, ("micro_inverter",), "acP")
+    assert stats.count == 2
+    assert stats.total == pytest.approx(40.5)
+    assert stats.mean == pytest.approx(20.25)
+    assert (stats.minimum, stats.maximum) == (18.0, 22.5)
+
+
+def test_stats_across_several_device_types():
+    """Aggregates can span several device types."""
+    data = _fleet_data()
+    stats = FleetAggregator().stats(data, ("micro_inverter", "hybrid_inverter"), "acP")
+    assert stats.count == 3
+    assert stats.maximum == 5000
+
+
+def test_no_usable_values_is_empty():
+    """No usable reading gives empty stats, not zeros."""
+    data = {"M1": {"device_type_code": "MICRO_INVERTER", "metrics": {"acP": None}}}
+    assert FleetAggregator().stats(data, ("micro_inverter",), "acP") == EMPTY_STATS
+    assert FleetAggregator().stats({}, ("micro_inverter",), "acP") == EMPTY_STATS
+
+
+def test_only_changed_values_are_reparsed(monkeypatch):
+    """A refresh re-parses only devices whose raw value changed."""
+    data = _fleet_data()
+    fleet = FleetAggregator()
+    fleet.stats(data, ("micro_inverter",), "acP")
+
+    parsed = []
+    real_parse = aggregates._parse
+    monkeypatch.setattr(
+        aggregates, "_parse", lambda v: parsed.append(v) or real_parse(v)
+    )
+
+    # A push to an unrelated device leaves the microinverter aggregate alone
+    data["H1"]["metrics"] = {"acP": 4000}
+    fleet.stats(data, ("micro_inverter",), "acP")
+    assert parsed == []
+
+    data["M1"]["metrics"] = {"acP": "100"}
+    stats = fleet.stats(data, ("micro_inverter",), "acP")
+    assert parsed == ["100"]
+    assert stats.total == pytest.approx(122.5)
+    assert stats.maximum == 100.0
+
+    # Going unusable removes the device from every aggregate
+    data["M2"]["metrics"]["acP"] = "null"
+    stats = fleet.stats(data, ("micro_inverter",), "acP")
+    assert (stats.count, stats.total, stats.minimum) == (1, 100.0, 100.0)
+
+
+def test_same_layout_keeps_aggregates_across_polls():
+    """A replaced data dict with the same fleet layout keeps running totals."""
+    fleet = FleetAggregator()
+    data = _fleet_data()
+    fleet.stats(data, ("micro_inverter",), "acP")
+    aggregate = fleet._aggregates[(("micro_inverter",), "acP")]
+
+    fleet.stats(_fleet_data(), ("micro_inverter",), "acP")
+    assert fleet._aggregates[(("micro_inverter",), "acP")] is aggregate
+
+    new_data = _fleet_data()
+    new_data["M4"] = {"device_type_code": "MICRO_INVERTER", "metrics": {"acP": 1}}
+    stats = fleet.stats(new_data, ("micro_inverter",), "acP")
+    assert stats.count == 3
+    assert fleet._aggregates[(("micro_inverter",), "acP")] is not aggregate
+
+
+def test_numpy_backing_matches_list_backing(monkeypatch):
+    """Large fleets use an array backing with identical results."""
+    pytest.importorskip("numpy")
+    sns = tuple(f"M{i}" for i in range(10))
+    data = {sn: {"metrics": {"acP": i * 1.5}} for i, sn in enumerate(sns)}
+    data["M3"]["metrics"]["acP"] = "--"
+
+    small = MetricAggregate("acP", sns)
+    monkeypatch.setattr(aggregates, "NUMPY_MIN_FLEET", 1)
+    large = MetricAggregate("acP", sns)
+    assert not isinstance(large._values, list)
+
+    small.refresh(data)
+    large.refresh(data)
+    assert small.stats() == pytest.approx(large.stats())
+
+
+def test_running_total_resyncs(monkeypatch):
+    """The delta-updated total is periodically recomputed exactly."""
+    monkeypatch.setattr(aggregates, "RESYNC_EVERY", 3)
+    aggregate = MetricAggregate("acP", ("M1",))
+    for value in (0.1, 0.2, 0.3, 0.7):
+        aggregate.refresh({"M1": {"metrics": {"acP": value}}})
+    assert aggregate.stats().total == 0.7
+    assert aggregate._deltas == 1
+
+
+def test_get_fleet_aggregator_attaches_once():
+    """Coordinators without a real aggregator get one attached."""
+    coordinator = MagicMock()
+    fleet = get_fleet_aggregator(coordinator)
+    assert isinstance(fleet, FleetAggregator)
+    assert get_fleet_aggregator(coordinator) is fleet
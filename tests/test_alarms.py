@@ -0,0 +1,93 @@
+"""Tests for the bounded per-device alarm store."""
+
+from custom_components.hyxi_cloud.alarms import (
+    HyxiAlarmStore,
+    get_alarm_store,
+    is_alarm_active,
+)
+
+
+def test_is_alarm_active():
+    """Active states count unless the alarm has an end time."""
+    assert is_alarm_active({"alarmState": "1"})
+    assert is_alarm_active({"alarmstate": 0})
+    assert not is_alarm_active({"alarmState": "1", "endTime": "2024-01-01"})
+    assert not is_alarm_active({"alarmState": "3"})
+    assert not is_alarm_active({})
+
+
+def test_upsert_tracks_active_count_incrementally():
+    """Upserts replace by alarmCode and keep the active count in step."""
+    store = HyxiAlarmStore()
+    store.upsert({"alarmCode": "768", "alarmState": "1"}, now=0)
+    store.upsert({"alarmCode": "769", "alarmState": "2"}, now=0)
+    assert store.active_count == 2
+
+    store.upsert({"alarmCode": "768", "alarmState": "1", "endTime": "x"}, now=1)
+    assert store.active_count == 1
+    assert len(store) == 2
+
+    store.upsert({"alarmCode": "768", "alarmState": "1"}, now=2)
+    assert store.active_count == 2
+
+
+def test_records_without_code_are_kept_separately():
+    """Records lacking an alarmCode must not collapse onto one key."""
+    store = HyxiAlarmStore()
+    store.replace_all([{"alarmState": "1"}, {"alarmState": "2"}], now=0)
+    assert len(store) == 2
+    assert store.active_count == 2
+
+
+def test_cleared_alarms_expire_after_ttl():
+    """Cleared records are evicted after the TTL; active ones never are."""
+    store = HyxiAlarmStore(ttl=60, max_cleared=10)
+    store.upsert({"alarmCode": "1", "alarmState": "1"}, now=0)
+    store.upsert({"alarmCode": "2", "alarmState": "1", "endTime": "x"}, now=0)
+
+    store.evict(now=30)
+    assert len(store) == 2
+
+    store.evict(now=61)
+    assert [r["alarmCode"] for r in store.records()] == ["1"]
+    assert store.active_count == 1
+
+
+def test_cleared_alarms_capped():
+    """Only the most recently cleared records survive past the cap."""
+    store = HyxiAlarmStore(ttl=3600, max_cleared=2)
+    for i in range(5):
+        store.upsert({"alarmCode": str(i), "alarmState": "9"}, now=i)
+    store.evict(now=5)
+    assert [r["alarmCode"] for r in store.records()] == ["3", "4"]
+
+
+def test_records_view_is_cached_until_change():
+    """records() returns the same list until the store changes."""
+    store = HyxiAlarmStore()
+    store.upsert({"alarmCode": "1", "alarmState": "1"}, now=0)
+    view = store.records()
+    assert store.records() is view
+    store.upsert({"alarmCode": "2", "alarmState": "1"}, now=0)
+    assert store.records() is not view
+
+
+def test_get_alarm_store_resyncs_on_replaced_list():
+    """A list swapped in from outside (a poll) reseeds the store."""
+    dev_data = {"alarms": [{"alarmCode": "1", "alarmState": "1"}]}
+    store = get_alarm_store(dev_data)
+    assert store.active_count == 1
+    assert dev_data["alarms"] is store.records()
+
+    assert get_alarm_store(dev_data) is store
+
+    dev_data["alarms"] = []
+    assert get_alarm_store(dev_data).active_count == 0
+
+
+def test_get_alarm_store_without_alarms_key():
+    """Devices without alarms get an empty store and no alarms key."""
+    dev_data = {"metrics": {}}
+    store = get_alarm_store(dev_data)
+    assert store.active_count == 0
+    assert "alarms" not in dev_data
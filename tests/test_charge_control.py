@@ -0,0 +1,65 @@
+"""Tests for the PI charge power controller."""
+
+import pytest
+
+from custom_components.hyxi_cloud.charge_control import (
+    KI,
+    KP,
+    MAX_DT,
+    quantize,
+    track_p1,
+)
+
+
+def test_feed_forward_and_gains():
+    """Output is feed-forward plus KP and KI on the P1 error, quantized."""
+    out = track_p1(-50, 150, 2000, 0.0, 10, low=100, high=5000, step=1)
+    assert out.integral == pytest.approx(KI * -200 * 10)
+    assert out.power == round(2000 + KP * -200 + out.integral)
+    assert out.saturated == 0
+
+    # Quantized to the power change threshold
+    out = track_p1(-50, 150, 2000, 0.0, 10, low=100, high=5000, step=100)
+    # 2000 - 20 - 10 = 1970
+    assert out.power == 2000
+    assert quantize(1949, 100) == 1900
+    assert quantize(1949, 0) == 1949
+
+
+def test_integral_is_clipped_and_dt_bounded():
+    """A big error or a long gap does not kick the integral."""
+    small = track_p1(0, 200, 1000, 0.0, 10, low=100, high=5000, step=1)
+    big = track_p1(0, 2000, 1000, 0.0, 10, low=100, high=5000, step=1)
+    assert big.integral == small.integral
+    late = track_p1(0, 200, 1000, 0.0, 600, low=100, high=5000, step=1)
+    assert late.integral == pytest.approx(small.integral * MAX_DT / 10)
+
+
+def test_no_windup_into_a_clamp():
+    """At a clamp the integral only moves back out of it."""
+    out = track_p1(0, -1000, 4950, 0.0, 10, low=100, high=3000, step=100)
+    assert out.saturated == 1
+    assert out.power == 3000
+    assert out.integral == 0.0
+
+    out = track_p1(0, 800, 200, -50.0, 10, low=100, high=3000, step=100)
+    assert out.saturated == -1
+    assert out.power == 100
+    assert out.integral == -50.0
+
+    # Error pointing out of the clamp still integrates
+    out = track_p1(0, 100, 4000, 0.0, 10, low=100, high=3000, step=100)
+    assert out.saturated == 1
+    assert out.integral < 0
+
+
+def test_holds_within_a_step_and_rests_near_the_setpoint():
+    """The current power is kept until the output is a full step away."""
+    out = track_p1(-50, -50, 1660, 0.0, 15, low=100, high=5000, step=100)
+    assert out.power == 1700
+    out = track_p1(-50, -50, 1660, 0.0, 15, low=100, high=5000, step=100, current=1600)
+    assert out.power == 1600
+
+    # Within half a step of the setpoint the integral does not move
+    out = track_p1(-50, -20, 1600, 12.0, 15, low=100, high=5000, step=100)
+    assert out.integral == 12.0
@@ -0,0 +1,98 @@
+"""Tests for the control command budget."""
+
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.hyxi_cloud.command_budget import CommandBudget, Quota
+from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+
+
+def _budget() -> CommandBudget:
+    """A budget of 4 per SN (one per 10 s) and 6 per account, reserve 1."""
+    return CommandBudget(
+        sn_quota=Quota(burst=4, per_hour=360),
+        account_quota=Quota(burst=6, per_hour=3600),
+        reserve=1,
+    )
+
+
+def test_ordinary_commands_leave_the_reserve():
+    """A burst spends down to the reserve; the bucket then refills."""
+    budget = _budget()
+    assert budget.available("SN1", 0) == 3
+    assert [budget.acquire("SN1", 0) for _ in range(4)] == [True, True, True, False]
+    assert budget.available("SN1", 0) == 0
+    assert budget.retry_after("SN1", 0) == pytest.approx(10)
+    assert not budget.acquire("SN1", 9)
+    assert budget.acquire("SN1", 10)
+    assert budget.refused == {"SN1": 2}
+    assert budget.granted == {"SN1": 4}
+
+
+def test_account_bucket_is_shared():
+    """Inverters with budget left still wait for the account's."""
+    budget = _budget()
+    for _ in range(3):
+        assert budget.acquire("SN1", 0)
+    assert budget.acquire("SN2", 0)
+    assert budget.acquire("SN2", 0)
+    # SN2 has 2 left, but the account only its reserve
+    assert budget.available("SN2", 0) == 0
+    assert not budget.acquire("SN2", 0)
+    assert budget.acquire("SN2", 1)
+
+
+def test_priority_commands_are_never_refused():
+    """Priority commands take the reserve, then overdraw the buckets."""
+    budget = _budget()
+    for _ in range(3):
+        budget.acquire("SN1", 0)
+    assert budget.acquire("SN1", 0, priority=True)
+    assert budget.overdrawn == 0
+    assert budget.acquire("SN1", 0, priority=True)
+    assert budget.overdrawn == 1
+    # The overdraft delays ordinary commands until it is paid back
+    assert budget.retry_after("SN1", 0) == pytest.approx(30)
+    assert budget.usage("SN1", 0) == {
+        "tokens": -1.0,
+        "account_tokens": 1.0,
+        "retry_after_s": 30.0,
+        "granted": 5,
+        "refused": 0,
+    }
+    assert budget.as_diagnostics(0, str.lower) == {
+        "account_tokens": 1.0,
+        "overdrawn": 1,
+        "inverters": {"sn1": {"tokens": -1.0, "granted": 5, "refused": 0}},
+    }
+
+
+async def test_engine_holds_commands_while_throttled():
+    """A throttled engine sends nothing and warns once, not every tick."""
+    coordinator = MagicMock()
+    coordinator.entry.options = {}
+    coordinator.command_budget = _budget()
+    coordinator.client = AsyncMock()
+    engine = EnergyManagerEngine(
+        MagicMock(), coordinator, EMEntityConfig(sn="SN1", p1_entity="sensor.p1")
+    )
+    now = time.monotonic()
+    for _ in range(3):
+        coordinator.command_budget.acquire("SN1", now)
+    assert engine.command_budget == 0
+
+    engine._get_param = MagicMock(return_value=0)
+    assert await engine._set_mode("idle") is False
+    assert await engine._set_peak_shaving("stop") is False
+    coordinator.client.set_mode_idle.assert_not_awaited()
+    coordinator.client.set_peak_shaving.assert_not_awaited()
+    assert engine._throttled
+    assert engine.command_budget_usage["refused"] == 2
+
+    # Refilled: the next command goes out
+    with patch("time.monotonic", return_value=now + 60):
+        assert await engine._set_mode("idle") is True
+    coordinator.client.set_mode_idle.assert_awaited_once_with("SN1")
+    assert not engine._throttled
@@ -1079,3 +1079,72 @@ async def test_async_step_energy_manager_keeps_existing_sn_selection(
     args, _kwargs = mock_build_schema.call_args
     assert sorted(args[1]) == ["SN_A", "SN_B"]
     assert args[2] == "SN_B"
+
+
+@pytest.mark.asyncio
+async def test_options_flow_write_throttle_step(mock_ha_environment):
+    """Enabling write throttling routes to its step, which saves the bands."""
+    import custom_components.hyxi_cloud.config_flow as config_flow_mod
+
+    config_entry = MagicMock()
+    config_entry.options = {}
+    options_flow = config_flow_mod.HyxiOptionsFlowHandler(config_entry)
+    options_flow.async_show_form = MagicMock(return_value={"type": "form"})
+    options_flow.async_create_entry = MagicMock(return_value={"type": "create_entry"})
+
+    user_input = {"update_interval": 5, config_flow_mod.CONF_WRITE_THROTTLE: True}
+    await options_flow.async_step_init(user_input=user_input)
+    assert options_flow.async_show_form.call_args.kwargs["step_id"] == "write_throttle"
+
+    result = await options_flow.async_step_write_throttle(
+        user_input={config_flow_mod.CONF_THROTTLE_POWER_DEADBAND: 25.0}
+    )
+    assert result["type"] == "create_entry"
+    saved = options_flow.async_create_entry.call_args.kwargs["data"]
+    assert saved[config_flow_mod.CONF_WRITE_THROTTLE] is True
+    assert saved[config_flow_mod.CONF_THROTTLE_POWER_DEADBAND] == 25.0
+
+
+@pytest.mark.asyncio
+async def test_options_flow_disabling_write_throttle_drops_bands(mock_ha_environment):
+    import custom_components.hyxi_cloud.config_flow as config_flow_mod
+
+    config_entry = MagicMock()
+    config_entry.options = {
+        config_flow_mod.CONF_WRITE_THROTTLE: True,
+        config_flow_mod.CONF_THROTTLE_POWER_DEADBAND: 25.0,
+    }
+    options_flow = config_flow_mod.HyxiOptionsFlowHandler(config_entry)
+    options_flow.async_create_entry = MagicMock(return_value={"type": "create_entry"})
+
+    user_input = {"update_interval": 5, config_flow_mod.CONF_WRITE_THROTTLE: False}
+    await options_flow.async_step_init(user_input=user_input)
+
+    saved = options_flow.async_create_entry.call_args.kwargs["data"]
+    assert config_flow_mod.CONF_THROTTLE_POWER_DEADBAND not in saved
+
+
+@pytest.mark.asyncio
+async def test_options_flow_saves_push_downsample(mock_ha_environment):
+    """The downsampling bucket is saved as int and dropped with push."""
+    import custom_components.hyxi_cloud.config_flow as config_flow_mod
+
+    config_entry = MagicMock()
+    config_entry.options = {config_flow_mod.CONF_ENABLE_PUSH: True}
+    options_flow = config_flow_mod.HyxiOptionsFlowHandler(config_entry)
+    options_flow.async_create_entry = MagicMock(return_value={"type": "create_entry"})
+
+    user_input = {
+        "update_interval": 5,
+        config_flow_mod.CONF_ENABLE_PUSH: True,
+        config_flow_mod.CONF_PUSH_RATE: "10",
+        config_flow_mod.CONF_PUSH_DOWNSAMPLE: "60",
+    }
+    await options_flow.async_step_init(user_input=user_input)
+    saved = options_flow.async_create_entry.call_args.kwargs["data"]
+    assert saved[config_flow_mod.CONF_PUSH_DOWNSAMPLE] == 60
+
+    user_input[config_flow_mod.CONF_ENABLE_PUSH] = False
+    await options_flow.async_step_init(user_input=user_input)
+    saved = options_flow.async_create_entry.call_args.kwargs["data"]
+    assert config_flow_mod.CONF_PUSH_DOWNSAMPLE not in saved
@@ -353,6 +353,12 @@ def test_mask_sensitive_key_value():
     assert mask_sensitive_key_value("sn", 12345) == mask_sn("12345")
 
 
+def test_mask_sensitive_key_value_masks_secrets():
+    """Credential keys are masked too, regardless of case."""
+    assert mask_sensitive_key_value("access_token", "tok") == mask_sn("tok")
+    assert mask_sensitive_key_value("Password", "pw") == mask_sn("pw")
+
+
 def test_resolve_base_url():
     """Verify each region resolves to its documented HYXI Cloud server."""
     assert resolve_base_url("eu") == BASE_URL_DEFAULT
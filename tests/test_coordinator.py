@@ -40,6 +40,7 @@ class DummyDataUpdateCoordinator:
     def __init__(self, hass, logger, name, update_interval, config_entry=None):  # pylint: disable=unused-argument,too-many-arguments,too-many-positional-arguments
         self.hass = hass
         self.data = {}
+        self.last_update_success = True
 
 
 class DummyUpdateFailed(Exception):
@@ -297,8 +298,14 @@ async def test_async_sync_device_metadata_with_change():
                 "hw_version": "V1",
             }
         }
+        stale = coordinator.device_infos.get("SN123", {"model": "Generic Model"}, {})
         await coordinator._async_sync_device_metadata(devices)
 
+        # The sensors' shared device info is rebuilt with the new model
+        fresh = coordinator.device_infos.get("SN123", devices["SN123"], {})
+        assert fresh is not stale
+        assert fresh["model"] == "HYX-H9K-HTA"
+
         mock_dev_reg.async_update_device.assert_called_once_with(
             "device_id",
             model="HYX-H9K-HTA",
@@ -404,6 +411,73 @@ async def test_async_update_data_merge_existing_metrics():
     )
 
 
+@pytest.mark.asyncio
+async def test_async_update_data_keeps_newer_pushed_metrics():
+    """A pushed value newer than the poll's collectTime survives the poll."""
+    mock_entry = MagicMock()
+    mock_entry.options = {"update_interval": 5}
+    mock_client = MagicMock()
+    mock_client.get_all_device_data = AsyncMock(
+        return_value={
+            "data": {
+                "SN123": {
+                    "device_type_code": "1",
+                    "metrics": {"collectTime": 1000, "acP": 100, "batSoc": 50},
+                }
+            },
+            "attempts": 1,
+        }
+    )
+    mock_client.compute_derived_metrics.return_value = {}
+
+    coordinator = hc_coord.HyxiDataUpdateCoordinator(
+        MagicMock(), mock_client, mock_entry
+    )
+    coordinator.data = {"SN123": {"metrics": {"acP": 10, "batSoc": 40}}}
+    with patch.object(hc_coord.time, "time", return_value=2000):
+        coordinator.record_push(
+            "SN123", {"acP": 10, "batSoc": 40}, {"acP": 500, "batSoc": 40}
+        )
+    coordinator.data["SN123"]["metrics"] = {"acP": 500, "batSoc": 40}
+
+    result = await coordinator._async_update_data()
+
+    metrics = result["SN123"]["metrics"]
+    assert metrics["acP"] == 500  # pushed at t=2000, poll sampled at t=1000
+    assert metrics["batSoc"] == 50  # never pushed (unchanged), poll wins
+    assert "SN123" not in coordinator.poll_unchanged
+
+
+@pytest.mark.asyncio
+async def test_async_update_data_flags_devices_with_nothing_newer():
+    """A poll that brings nothing newer reuses the metrics dict and skips derivation."""
+    mock_entry = MagicMock()
+    mock_entry.options = {"update_interval": 5}
+    mock_client = MagicMock()
+    mock_client.get_all_device_data = AsyncMock(
+        return_value={
+            "data": {"SN123": {"metrics": {"acP": 100, "batSoc": None}}},
+            "attempts": 1,
+        }
+    )
+
+    coordinator = hc_coord.HyxiDataUpdateCoordinator(
+        MagicMock(), mock_client, mock_entry
+    )
+    old_metrics = {"acP": 100, "batSoc": 40}
+    coordinator.data = {"SN123": {"metrics": old_metrics}}
+
+    result = await coordinator._async_update_data()
+
+    assert result["SN123"]["metrics"] is old_metrics
+    assert coordinator.poll_unchanged == {"SN123"}
+    mock_client.compute_derived_metrics.assert_not_called()
+
+    # A push for the device clears the flag again.
+    coordinator.record_push("SN123", old_metrics, {"acP": 200, "batSoc": 40})
+    assert coordinator.poll_unchanged == set()
+
+
 def test_is_cache_expired_none():
     """A missing cache payload is treated as expired."""
     assert hc_coord._is_cache_expired(None) is True  # pylint: disable=protected-access
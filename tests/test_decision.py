@@ -0,0 +1,388 @@
+"""Tests for the pure Energy Manager decision kernel."""
+
+import dataclasses
+import random
+
+from custom_components.hyxi_cloud.decision import (
+    Command,
+    DecisionCounters,
+    DecisionParams,
+    DecisionState,
+    SolarConfig,
+    decide,
+    solar_entry,
+    solar_tune,
+)
+
+NOW = 10_000.0
+
+PARAMS = DecisionParams(
+    battery_capacity_wh=10000,
+    high_load_threshold=6500,
+    max_grid_export=500,
+    min_solar_for_charge=1000,
+    charge_margin=150,
+    charge_entry_threshold=500,
+    charge_reentry_delay=90,  # readings_needed = 2
+    bottomout_cooldown=300,
+)
+
+SOLAR = SolarConfig(
+    min_solar_for_charge=1000,
+    charge_margin=150,
+    charge_entry_threshold=500,
+    readings_needed=2,
+    sunset_urgent=False,
+)
+
+
+def _state(**kwargs) -> DecisionState:
+    values = {
+        "soc": 50,
+        "solar": 0,
+        "p1": 0,
+        "home_load": 0,
+        "soc_min": 20,
+        "soc_max": 90,
+        "max_charge": 2000,
+        "max_discharge": 2000,
+        "is_night": False,
+        "night_soc_target": 30,
+    } | kwargs
+    values.setdefault("solar_producing", values["solar"] > 50)
+    return DecisionState(**values)
+
+
+def _params(**kwargs) -> DecisionParams:
+    return dataclasses.replace(PARAMS, **kwargs)
+
+
+def test_decide_is_pure():
+    """The same inputs give the same decision and nothing is mutated."""
+    s = _state(soc=50, solar=1500, p1=-800, current_mode="self_consume")
+    counters = DecisionCounters(charge_entry_export_count=1)
+    first = decide(s, PARAMS, counters, NOW)
+    assert decide(s, PARAMS, counters, NOW) == first
+    assert counters.charge_entry_export_count == 1
+    assert first.label == "solar_charge"
+    assert first.commands == (Command("set_mode", "charge", 550),)
+
+
+def test_soc_limits_switch_or_adjust():
+    """Emergency and forced discharge retune when already in the mode."""
+    s = _state(soc=15, solar=1000, p1=-100, current_mode="charge")
+    decision = decide(s, PARAMS, DecisionCounters(), NOW)
+    assert decision.label == "emergency_solar_charge"
+    assert decision.commands == (Command("adjust_power", "charge", 1050),)
+
+    s = _state(soc=15, current_mode="idle")
+    decision = decide(s, _params(grid_charge_allowed=True), DecisionCounters(), NOW)
+    assert decision.label == "grid_charge_emergency"
+    assert decision.commands == (Command("set_mode", "charge", 2000),)
+
+    decision = decide(
+        _state(soc=15, current_mode="idle"), PARAMS, DecisionCounters(), NOW
+    )
+    assert decision.label == "low_soc_idle"
+    assert decision.commands == ()
+
+    s = _state(soc=95, p1=500, current_mode="discharge")
+    decision = decide(s, PARAMS, DecisionCounters(), NOW)
+    assert decision.label == "forced_discharge_over_max"
+    assert decision.commands == (Command("adjust_power", "discharge", 1000),)
+
+
+def test_export_limit_branches():
+    """Every outcome of the single-phase export limiting priority."""
+    limiting = _params(peak_shaving=True, export_limiting=True)
+    counters = DecisionCounters()
+
+    # No peak shaving support: export limiting never applies
+    s = _state(soc=50, solar=1000, p1=-2000, current_mode="self_consume")
+    decision = decide(s, _params(export_limiting=True), counters, NOW)
+    assert decision.label == "solar_export_waiting"
+
+    # Switched off (or unlimited) while curtailed: resume, then carry on
+    unlimited = dataclasses.replace(limiting, max_grid_export=0)
+    for params in (_params(peak_shaving=True), unlimited):
+        s = _state(pv_curtailed=True, current_mode="self_consume")
+        decision = decide(s, params, counters, NOW)
+        assert decision.label == "idle_default"
+        assert decision.commands == (Command("release_pv"),)
+
+    # Over the limit with room in the battery: release and charge
+    s = _state(soc=50, solar=1000, p1=-2000, pv_curtailed=True, current_mode="idle")
+    decision = decide(s, limiting, counters, NOW)
+    assert decision.label == "export_limit_charge"
+    assert decision.commands == (
+        Command("release_pv"),
+        Command("set_mode", "charge", 1500),
+    )
+
+    # Over the limit with a full battery: curtail once
+    s = _state(soc=90, solar=1000, p1=-2000)
+    assert decide(s, limiting, counters, NOW).commands == (Command("curtail_pv"),)
+    s = _state(soc=90, solar=1000, p1=-2000, pv_curtailed=True)
+    decision = decide(s, limiting, counters, NOW)
+    assert decision.label == "export_limit_pv_curtail"
+    assert decision.commands == ()
+
+    # Back within the limit
+    s = _state(p1=100, pv_curtailed=True)
+    assert decide(s, limiting, counters, NOW).label == "export_limit_pv_resume"
+    s = _state(p1=100, current_mode="charge", last_decision="export_limit_charge")
+    decision = decide(s, limiting, counters, NOW)
+    assert decision.label == "export_limit_ok"
+    assert decision.commands == (Command("set_mode", "self_consume"),)
+
+
+def test_high_load_and_night():
+    """High load assist, the night priorities and daytime preservation."""
+    assist = _params(high_load_assist=True)
+    s = _state(soc=80, home_load=8000)
+    assert decide(s, assist, DecisionCounters(), NOW).label == (
+        "high_load_battery_assist"
+    )
+    s = _state(soc=30, home_load=8000)
+    assert decide(s, assist, DecisionCounters(), NOW).label == "high_load_grid_only"
+    s = _state(soc=80, home_load=100)
+    assert decide(s, assist, DecisionCounters(), NOW).label == "idle_default"
+
+    night = _params(night_mode=True)
+    s = _state(soc=25, p1=200, p1_avg=500, solar_covers_night=False)
+    decision = decide(s, night, DecisionCounters(), NOW)
+    assert decision.label == "night_preserve_idle"
+    assert decision.commands == (Command("set_mode", "idle"),)
+    s = _state(soc=25, p1=200, p1_avg=500, solar_covers_night=True)
+    assert decide(s, night, DecisionCounters(), NOW).label == "idle_default"
+    s = _state(soc=50, is_night=True, current_mode="self_consume")
+    decision = decide(s, night, DecisionCounters(), NOW)
+    assert decision.label == "night_self_consume"
+    assert decision.commands == ()
+
+
+def test_solar_entry_counts_readings():
+    """Sustained export is counted before switching to charge."""
+    s = _state(soc=50, solar=1500, p1=-600, current_mode="discharge")
+    waiting = solar_entry(s, SOLAR, DecisionCounters(), NOW)
+    assert waiting.label == "solar_export_waiting"
+    assert waiting.counters.charge_entry_export_count == 1
+    assert waiting.commands == (Command("set_mode", "self_consume"),)
+
+    entered = solar_entry(s, SOLAR, waiting.counters, NOW + 15)
+    assert entered.label == "solar_charge"
+    assert entered.commands == (Command("set_mode", "charge", 350),)
+    assert entered.counters.charge_entry_export_count == 0
+    # Refused (cooldown): keep the count so the next tick retries
+    assert entered.counters_if_refused.charge_entry_export_count == 2
+
+    for s in (_state(solar=50, p1=-600), _state(solar=1500, p1=0)):
+        decision = solar_entry(s, SOLAR, DecisionCounters(5), NOW)
+        assert decision.label == "solar_self_consume"
+        assert decision.counters.charge_entry_export_count == 0
+
+
+def test_solar_config_bottomout_and_sunset():
+    """A recent bottomout doubles the readings; sunset urgency halves them."""
+    s = _state(soc=50, solar=1500, p1=-600, current_mode="idle")
+    recent = DecisionCounters(charge_entry_export_count=2, last_bottomout_exit=NOW - 10)
+    assert decide(s, PARAMS, recent, NOW).label == "solar_export_waiting"
+    assert decide(s, PARAMS, recent, NOW + 300).label == "solar_charge"
+
+    urgent = _state(
+        soc=50,
+        solar=900,
+        p1=-300,
+        night_soc_target=60,
+        hours_to_sunset=2.0,
+        solar_covers_night=False,
+        current_mode="idle",
+    )
+    decision = decide(urgent, PARAMS, DecisionCounters(), NOW)
+    assert decision.label == "pre_night_charge"
+
+
+def test_solar_tune_branches():
+    """Exit, balanced, increase and reduce while already charging."""
+    s = _state(solar=100, current_mode="charge")
+    decision = solar_tune(s, SOLAR, DecisionCounters(2, 3), NOW)
+    assert decision.label == "solar_self_consume"
+    assert decision.counters == DecisionCounters(0, 0, NOW, -999999.0)
+
+    s = _state(solar=1500, p1=0, current_mode="charge")
+    decision = solar_tune(s, SOLAR, DecisionCounters(0, 3), NOW)
+    assert decision.commands == ()
+    assert decision.counters.charge_bottomout_count == 2
+
+    s = _state(solar=1500, p1=-800, charge_power=500, current_mode="charge")
+    decision = solar_tune(s, SOLAR, DecisionCounters(), NOW)
+    assert decision.commands == (Command("adjust_power", "charge", 1150),)
+
+    s = _state(solar=1500, p1=200, charge_power=1000, current_mode="charge")
+    decision = solar_tune(s, SOLAR, DecisionCounters(0, 3), NOW)
+    assert decision.commands == (Command("adjust_power", "charge", 650),)
+    assert decision.counters.charge_bottomout_count == 0
+
+    s = _state(solar=1500, p1=500, charge_power=150, current_mode="charge")
+    decision = solar_tune(s, SOLAR, DecisionCounters(0, 3), NOW)
+    assert decision.label == "solar_charge_reduced"
+    assert decision.counters.charge_bottomout_count == 4
+    decision = solar_tune(s, SOLAR, decision.counters, NOW + 15)
+    assert decision.label == "solar_self_consume"
+    assert decision.counters == DecisionCounters(0, 0, NOW + 15, NOW + 15)
+
+
+def test_decide_never_charges_over_limits():
+    """Random states: power stays within the battery's limits."""
+    rng = random.Random(41)  # noqa: S311
+    modes = (None, "self_consume", "idle", "charge", "discharge")
+    params = _params(
+        peak_shaving=True, export_limiting=True, high_load_assist=True, night_mode=True
+    )
+    counters = DecisionCounters()
+    for _ in range(2000):
+        max_charge = rng.uniform(300, 5000)
+        s = _state(
+            soc=rng.uniform(0, 100),
+            solar=rng.uniform(0, 6000),
+            p1=rng.uniform(-5000, 5000),
+            home_load=rng.uniform(0, 9000),
+            max_charge=max_charge,
+            max_discharge=rng.uniform(1000, 5000),
+            is_night=rng.random() < 0.3,
+            charge_power=rng.uniform(0, max_charge),
+            pv_curtailed=rng.random() < 0.2,
+            current_mode=rng.choice(modes),
+        )
+        decision = decide(s, params, counters, NOW)
+        counters = decision.counters
+        for command in decision.commands:
+            if command.target == "charge":
+                assert 100 <= command.power <= max_charge
+            elif command.target == "discharge":
+                assert command.power <= s.max_discharge
+
+
+def test_planned_power_steers_preservation_and_charge_entry():
+    """A day-ahead plan replaces the forecast flag and sets the entry power."""
+    night = _params(night_mode=True)
+    s = _state(soc=25, p1=200, p1_avg=500, solar_covers_night=False)
+    assert decide(s, night, DecisionCounters(), NOW).label == "night_preserve_idle"
+    s.planned_power = -300
+    assert decide(s, night, DecisionCounters(), NOW).label == "idle_default"
+    s.planned_power = 0
+    assert decide(s, night, DecisionCounters(), NOW).label == "night_preserve_idle"
+
+    s = _state(soc=50, solar=3000, p1=-800, current_mode="idle", planned_power=1800)
+    decision = solar_entry(s, SOLAR, DecisionCounters(1), NOW)
+    assert decision.commands == (Command("set_mode", "charge", 1800),)
+    s.planned_power = 200
+    decision = solar_entry(s, SOLAR, DecisionCounters(1), NOW)
+    assert decision.commands == (Command("set_mode", "charge", 550),)
+
+
+def test_pi_charge_control_tracks_the_setpoint():
+    """PI mode follows the feed-forward and keeps its integral."""
+    params = _params(pi_charge_control=True, p1_setpoint=-50)
+    s = _state(
+        solar=3000,
+        home_load=800,
+        p1=-600,
+        p1_avg=-50,
+        current_mode="charge",
+        charge_power=1500,
+    )
+    # Feed-forward: 3000 - 800 - 50, capped at max charge
+    decision = decide(s, params, DecisionCounters(), NOW)
+    assert decision.label == "solar_charge"
+    assert decision.commands == (Command("adjust_power", "charge", 2000),)
+    assert decision.counters.last_charge_tune == NOW
+    assert decision.counters_if_refused.charge_integral == 0.0
+
+    # On the setpoint, inside one threshold: nothing to send
+    s = dataclasses.replace(s, home_load=1200, charge_power=1800)
+    decision = decide(s, params, decision.counters, NOW + 15)
+    assert decision.commands == ()
+    assert decision.counters.last_charge_tune == NOW + 15
+
+
+def test_pi_charge_control_bottoms_out():
+    """Importing at the 100W floor exits after five ticks, as step mode."""
+    params = _params(pi_charge_control=True)
+    s = _state(
+        solar=1200,
+        home_load=1500,
+        p1=600,
+        p1_avg=600,
+        current_mode="charge",
+        charge_power=100,
+    )
+    counters = DecisionCounters()
+    for tick in range(4):
+        decision = decide(s, params, counters, NOW + tick * 15)
+        assert decision.label == "solar_charge_reduced"
+        assert decision.commands == ()
+        counters = decision.counters
+    decision = decide(s, params, counters, NOW + 60)
+    assert decision.label == "solar_self_consume"
+    assert decision.commands == (Command("set_mode", "self_consume"),)
+    assert decision.counters.last_bottomout_exit == NOW + 60
+
+
+def test_pi_charge_control_settles_on_one_step():
+    """Against a plant between two steps, PI mode settles instead of cycling.
+
+    The home load reads 80W low, so the ideal charge power is 1580W:
+    not on the 100W grid, but one step from the 1500W it starts at.
+    """
+    params = _params(pi_charge_control=True, p1_setpoint=-50)
+    counters = DecisionCounters()
+    charge = 1500
+    history = []
+    for tick in range(120):
+        p1 = 1370 - 3000 + charge
+        s = _state(
+            solar=3000,
+            home_load=1290,
+            p1=p1,
+            p1_avg=p1,
+            max_charge=5000,
+            current_mode="charge",
+            charge_power=charge,
+        )
+        decision = decide(s, params, counters, NOW + tick * 15)
+        counters = decision.counters
+        for command in decision.commands:
+            # PI adjustments are on the threshold grid: the engine resends
+            # a change of one full step
+            assert decision.exact_step
+            if abs(command.power - charge) >= params.power_change_threshold:
+                charge = command.power
+        history.append(charge)
+    assert set(history[20:]) == {1600}
+
+
+def test_event_decisions_do_not_shorten_the_entry_delay():
+    """Decisions every 5s count export no faster than the 15s loop did."""
+    params = _params(charge_reentry_delay=300)  # 6 readings
+    s = _state(soc=50, solar=3000, p1=-1000, current_mode="self_consume")
+    counters = DecisionCounters()
+    for step in range(60):
+        now = NOW + step * 5
+        decision = decide(s, params, counters, now)
+        if decision.label == "solar_charge":
+            break
+        counters = decision.counters
+    # Six readings 15s apart: the first at NOW, the sixth 75s later
+    assert now - NOW == 75
+
+    # The same holds for the bottomout exit while charging
+    s = _state(solar=1500, p1=500, charge_power=150, current_mode="charge")
+    counters = DecisionCounters()
+    for step in range(60):
+        now = NOW + step * 5
+        decision = decide(s, params, counters, now)
+        if decision.label == "solar_self_consume":
+            break
+        counters = decision.counters
+    assert now - NOW == 60
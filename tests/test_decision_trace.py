@@ -0,0 +1,144 @@
+"""Tests for the Energy Manager decision trace."""
+
+import dataclasses
+
+import pytest
+
+from custom_components.hyxi_cloud.decision import (
+    Command,
+    DecisionCounters,
+    DecisionParams,
+    DecisionState,
+    decide,
+)
+from custom_components.hyxi_cloud.decision_trace import (
+    COLUMNS,
+    DecisionTrace,
+    csv_lines,
+    decode_commands,
+    encode_commands,
+    ndjson_lines,
+    parse_record,
+    read_rows,
+    write_rows,
+)
+
+PARAMS = DecisionParams(
+    battery_capacity_wh=10000,
+    high_load_threshold=6500,
+    max_grid_export=3000,
+    min_solar_for_charge=1000,
+    charge_margin=150,
+    charge_entry_threshold=500,
+    charge_reentry_delay=300,
+    bottomout_cooldown=300,
+    export_limiting=True,
+    night_mode=True,
+)
+
+
+def _state(**changes) -> DecisionState:
+    state = DecisionState(
+        soc=55,
+        solar=4200,
+        p1=-900,
+        home_load=600,
+        soc_min=20,
+        soc_max=90,
+        max_charge=5000,
+        max_discharge=5000,
+        is_night=False,
+        solar_producing=True,
+        night_soc_target=40,
+    )
+    return dataclasses.replace(state, **changes)
+
+
+def _trace(states, size=8) -> DecisionTrace:
+    """A trace of real kernel decisions on states."""
+    trace = DecisionTrace(size=size)
+    counters = DecisionCounters()
+    for tick, state in enumerate(states):
+        now = 1000.0 + 15 * tick
+        result = decide(state, PARAMS, counters, now)
+        trace.record(state, PARAMS, counters, now, result, sent=bool(result.commands))
+        counters = result.counters
+    return trace
+
+
+def test_ring_keeps_the_last_decisions_oldest_first():
+    """Past its size the trace drops the oldest records."""
+    trace = _trace([_state(soc=soc) for soc in (30, 40, 50, 60, 70)], size=3)
+    assert len(trace) == 3
+    assert trace.recorded == 5
+    rows = list(trace.rows())
+    assert [row["soc"] for row in rows] == [50, 60, 70]
+    assert list(rows[0]) == list(COLUMNS)
+    assert trace.as_diagnostics()["size"] == 3
+
+
+def test_commands_round_trip_as_text():
+    """Commands survive encoding, with and without target and power."""
+    commands = (
+        Command("release_pv"),
+        Command("set_mode", "charge", 1500),
+        Command("set_mode", "idle"),
+    )
+    text = encode_commands(commands)
+    assert text == "release_pv|set_mode:charge:1500|set_mode:idle"
+    assert decode_commands(text) == commands
+    assert decode_commands("") == ()
+
+
+@pytest.mark.parametrize("lines", [ndjson_lines, csv_lines])
+def test_exported_rows_replay_to_the_same_decision(lines):
+    """NDJSON and CSV read back into the kernel's exact inputs."""
+    states = [
+        _state(),
+        _state(planned_power=-400.0, current_mode="charge", last_decision="x"),
+        _state(soc=15, solar=0, p1=800, is_night=True, solar_producing=False),
+    ]
+    trace = _trace(states)
+    trace.record(
+        states[0],
+        PARAMS,
+        DecisionCounters(),
+        0.0,
+        decide(states[0], PARAMS, DecisionCounters(), 0.0),
+        sent=True,
+        latency=0.25,
+    )
+
+    rows = list(read_rows(lines(trace.rows())))
+    assert len(rows) == 4
+    for row, state in zip(rows, [*states, states[0]], strict=True):
+        case = parse_record(row)
+        assert case.state == state
+        assert case.params == PARAMS
+        replayed = decide(case.state, case.params, case.counters, case.now)
+        assert (replayed.label, replayed.commands) == (case.decision, case.commands)
+    assert parse_record(rows[1]).state.planned_power == -400.0
+    assert rows[-1]["latency_ms"] in (250.0, "250.0")
+
+
+def test_write_rows_streams_a_file(tmp_path):
+    """Files written for the export read back; an empty trace is a header."""
+    trace = _trace([_state(), _state(soc=70)])
+    path = tmp_path / "trace.csv"
+    write_rows(str(path), trace.rows(), "csv")
+    with path.open(encoding="utf-8", newline="") as file:
+        assert [row["soc"] for row in read_rows(file)] == ["55.0", "70.0"]
+
+    empty = tmp_path / "empty.csv"
+    write_rows(str(empty), DecisionTrace().rows(), "csv")
+    assert empty.read_text(encoding="utf-8").startswith("time,decision,commands,")
+    assert list(read_rows([])) == []
+
+
+def test_parse_record_rejects_a_row_without_inputs():
+    """A row missing a required input isn't a decision record."""
+    row = next(_trace([_state()]).rows())
+    with pytest.raises(KeyError):
+        parse_record({k: v for k, v in row.items() if k != "soc"})
+    with pytest.raises(ValueError):
+        parse_record({**row, "soc": ""})
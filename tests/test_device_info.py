@@ -0,0 +1,62 @@
+"""Tests for the shared device info cache."""
+
+from custom_components.hyxi_cloud.device_info import (
+    DeviceInfoCache,
+    build_device_info,
+)
+
+DEV_DATA = {
+    "device_name": "Roof",
+    "model": "HYX-H9K-HTA",
+    "sw_version": "V1.0",
+    "_sw_version_cached": "V1.0",
+    "hw_version": "H1",
+    "metrics": {"batSn": "BAT1", "parentSn": "COL1"},
+}
+
+
+def test_build_device_info_device_and_battery():
+    metrics = DEV_DATA["metrics"]
+    info = build_device_info("SN1", DEV_DATA, metrics)
+    assert info["identifiers"] == {("hyxi_cloud", "SN1")}
+    assert info["name"] == "Roof"
+    assert info["sw_version"] == "V1.0"
+    assert info["via_device"] == ("hyxi_cloud", "COL1")
+
+    battery = build_device_info("SN1", DEV_DATA, metrics, battery=True)
+    assert battery["identifiers"] == {("hyxi_cloud", "BAT1")}
+    assert battery["via_device"] == ("hyxi_cloud", "SN1")
+
+    # No batSn: battery sensors fall back to the device itself
+    bare = build_device_info("SN1", {}, {}, battery=True)
+    assert bare["name"] == "Device SN1"
+    assert "via_device" not in bare
+
+
+def test_cache_shares_one_object_per_device_and_battery():
+    cache = DeviceInfoCache()
+    metrics = DEV_DATA["metrics"]
+    info = cache.get("SN1", DEV_DATA, metrics)
+    assert cache.get("SN1", DEV_DATA, metrics) is info
+    battery = cache.get("SN1", DEV_DATA, metrics, battery=True)
+    assert battery is not info
+    assert cache.get("SN1", DEV_DATA, metrics, battery=True) is battery
+
+
+def test_refresh_drops_entries_only_on_metadata_change():
+    cache = DeviceInfoCache()
+    metrics = DEV_DATA["metrics"]
+    assert cache.refresh("SN1", DEV_DATA, "V1.0") is True  # First sight
+    info = cache.get("SN1", DEV_DATA, metrics)
+
+    # Same metadata (metric values may differ): the object survives
+    same = {**DEV_DATA, "metrics": {**metrics, "acP": 500}}
+    assert cache.refresh("SN1", same, "V1.0") is False
+    assert cache.get("SN1", same, same["metrics"]) is info
+
+    # Firmware update: rebuilt with the new version
+    updated = {**DEV_DATA, "_sw_version_cached": "V2.0"}
+    assert cache.refresh("SN1", updated, "V2.0") is True
+    rebuilt = cache.get("SN1", updated, metrics)
+    assert rebuilt is not info
+    assert rebuilt["sw_version"] == "V2.0"
@@ -0,0 +1,77 @@
+"""Tests for HYXI Cloud diagnostics."""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.hyxi_cloud.command_budget import CommandBudget
+from custom_components.hyxi_cloud.const import DOMAIN, mask_sn
+from custom_components.hyxi_cloud.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.hyxi_cloud.downsample import PushDownsampler
+from custom_components.hyxi_cloud.telemetry import TelemetryTrace
+from custom_components.hyxi_cloud.throttle import WriteThrottleStats
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_redacts_and_includes_trace():
+    """Credentials are redacted, SNs masked and the trace buffer included."""
+    trace = TelemetryTrace(enabled=True)
+    trace.record("poll", "SN123", {"acP": 100})
+
+    coordinator = MagicMock()
+    coordinator.data = {
+        "SN123": {
+            "model": "H5K-HT",
+            "device_type_code": "HYBRID_INVERTER",
+            "metrics": {"acP": 100, "batSoc": 50},
+            "alarms": [{"alarmCode": "1"}],
+        }
+    }
+    coordinator.hyxi_metadata = {"api_status": "Online"}
+    coordinator.telemetry = trace
+    coordinator.write_stats = WriteThrottleStats()
+    coordinator.write_stats.count("power", True)
+    coordinator.write_stats.count("power", False)
+    coordinator.downsampler = PushDownsampler(60)
+    coordinator.downsampler.add("SN123", {"acP": 100}, 0)
+    coordinator.downsampler.add("SN123", {"acP": 120}, 60)
+    coordinator.command_budget = CommandBudget()
+    coordinator.command_budget.acquire("SN123", time.monotonic())
+    coordinator.engine = None
+
+    entry = MagicMock()
+    entry.entry_id = "entry1"
+    entry.data = {"access_key": "ak", "secret_key": "sk", "region": "eu"}
+    entry.options = {"update_interval": 5, "realtime_push_url": "https://x"}
+
+    hass = MagicMock()
+    hass.data = {DOMAIN: {"entry1": coordinator}}
+
+    diag = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diag["entry"]["data"]["access_key"] == "**REDACTED**"
+    assert diag["entry"]["data"]["region"] == "eu"
+    assert diag["entry"]["options"]["realtime_push_url"] == "**REDACTED**"
+    assert diag["devices"][mask_sn("SN123")]["metric_keys"] == ["acP", "batSoc"]
+    assert diag["devices"][mask_sn("SN123")]["alarm_count"] == 1
+    assert diag["telemetry_trace"]["written"] == 1
+    assert diag["write_throttle"]["power"] == {
+        "written": 1,
+        "suppressed": 1,
+        "suppressed_ratio": 0.5,
+    }
+    assert diag["push_downsample"] == {
+        "bucket_seconds": 60.0,
+        "devices": 1,
+        "closed_buckets": 1,
+    }
+    assert diag["command_budget"]["inverters"] == {
+        mask_sn("SN123"): {"tokens": 5.0, "granted": 1, "refused": 0}
+    }
+    assert diag["load_profile"] is None
+    assert diag["decision_scheduler"] is None
+    assert diag["decision_trace"] is None
+    assert diag["stale_recovery"] is None
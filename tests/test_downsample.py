@@ -0,0 +1,70 @@
+"""Tests for push downsampling."""
+
+import pytest
+
+from custom_components.hyxi_cloud.downsample import BucketStats, PushDownsampler
+
+
+def test_disabled_downsampler_does_nothing():
+    downsampler = PushDownsampler(0)
+    assert not downsampler.enabled
+    assert downsampler.add("SN1", {"acP": 1}, 0) is False
+    assert not downsampler.holds("SN1", 0, 0)
+
+
+def test_bucket_stats_and_close_on_first_push_after_end():
+    downsampler = PushDownsampler(30)
+    for now, power in ((0, 100), (10, 300), (20, "200")):
+        assert downsampler.add("SN1", {"acP": power, "state": "on"}, now) is False
+    assert downsampler.generation("SN1") == 0
+    assert downsampler.add("SN1", {"acP": 900}, 30) is True
+    assert downsampler.generation("SN1") == 1
+    stats = downsampler.stats("SN1")
+    assert stats["acP"] == BucketStats(100.0, 200.0, 300.0, 200.0, 3)
+    assert "state" not in stats  # Non-numeric metrics aren't aggregated
+
+
+def test_skips_null_and_non_finite_values():
+    downsampler = PushDownsampler(30)
+    downsampler.add("SN1", {"acP": 100}, 0)
+    downsampler.add("SN1", {"acP": "--"}, 5)
+    downsampler.add("SN1", {"acP": float("nan")}, 10)
+    downsampler.add("SN1", {"acP": True}, 15)
+    downsampler.add("SN1", {"acP": 50}, 30)
+    assert downsampler.stats("SN1")["acP"].count == 1
+
+
+def test_holds_mid_bucket_until_close_or_push_outage():
+    downsampler = PushDownsampler(60)
+    assert not downsampler.holds("SN1", 0, 0)  # No push yet: polls pass
+    downsampler.add("SN1", {"acP": 100}, 0)
+    assert downsampler.holds("SN1", 0, 30)
+    downsampler.add("SN1", {"acP": 100}, 60)
+    assert not downsampler.holds("SN1", 0, 60)  # A bucket closed since
+    assert downsampler.holds("SN1", 1, 70)
+    assert not downsampler.holds("SN1", 1, 60 + 120)  # Pushes stopped
+
+
+def test_mean_view_is_shared_and_expires():
+    downsampler = PushDownsampler(60)
+    downsampler.add("SN1", {"acP": 100}, 0)
+    downsampler.add("SN1", {"acP": 300}, 30)
+    raw = {"acP": 500, "totalE": 12}
+    assert downsampler.mean_view("SN1", raw, 40) is raw  # Nothing closed yet
+    downsampler.add("SN1", raw, 60)
+    view = downsampler.mean_view("SN1", raw, 61)
+    assert view == {"acP": 200.0, "totalE": 12}
+    assert downsampler.mean_view("SN1", raw, 62) is view
+    assert raw["acP"] == 500  # The raw stream is left alone
+    assert downsampler.mean_view("SN1", raw, 60 + 120) is raw
+
+
+def test_devices_have_independent_buckets():
+    downsampler = PushDownsampler(30)
+    downsampler.add("SN1", {"acP": 1}, 0)
+    downsampler.add("SN2", {"acP": 2}, 20)
+    assert downsampler.add("SN1", {"acP": 1}, 30) is True
+    assert downsampler.add("SN2", {"acP": 2}, 30) is False
+    assert downsampler.as_diagnostics()["closed_buckets"] == 1
+    assert downsampler.stats("SN2") == {}
+    assert downsampler.stats("SN1")["acP"].mean == pytest.approx(1.0)
@@ -0,0 +1,201 @@
+"""Tests for the multi-inverter Energy Manager (em_fleet.py)."""
+
+import time
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.hyxi_cloud.decision import Command
+from custom_components.hyxi_cloud.em_fleet import FleetEnergyManager, split_power
+from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+
+
+def _device(model: str, soc: float, cap_kwh: float, **metrics) -> dict:
+    return {
+        "model": model,
+        "device_type_code": "HYBRID_INVERTER",
+        "metrics": {"batSoc": soc, "batCap": cap_kwh, **metrics},
+    }
+
+
+@pytest.fixture
+def fleet():
+    """Lead SN_A plus members SN_B and SN_C, entities unregistered, dry run."""
+    coordinator = MagicMock()
+    coordinator.data = {
+        "SN_A": _device("H10K-HT", 50, 10, ppv=3000, home_load=800),
+        "SN_B": _device("H5K-HT", 80, 5, ppv=1000, home_load=200),
+        "SN_C": _device("H5K-HS", 50, 5, maxChargePower=1500),
+    }
+    coordinator.entry.options = {"em_dry_run": True}
+    hass = MagicMock()
+    hass.states.get.return_value = None
+    with (
+        patch.object(EnergyManagerEngine, "_find_entity_id", return_value=None),
+        patch(
+            "homeassistant.util.dt.now", return_value=datetime(2026, 6, 1, tzinfo=UTC)
+        ),
+    ):
+        yield FleetEnergyManager(
+            hass,
+            coordinator,
+            EMEntityConfig(sn="SN_A", p1_entity="sensor.p1"),
+            ["SN_B", "SN_A", "SN_C", "SN_B"],
+        )
+
+
+def test_split_power_weights_and_caps():
+    """Power is split by weight; what a capped member can't take moves on."""
+    assert split_power(3000, [2, 1], [5000, 5000]) == [2000, 1000]
+    assert split_power(3000, [2, 1], [1000, 5000]) == [1000, 2000]
+    assert split_power(9000, [1, 1, 1], [1000, 2000, 2500]) == [1000, 2000, 2500]
+    assert split_power(3000, [0, 1], [5000, 5000]) == [0, 3000]
+    assert split_power(3000, [0, 0], [5000, 5000]) == [0, 0]
+    assert split_power(0, [1, 1], [5000, 5000]) == [0, 0]
+
+
+def test_members_and_combined_readings(fleet):
+    """Members are deduplicated, lead first; readings cover the whole fleet."""
+    assert fleet.member_sns == ["SN_A", "SN_B", "SN_C"]
+    assert fleet._get_battery_capacity() == 20000
+    assert fleet._get_soc() == pytest.approx((50 * 10 + 80 * 5 + 50 * 5) / 20)
+    assert fleet._get_solar() == 4000
+    assert fleet._get_home_load() == 1000
+    # Only the single-phase member can curtail PV
+    assert fleet._has_peak_shaving()
+    assert [m._sn for m in fleet._peak_shaving_members()] == ["SN_C"]
+
+    fleet._coordinator.entry.options = {
+        "em_battery_capacity_override": True,
+        "em_battery_capacity_wh": 12000,
+    }
+    assert fleet._get_battery_capacity() == 12000
+
+
+def test_decision_state_limits_the_site_power(fleet):
+    """The EM power limit holds for the site, capped by the members' sum."""
+    fleet._members[1]._current_mode = "charge"
+    fleet._members[2]._current_mode = "charge"
+    fleet._members[2]._last_sent_power["charge"] = 700
+    state = fleet._decision_state()
+    # The 5000 W parameter is the site's, not each inverter's
+    assert state.max_charge == 5000
+    assert state.max_discharge == 5000
+    assert state.current_mode == "charge"
+    assert state.charge_power == 700
+
+    # Above what the inverters can do, their hardware limits cap it
+    for sn, watts in (("SN_A", 3000), ("SN_B", 2000)):
+        fleet._coordinator.data[sn]["metrics"]["maxChargePower"] = watts
+    with patch.object(fleet, "_get_param", return_value=20000):
+        assert fleet._power_limit("charge") == 3000 + 2000 + 1500
+
+
+def test_split_follows_headroom_capacity_and_phase(fleet):
+    """Emptier, bigger and three-phase batteries take more of a charge."""
+    shares = fleet._split("charge", 4000)
+    # Headroom to soc_max 90 x capacity x phase: 40*10, 10*5, 40*5*0.5
+    assert shares == [2909, 363, 727]
+
+    # Discharge headroom down to soc_min 20: 30*10, 60*5, 30*5*0.5
+    assert fleet._split("discharge", 3000) == [1333, 1333, 333]
+
+    for member in fleet._members:
+        fleet._coordinator.data[member._sn]["metrics"]["batSoc"] = 95
+    # Every battery full: share by power limit alone
+    assert fleet._split("charge", 1150) == [500, 500, 150]
+
+
+async def test_charge_target_fans_out_concurrently(fleet):
+    """Each member gets its share through its own command channel."""
+    lead, member_b, member_c = fleet._members
+    member_b._current_mode = "charge"
+    with (
+        patch.object(member_b, "_adjust_power", AsyncMock(return_value=True)),
+        patch.object(member_c, "_set_mode", AsyncMock(return_value=False)),
+    ):
+        # SN_C refused, so the command as a whole did not go through
+        assert not await fleet._send_command(Command("set_mode", "charge", 4000))
+        member_b._adjust_power.assert_awaited_once_with("charge", 363, False)
+        member_c._set_mode.assert_awaited_once_with("charge", 727)
+    assert lead._last_action == "[dry-run] charge @ 2909W"
+
+    # Members not in a charge or discharge mode are left alone at 0 W
+    fleet._members[2]._current_mode = "idle"
+    with (
+        patch.object(fleet, "_split", return_value=[1000, 0, 0]),
+        patch.object(fleet._members[1], "_set_mode", AsyncMock(return_value=True)),
+        patch.object(fleet._members[2], "_set_mode", AsyncMock(return_value=True)),
+    ):
+        await fleet._send_command(Command("adjust_power", "charge", 1000))
+        fleet._members[1]._set_mode.assert_awaited_once_with("self_consume")
+        fleet._members[2]._set_mode.assert_not_awaited()
+
+
+async def test_cooldowns_stay_per_member(fleet):
+    """A member in cooldown refuses; the others still switch."""
+    fleet._members[1]._last_mode_switch = time.monotonic()
+    # One member refusing counts as refused, so the kernel sends it again
+    assert await fleet._send_command(Command("set_mode", "idle")) is False
+    assert [m._current_mode for m in fleet._members] == ["idle", None, "idle"]
+
+    # Only the member left out is sent the repeat; nobody left counts as done
+    assert await fleet._send_command(Command("set_mode", "idle")) is False
+    fleet._members[1]._current_mode = "idle"
+    assert await fleet._send_command(Command("set_mode", "idle"))
+
+
+async def test_pv_commands_reach_the_right_members(fleet):
+    """Curtailment goes to peak shaving members; release goes to all."""
+    assert await fleet._send_command(Command("curtail_pv"))
+    assert [m._pv_curtailed for m in fleet._members] == [False, False, True]
+    fleet._members[2]._last_pv_curtail_toggle = -999999.0
+    assert await fleet._send_command(Command("release_pv"))
+    assert not any(m._pv_curtailed for m in fleet._members)
+
+
+async def test_disabling_the_em_stops_every_member(fleet):
+    """A member still charging is forced back even with the lead idle."""
+    fleet._enabled = True
+    fleet._coordinator.hyxi_metadata = {}
+    fleet._members[0]._current_mode = "self_consume"
+    fleet._members[1]._current_mode = "charge"
+    with (
+        patch.object(fleet, "_find_entity_id", return_value="switch.em_enabled"),
+        patch.object(fleet, "_get_ha_state_bool", return_value=False),
+    ):
+        assert fleet._active_mode() == "charge"
+        await fleet._loop_tick(None)
+    assert fleet._members[1]._current_mode == "self_consume"
+    assert fleet._active_mode() is None
+    assert fleet.decision == "disabled"
+
+
+async def test_a_member_left_behind_is_brought_back(fleet):
+    """Two members in self_consume and one still charging: it is switched."""
+    from custom_components.hyxi_cloud.decision import Decision
+
+    for member, mode in zip(
+        fleet._members, ("self_consume", "self_consume", "charge"), strict=True
+    ):
+        member._current_mode = mode
+    assert fleet._fleet_mode() == "self_consume"
+    # The kernel sees self_consume and has nothing to send
+    assert await fleet._apply_decision(Decision("solar_self_consume"))
+    assert [m._current_mode for m in fleet._members] == ["self_consume"] * 3
+    assert not await fleet._apply_decision(Decision("solar_self_consume"))
+
+    # Next to a charging fleet, self_consume is where members without a
+    # share sit; a member in discharge is switched there
+    for member, mode in zip(
+        fleet._members, ("charge", "charge", "discharge"), strict=True
+    ):
+        member._current_mode = mode
+        member._last_mode_switch = -999999.0
+    await fleet._apply_decision(Decision("solar_charge_adjust"))
+    assert [m._current_mode for m in fleet._members] == [
+        "charge",
+        "charge",
+        "self_consume",
+    ]
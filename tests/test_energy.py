@@ -0,0 +1,87 @@
+"""Tests for local energy integration."""
+
+import pytest
+
+from custom_components.hyxi_cloud.energy import (
+    ANCHOR_MAX_LEAD,
+    MAX_SAMPLE_GAP,
+    EnergyAccumulator,
+)
+
+
+def test_trapezoidal_integration():
+    """1 kW rising to 2 kW over 10 minutes is 0.25 kWh."""
+    accumulator = EnergyAccumulator(0.0)
+    assert accumulator.add(1000, 0) is False  # first sample only sets the start
+    assert accumulator.add("2000", 600) is True
+    assert accumulator.total == pytest.approx(0.25)
+
+
+def test_same_sample_is_not_counted_twice():
+    accumulator = EnergyAccumulator(0.0)
+    accumulator.add(1000, 0)
+    accumulator.add(1000, 36)
+    total = accumulator.total
+    assert accumulator.add(1000, 36) is False
+    assert accumulator.add(1000, 20) is False
+    assert accumulator.total == total
+
+
+def test_gaps_and_unusable_samples_are_skipped():
+    accumulator = EnergyAccumulator(0.0)
+    accumulator.add(1000, 0)
+    assert accumulator.add(1000, MAX_SAMPLE_GAP + 1) is False
+    assert accumulator.total == 0.0
+    assert accumulator.add("--", MAX_SAMPLE_GAP + 10) is False
+    # The sample after an unusable one restarts the integration
+    assert accumulator.add(1000, MAX_SAMPLE_GAP + 20) is False
+    assert accumulator.add(-500, MAX_SAMPLE_GAP + 56) is True
+    assert accumulator.total == pytest.approx(1000 / 2 * 36 / 3_600_000)
+
+
+def test_starts_at_the_cloud_counter_and_catches_up():
+    accumulator = EnergyAccumulator()
+    accumulator.add(1000, 0)
+    assert accumulator.add(1000, 36) is False  # Not started before an anchor
+    assert accumulator.anchor("100.0") is True
+    assert accumulator.total == 100.0
+    accumulator.add(1000, 72)
+    assert accumulator.total == pytest.approx(100.01)
+    # A push outage: the counter moved past the local total
+    assert accumulator.anchor(101.5) is True
+    assert accumulator.total == 101.5
+
+
+def test_stops_when_too_far_ahead_of_the_counter():
+    accumulator = EnergyAccumulator()
+    accumulator.anchor(10.0)
+    accumulator.add(6000, 0)
+    accumulator.add(6000, 600)  # +1 kWh, ahead of the counter
+    total = accumulator.total
+    assert total - 10.0 > ANCHOR_MAX_LEAD
+    assert accumulator.add(6000, 610) is False
+    assert accumulator.total == total
+    # Never moves backwards when the counter is behind
+    assert accumulator.anchor(10.2) is False
+    assert accumulator.total == total
+
+
+def test_counter_dip_is_ignored_but_reset_detaches():
+    accumulator = EnergyAccumulator()
+    accumulator.anchor(500.0)
+    assert accumulator.anchor(300.0) is False
+    assert accumulator.anchor(0.0) is False  # Reset: keep counting locally
+    accumulator.add(6000, 0)
+    accumulator.add(6000, 600)
+    assert accumulator.total == pytest.approx(501.0)
+    assert accumulator.anchor(2.0) is False
+    assert accumulator.total == pytest.approx(501.0)
+
+
+def test_start_without_counter():
+    accumulator = EnergyAccumulator()
+    accumulator.start()
+    assert accumulator.total == 0.0
+    restored = EnergyAccumulator(12.5)
+    restored.start()
+    assert restored.total == 12.5
@@ -87,7 +87,7 @@ class TestEMConstants:
     """Test EM constant definitions."""
 
     def test_em_defaults_has_all_required_keys(self):
-        """EM_DEFAULTS should have all 15 parameter keys (not soc_min/soc_max, not battery_capacity_wh)."""
+        """EM_DEFAULTS should have all 16 parameter keys (not soc_min/soc_max, not battery_capacity_wh)."""
         required_keys = [
             "night_buffer_pct",
             "high_load_threshold",
@@ -104,6 +104,7 @@ class TestEMConstants:
             "bottomout_cooldown",
             "p1_smoothing_period",
             "max_grid_export",
+            "p1_setpoint",
         ]
         em_defaults = _get_em_defaults()
         for key in required_keys:
@@ -225,6 +226,7 @@ class TestEMTranslationCoverage:
             "em_high_load_battery_assist",
             "em_night_mode",
             "em_export_limiting",
+            "em_pi_charge_control",
         ):
             assert key in switch_translations, (
                 f"Switch translation key '{key}' missing from strings.json"
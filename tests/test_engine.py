@@ -1,11 +1,9 @@
 """Tests for the Energy Manager decision engine.
 
-The real engine.py imports HA modules that are hard to mock at import time.
-Instead of fighting the import system, we embed the decision logic directly
-in FakeEngine — it's a 1:1 copy of _make_decision from engine.py.  This
-tests the priority logic, cooldowns, and state transitions without HA.
-
-If engine.py _make_decision changes, update the copy here.
+FakeEngine is the real EnergyManagerEngine with its Home Assistant reads
+and cloud commands replaced by plain attributes and call recorders, so
+these tests run the real adapter and decision kernel (decision.py) for
+the priority logic, cooldowns and state transitions without HA.
 """
 
 import time
@@ -14,35 +12,12 @@ from dataclasses import dataclass
 
 import pytest
 
-# ── Helpers to build a testable engine without real HA ──────────────────
-
-
-@dataclass
-class DecisionState:
-    """Snapshot of current system state for the decision engine."""
-
-    soc: float
-    solar: float
-    p1: float
-    home_load: float
-    soc_min: float
-    soc_max: float
-    max_charge: float
-    max_discharge: float
-    is_night: bool
-    solar_producing: bool
-    night_soc_target: float
-
+from custom_components.hyxi_cloud.decision import DecisionCounters
+from custom_components.hyxi_cloud.decision_trace import DecisionTrace
+from custom_components.hyxi_cloud.engine import EnergyManagerEngine
+from custom_components.hyxi_cloud.scheduler import DecisionScheduler
 
-@dataclass
-class SolarConfig:
-    """Computed solar charge parameters for a single decision tick."""
-
-    min_solar_for_charge: float
-    charge_margin: float
-    charge_entry_threshold: float
-    readings_needed: int
-    sunset_urgent: bool
+# ── Helpers to build a testable engine without real HA ──────────────────
 
 
 @dataclass
@@ -64,10 +39,10 @@ class FakeEngineConfig:
     night_mode_enabled: bool = True
 
 
-class FakeEngine:
-    """Stripped-down engine that replicates decision logic without HA imports."""
+class FakeEngine(EnergyManagerEngine):
+    """Real engine whose HA state reads and API calls are stubbed out."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, **kwargs):  # pylint: disable=super-init-not-called
         cfg = FakeEngineConfig(**kwargs)
         self.soc = cfg.soc
         self.solar = cfg.solar
@@ -84,16 +59,19 @@ class FakeEngine:
 
         # Engine state
         self._sn = "TEST_SN"
+        self._param_sn = self._sn
         self._current_mode = cfg.current_mode
         self._last_decision = ""
         self._last_action = ""
+        self._in_decision = False
         self._last_mode_switch: float = 0
         self._last_power_adjust: float = 0
-        self._last_charge_exit: float = 0
-        self._last_bottomout_exit: float = 0
-        self._charge_entry_export_count = 0
-        self._charge_bottomout_count = 0
+        self._counters = DecisionCounters()
+        self._pv_curtailed = False
         self._p1_buffer: deque = deque()
+        self.schedule = None  # No forecast series: no day-ahead plan
+        self._scheduler = DecisionScheduler(max_idle=60)
+        self._trace = DecisionTrace(size=8)
 
         # Track API calls
         self.mode_calls: list = []
@@ -165,11 +143,11 @@ class FakeEngine:
     def _hours_until_sunset(self):
         return 12.0
 
-    @property
-    def p1_avg(self):
-        if not self._p1_buffer:
-            return 0.0
-        return sum(v for _, v in self._p1_buffer) / len(self._p1_buffer)
+    def _battery_schedule(self, target_soc):
+        return self.schedule
+
+    def _has_peak_shaving(self):
+        return False
 
     def _get_current_power_setting(self, direction):
         return 0.0
@@ -199,7 +177,7 @@ class FakeEngine:
             self._last_action = mode
         return True
 
-    async def _adjust_power(self, direction, target_w):
+    async def _adjust_power(self, direction, target_w, exact_step=False):
         self.adjust_calls.append((direction, target_w))
         self._last_power_adjust = time.monotonic()
         return True
@@ -207,297 +185,6 @@ class FakeEngine:
     def _notify_sensors(self):
         pass
 
-    # ── Decision logic — 1:1 copy from engine.py ────────────────────────
-    # Keep in sync with custom_components/hyxi_cloud/engine.py
-
-    async def _make_decision(self) -> None:
-        solar = self._get_solar()
-        s = DecisionState(
-            soc=self._get_soc(),
-            solar=solar,
-            p1=self._get_p1(),
-            home_load=self._get_home_load(),
-            soc_min=self._get_protection_param("soc_min", 20),
-            soc_max=self._get_protection_param("soc_max", 90),
-            max_charge=self._get_param("max_charge_power"),
-            max_discharge=self._get_param("max_discharge_power"),
-            is_night=self._is_night(),
-            solar_producing=solar > 50,
-            night_soc_target=self._soc_needed_for_night(),
-        )
-
-        # PRIORITY 1 & 2: SOC safety limits
-        if await self._check_soc_limits(s):
-            return
-        # PRIORITY 3: Sustained high load
-        if await self._check_high_load(s):
-            return
-        # PRIORITY 4 & 4b: Night mode
-        if await self._check_night(s):
-            return
-        # PRIORITY 5: Solar optimization
-        if await self._check_solar(s):
-            return
-
-        # DEFAULT: self_consume as safe fallback
-        self._set_decision("idle_default")
-        if self._current_mode in ("charge", "discharge"):
-            await self._set_mode("self_consume")
-
-    async def _check_soc_limits(self, s: DecisionState) -> bool:
-        """PRIORITY 1: Emergency SOC below minimum. PRIORITY 2: SOC above maximum."""
-        if s.soc < s.soc_min:
-            if s.solar_producing:
-                charge_target = min(s.solar - 50, s.max_charge)
-                charge_target = max(charge_target, 300)
-                self._set_decision("emergency_solar_charge")
-                if self._current_mode != "charge":
-                    await self._set_mode("charge", int(charge_target))
-                else:
-                    await self._adjust_power("charge", int(charge_target))
-                return True
-
-            grid_charge_uid = f"hyxi_{self._sn}_em_grid_charge_allowed"
-            grid_entity = self._find_entity_id("switch", grid_charge_uid)
-            if self._get_ha_state_bool(grid_entity):
-                grid_charge_w = min(2000, int(s.max_charge))
-                self._set_decision("grid_charge_emergency")
-                if self._current_mode != "charge":
-                    await self._set_mode("charge", grid_charge_w)
-                else:
-                    await self._adjust_power("charge", grid_charge_w)
-                return True
-            self._set_decision("low_soc_idle")
-            if self._current_mode != "idle":
-                await self._set_mode("idle")
-            return True
-
-        # SOC above maximum — force discharge
-        if s.soc > s.soc_max:
-            discharge_w = max(s.p1, 1000)
-            discharge_w = min(discharge_w, s.max_discharge)
-            self._set_decision("forced_discharge_over_max")
-            if self._current_mode != "discharge":
-                await self._set_mode("discharge", int(discharge_w))
-            else:
-                await self._adjust_power("discharge", int(discharge_w))
-            return True
-
-        return False
-
-    async def _check_high_load(self, s: DecisionState) -> bool:
-        """PRIORITY 3: Sustained high load — battery assist or grid only."""
-        # Check if high load feature is enabled by the user
-        high_load_assist_uid = f"hyxi_{self._sn}_em_high_load_battery_assist"
-        high_load_entity = self._find_entity_id("switch", high_load_assist_uid)
-        high_load_assist = self._get_ha_state_bool(high_load_entity, False)
-        if not high_load_assist:
-            return False
-
-        high_load_threshold = self._get_param("high_load_threshold")
-
-        if s.home_load > high_load_threshold:
-            high_load_wh = s.max_discharge * 0.5
-            capacity = self._get_param("battery_capacity_wh")
-            soc_cost = (high_load_wh / capacity) * 100 if capacity > 0 else 100
-
-            if (s.soc - soc_cost) > s.night_soc_target:
-                self._set_decision("high_load_battery_assist")
-                if self._current_mode != "self_consume":
-                    await self._set_mode("self_consume")
-            else:
-                self._set_decision("high_load_grid_only")
-                if self._current_mode != "idle":
-                    await self._set_mode("idle")
-            return True
-
-        return False
-
-    async def _check_night(self, s: DecisionState) -> bool:
-        """PRIORITY 4: Night self_consume/idle. PRIORITY 4b: Night battery preservation."""
-        # Check if night mode feature is enabled by the user
-        night_mode_uid = f"hyxi_{self._sn}_em_night_mode"
-        night_mode_entity = self._find_entity_id("switch", night_mode_uid)
-        if not self._get_ha_state_bool(night_mode_entity, False):
-            return False
-
-        if not s.solar_producing and s.is_night:
-            if s.soc > s.soc_min:
-                self._set_decision("night_self_consume")
-                if self._current_mode != "self_consume":
-                    await self._set_mode("self_consume")
-            else:
-                self._set_decision("night_reserve_hold")
-                if self._current_mode != "idle":
-                    await self._set_mode("idle")
-            return True
-
-        # Night battery preservation during daytime
-        p1_avg = self.p1_avg
-        if (
-            not s.is_night
-            and s.soc <= s.night_soc_target
-            and s.p1 > 0
-            and p1_avg > 0
-            and not self._solar_will_cover_charge(s.night_soc_target)
-        ):
-            self._set_decision("night_preserve_idle")
-            if self._current_mode != "idle":
-                await self._set_mode("idle")
-            return True
-
-        return False
-
-    async def _check_solar(self, s: DecisionState) -> bool:
-        """PRIORITY 5: Solar charge entry/exit and battery full."""
-        if s.solar_producing and s.soc < s.soc_max:
-            await self._solar_charge_logic(s)
-            return True
-
-        if s.solar_producing and s.soc >= s.soc_max:
-            self._set_decision("solar_battery_full")
-            if self._current_mode != "self_consume":
-                await self._set_mode("self_consume")
-            return True
-
-        return False
-
-    async def _solar_charge_logic(self, s: DecisionState) -> None:
-        """Solar charge entry/exit and power tuning logic."""
-        min_solar_for_charge = self._get_param("min_solar_for_charge")
-        charge_margin = self._get_param("charge_margin")
-        charge_entry_threshold = self._get_param("charge_entry_threshold")
-        charge_reentry_delay = self._get_param("charge_reentry_delay")
-        readings_needed = max(int(charge_reentry_delay / 15 / 3), 2)
-
-        # After a bottomout exit, double the readings needed
-        bottomout_cooldown = self._get_param("bottomout_cooldown")
-        if (time.monotonic() - self._last_bottomout_exit) < bottomout_cooldown:
-            readings_needed = readings_needed * 2
-
-        # Sunset urgency
-        hours_to_sunset = self._hours_until_sunset()
-        sunset_urgent = False
-        if hours_to_sunset < 4 and s.soc < s.night_soc_target:
-            if not self._solar_will_cover_charge(s.night_soc_target):
-                sunset_urgent = True
-                charge_entry_threshold = max(charge_entry_threshold // 2, 100)
-                readings_needed = max(readings_needed // 2, 1)
-                min_solar_for_charge = max(min_solar_for_charge - 300, 200)
-
-        sc = SolarConfig(
-            min_solar_for_charge=min_solar_for_charge,
-            charge_margin=charge_margin,
-            charge_entry_threshold=charge_entry_threshold,
-            readings_needed=readings_needed,
-            sunset_urgent=sunset_urgent,
-        )
-
-        if self._current_mode != "charge":
-            await self._solar_entry_logic(s, sc)
-        else:
-            # In charge mode: fine-tune power, cap at solar, exit if sustained import
-            await self._solar_tune_logic(s, sc)
-
-    async def _solar_entry_logic(
-        self,
-        s: DecisionState,
-        sc: SolarConfig,
-    ) -> None:
-        """Handle charge entry — stay in self_consume, only charge on sustained export."""
-        if s.solar < sc.min_solar_for_charge:
-            self._set_decision("solar_self_consume")
-            if self._current_mode not in ("self_consume", "idle"):
-                await self._set_mode("self_consume")
-            self._charge_entry_export_count = 0
-
-        elif s.p1 < -sc.charge_entry_threshold:
-            self._charge_entry_export_count += 1
-            if (
-                self._charge_entry_export_count >= sc.readings_needed
-                and s.solar >= sc.min_solar_for_charge
-            ):
-                charge_target = min(abs(s.p1) - sc.charge_margin - 100, s.solar - 500)
-                charge_target = min(charge_target, s.max_charge)
-                charge_target = max(charge_target, 300)
-                decision = "pre_night_charge" if sc.sunset_urgent else "solar_charge"
-                self._set_decision(decision)
-                if await self._set_mode("charge", int(charge_target)):
-                    self._charge_entry_export_count = 0
-            else:
-                self._set_decision("solar_export_waiting")
-                if self._current_mode not in ("self_consume", "idle"):
-                    await self._set_mode("self_consume")
-        else:
-            self._charge_entry_export_count = 0
-            self._set_decision("solar_self_consume")
-            if self._current_mode not in ("self_consume", "idle"):
-                await self._set_mode("self_consume")
-
-    async def _solar_tune_logic(
-        self,
-        s: DecisionState,
-        sc: SolarConfig,
-    ) -> None:
-        """Fine-tune charge power — cap at solar, exit if sustained import."""
-        current_charge = self._get_current_power_setting("charge")
-        solar_cap = max(s.solar - sc.charge_margin, 100)
-
-        if s.solar < sc.min_solar_for_charge - 150:
-            self._set_decision("solar_self_consume")
-            self._last_charge_exit = time.monotonic()
-            self._charge_entry_export_count = 0
-            self._charge_bottomout_count = 0
-            await self._set_mode("self_consume")
-
-        elif s.p1 > sc.charge_margin:
-            await self._solar_reduce_charge(
-                s.p1, current_charge, solar_cap, sc.charge_margin
-            )
-
-        elif s.p1 < -(sc.charge_margin + 100):
-            # Exporting too much — increase charge
-            self._charge_bottomout_count = 0
-            excess_export = abs(s.p1) - sc.charge_margin
-            charge_target = current_charge + excess_export
-            charge_target = min(charge_target, s.max_charge)
-            charge_target = min(charge_target, solar_cap)
-            self._set_decision("solar_charge")
-            await self._adjust_power("charge", int(charge_target))
-        else:
-            # P1 within target range — balanced
-            self._charge_bottomout_count = 0
-            self._set_decision("solar_charge")
-
-    async def _solar_reduce_charge(
-        self,
-        p1,
-        current_charge,
-        solar_cap,
-        charge_margin,
-    ) -> None:
-        """Reduce charge power when importing from grid."""
-        charge_target = current_charge - (p1 + charge_margin)
-        charge_target = min(charge_target, solar_cap)
-        charge_target = max(charge_target, 100)
-
-        if charge_target <= 100:
-            self._charge_bottomout_count += 1
-            if self._charge_bottomout_count >= 3:
-                self._set_decision("solar_self_consume")
-                self._last_charge_exit = time.monotonic()
-                self._last_bottomout_exit = time.monotonic()
-                self._charge_entry_export_count = 0
-                self._charge_bottomout_count = 0
-                await self._set_mode("self_consume")
-            else:
-                self._set_decision("solar_charge_reduced")
-                await self._adjust_power("charge", 100)
-        else:
-            self._charge_bottomout_count = 0
-            self._set_decision("solar_charge")
-            await self._adjust_power("charge", int(charge_target))
-
 
 async def run_decision(engine):
     """Run the decision logic on FakeEngine."""
@@ -642,10 +329,14 @@ class TestPriority4Night:
 
     @pytest.mark.asyncio
     async def test_night_soc_at_min_idles(self):
-        """Night + SOC at minimum -> idle to protect reserve."""
+        """Night + SOC at minimum -> idle to protect reserve.
+
+        SOC at soc_min already counts as low (Priority 1), which idles
+        before the night reserve check is reached.
+        """
         engine = FakeEngine(soc=20, is_night=True, soc_min=20)
         await run_decision(engine)
-        assert engine._last_decision == "night_reserve_hold"
+        assert engine._last_decision == "low_soc_idle"
         assert engine.mode_calls[0][0] == "idle"
 
     @pytest.mark.asyncio
@@ -703,7 +394,7 @@ class TestPriority5Solar:
         engine.params["charge_entry_threshold"] = 500
         await run_decision(engine)
         # First tick should just count, not switch to charge
-        assert engine._charge_entry_export_count == 1
+        assert engine._counters.charge_entry_export_count == 1
         assert engine._last_decision == "solar_export_waiting"
 
     @pytest.mark.asyncio
@@ -810,23 +501,149 @@ class TestChargeBottomout:
         engine.params["charge_margin"] = 150
         engine.params["min_solar_for_charge"] = 1000
         await run_decision(engine)
-        assert engine._charge_bottomout_count >= 1
+        assert engine._counters.charge_bottomout_count >= 1
 
     @pytest.mark.asyncio
-    async def test_three_bottomouts_exits_to_self_consume(self):
-        """Three consecutive bottomouts -> exit charge to self_consume."""
+    async def test_five_bottomouts_exits_to_self_consume(self):
+        """Five consecutive bottomouts -> exit charge to self_consume."""
         engine = FakeEngine(
             soc=50, solar=1200, p1=2000, current_mode="charge", soc_max=90
         )
         engine.params["charge_margin"] = 150
         engine.params["min_solar_for_charge"] = 1000
-        engine._charge_bottomout_count = 2  # Already at 2, next will be 3
+        # Already at 4, next will be 5
+        engine._counters = DecisionCounters(charge_bottomout_count=4)
 
         await run_decision(engine)
         assert engine._last_decision == "solar_self_consume"
         assert engine.mode_calls[0][0] == "self_consume"
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# Decision kernel adapter
+# ═══════════════════════════════════════════════════════════════════════
+
+
+class TestDecisionAdapter:
+    """Test how the engine applies the kernel's decisions."""
+
+    @pytest.mark.asyncio
+    async def test_refused_charge_entry_keeps_counting(self):
+        """A charge switch refused by the cooldown is retried next tick."""
+        engine = FakeEngine(soc=50, solar=3000, p1=-1000, current_mode="idle")
+        engine.params["charge_reentry_delay"] = 90  # 2 readings
+        engine._counters = DecisionCounters(charge_entry_export_count=1)
+
+        async def refuse(mode, power_w=None):
+            engine.mode_calls.append((mode, power_w))
+            return False
+
+        engine._set_mode = refuse
+        await run_decision(engine)
+        assert engine._last_decision == "solar_charge"
+        assert engine.mode_calls == [("charge", 750)]
+        assert engine._counters.charge_entry_export_count == 2
+
+    @pytest.mark.asyncio
+    async def test_commands_dispatch_in_order(self):
+        """Release PV before charging; curtailment uses peak shaving stop."""
+        from unittest.mock import AsyncMock
+
+        from custom_components.hyxi_cloud.decision import Command, Decision
+
+        engine = FakeEngine()
+        calls = []
+        engine._release_pv_curtailment = AsyncMock(
+            side_effect=lambda: calls.append("release")
+        )
+        engine._set_peak_shaving = AsyncMock(return_value=True)
+        decision = Decision(
+            "export_limit_charge",
+            (Command("release_pv"), Command("set_mode", "charge", 1500)),
+            DecisionCounters(charge_bottomout_count=1),
+        )
+        await engine._apply_decision(decision)
+        assert calls == ["release"]
+        assert engine.mode_calls == [("charge", 1500)]
+        assert engine._counters.charge_bottomout_count == 1
+
+        await engine._apply_decision(
+            Decision("export_limit_pv_curtail", (Command("curtail_pv"),))
+        )
+        engine._set_peak_shaving.assert_awaited_once_with("stop")
+        assert engine._last_decision == "export_limit_pv_curtail"
+
+    @pytest.mark.asyncio
+    async def test_only_pi_adjustments_send_a_single_threshold_step(self):
+        """A change of exactly one threshold step is dropped, except for PI."""
+        from types import MethodType, SimpleNamespace
+
+        from custom_components.hyxi_cloud.decision import Command, Decision
+
+        engine = FakeEngine()
+        engine._coordinator = SimpleNamespace(
+            entry=SimpleNamespace(options={"em_dry_run": True})
+        )
+        engine._adjust_power = MethodType(EnergyManagerEngine._adjust_power, engine)
+        engine._get_current_power_setting = lambda direction: 1500.0
+        # Step-mode solar tuning and high-load discharge: 100W is too small
+        for direction in ("charge", "discharge"):
+            adjust = Command("adjust_power", direction, 1600)
+            assert not await engine._apply_decision(Decision("tune", (adjust,)))
+            assert engine._last_power_adjust == 0
+        # The PI path's output is on the grid: one step is sent
+        adjust = Command("adjust_power", "charge", 1600)
+        assert await engine._apply_decision(
+            Decision("solar_charge", (adjust,), exact_step=True)
+        )
+        assert engine._last_power_adjust > 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_decides_daytime_preservation(self):
+        """With a day-ahead plan, hold the battery only where the plan does."""
+        from custom_components.hyxi_cloud.planner import BatterySchedule
+
+        engine = FakeEngine(soc=25, solar=300, p1=400, current_mode="self_consume")
+        engine._p1_buffer.append((time.monotonic(), 400))
+
+        # The plan discharges now: solar later brings the battery back
+        engine.schedule = BatterySchedule((), (-400, 2000), (24, 40), True)
+        await run_decision(engine)
+        assert engine._last_decision == "solar_self_consume"
+        assert engine.mode_calls == []
+
+        engine.schedule = BatterySchedule((), (0, 2000), (25, 40), True)
+        await run_decision(engine)
+        assert engine._last_decision == "night_preserve_idle"
+        assert engine.mode_calls == [("idle", None)]
+
+    @pytest.mark.asyncio
+    async def test_decisions_feed_the_scheduler(self):
+        """A decision records its inputs; only a settled one lets ticks idle."""
+        engine = FakeEngine(soc=15, current_mode="self_consume")
+        scheduler = engine._scheduler
+        scheduler.request("soc", time.monotonic())
+        await run_decision(engine)
+        assert engine._last_decision == "low_soc_idle"
+        assert scheduler.decisions == 1
+        assert scheduler.with_commands == 1
+        # Commands went out: the next tick follows up
+        assert scheduler.due(time.monotonic())
+
+        await run_decision(engine)
+        assert engine.mode_calls == [("idle", None)]
+        assert not scheduler.due(time.monotonic())
+        assert scheduler.skipped == 1
+        # Within the deadband of the SOC the decision saw
+        assert not scheduler.observe("soc", 15.5, time.monotonic())
+
+        # Both decisions are traced; only the first sent a command
+        rows = list(engine.decision_trace.rows())
+        assert [row["commands"] for row in rows] == ["set_mode:idle", ""]
+        assert [row["sent"] for row in rows] == [True, False]
+        assert rows[0]["latency_ms"] is not None
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # HA State Utilities
 # ═══════════════════════════════════════════════════════════════════════
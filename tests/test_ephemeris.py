@@ -0,0 +1,117 @@
+"""Tests for the cached sun ephemeris."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.hyxi_cloud import ephemeris
+from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+from custom_components.hyxi_cloud.ephemeris import SunEphemeris
+
+AMSTERDAM = (52.37, 4.90)
+NEW_YORK = (40.71, -74.01)
+
+
+def test_next_events_around_the_utc_day():
+    """Sunrise and sunset come out in order, wherever the UTC day splits."""
+    sun = SunEphemeris(*AMSTERDAM)
+    now = datetime(2026, 6, 20, 12, tzinfo=UTC)
+    assert sun.next_setting(now).replace(second=0, microsecond=0) == datetime(
+        2026, 6, 20, 20, 5, tzinfo=UTC
+    )
+    assert sun.next_rising(now).date() == datetime(2026, 6, 21).date()
+
+    # New York sets after midnight UTC: the next setting still is today's
+    sun = SunEphemeris(*NEW_YORK)
+    now = datetime(2026, 6, 20, 23, tzinfo=UTC)
+    setting = sun.next_setting(now)
+    assert timedelta(0) < setting - now < timedelta(hours=2)
+    rising = sun.next_rising(now)
+    assert setting < rising < setting + timedelta(hours=12)
+
+
+def test_events_are_computed_once_per_day():
+    """Queries on the same UTC day reuse the cached times."""
+    sun = SunEphemeris(*AMSTERDAM)
+    now = datetime(2026, 3, 1, 6, tzinfo=UTC)
+    with patch.object(
+        ephemeris.astral_sun, "sunrise", wraps=ephemeris.astral_sun.sunrise
+    ) as sunrise:
+        first = sun.next_rising(now)
+        assert sun.next_rising(now + timedelta(hours=12)) > first
+        assert sunrise.call_count == len(ephemeris._DAYS)
+        sun.next_rising(now + timedelta(days=1))
+        assert sunrise.call_count == 2 * len(ephemeris._DAYS)
+
+
+def test_elevation_is_cached_for_a_minute():
+    """The elevation is computed again only once it is a minute old."""
+    sun = SunEphemeris(*AMSTERDAM)
+    noon = datetime(2026, 6, 20, 11, 40, tzinfo=UTC)
+    midnight = datetime(2026, 6, 20, 23, 40, tzinfo=UTC)
+    assert sun.elevation(noon) > 55
+    with patch.object(ephemeris.astral_sun, "elevation", return_value=1.0) as calc:
+        assert sun.elevation(noon + timedelta(seconds=30)) > 55
+        calc.assert_not_called()
+        assert sun.elevation(noon + timedelta(seconds=ephemeris.ELEVATION_TTL)) == 1
+    assert sun.elevation(midnight) < 0
+
+
+def test_polar_day_has_no_events():
+    """Above the arctic circle in June the sun neither rises nor sets."""
+    sun = SunEphemeris(78.2, 15.6)
+    now = datetime(2026, 6, 20, 12, tzinfo=UTC)
+    assert sun.next_rising(now) is None
+    assert sun.next_setting(now) is None
+    assert sun.elevation(now) > 0
+
+
+@pytest.fixture
+def engine():
+    """A real engine at Amsterdam with no solar."""
+    hass = MagicMock()
+    hass.config.latitude, hass.config.longitude = AMSTERDAM
+    hass.config.elevation = 0
+    coordinator = MagicMock()
+    coordinator.data = {"SN1": {"metrics": {"ppv": 0}}}
+    return EnergyManagerEngine(
+        hass, coordinator, EMEntityConfig(sn="SN1", p1_entity="sensor.p1")
+    )
+
+
+def test_engine_sun_queries(engine):
+    """The engine answers from the ephemeris, without a sun.sun entity."""
+    evening = datetime(2026, 6, 20, 18, tzinfo=UTC)
+    with patch("homeassistant.util.dt.utcnow", return_value=evening):
+        assert engine._is_night() is False
+        assert engine._hours_until_sunset() == pytest.approx(2.1, abs=0.1)
+        assert engine._hours_until_sunrise() == pytest.approx(9.3, abs=0.1)
+    with patch(
+        "homeassistant.util.dt.utcnow", return_value=evening + timedelta(hours=4)
+    ):
+        assert engine._is_night() is True
+    engine._hass.states.get.assert_not_called()
+
+    # Solar production means day, whatever the clock says
+    engine._coordinator.data["SN1"]["metrics"]["ppv"] = 500
+    with patch(
+        "homeassistant.util.dt.utcnow", return_value=evening + timedelta(hours=4)
+    ):
+        assert engine._is_night() is False
+
+
+def test_engine_rebuilds_on_sun_events(engine):
+    """Only a horizon crossing or moved events rebuild the sun times."""
+    sun = engine._ephemeris()
+
+    def change(old, new):
+        engine._on_sun_change(MagicMock(data={"old_state": old, "new_state": new}))
+
+    old = MagicMock(state="above_horizon", attributes={"next_setting": "a"})
+    new = MagicMock(state="above_horizon", attributes={"next_setting": "a"})
+    change(old, new)
+    assert engine._ephemeris() is sun
+
+    change(old, MagicMock(state="below_horizon", attributes={"next_setting": "b"}))
+    assert engine._ephemeris() is not sun
@@ -0,0 +1,98 @@
+"""Tests for the streaming outlier filters."""
+
+import math
+
+from custom_components.hyxi_cloud.const import CONF_OUTLIER_FILTER
+from custom_components.hyxi_cloud.filters import (
+    HAMPEL_WINDOW,
+    MAX_HELD,
+    HampelStage,
+    OutlierFilter,
+    RateStage,
+    build_outlier_filter,
+    counter_max_jump,
+    counter_reset_is_valid,
+)
+
+
+def _feed(outlier_filter, values, start=0, interval=10.0):
+    return [
+        outlier_filter.filter(value, (start + i) * interval)
+        for i, value in enumerate(values)
+    ]
+
+
+def _power_filter():
+    return build_outlier_filter({CONF_OUTLIER_FILTER: True}, "power")
+
+
+def test_build_requires_option_and_known_device_class():
+    assert build_outlier_filter({}, "power") is None
+    assert build_outlier_filter(None, "power") is None
+    assert build_outlier_filter({CONF_OUTLIER_FILTER: True}, "energy") is None
+    assert build_outlier_filter({CONF_OUTLIER_FILTER: True}, None) is None
+    assert isinstance(_power_filter(), OutlierFilter)
+
+
+def test_build_gives_each_entity_its_own_state():
+    first, second = _power_filter(), _power_filter()
+    assert first.stages[0] is not second.stages[0]
+
+
+def test_isolated_spike_is_held():
+    """A single glitch shows the last accepted value instead."""
+    outlier_filter = _power_filter()
+    _feed(outlier_filter, [1000, 1010, 990, 1005, 995])
+    assert outlier_filter.filter(25000, 60) == 995
+    assert outlier_filter.filter(1002, 70) == 1002
+
+
+def test_genuine_step_is_accepted_after_one_sample():
+    """A level change is confirmed by the next sample and then passes."""
+    outlier_filter = _power_filter()
+    _feed(outlier_filter, [100, 105, 95, 102, 98])
+    assert outlier_filter.filter(3000, 60) == 98
+    assert outlier_filter.filter(3010, 70) == 3010
+    shown = _feed(outlier_filter, [2990, 3005, 3000, 2995], start=8)
+    assert shown == [2990, 3005, 3000, 2995]
+
+
+def test_held_values_are_released_after_max_held():
+    """Even unconfirmed rejections can't hold a value forever."""
+    outlier_filter = OutlierFilter((RateStage(0.0, 1.0),))
+    outlier_filter.filter(10.0, 0)
+    shown = _feed(outlier_filter, [20.0, 40.0, 80.0][:MAX_HELD], start=1)
+    assert shown[:-1] == [10.0] * (MAX_HELD - 1)
+    assert shown[-1] == [20.0, 40.0, 80.0][MAX_HELD - 1]
+
+
+def test_non_finite_values_hold_the_last_value():
+    outlier_filter = _power_filter()
+    assert outlier_filter.filter(math.nan, 0) is None
+    outlier_filter.filter(500.0, 10)
+    assert outlier_filter.filter(math.inf, 20) == 500.0
+
+
+def test_rate_stage_scales_with_elapsed_time():
+    """SOC may move 1 %/min plus a 2 % floor since the last accepted value."""
+    soc = build_outlier_filter({CONF_OUTLIER_FILTER: True}, "battery")
+    soc.filter(50.0, 0)
+    assert soc.filter(10.0, 10) == 50.0
+    assert soc.filter(51.5, 20) == 51.5
+    assert soc.filter(60.0, 20 + 600) == 60.0
+
+
+def test_hampel_stage_window_is_fixed_size():
+    stage = HampelStage(1.0)
+    for i in range(HAMPEL_WINDOW * 3):
+        stage.accepts(float(i), i, None, 0)
+    assert len(stage._samples) == HAMPEL_WINDOW
+    assert stage._count == HAMPEL_WINDOW
+
+
+def test_counter_guards():
+    assert counter_reset_is_valid(2742.0, 0.0)
+    assert not counter_reset_is_valid(2742.0, 2000.0)
+    assert not counter_reset_is_valid(0.1, 0.05)
+    assert counter_max_jump(0) == 100.0
+    assert counter_max_jump(3) == 250.0
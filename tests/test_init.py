@@ -136,6 +136,13 @@ def mock_entry():
     entry.entry_id = "test_id"
     entry.add_update_listener = MagicMock()
     entry.async_on_unload = MagicMock()
+
+    def _create_background_task(_hass, coro, name, eager_start=True):
+        import asyncio
+
+        return asyncio.create_task(coro, name=name)
+
+    entry.async_create_background_task = MagicMock(side_effect=_create_background_task)
     return entry
 
 
@@ -226,6 +233,111 @@ async def test_async_setup_entry_success(mock_hass, mock_entry):
         )
 
 
+@pytest.mark.asyncio
+async def test_async_setup_entry_runs_subscriptions_in_background(
+    mock_hass, mock_entry
+):
+    """Platforms are forwarded without waiting on push/alarm subscription setup,
+    and both subscriptions are started concurrently."""
+    import asyncio
+
+    release = asyncio.Event()
+    started: list[str] = []
+
+    async def _slow_setup(name):
+        started.append(name)
+        await release.wait()
+
+    with (
+        patch(
+            "custom_components.hyxi_cloud.__init__.HyxiDataUpdateCoordinator"
+        ) as mock_coordinator_class,
+        patch("custom_components.hyxi_cloud.__init__.async_get_clientsession"),
+        patch("custom_components.hyxi_cloud.__init__.HyxiApiClient"),
+        patch("custom_components.hyxi_cloud.__init__.dr.async_get"),
+        patch("custom_components.hyxi_cloud.__init__.er.async_get"),
+        patch("custom_components.hyxi_cloud.__init__.async_reload_entry"),
+        patch(
+            "custom_components.hyxi_cloud.__init__._async_setup_push_subscription",
+            new=lambda *_: _slow_setup("push"),
+        ),
+        patch(
+            "custom_components.hyxi_cloud.__init__._async_setup_alarm_subscription",
+            new=lambda *_: _slow_setup("alarm"),
+        ),
+    ):
+        mock_coordinator = mock_coordinator_class.return_value
+        mock_coordinator.async_preload_cache = AsyncMock()
+        mock_coordinator.async_config_entry_first_refresh = AsyncMock()
+        mock_coordinator.engine = None
+        mock_coordinator.data = {"TEST_SN_1": {"metrics": {}}}
+
+        assert await async_setup_entry(mock_hass, mock_entry) is True
+        mock_hass.config_entries.async_forward_entry_setups.assert_called_once()
+
+        await asyncio.sleep(0)
+        assert sorted(started) == ["alarm", "push"]
+        tasks = mock_coordinator.subscription_tasks
+        assert not any(task.done() for task in tasks)
+        # Setup and its monitor run as entry background tasks, so startup
+        # doesn't wait for them and unload cancels them
+        assert mock_entry.async_create_background_task.call_count == 3
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_subscription_setup_timeout_flags_error_without_cancelling():
+    """A subscription still running at the timeout is reported, not cancelled."""
+    import asyncio
+
+    coordinator = MagicMock()
+    coordinator.push_status = "inactive"
+    coordinator.alarm_push_status = "active"
+    entry = MagicMock()
+    entry.entry_id = "test_id"
+
+    hang = asyncio.Event()
+    push_task = asyncio.create_task(hang.wait())
+    alarm_task = asyncio.create_task(asyncio.sleep(0))
+
+    with patch.object(hc_init, "SUBSCRIPTION_SETUP_TIMEOUT", 0.01):
+        await hc_init._async_monitor_subscription_setup(
+            entry, coordinator, push_task, alarm_task
+        )
+
+    assert coordinator.push_status == "error"
+    assert "still running" in coordinator.push_error
+    assert coordinator.alarm_push_status == "active"
+    assert not push_task.cancelled()
+    coordinator.async_update_listeners.assert_called_once()
+
+    hang.set()
+    await push_task
+
+
+@pytest.mark.asyncio
+async def test_async_unload_entry_waits_for_subscription_setup(mock_hass, mock_entry):
+    """Unload lets in-flight subscription setup finish before tearing down."""
+    import asyncio
+
+    finished = []
+
+    async def _setup():
+        await asyncio.sleep(0)
+        finished.append(True)
+
+    mock_coordinator = MagicMock()
+    mock_coordinator.protection_controllers = {}
+    mock_coordinator.engine = None
+    mock_coordinator.subscription_tasks = [asyncio.create_task(_setup())]
+    mock_hass.data[DOMAIN] = {mock_entry.entry_id: mock_coordinator}
+
+    assert await async_unload_entry(mock_hass, mock_entry) is True
+    assert finished == [True]
+
+
 @pytest.mark.asyncio
 async def test_async_setup_entry_uses_shared_session_not_owned(mock_hass, mock_entry):
     """The integration must never own its aiohttp session.
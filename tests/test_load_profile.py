@@ -0,0 +1,133 @@
+"""Tests for the hour-of-week household load profile."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+from custom_components.hyxi_cloud.load_profile import HOURS_PER_WEEK, LoadProfile
+
+MONDAY = datetime(2026, 6, 1, tzinfo=UTC)
+
+
+def _hour(profile: LoadProfile, start: datetime, loads: list[float]) -> None:
+    """Add samples spread evenly over the hour starting at start."""
+    for i, load in enumerate(loads):
+        profile.add(start + timedelta(seconds=i * 3600 / len(loads)), load)
+
+
+def test_buckets_by_hour_of_week():
+    """Monday 00:00 is bucket 0, Sunday 23:00 the last one."""
+    assert LoadProfile.bucket(MONDAY) == 0
+    assert LoadProfile.bucket(MONDAY + timedelta(days=2, hours=7)) == 55
+    assert LoadProfile.bucket(MONDAY - timedelta(hours=1)) == HOURS_PER_WEEK - 1
+
+
+def test_hour_mean_folds_in_when_the_hour_ends():
+    """The hour's mean lands in its bucket; later weeks are weighted in."""
+    profile = LoadProfile()
+    _hour(profile, MONDAY, [200, 400])
+    assert profile.expected(MONDAY) is None
+    assert profile.add(MONDAY + timedelta(hours=1), 0)
+    assert profile.expected(MONDAY) == 300
+
+    for week in range(1, 5):
+        _hour(profile, MONDAY + timedelta(weeks=week), [600])
+        profile.add(MONDAY + timedelta(weeks=week, hours=1), 0)
+    # 300, then 600 at 1/2, 1/3, 1/4 and (capped) 1/4
+    assert profile.expected(MONDAY) == pytest.approx(
+        600 - 300 / 2 * 2 / 3 * 3 / 4 * 3 / 4
+    )
+    # Invalid samples are ignored
+    assert not profile.add(MONDAY, float("nan"))
+    assert not profile.add(MONDAY, -5)
+
+
+def test_hour_mean_weights_samples_by_how_long_they_held():
+    """A burst of readings doesn't outweigh a quiet stretch of the hour."""
+    profile = LoadProfile()
+    # 300 W for 15 min, then a 100-reading burst at 2000 W over 100 s,
+    # then 300 W again until the next sample 15 min later
+    profile.add(MONDAY, 300)
+    for i in range(100):
+        profile.add(MONDAY + timedelta(seconds=900 + i), 2000)
+    profile.add(MONDAY + timedelta(seconds=1000), 300)
+    profile.add(MONDAY + timedelta(seconds=1900), 300)
+    profile.add(MONDAY + timedelta(hours=1), 0)
+    # Held: 300 W for 900 + 900 + 900 s (the last up to MAX_HOLD), 2000 W
+    # for 100 s, against a per-reading mean near 1900 W
+    assert profile.expected(MONDAY) == pytest.approx((300 * 2700 + 2000 * 100) / 2800)
+
+
+def test_running_quantiles_track_the_samples():
+    """Median and 90th percentile converge on a skewed load."""
+    profile = LoadProfile()
+    loads = [300] * 8 + [2000] * 2  # A kettle 20% of the time
+    _hour(profile, MONDAY, loads * 300)
+    profile.add(MONDAY + timedelta(hours=1), 0)
+    p50, p90 = profile.quantiles(MONDAY)
+    assert p50 == pytest.approx(300, abs=40)
+    # Within a quantile step of the kettle, either side
+    assert p90 == pytest.approx(2000, abs=50)
+    assert profile.quantiles(MONDAY + timedelta(hours=5)) is None
+
+
+def test_energy_integrates_learned_hours_and_fallback():
+    """Learned hours count at their mean, the others at the fallback."""
+    profile = LoadProfile()
+    _hour(profile, MONDAY + timedelta(hours=1), [1000])
+    profile.add(MONDAY + timedelta(hours=2), 0)
+    start = MONDAY + timedelta(minutes=30)
+    end = start + timedelta(hours=2)
+    # 0.5 h at 400 + 1 h at 1000 + 0.5 h at 400
+    assert profile.energy_wh(start, end, 400) == pytest.approx(1400)
+
+
+def test_storage_round_trip_and_bad_data():
+    """The flat stored list restores the profile; bad data starts empty."""
+    profile = LoadProfile()
+    _hour(profile, MONDAY, [123.4])
+    profile.add(MONDAY + timedelta(hours=1), 0)
+    data = profile.as_dict()
+    assert len(data["buckets"]) == HOURS_PER_WEEK * 4
+
+    restored = LoadProfile.from_dict(data)
+    assert restored.expected(MONDAY) == pytest.approx(123.4)
+    assert restored.as_diagnostics() == {
+        "hours_learned": 1,
+        "mean_load_by_weekday": {0: 123},
+    }
+    for bad in (None, {}, {"buckets": [1, 2]}, {"buckets": ["x"] * 672}):
+        assert LoadProfile.from_dict(bad).expected(MONDAY) is None
+    assert LoadProfile.from_dict({"buckets": [-1.0] * 672}).as_diagnostics() == {
+        "hours_learned": 0,
+        "mean_load_by_weekday": {},
+    }
+
+
+async def test_engine_learns_and_warm_starts_the_profile():
+    """P1 samples feed the profile, which is saved and restored."""
+    stored = LoadProfile()
+    _hour(stored, MONDAY, [450])
+    stored.add(MONDAY + timedelta(hours=1), 0)
+
+    coordinator = MagicMock()
+    coordinator.data = {"SN1": {"metrics": {"home_load": 800}}}
+    store = MagicMock()
+    store.async_load = AsyncMock(return_value=stored.as_dict())
+    store.async_save = AsyncMock()
+    engine = EnergyManagerEngine(
+        MagicMock(), coordinator, EMEntityConfig(sn="SN1", p1_entity="")
+    )
+    with patch("custom_components.hyxi_cloud.engine.Store", return_value=store):
+        await engine._async_load_profile()
+    assert engine.load_profile.expected(MONDAY) == 450
+
+    with patch("homeassistant.util.dt.now", return_value=MONDAY + timedelta(hours=2)):
+        engine._learn_load(-300)
+    with patch("homeassistant.util.dt.now", return_value=MONDAY + timedelta(hours=3)):
+        engine._learn_load(-300)
+    # The inverter's home load is learned, not the (exporting) P1
+    assert engine.load_profile.expected(MONDAY + timedelta(hours=2)) == 800
+    store.async_delay_save.assert_called_once()
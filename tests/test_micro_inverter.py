@@ -160,6 +160,31 @@ def test_microinverter_sum_sensor_aggregates_across_devices(
     assert sensor.native_value == 40.5  # 18.0 + 22.5, SN_MICRO_3/SN_HYBRID excluded
 
 
+def test_microinverter_sum_sensor_exposes_fleet_stats(
+    multi_micro_inverter_coordinator,
+):
+    """Count, mean, min and max come from the same aggregate pass and are
+    kept out of the recorder."""
+    entry = MagicMock()
+    entry.entry_id = "entry123"
+    description = MagicMock()
+    description.key = "micro_ac_power_total"
+
+    sensor = sensor_mod.HyxiMicroinverterSumSensor(
+        multi_micro_inverter_coordinator, entry, "acP", description
+    )
+
+    assert sensor._attr_extra_state_attributes == {
+        "count": 2,
+        "mean": 20.25,
+        "minimum": 18.0,
+        "maximum": 22.5,
+    }
+    assert set(sensor._attr_extra_state_attributes) == set(
+        sensor._unrecorded_attributes
+    )
+
+
 def test_microinverter_sum_sensor_daily_yield(multi_micro_inverter_coordinator):
     """Verify aggregation also works for the daily-yield metric key."""
     entry = MagicMock()
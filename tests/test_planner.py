@@ -0,0 +1,155 @@
+"""Tests for the day-ahead battery schedule planner."""
+
+import dataclasses
+from datetime import UTC, datetime, timedelta
+
+from custom_components.hyxi_cloud.planner import (
+    PlanParams,
+    SchedulePlanner,
+    Slot,
+    forecast_series,
+    forecast_slots,
+)
+
+T0 = datetime(2026, 6, 1, 10, tzinfo=UTC)
+
+PARAMS = PlanParams(
+    soc_min=20,
+    soc_max=90,
+    target_soc=50,
+    capacity_wh=10000,
+    max_charge=3000,
+    max_discharge=3000,
+)
+
+
+def _slots(solar: list[float], load: float = 500) -> list[Slot]:
+    return [
+        Slot(T0 + timedelta(hours=i), 1.0, watts, load) for i, watts in enumerate(solar)
+    ]
+
+
+def test_forecast_series_formats():
+    """Open-Meteo/Forecast.Solar watts maps and Solcast period lists."""
+    watts = {
+        "watts": {"2026-06-01T11:00:00+00:00": 800, "2026-06-01T10:00:00+00:00": 500}
+    }
+    assert forecast_series(watts) == [(T0, 500.0), (T0 + timedelta(hours=1), 800.0)]
+
+    solcast = {
+        "detailedForecast": [
+            {"period_start": T0, "pv_estimate": 1.2},
+            {"period_start": "2026-06-01T10:30:00+00:00", "pv_estimate": "1.5"},
+            {"period_start": "not a time", "pv_estimate": 1},
+            {"period_start": datetime(2026, 6, 1, 11), "pv_estimate": 1},
+            {"period_start": T0, "pv_estimate": None},
+        ]
+    }
+    assert forecast_series(solcast) == [
+        (T0, 1200.0),
+        (T0 + timedelta(minutes=30), 1500.0),
+    ]
+    assert forecast_series({"watts": "x", "friendly_name": "Solar"}) == []
+
+
+def test_forecast_slots_cut_at_sunset():
+    """Past slots drop out, the current one counts in full, sunset cuts."""
+    series = [(T0 + timedelta(minutes=30 * i), 100.0 * i) for i in range(8)]
+    now = T0 + timedelta(minutes=40)
+    sunset = T0 + timedelta(minutes=150)
+    slots = forecast_slots(series, now, sunset, lambda start: start.minute)
+    assert slots == [
+        Slot(T0 + timedelta(minutes=30), 0.5, 100.0, 30),
+        Slot(T0 + timedelta(minutes=60), 0.5, 200.0, 0),
+        Slot(T0 + timedelta(minutes=90), 0.5, 300.0, 30),
+        Slot(T0 + timedelta(minutes=120), 0.5, 400.0, 0),
+    ]
+    assert forecast_slots(series[:1], now, sunset, lambda _: 0) == [
+        Slot(T0, 1.0, 0.0, 0)
+    ]
+
+
+def test_plan_charges_from_surplus_and_discharges_when_safe():
+    """Plenty of sun: discharge into the deficit, store every surplus."""
+    schedule = SchedulePlanner().plan(PARAMS, _slots([0, 3500, 3500, 0]), soc=60)
+    assert schedule.power == (-500, 3000, 500, -500)
+    assert schedule.soc == (55, 85, 90, 85)
+    assert schedule.reaches_target
+
+
+def test_plan_holds_the_battery_when_short():
+    """Not enough sun: hold the battery rather than end below the target."""
+    schedule = SchedulePlanner().plan(PARAMS, _slots([0, 0, 1500, 0]), soc=45)
+    assert schedule.power == (0, 0, 1000, -500)
+    assert schedule.soc[-1] == 50
+    assert schedule.reaches_target
+
+    schedule = SchedulePlanner().plan(PARAMS, _slots([0, 0, 0]), soc=45)
+    assert schedule.power == (0, 0, 0)
+    assert not schedule.reaches_target
+
+
+def test_plan_recomputes_only_changed_slots():
+    """Unchanged tail slots reuse their tables; new params start over."""
+    planner = SchedulePlanner()
+    slots = _slots([0, 1000, 2000, 3000, 2000, 1000, 0])
+    first = planner.plan(PARAMS, slots, soc=50)
+    assert planner.recomputed == 7
+
+    # Same inputs, new SOC: only the forward pass runs
+    planner.plan(PARAMS, slots, soc=40)
+    assert planner.recomputed == 0
+    # Time moves on a slot
+    later = planner.plan(PARAMS, slots[1:], soc=first.soc[0])
+    assert later.power == first.power[1:]
+    assert planner.recomputed == 0
+    # The forecast for one slot changes
+    changed = [*slots[:3], slots[3]._replace(solar=500), *slots[4:]]
+    planner.plan(PARAMS, changed, soc=50)
+    assert planner.recomputed == 4
+    planner.plan(dataclasses.replace(PARAMS, target_soc=60), changed, soc=50)
+    assert planner.recomputed == 7
+
+
+def test_engine_plan_reuses_tables_across_ticks_with_a_learned_profile():
+    """The night target moves every tick; the plan's tables don't."""
+    from unittest.mock import MagicMock, patch
+
+    from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+    from custom_components.hyxi_cloud.load_profile import LoadProfile
+
+    engine = EnergyManagerEngine(
+        MagicMock(), MagicMock(), EMEntityConfig(sn="SN1", p1_entity="")
+    )
+    # A learned evening, so the night estimate changes from tick to tick
+    profile = LoadProfile()
+    for hour in range(17, 24):
+        start = T0.replace(hour=hour)
+        profile.add(start, 300 + 40 * hour)
+        profile.add(start + timedelta(minutes=59), 300 + 40 * hour)
+    profile.add(T0 + timedelta(hours=14), 0)
+    engine._load_profile = profile
+    series = [(T0 + timedelta(hours=i), 3000.0 - 300 * i) for i in range(10)]
+
+    targets = []
+    with (
+        patch.object(engine, "_find_entity_id", return_value=None),
+        patch.object(engine, "_get_battery_capacity", return_value=10000),
+        patch.object(engine, "_is_night", return_value=False),
+        patch.object(engine, "_hours_until_sunrise", return_value=10.0),
+        patch.object(engine, "_next_setting", return_value=T0 + timedelta(hours=9)),
+        patch.object(engine, "_forecast_series", return_value=series),
+        patch("homeassistant.util.dt.as_local", side_effect=lambda when: when),
+    ):
+        for tick in range(3):
+            now = T0 + timedelta(hours=7, seconds=15 * tick)
+            with (
+                patch("homeassistant.util.dt.now", return_value=now),
+                patch("homeassistant.util.dt.utcnow", return_value=now),
+            ):
+                target = engine._soc_needed_for_night()
+                targets.append(target)
+                assert engine._battery_schedule(target) is not None
+            if tick:
+                assert engine._planner.recomputed == 0
+    assert len(set(targets)) == 3
@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from custom_components.hyxi_cloud.command_budget import CommandBudget
 from custom_components.hyxi_cloud.protection import HyxiBatteryProtectionController
 
 
@@ -26,6 +27,7 @@ class FakeCoordinator:
             set_peak_shaving=AsyncMock(),
         )
         self.async_request_refresh = AsyncMock()
+        self.command_budget = CommandBudget()
 
     def async_add_listener(self, listener):
         """Return a no-op unsubscribe callback."""
@@ -466,6 +468,8 @@ async def test_ensure_mode_three_phase_actions():
     controller._coordinator.client.set_mode_self_consume.assert_awaited_once_with(
         "SN123"
     )
+    # Safety commands count against the budget but are never refused
+    assert controller._coordinator.command_budget.granted["SN123"] == 4
 
 
 @pytest.mark.asyncio
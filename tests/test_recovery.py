@@ -0,0 +1,156 @@
+"""Tests for the staged recovery from stale cloud data."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.hyxi_cloud import recovery
+from custom_components.hyxi_cloud.recovery import StaleDataRecovery
+
+STALE = datetime(2026, 6, 1, 12, tzinfo=UTC)
+
+
+def _setup(fresh_after: int | None):
+    """A recovery whose coordinator polls fresh data on refresh number n."""
+    hass = MagicMock()
+    hass.async_create_task = lambda coro, _name=None: asyncio.ensure_future(coro)
+    hass.config_entries.async_reload = AsyncMock()
+    coordinator = MagicMock()
+    coordinator.push_enabled = False
+    coordinator.hyxi_metadata = {"last_success": STALE}
+    refreshes = 0
+
+    async def refresh():
+        nonlocal refreshes
+        refreshes += 1
+        if refreshes == fresh_after:
+            coordinator.hyxi_metadata["last_success"] = STALE + timedelta(minutes=20)
+
+    coordinator.async_refresh = AsyncMock(side_effect=refresh)
+    return hass, coordinator, StaleDataRecovery(hass, coordinator)
+
+
+def _counts(stats: dict, key: str) -> dict:
+    return {stage: counters[key] for stage, counters in stats["stages"].items()}
+
+
+async def test_refresh_alone_recovers():
+    """A refresh that brings fresh data stops the recovery there."""
+    hass, _coordinator, stale = _setup(fresh_after=1)
+    assert await stale.async_recover(900)
+    stats = stale.as_diagnostics()
+    assert stats["last_stage"] == "refresh"
+    assert _counts(stats, "recovered") == {
+        "refresh": 1,
+        "reconnect": 0,
+        "resubscribe": 0,
+        "reload": 0,
+    }
+    assert stats["stages"]["refresh"]["last_ms"] is not None
+    hass.config_entries.async_reload.assert_not_awaited()
+
+
+async def test_reconnect_replaces_the_client():
+    """A failed refresh escalates to a new client with a new token."""
+    _hass, coordinator, stale = _setup(fresh_after=2)
+    old_client = coordinator.client
+    with patch.object(recovery, "HyxiApiClient") as client_cls:
+        client_cls.return_value._refresh_token = AsyncMock(return_value=True)
+        assert await stale.async_recover(900)
+    assert coordinator.client is client_cls.return_value
+    assert coordinator.client is not old_client
+    stats = stale.as_diagnostics()
+    assert _counts(stats, "failed")["refresh"] == 1
+    assert _counts(stats, "recovered")["reconnect"] == 1
+
+
+async def test_reload_is_the_last_resort():
+    """Without push, resubscribing is skipped and the entry reloads."""
+    hass, coordinator, stale = _setup(fresh_after=None)
+    coordinator.entry.entry_id = "entry1"
+    with (
+        patch.object(recovery, "HyxiApiClient") as client_cls,
+        patch.object(recovery.persistent_notification, "async_create") as notify,
+    ):
+        # The token is refused: the reconnect fails without polling
+        client_cls.return_value._refresh_token = AsyncMock(return_value=False)
+        assert await stale.async_recover(900)
+    hass.config_entries.async_reload.assert_awaited_once_with("entry1")
+    notify.assert_called_once()
+    assert coordinator.async_refresh.await_count == 1
+    stats = stale.as_diagnostics()
+    assert _counts(stats, "attempts") == {
+        "refresh": 1,
+        "reconnect": 1,
+        "resubscribe": 0,
+        "reload": 1,
+    }
+    assert stats["stages"]["resubscribe"]["skipped"] == 1
+
+
+async def test_stage_timeout_escalates_without_cancelling():
+    """A hanging stage is left running and the next one is tried."""
+    hass, coordinator, stale = _setup(fresh_after=None)
+    release = asyncio.Event()
+    coordinator.async_refresh = AsyncMock(side_effect=release.wait)
+    timeouts = dict.fromkeys(recovery.STAGE_TIMEOUTS, 0.01)
+    with (
+        patch.dict(recovery.STAGE_TIMEOUTS, timeouts),
+        patch.object(recovery, "HyxiApiClient") as client_cls,
+        patch.object(recovery.persistent_notification, "async_create"),
+    ):
+        client_cls.return_value._refresh_token = AsyncMock(return_value=True)
+        recovering = asyncio.ensure_future(stale.async_recover(900))
+        await asyncio.sleep(0)
+        # Only one recovery at a time
+        assert stale.running
+        assert not await stale.async_recover(900)
+        assert await recovering
+    release.set()
+    await asyncio.sleep(0)
+    stats = stale.as_diagnostics()
+    assert _counts(stats, "timeouts")["refresh"] == 1
+    assert _counts(stats, "timeouts")["reconnect"] == 1
+    assert _counts(stats, "recovered")["reload"] == 1
+    hass.config_entries.async_reload.assert_awaited_once()
+
+
+async def test_reload_waits_for_a_running_resubscribe():
+    """A reload never overlaps a resubscribe that is still running."""
+    hass, coordinator, stale = _setup(fresh_after=None)
+    coordinator.push_enabled = True
+    release = asyncio.Event()
+
+    async def resubscribe():
+        await release.wait()
+        return False
+
+    stale._async_resubscribe = resubscribe
+    timeouts = dict.fromkeys(recovery.STAGE_TIMEOUTS, 0.01)
+    with (
+        patch.dict(recovery.STAGE_TIMEOUTS, timeouts),
+        patch.object(recovery, "HyxiApiClient") as client_cls,
+        patch.object(recovery.persistent_notification, "async_create"),
+    ):
+        client_cls.return_value._refresh_token = AsyncMock(return_value=False)
+        # Resubscribe outlasts its timeout and the reload's wait for it
+        assert not await stale.async_recover(900)
+        hass.config_entries.async_reload.assert_not_awaited()
+        stats = stale.as_diagnostics()
+        assert _counts(stats, "timeouts")["resubscribe"] == 1
+        assert stats["stages"]["reload"]["skipped"] == 1
+
+        # Still running: not started again, and the reload is put off again
+        assert not await stale.async_recover(900)
+        stats = stale.as_diagnostics()
+        assert _counts(stats, "attempts")["resubscribe"] == 1
+        assert stats["stages"]["resubscribe"]["skipped"] == 1
+
+        # Once it has finished, the next recovery may reload
+        release.set()
+        await asyncio.sleep(0)
+        assert await stale.async_recover(900)
+    hass.config_entries.async_reload.assert_awaited_once()
+    stats = stale.as_diagnostics()
+    assert _counts(stats, "attempts")["resubscribe"] == 2
+    assert _counts(stats, "recovered")["reload"] == 1
@@ -0,0 +1,125 @@
+"""Tests for the event-driven decision scheduler."""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.hyxi_cloud.engine import EMEntityConfig, EnergyManagerEngine
+from custom_components.hyxi_cloud.scheduler import MIN_GAP, DecisionScheduler
+
+
+def _decide(scheduler: DecisionScheduler, now: float, **inputs: float) -> None:
+    """Run one settled decision that sent no commands."""
+    scheduler.begin(now, **inputs)
+    scheduler.finish(now, sent=False, busy=False)
+
+
+def test_first_tick_decides_then_ticks_idle():
+    """Without changes, ticks skip until the idle net runs out."""
+    scheduler = DecisionScheduler(max_idle=60)
+    assert scheduler.due(0)
+    _decide(scheduler, 0, p1=100, soc=50)
+    assert not scheduler.due(15)
+    assert not scheduler.due(45)
+    assert scheduler.due(60)
+    assert scheduler.skipped == 2
+    assert scheduler.triggers == {"start": 1, "idle": 1}
+
+
+def test_inputs_trigger_beyond_their_deadband():
+    """Changes within the deadband are ignored; a crossing asks once."""
+    scheduler = DecisionScheduler(max_idle=60)
+    _decide(scheduler, 0, p1=100, soc=50, solar=0)
+    assert not scheduler.observe("p1", 240, 1)
+    assert not scheduler.observe("soc", 50.5, 1)
+    assert scheduler.ignored == 2
+    assert not scheduler.pending
+
+    assert scheduler.observe("soc", 49, 2)
+    # Already pending: a second crossing doesn't ask again
+    assert not scheduler.observe("p1", 2000, 3)
+    assert scheduler.pending
+    assert scheduler.due(4)
+    assert scheduler.triggers == {"soc": 1}
+
+    # The next decision's inputs become the reference
+    _decide(scheduler, 4, p1=2000, soc=49, solar=0)
+    assert not scheduler.pending
+    assert not scheduler.observe("p1", 2100, 5)
+    # An input no decision has seen yet always asks
+    assert scheduler.observe("home_load", 0, 6)
+
+
+def test_busy_decision_keeps_ticking():
+    """A decision that sent commands is followed up by the next tick."""
+    scheduler = DecisionScheduler(max_idle=60)
+    scheduler.begin(0, soc=50)
+    scheduler.finish(0, sent=True, busy=True)
+    assert scheduler.due(15)
+    scheduler.begin(15, soc=50)
+    scheduler.finish(15, sent=False, busy=False)
+    assert not scheduler.due(30)
+    assert scheduler.triggers == {"busy": 1}
+
+
+def test_latency_counts_from_the_change_to_the_command():
+    """Only decisions asked for by a change and sending a command count."""
+    scheduler = DecisionScheduler(max_idle=60)
+    assert scheduler.wait(0) == 0
+    scheduler.request("param", 10.0)
+    scheduler.begin(10.5)
+    scheduler.finish(11.0, sent=True, busy=True)
+    # A timer follow-up sends a command but has no change to measure from
+    scheduler.begin(25.0)
+    scheduler.finish(25.2, sent=True, busy=False)
+    scheduler.request("p1", 30.0)
+    scheduler.begin(30.0)
+    scheduler.finish(30.2, sent=True, busy=False)
+
+    assert scheduler.wait(32.0) == pytest.approx(MIN_GAP - 2.0)
+    assert scheduler.as_diagnostics() == {
+        "decisions": 3,
+        "skipped_ticks": 0,
+        "ignored_changes": 0,
+        "triggers": {"param": 1, "p1": 1},
+        "latency_last_ms": 200,
+        "latency_max_ms": 1000,
+        "latency_mean_ms": 600,
+    }
+
+
+def test_diagnostics_before_any_command():
+    """No latency is reported until a decision sent a command."""
+    diagnostics = DecisionScheduler(max_idle=60).as_diagnostics()
+    assert diagnostics["latency_last_ms"] is None
+    assert diagnostics["latency_mean_ms"] is None
+
+
+def test_engine_decides_on_changes_within_the_minimum_gap():
+    """Crossings run a decision now, or once the minimum gap has passed."""
+    hass = MagicMock()
+    coordinator = MagicMock()
+    coordinator.data = {"SN1": {"metrics": {"batSoc": 50, "ppv": 0}}}
+    engine = EnergyManagerEngine(
+        hass, coordinator, EMEntityConfig(sn="SN1", p1_entity="sensor.p1")
+    )
+    engine._enabled = True
+    with patch("custom_components.hyxi_cloud.engine.async_call_later") as call_later:
+        # Nothing decided yet: the first reading runs a decision right away
+        engine._on_coordinator_update()
+        hass.async_create_task.assert_called_once()
+        hass.async_create_task.call_args.args[0].close()
+        call_later.assert_not_called()
+
+        # Decided just now: the next crossing waits for the gap
+        engine._scheduler.begin(time.monotonic(), soc=50, solar=0, home_load=0)
+        coordinator.data["SN1"]["metrics"]["batSoc"] = 48
+        engine._on_coordinator_update()
+        call_later.assert_called_once()
+        assert 0 < call_later.call_args.args[1] <= MIN_GAP
+
+        # The pending decision covers a parameter edit too
+        engine._on_param_change(MagicMock(data={"new_state": MagicMock(state="1")}))
+        call_later.assert_called_once()
+    assert engine.scheduler_stats["triggers"] == {"soc": 2}
@@ -3,7 +3,7 @@
 import importlib
 import sys
 import unittest
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from typing import Any
 from unittest.mock import MagicMock
 
@@ -124,7 +124,16 @@ import custom_components.hyxi_cloud.sensor as sensor_mod
 
 importlib.reload(sensor_mod)
 
-from custom_components.hyxi_cloud.const import DOMAIN
+from custom_components.hyxi_cloud.const import (
+    CONF_ENABLE_PUSH,
+    CONF_OUTLIER_FILTER,
+    CONF_PUSH_STATUS_INTERVAL,
+    CONF_THROTTLE_POWER_DEADBAND,
+    CONF_WRITE_THROTTLE,
+    DOMAIN,
+)
+from custom_components.hyxi_cloud.downsample import PushDownsampler
+from custom_components.hyxi_cloud.throttle import WriteThrottleStats
 
 
 @pytest.fixture
@@ -265,6 +274,36 @@ async def test_async_setup_entry_adds_microinverter_summary(mock_entry):
     assert micro_sum_sensors["micro_daily_yield_total"].native_value == 7.8
 
 
+@pytest.mark.asyncio
+async def test_async_setup_entry_adds_battery_summary_for_multiple_inverters(
+    mock_entry,
+):
+    """Two or more battery-capable inverters get a batteries summary."""
+    coord = MagicMock()
+    coord.data = {
+        "H1": {"deviceCode": "1", "metrics": {"batSoc": "40", "batP": "-500"}},
+        "H2": {"deviceCode": "1", "metrics": {"batSoc": "60", "batP": "1500"}},
+    }
+    hass = MagicMock()
+    hass.data = {DOMAIN: {mock_entry.entry_id: coord}}
+    async_add_entities = MagicMock()
+
+    with unittest.mock.patch(
+        "custom_components.hyxi_cloud.sensor.is_battery_control_enabled",
+        return_value=False,
+    ):
+        await sensor_mod.async_setup_entry(hass, mock_entry, async_add_entities)
+
+    summary = {
+        e.entity_description.key: e
+        for e in async_add_entities.call_args[0][0]
+        if isinstance(e, sensor_mod.HyxiFleetAggregateSensor)
+    }
+    assert set(summary) == {"batteries_soc_mean", "batteries_power_total"}
+    assert summary["batteries_soc_mean"].native_value == 50.0
+    assert summary["batteries_power_total"].native_value == 1000.0
+
+
 def test_microinverter_sum_sensor_skips_unparseable_values():
     """Test a non-numeric metric value on one microinverter is skipped rather
     than aborting the sum for the rest."""
@@ -418,6 +457,58 @@ def test_hyxi_sensor_parsing_int():
     assert sensor.native_value == 96  # Rounded and int cast
 
 
+def test_entity_plan_is_shared_across_identical_devices():
+    """Devices with the same signature reuse one compiled plan."""
+    sensor_mod._compile_entity_plan.cache_clear()
+    keys = frozenset({"acP", "acE"})
+    plan = sensor_mod._compile_entity_plan("micro_inverter", "single_phase", keys)
+    again = sensor_mod._compile_entity_plan(
+        "micro_inverter", "single_phase", frozenset({"acE", "acP"})
+    )
+    assert again is plan
+    assert sensor_mod._compile_entity_plan.cache_info().misses == 1
+
+    plan_keys = {entry.description.key for entry in plan}
+    assert {"acP", "acE", "device_type", "gridF"} <= plan_keys
+    assert "ph2v" not in plan_keys
+    assert "batSoc" not in plan_keys
+
+
+def test_entity_plan_signature_differences():
+    """Phase type and device type change the compiled key set."""
+    three = sensor_mod._compile_entity_plan(
+        "hybrid_inverter", "three_phase", frozenset()
+    )
+    keys = {entry.description.key for entry in three}
+    assert {"ph2v", "ph3p"} <= keys
+    assert "batSoc" in keys
+    assert all(
+        entry.battery_scoped == (entry.description.key in sensor_mod.BATTERY_SENSORS)
+        for entry in three
+    )
+
+    collector = sensor_mod._compile_entity_plan(
+        "collector", None, frozenset({"batSoc"})
+    )
+    assert "batSoc" not in {entry.description.key for entry in collector}
+
+
+def test_hyxi_sensor_uses_plan_entry():
+    """A plan entry supplies the parser, naming and battery SN scoping."""
+    coord = MagicMock()
+    coord.data = {
+        "SN1": {"deviceCode": "1", "metrics": {"batSoc": "50", "batSn": "BAT9"}}
+    }
+    plan = sensor_mod._compile_entity_plan("hybrid_inverter", None, frozenset())
+    entry = next(e for e in plan if e.description.key == "batSoc")
+
+    sensor = sensor_mod.HyxiSensor(coord, "SN1", entry.description, entry)
+    assert sensor._attr_unique_id == "hyxi_BAT9_batSoc"
+    assert sensor.entity_id == "sensor.hyxi_BAT9_batsoc"
+    assert sensor._device_type == "hybrid_inverter"
+    assert sensor._parser_func == sensor._parse_int_sensor
+
+
 def test_fallback_micro_inverter():
     """Test acE falling back to efpv for micro inverters."""
     coord = MagicMock()
@@ -457,8 +548,108 @@ def test_subscription_status_sensor(mock_coordinator, mock_entry):
     assert sensor.native_value == "error"
 
 
-def test_hyxi_sensor_extra_state_attributes():
-    """Test HyxiSensor.extra_state_attributes exposes the coordinator's metadata."""
+def test_subscription_status_sensor_skips_unchanged_writes(
+    mock_coordinator, mock_entry
+):
+    """A push that changes nothing about the subscriptions writes no state."""
+    sensor = sensor_mod.HyxiSubscriptionStatusSensor(mock_coordinator, mock_entry)
+
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ) as write:
+        sensor._handle_coordinator_update()
+        mock_coordinator.last_push_received = datetime(2026, 3, 11, 11, 56, tzinfo=UTC)
+        sensor._handle_coordinator_update()
+        assert write.call_count == 1
+
+        mock_coordinator.push_error = "boom"
+        sensor._handle_coordinator_update()
+        assert write.call_count == 2
+
+
+def test_last_push_sensor_rate_limits_writes(mock_coordinator, mock_entry):
+    """The push timestamp is written at most once per configured interval."""
+    mock_entry.options = {CONF_PUSH_STATUS_INTERVAL: 60}
+    mock_coordinator.last_update_success = True
+    start = mock_coordinator.last_push_received
+    sensor = sensor_mod.HyxiLastDataPushSensor(mock_coordinator, mock_entry)
+    assert sensor.native_value == start
+    assert sensor._attr_unique_id == "test_entry_last_data_push"
+
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ) as write:
+        # First update writes (availability not yet reported)
+        sensor._handle_coordinator_update()
+        assert write.call_count == 1
+
+        mock_coordinator.last_push_received = start + timedelta(seconds=30)
+        sensor._handle_coordinator_update()
+        assert write.call_count == 1
+        assert sensor.native_value == start
+
+        mock_coordinator.last_push_received = start + timedelta(seconds=61)
+        sensor._handle_coordinator_update()
+        assert write.call_count == 2
+        assert sensor.native_value == start + timedelta(seconds=61)
+
+        # Availability changes are always written
+        mock_coordinator.last_update_success = False
+        sensor._handle_coordinator_update()
+        assert write.call_count == 3
+
+
+def test_last_alarm_push_sensor_zero_interval(mock_coordinator, mock_entry):
+    """An interval of 0 writes every new alarm push timestamp."""
+    mock_entry.options = {CONF_PUSH_STATUS_INTERVAL: 0}
+    mock_coordinator.alarm_last_push_received = None
+    mock_coordinator.last_update_success = True
+    sensor = sensor_mod.HyxiLastAlarmPushSensor(mock_coordinator, mock_entry)
+    assert sensor.native_value is None
+
+    stamp = datetime(2026, 3, 11, 12, 0, tzinfo=UTC)
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ) as write:
+        for offset in range(3):
+            mock_coordinator.alarm_last_push_received = stamp + timedelta(
+                seconds=offset
+            )
+            sensor._handle_coordinator_update()
+        assert write.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_async_setup_entry_adds_push_timestamp_sensors(
+    mock_coordinator, mock_entry
+):
+    """Push timestamp sensors are only created when push is enabled."""
+    hass = MagicMock()
+    hass.data = {DOMAIN: {mock_entry.entry_id: mock_coordinator}}
+    mock_entry.options = {CONF_ENABLE_PUSH: True}
+    async_add_entities = MagicMock()
+
+    with unittest.mock.patch(
+        "custom_components.hyxi_cloud.sensor.is_battery_control_enabled",
+        return_value=False,
+    ):
+        await sensor_mod.async_setup_entry(hass, mock_entry, async_add_entities)
+
+    entities = async_add_entities.call_args[0][0]
+    push_sensors = [e for e in entities if isinstance(e, sensor_mod.HyxiLastPushSensor)]
+    assert {e._attr_translation_key for e in push_sensors} == {
+        "last_data_push",
+        "last_alarm_push",
+    }
+
+
+def test_hyxi_sensor_has_no_poll_metadata_attributes():
+    """Metric sensors no longer carry the coordinator's per-poll metadata.
+
+    last_success changes every poll, so attaching it to every metric sensor
+    wrote a new recorder row per sensor per poll even when values were
+    unchanged. It now lives on the health entities only.
+    """
     coord = MagicMock()
     coord.data = {"SN1": {"deviceCode": "1", "metrics": {"batSoc": "50"}}}
     coord.hyxi_metadata = {"api_status": "Online", "last_attempts": 1}
@@ -471,8 +662,26 @@ def test_hyxi_sensor_extra_state_attributes():
 
     sensor = sensor_mod.HyxiSensor(coord, "SN1", desc)
 
-    assert sensor.extra_state_attributes is coord.hyxi_metadata
-    assert sensor.extra_state_attributes["api_status"] == "Online"
+    assert "extra_state_attributes" not in vars(sensor_mod.HyxiSensor)
+    assert not getattr(sensor, "_attr_extra_state_attributes", None)
+
+
+def test_health_sensor_exposes_poll_metadata(mock_coordinator, mock_entry):
+    """HyxiLastUpdateSensor carries the poll metadata as attributes."""
+    mock_coordinator.hyxi_metadata.update(
+        api_status="Degraded", last_attempts=2, last_error="x", cache_active=True
+    )
+    sensor = sensor_mod.HyxiLastUpdateSensor(mock_coordinator, mock_entry)
+    assert sensor._attr_extra_state_attributes == {
+        "api_status": "Degraded",
+        "last_attempts": 2,
+        "last_error": "x",
+        "cache_active": True,
+    }
+
+    mock_coordinator.hyxi_metadata["api_status"] = "Online"
+    sensor._handle_coordinator_update()
+    assert sensor._attr_extra_state_attributes["api_status"] == "Online"
 
 
 def test_health_sensor_handle_coordinator_update(mock_coordinator, mock_entry):
@@ -497,3 +706,227 @@ def test_subscription_status_sensor_handle_coordinator_update(
     mock_coordinator.push_status = "inactive"
     sensor._handle_coordinator_update()
     assert sensor.native_value == "inactive"
+
+
+def test_hyxi_sensor_write_throttle_suppresses_jitter():
+    """With write throttling on, power jitter within the deadband isn't written."""
+    coord = MagicMock()
+    coord.last_update_success = True
+    coord.options = {CONF_WRITE_THROTTLE: True, CONF_THROTTLE_POWER_DEADBAND: 10}
+    coord.write_stats = WriteThrottleStats()
+    coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": "1000"}}}
+    desc = MagicMock()
+    desc.key = "acP"
+    desc.translation_key = "acp"
+    desc.device_class = "power"
+    desc.state_class = "measurement"
+    sensor = sensor_mod.HyxiSensor(coord, "SN1", desc)
+    assert sensor._throttle is not None
+
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ) as write:
+        for value in ("1000", "1004", "995", "1030"):
+            coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": value}}}
+            sensor._handle_coordinator_update()
+        assert write.call_count == 2
+    assert sensor.native_value == 1030
+    assert coord.write_stats.as_diagnostics()["power"]["suppressed"] == 2
+
+
+def test_hyxi_sensor_not_throttled_by_default():
+    coord = MagicMock()
+    coord.options = {}
+    coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": "1000"}}}
+    desc = MagicMock()
+    desc.key = "acP"
+    desc.translation_key = "acp"
+    desc.device_class = "power"
+    desc.state_class = "measurement"
+    sensor = sensor_mod.HyxiSensor(coord, "SN1", desc)
+    assert sensor._throttle is None
+
+
+def test_hyxi_sensor_outlier_filter_holds_glitch():
+    """With the outlier filter on, a one-sample power glitch isn't shown."""
+    coord = MagicMock()
+    coord.options = {CONF_OUTLIER_FILTER: True}
+    coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": "1000"}}}
+    desc = MagicMock()
+    desc.key = "acP"
+    desc.translation_key = "acp"
+    desc.device_class = "power"
+    desc.state_class = "measurement"
+    desc.native_unit_of_measurement = "W"
+    sensor = sensor_mod.HyxiSensor(coord, "SN1", desc)
+    assert sensor._outlier_filter is not None
+
+    shown = []
+    for value in ("1010", "990", "1005", "995", "64000", "1001"):
+        coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": value}}}
+        sensor._handle_coordinator_update()
+        shown.append(sensor.native_value)
+    assert shown == [1010, 990, 1005, 995, 995, 1001]
+    assert sensor._last_valid_time is None  # only counters read the clock
+
+
+def _local_energy_coordinator(metrics):
+    coord = MagicMock()
+    coord.last_update_success = True
+    coord.data = {"SN1": {"deviceCode": "1", "model": "HYS", "metrics": metrics}}
+    return coord
+
+
+def test_local_energy_sensor_integrates_pushed_power():
+    """Pushed grid import power is integrated on top of the cloud counter."""
+    coord = _local_energy_coordinator(
+        {"grid_import": "1000", "totalEnt": "50.0", "collectTime": 1_700_000_000}
+    )
+    description = next(
+        d
+        for d in sensor_mod.LOCAL_ENERGY_SENSORS
+        if d.key == "grid_import_energy_local"
+    )
+    sensor = sensor_mod.HyxiLocalEnergySensor(coord, "SN1", description)
+    assert sensor.native_value == 50.0
+    assert sensor._attr_unique_id == "hyxi_SN1_grid_import_energy_local"
+
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ) as write:
+        # 1 kW for 36 s is 10 Wh; re-dispatching the same sample adds nothing
+        for _ in range(2):
+            coord.data["SN1"]["metrics"] = {
+                "grid_import": "1000",
+                "totalEnt": "50.0",
+                "collectTime": 1_700_000_036,
+            }
+            sensor._handle_coordinator_update()
+        assert write.call_count == 1
+    assert sensor.native_value == 50.01
+
+
+def test_local_energy_sensor_waits_for_a_counter_that_arrives_after_start():
+    """No total before the first counter, so it never jumps to the lifetime."""
+    coord = _local_energy_coordinator(
+        {"grid_import": "1000", "totalEnt": "--", "collectTime": 1_700_000_000}
+    )
+    description = next(
+        d
+        for d in sensor_mod.LOCAL_ENERGY_SENSORS
+        if d.key == "grid_import_energy_local"
+    )
+    sensor = sensor_mod.HyxiLocalEnergySensor(coord, "SN1", description)
+    assert sensor.native_value is None
+
+    with unittest.mock.patch.object(
+        sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+    ):
+        coord.data["SN1"]["metrics"] = {
+            "grid_import": "1000",
+            "totalEnt": None,
+            "collectTime": 1_700_000_060,
+        }
+        sensor._handle_coordinator_update()
+        assert sensor.native_value is None
+        coord.data["SN1"]["metrics"] = {
+            "grid_import": "1000",
+            "totalEnt": "12345.6",
+            "collectTime": 1_700_000_096,
+        }
+        sensor._handle_coordinator_update()
+    # The first state is the counter (plus the sample integrated on top)
+    assert sensor.native_value == 12345.61
+
+
+def test_local_energy_sensor_shares_the_device_info():
+    """The local sensors register the same device as the metric sensors."""
+    coord = _local_energy_coordinator({"totalE": "9"})
+    coord.device_infos = sensor_mod.DeviceInfoCache()
+    description = next(
+        d for d in sensor_mod.LOCAL_ENERGY_SENSORS if d.key == "pv_energy_local"
+    )
+    sensor = sensor_mod.HyxiLocalEnergySensor(coord, "SN1", description)
+    data = coord.data["SN1"]
+    assert sensor.device_info is coord.device_infos.get("SN1", data, data["metrics"])
+
+
+@pytest.mark.asyncio
+async def test_local_energy_sensor_restores_a_higher_total():
+    coord = _local_energy_coordinator({"home_load": "300"})
+    description = next(
+        d for d in sensor_mod.LOCAL_ENERGY_SENSORS if d.key == "home_energy_local"
+    )
+    sensor = sensor_mod.HyxiLocalEnergySensor(coord, "SN1", description)
+    assert sensor.native_value == 0.0
+
+    last_state = MagicMock()
+    last_state.state = "12.345"
+    sensor.async_get_last_state = unittest.mock.AsyncMock(return_value=last_state)
+    await sensor.async_added_to_hass()
+    assert sensor.native_value == 12.345
+
+
+@pytest.mark.asyncio
+async def test_async_setup_entry_adds_local_energy_sensors_with_push(mock_entry):
+    coord = _local_energy_coordinator(
+        {"ppv": "1200", "grid_import": "0", "grid_export": "--", "totalE": "9"}
+    )
+    hass = MagicMock()
+    hass.data = {DOMAIN: {mock_entry.entry_id: coord}}
+    async_add_entities = MagicMock()
+
+    with unittest.mock.patch(
+        "custom_components.hyxi_cloud.sensor.is_battery_control_enabled",
+        return_value=False,
+    ):
+        await sensor_mod.async_setup_entry(hass, mock_entry, async_add_entities)
+        entities = async_add_entities.call_args[0][0]
+        assert not any(
+            isinstance(e, sensor_mod.HyxiLocalEnergySensor) for e in entities
+        )
+
+        mock_entry.options = {CONF_ENABLE_PUSH: True}
+        await sensor_mod.async_setup_entry(hass, mock_entry, async_add_entities)
+
+    entities = async_add_entities.call_args[0][0]
+    local = [e for e in entities if isinstance(e, sensor_mod.HyxiLocalEnergySensor)]
+    assert {e.entity_description.key for e in local} == {
+        "pv_energy_local",
+        "grid_import_energy_local",
+    }
+
+
+def test_hyxi_sensor_publishes_push_buckets():
+    """With downsampling, a metric sensor writes once per bucket, the mean."""
+    coord = MagicMock()
+    coord.last_update_success = True
+    coord.options = {}
+    coord.poll_unchanged = set()
+    coord.downsampler = PushDownsampler(60)
+    coord.data = {"SN1": {"deviceCode": "1", "metrics": {"acP": "1000"}}}
+    desc = MagicMock()
+    desc.key = "acP"
+    desc.translation_key = "acp"
+    desc.device_class = "power"
+    desc.state_class = "measurement"
+    desc.native_unit_of_measurement = "W"
+    sensor = sensor_mod.HyxiSensor(coord, "SN1", desc)
+
+    clock = [0.0]
+    with (
+        unittest.mock.patch.object(sensor_mod.time, "monotonic", lambda: clock[0]),
+        unittest.mock.patch.object(
+            sensor_mod.CoordinatorEntity, "_handle_coordinator_update"
+        ) as write,
+    ):
+        for now, power in ((0, 1000), (20, 2000), (40, 3000), (60, 9000)):
+            clock[0] = now
+            metrics = {"acP": str(power)}
+            coord.data = {"SN1": {"deviceCode": "1", "metrics": metrics}}
+            coord.downsampler.add("SN1", metrics, now)
+            sensor._handle_coordinator_update()
+        assert write.call_count == 1
+    assert sensor.native_value == 2000
+    # The raw stream stays in coordinator.data for the engine
+    assert coord.data["SN1"]["metrics"]["acP"] == "9000"
@@ -761,6 +761,49 @@ def test_battery_serial_mapping(base_sensor):
     assert sensor.device_info["name"] == "Battery BAT_REAL_123"
 
 
+def test_device_info_shared_across_sensors(base_sensor):
+    """Sensors of one device share the coordinator's cached device info."""
+    coordinator = MagicMock()
+    coordinator.device_infos = sensor_mod.DeviceInfoCache()
+    coordinator.data = {
+        "INV123": {
+            "metrics": {"batSoc": 50, "acP": 10, "batSn": "BAT_REAL_123"},
+            "device_name": "My Inverter",
+        }
+    }
+    sensors = {}
+    for key in ("acP", "gridP", "batSoc", "batP"):
+        description = MagicMock()
+        description.key = key
+        sensors[key] = sensor_mod.HyxiSensor(coordinator, "INV123", description)
+
+    assert sensors["acP"].device_info is sensors["gridP"].device_info
+    assert sensors["batSoc"].device_info is sensors["batP"].device_info
+    assert sensors["acP"].device_info["name"] == "My Inverter"
+    assert sensors["batSoc"].device_info["name"] == "Battery BAT_REAL_123"
+
+
+def test_sensors_keep_their_own_guard_state(base_sensor):
+    """Each sensor of a device guards its own counter."""
+    coordinator = MagicMock()
+    coordinator.data = {"INV123": {"metrics": {"totalE": 10.0, "acE": 5.0}}}
+    sensors = []
+    for key in ("totalE", "acE"):
+        description = MagicMock()
+        description.key = key
+        description.native_unit_of_measurement = "kWh"
+        description.state_class = "total_increasing"
+        sensors.append(sensor_mod.HyxiSensor(coordinator, "INV123", description))
+
+    assert [s._last_valid_value for s in sensors] == [10.0, 5.0]
+
+    # A dip is still held back per sensor
+    assert sensors[0]._process_numeric_value(9.0) == 10.0
+    assert sensors[1]._process_numeric_value(6.0) == 6.0
+    assert sensors[0]._last_logged_glitch == 9.0
+    assert sensors[1]._last_logged_glitch is None
+
+
 def test_hyxi_base_sensor_conversion_errors(base_sensor):
     """Test ValueError and TypeError handling in _process_numeric_value."""
     sensor, _ = base_sensor
@@ -1230,7 +1273,21 @@ async def test_em_sensor_lifecycle():
     assert sensor.native_value == 456.8
     mock_engine.battery_energy_available_wh.assert_called_once()
 
-    # 10. Will remove from HASS
+    # 10. Detail attributes: only the decisions and command budget sensors
+    # have any
+    assert sensor.extra_state_attributes is None
+    sensor._key = "decisions"
+    mock_engine.decision_count = 12
+    mock_engine.scheduler_stats = {"skipped_ticks": 3}
+    assert sensor.native_value == 12
+    assert sensor.extra_state_attributes == {"skipped_ticks": 3}
+    sensor._key = "command_budget"
+    mock_engine.command_budget = 4
+    mock_engine.command_budget_usage = {"refused": 0}
+    assert sensor.native_value == 4
+    assert sensor.extra_state_attributes == {"refused": 0}
+
+    # 11. Will remove from HASS
     await sensor.async_will_remove_from_hass()
     mock_engine.unregister_update_callback.assert_called_once_with(
         sensor._engine_updated
@@ -1332,11 +1389,13 @@ def test_hyxi_subscription_status_sensor():
     coordinator.last_push_received = dt
     coordinator.alarm_last_push_received = dt
 
+    # Push timestamps live on HyxiLastPushSensor, not in these attributes,
+    # so a push doesn't change them.
     attrs = sensor.extra_state_attributes
     assert attrs["data_push"]["status"] == "error"
-    assert attrs["data_push"]["last_push_received"] == dt.isoformat()
+    assert "last_push_received" not in attrs["data_push"]
     assert attrs["alarm_push"]["status"] == "inactive"
-    assert attrs["alarm_push"]["last_push_received"] == dt.isoformat()
+    assert "last_push_received" not in attrs["alarm_push"]
     assert attrs["alarm_push"]["error"] is None
 
     # 6. Alarm push failure surfaces its own error message, independently of
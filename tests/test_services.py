@@ -218,3 +218,34 @@ async def test_subscription_code_persistence(hass, mock_coordinator):
     assert codes == []
     assert mock_coordinator.known_subscription_codes == []
     mock_coordinator.async_update_listeners.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_export_decision_trace(hass, mock_coordinator, tmp_path):
+    """The decision trace of each running engine is written to a file."""
+    from custom_components.hyxi_cloud.decision_trace import DecisionTrace
+
+    hass.data[DOMAIN] = {"entry_123": mock_coordinator}
+    await async_setup_services(hass)
+
+    # No engine running: nothing to export
+    with pytest.raises(HomeAssistantError, match="No HYXI Cloud Energy Manager"):
+        await hass.services.async_call(
+            DOMAIN, "export_decision_trace", {}, blocking=True, return_response=True
+        )
+
+    mock_coordinator.engine = MagicMock()
+    mock_coordinator.engine.decision_trace = DecisionTrace(size=4)
+    with patch.object(
+        hass.config, "path", side_effect=lambda name: str(tmp_path / name)
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            "export_decision_trace",
+            {"format": "csv"},
+            blocking=True,
+            return_response=True,
+        )
+    path = tmp_path / "hyxi_cloud_decision_trace_entry_123.csv"
+    assert response == {"files": [{"path": str(path), "records": 0}]}
+    assert path.read_text(encoding="utf-8").startswith("time,decision,")
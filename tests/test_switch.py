@@ -595,11 +595,11 @@ async def test_async_setup_entry_em_switches(
         await switch_mod.async_setup_entry(hass, mock_entry_fixture, async_add_entities)
 
     async_add_entities.assert_called()
-    # Expect 1 frequency control switch + 5 EM switches (grid_charge, enabled, night_mode, high_load, export_limiting)
+    # Expect 1 frequency control switch + 6 EM switches (grid_charge, enabled, night_mode, high_load, pi_charge_control, export_limiting)
     entities = async_add_entities.call_args[0][0]
 
     em_switches = [e for e in entities if isinstance(e, switch_mod.EMToggleSwitch)]
-    assert len(em_switches) == 5
+    assert len(em_switches) == 6
 
     keys = {e._attr_translation_key for e in em_switches}
     assert keys == {
@@ -607,6 +607,7 @@ async def test_async_setup_entry_em_switches(
         "em_enabled",
         "em_night_mode",
         "em_high_load_battery_assist",
+        "em_pi_charge_control",
         "em_export_limiting",
     }
 
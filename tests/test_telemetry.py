@@ -0,0 +1,83 @@
+"""Tests for the telemetry trace facility."""
+
+import logging
+from unittest.mock import MagicMock, patch
+
+from custom_components.hyxi_cloud import telemetry
+from custom_components.hyxi_cloud.const import mask_sn
+from custom_components.hyxi_cloud.telemetry import (
+    MaskedPayload,
+    TelemetryTrace,
+    mask_payload,
+    telemetry_active,
+    trace_telemetry,
+)
+
+
+def test_mask_payload_masks_mappings_and_records():
+    """Sensitive keys are masked in dicts and in lists of records."""
+    assert mask_payload({"deviceSn": "SN1", "acP": 5}) == {
+        "deviceSn": mask_sn("SN1"),
+        "acP": 5,
+    }
+    assert mask_payload([{"token": "abc"}]) == [{"token": mask_sn("abc")}]
+
+
+def test_masked_payload_is_lazy():
+    """Nothing is masked until the log record is rendered."""
+    with patch.object(telemetry, "mask_payload") as mock_mask:
+        payload = MaskedPayload({"sn": "SN1"})
+        mock_mask.assert_not_called()
+        str(payload)
+        mock_mask.assert_called_once()
+
+
+def test_trace_rate_limited_per_source_and_device():
+    """Only one entry per source/device is written within min_interval."""
+    trace = TelemetryTrace(enabled=True, min_interval=60)
+    with patch.object(telemetry.time, "monotonic", return_value=100.0):
+        assert trace.record("push", "SN1", {"acP": 1})
+        assert not trace.record("push", "SN1", {"acP": 2})
+        assert trace.record("poll", "SN1", {"acP": 3})
+        assert trace.record("push", "SN2", {"acP": 4})
+    with patch.object(telemetry.time, "monotonic", return_value=161.0):
+        assert trace.record("push", "SN1", {"acP": 5})
+
+    diag = trace.as_diagnostics()
+    assert diag["written"] == 4
+    assert diag["suppressed"] == 1
+    assert diag["entries"][0]["device"] == mask_sn("SN1")
+
+
+def test_trace_sampling_and_ring_buffer_bound():
+    """Every Nth payload is kept and the buffer never exceeds its size."""
+    trace = TelemetryTrace(enabled=True, size=3, min_interval=0, sample_every=2)
+    for i in range(10):
+        trace.record("push", "SN1", {"i": i})
+
+    entries = trace.as_diagnostics()["entries"]
+    assert [e["data"]["i"] for e in entries] == [5, 7, 9]
+
+
+def test_trace_telemetry_routes_to_buffer_when_enabled():
+    """An enabled buffer takes the payload instead of the debug log."""
+    trace = TelemetryTrace(enabled=True)
+    logger = MagicMock()
+    trace_telemetry(trace, logger, "push", "msg %s %s", "SN1", {"acP": 1})
+    logger.debug.assert_not_called()
+    assert trace.written == 1
+
+
+def test_trace_telemetry_logs_at_debug_only():
+    """Without a buffer, payloads are logged only when DEBUG is enabled."""
+    logger = MagicMock()
+    logger.isEnabledFor.return_value = False
+    trace_telemetry(None, logger, "push", "msg %s %s", "SN1", {"acP": 1})
+    logger.debug.assert_not_called()
+    assert not telemetry_active(TelemetryTrace(), logger)
+
+    logger.isEnabledFor.return_value = True
+    trace_telemetry(TelemetryTrace(), logger, "push", "msg %s %s", "SN1", {})
+    logger.isEnabledFor.assert_called_with(logging.DEBUG)
+    logger.debug.assert_called_once()
+    assert logger.debug.call_args[0][1] == mask_sn("SN1")
@@ -0,0 +1,120 @@
+"""Tests for sensor state write throttling."""
+
+import pytest
+
+from custom_components.hyxi_cloud.const import (
+    CONF_THROTTLE_MAX_AGE,
+    CONF_THROTTLE_MIN_INTERVAL,
+    CONF_THROTTLE_POWER_DEADBAND,
+    CONF_THROTTLE_RELATIVE_DEADBAND,
+    CONF_WRITE_THROTTLE,
+    DEFAULT_THROTTLE_VOLTAGE_DEADBAND,
+)
+from custom_components.hyxi_cloud.throttle import (
+    ThrottlePolicy,
+    WriteThrottle,
+    WriteThrottleStats,
+    throttle_policy,
+)
+
+
+def _throttle(abs_deadband=10.0, rel=0.0, min_interval=0.0, max_age=300.0):
+    policy = ThrottlePolicy("power", abs_deadband, rel, min_interval, max_age)
+    return WriteThrottle(policy, WriteThrottleStats())
+
+
+def test_policy_requires_the_option():
+    """Without write_throttle enabled nothing is throttled."""
+    assert throttle_policy({}, "power") is None
+    assert throttle_policy(None, "power") is None
+    assert throttle_policy({CONF_WRITE_THROTTLE: False}, "power") is None
+
+
+def test_policy_only_for_throttled_device_classes():
+    """Energy and unset device classes are never throttled."""
+    options = {CONF_WRITE_THROTTLE: True}
+    assert throttle_policy(options, "energy") is None
+    assert throttle_policy(options, None) is None
+    voltage = throttle_policy(options, "voltage")
+    assert voltage.abs_deadband == DEFAULT_THROTTLE_VOLTAGE_DEADBAND
+
+
+def test_policy_reads_configured_values():
+    """Options override the defaults; the relative band is a percentage."""
+    policy = throttle_policy(
+        {
+            CONF_WRITE_THROTTLE: True,
+            CONF_THROTTLE_POWER_DEADBAND: 25,
+            CONF_THROTTLE_RELATIVE_DEADBAND: 5,
+            CONF_THROTTLE_MIN_INTERVAL: 2,
+            CONF_THROTTLE_MAX_AGE: 60,
+        },
+        "power",
+    )
+    assert policy == ThrottlePolicy("power", 25.0, 0.05, 2.0, 60.0)
+
+
+def test_first_value_is_always_written():
+    assert _throttle().should_write(100.0, now=0) is True
+
+
+def test_absolute_deadband():
+    """Moves within the deadband are suppressed, larger moves are written."""
+    throttle = _throttle(abs_deadband=10.0)
+    throttle.should_write(100.0, now=0)
+    assert throttle.should_write(105.0, now=1) is False
+    assert throttle.should_write(109.0, now=2) is False
+    assert throttle.should_write(111.0, now=3) is True
+    # The band is measured from the last *written* value
+    assert throttle.should_write(118.0, now=4) is False
+
+
+def test_relative_deadband_wins_for_large_values():
+    throttle = _throttle(abs_deadband=10.0, rel=0.02)
+    throttle.should_write(5000.0, now=0)
+    assert throttle.should_write(5080.0, now=1) is False
+    assert throttle.should_write(5101.0, now=2) is True
+
+
+def test_min_interval_holds_back_large_moves():
+    throttle = _throttle(min_interval=5.0)
+    throttle.should_write(100.0, now=0)
+    assert throttle.should_write(500.0, now=4) is False
+    assert throttle.should_write(500.0, now=5) is True
+
+
+def test_max_age_forces_a_write():
+    throttle = _throttle(max_age=60.0)
+    throttle.should_write(100.0, now=0)
+    assert throttle.should_write(100.0, now=59) is False
+    assert throttle.should_write(100.0, now=60) is True
+
+
+def test_none_and_availability_transitions_are_written():
+    throttle = _throttle(min_interval=30.0)
+    throttle.should_write(100.0, now=0)
+    assert throttle.should_write(None, now=1) is True
+    assert throttle.should_write(100.0, now=2) is True
+    assert throttle.should_write(100.0, available=False, now=3) is True
+    assert throttle.should_write(100.0, available=False, now=4) is False
+
+
+def test_non_numeric_values_write_on_change():
+    throttle = _throttle()
+    throttle.should_write("on", now=0)
+    assert throttle.should_write("on", now=1) is False
+    assert throttle.should_write("off", now=2) is True
+
+
+def test_stats_count_decisions_per_device_class():
+    throttle = _throttle()
+    for now, value in enumerate((100.0, 101.0, 102.0, 150.0)):
+        throttle.should_write(value, now=now)
+    diagnostics = throttle.stats.as_diagnostics()
+    assert diagnostics == {
+        "power": {"written": 2, "suppressed": 2, "suppressed_ratio": pytest.approx(0.5)}
+    }
+
+
+def test_stats_empty_diagnostics():
+    assert WriteThrottleStats().as_diagnostics() == {}